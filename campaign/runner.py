@@ -0,0 +1,183 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from constants.chains import Chain
+from integrations.cached_balances_integration import CachedBalancesIntegration
+from integrations.integration import Integration
+from integrations.l2_delegation_integration import L2DelegationIntegration
+
+# Integrations running at the same time, on a shared thread pool
+RUNNER_MAX_WORKERS = int(os.getenv("RUNNER_MAX_WORKERS", "16"))
+# Worker processes running the integrations instead of the threads, 0 keeps them in threads
+RUNNER_PROCESSES = int(os.getenv("RUNNER_PROCESSES", "0"))
+# Integrations hitting the same chain at the same time, override per chain below
+RUNNER_MAX_INTEGRATIONS_PER_CHAIN = int(os.getenv("RUNNER_MAX_INTEGRATIONS_PER_CHAIN", "4"))
+RUNNER_MAX_INTEGRATIONS_BY_CHAIN: Dict[Chain, int] = {}
+
+BlockBalances = Dict[int, Dict[str, float]]
+
+
+@dataclass
+class IntegrationRun:
+    integration_id: str
+    chain: str
+    blocks: List[int]
+    seconds: float
+    balances: Optional[BlockBalances] = None
+    error: Optional[str] = None
+
+
+def get_integration_block_balances(
+    integration: Integration, cached_data: BlockBalances, blocks: List[int]
+) -> BlockBalances:
+    """Call the balances entry point matching the integration type."""
+    if isinstance(integration, L2DelegationIntegration):
+        return integration.get_l2_block_balances(cached_data, blocks)
+    if isinstance(integration, CachedBalancesIntegration):
+        return integration.get_block_balances(cached_data, blocks)  # type: ignore[arg-type]
+
+    # legacy integrations only expose participants and per user balances
+    block_balances: BlockBalances = {}
+    for block in blocks:
+        participants = integration.get_participants([block])
+        block_balances[block] = integration.get_balances(list(participants), block)
+    return block_balances
+
+
+def run_campaign_integration(name: str, cached_data: BlockBalances, blocks: List[int]) -> BlockBalances:
+    """Process pool entry point, integrations hold RPC clients so the worker uses its own
+    instance from the campaign."""
+    from campaign.campaign import get_integrations  # pylint: disable=import-outside-toplevel
+
+    integration = next(i for i in get_integrations() if i.integration_id.name == name)
+    return get_integration_block_balances(integration, cached_data, blocks)
+
+
+def run_integrations(
+    integrations: List[Integration],
+    blocks_by_chain: Dict[Chain, List[int]],
+    cached_data_by_integration: Optional[Dict[str, BlockBalances]] = None,
+    output_dir: Optional[str] = None,
+    processes: int = RUNNER_PROCESSES,
+) -> Dict[str, IntegrationRun]:
+    """Run every integration with a target block on its chain, concurrently.
+
+    Integrations run on a thread pool, no more than RUNNER_MAX_INTEGRATIONS_PER_CHAIN of
+    them query the same chain at once. Their time is measured once they hold a chain slot.
+    With `processes`, the integrations run in a pool of that many worker processes instead
+    (e.g. for CPU bound attribution), their thread only holds the chain slot. They must then
+    come from campaign.get_integrations(), each worker builds its own copy.
+    A failing integration is reported in its result and does not stop the others.
+    When `output_dir` is set, each result is written to <output_dir>/<integration id>.json,
+    so integration ids must be unique.
+    """
+    names = [integration.integration_id.name for integration in integrations]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    assert not duplicates, f"Integration ids run more than once: {duplicates}"
+
+    if processes:
+        from campaign.campaign import get_integrations  # pylint: disable=import-outside-toplevel
+
+        campaign_names = {integration.integration_id.name for integration in get_integrations()}
+        missing = sorted(name for name in names if name not in campaign_names)
+        assert not missing, f"Integrations missing from the campaign can't run in processes: {missing}"
+
+    cached_data_by_integration = cached_data_by_integration or {}
+    chain_slots = {
+        chain: threading.BoundedSemaphore(
+            RUNNER_MAX_INTEGRATIONS_BY_CHAIN.get(chain, RUNNER_MAX_INTEGRATIONS_PER_CHAIN)
+        )
+        for chain in {integration.chain for integration in integrations}
+    }
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def run(integration: Integration) -> IntegrationRun:
+        name = integration.integration_id.name
+        blocks = blocks_by_chain[integration.chain]
+        cached_data = cached_data_by_integration.get(name, {})
+        with chain_slots[integration.chain]:
+            start = time.time()
+            logging.info(f"[{name}] Running on {integration.chain.value} for {len(blocks)} blocks")
+            try:
+                if process_pool is not None:
+                    balances = process_pool.submit(run_campaign_integration, name, cached_data, blocks).result()
+                else:
+                    balances = get_integration_block_balances(integration, cached_data, blocks)
+                result = IntegrationRun(name, integration.chain.value, blocks, time.time() - start, balances)
+            except Exception as e:
+                msg = f"Error running integration {name}: {e}, {traceback.format_exc()}"
+                logging.error(msg)
+                result = IntegrationRun(name, integration.chain.value, blocks, time.time() - start, error=str(e))
+        logging.info(f"[{name}] Done in {result.seconds:.1f}s")
+
+        if output_dir:
+            with open(os.path.join(output_dir, f"{name}.json"), "w") as f:
+                json.dump(asdict(result), f)
+        return result
+
+    runs: Dict[str, IntegrationRun] = {}
+    # workers are spawned, forking would copy the locks and sessions held by other threads
+    process_pool = (
+        ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        if processes
+        else None
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=RUNNER_MAX_WORKERS) as executor:
+            futures: Dict[str, Future] = {}
+            for integration in integrations:
+                if integration.chain not in blocks_by_chain:
+                    logging.info(f"[{integration.integration_id.name}] No target blocks on {integration.chain.value}, skipping")
+                    continue
+                futures[integration.integration_id.name] = executor.submit(run, integration)
+            for name, future in futures.items():
+                runs[name] = future.result()
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+    return runs
+
+
+if __name__ == "__main__":
+    from campaign.campaign import get_integrations  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Run all campaign integrations concurrently")
+    parser.add_argument(
+        "--block",
+        action="append",
+        default=[],
+        metavar="CHAIN=BLOCK[,BLOCK...]",
+        help="Target blocks for a chain, e.g. Ethereum=22000000. Integrations on other chains are skipped.",
+    )
+    parser.add_argument("--output-dir", default="output", help="Directory for the per integration results")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=RUNNER_PROCESSES,
+        metavar="N",
+        help="Run the integrations in N worker processes instead of threads",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    blocks_by_chain: Dict[Chain, List[int]] = {}
+    for entry in args.block:
+        chain_name, blocks = entry.split("=")
+        blocks_by_chain[Chain(chain_name)] = [int(block) for block in blocks.split(",")]
+
+    runs = run_integrations(
+        get_integrations(), blocks_by_chain, output_dir=args.output_dir, processes=args.processes
+    )
+    for name, run in sorted(runs.items(), key=lambda item: -item[1].seconds):
+        status = "error" if run.error else f"{sum(len(b) for b in (run.balances or {}).values())} balances"
+        print(f"{name:<40} {run.seconds:>8.1f}s  {status}")
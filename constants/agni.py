@@ -13,10 +13,11 @@ from eth_account.messages import encode_defunct
 from eth_utils import keccak, to_bytes, to_hex
 
 
-import json
 from utils.web3_utils import (
     w3_mantle,
+    lazy_contract,
 )
+from utils.abi import load_abi
 
 
 MAX_TICK_RANGE=887272
@@ -30,22 +31,16 @@ agni_position_manager = Web3.to_checksum_address("0x218bf598D1453383e2F4AA7b14fF
 usde_address = Web3.to_checksum_address('0x5d3a1Ff2b6BAb83b63cd9AD0787074081a52ef34')
 
 
+pool_abi = load_abi("agni_pool.json")
 
-
-with open("abi/agni_pool.json") as j:
-    pool_abi = json.load(j)
-
-with open("abi/agni_position_manager.json") as j:
-    position_abi = json.load(j)
-
-
-usde_cmeth_025_contract = w3_mantle.eth.contract(address=usde_cmeth_025, abi=pool_abi)
-usde_usdt_001_contract = w3_mantle.eth.contract(address=usde_usdt_001, abi=pool_abi)
-susde_usde_005_contract = w3_mantle.eth.contract(address=susde_usde_005, abi=pool_abi)
-usdc_usde_001_contract = w3_mantle.eth.contract(address=usdc_usde_001, abi=pool_abi)
-position_manager_contract = w3_mantle.eth.contract(address=agni_position_manager, abi=position_abi)
+position_abi = load_abi("agni_position_manager.json")
 
 
+usde_cmeth_025_contract = lazy_contract(w3_mantle, address=usde_cmeth_025, abi=pool_abi)
+usde_usdt_001_contract = lazy_contract(w3_mantle, address=usde_usdt_001, abi=pool_abi)
+susde_usde_005_contract = lazy_contract(w3_mantle, address=susde_usde_005, abi=pool_abi)
+usdc_usde_001_contract = lazy_contract(w3_mantle, address=usdc_usde_001, abi=pool_abi)
+position_manager_contract = lazy_contract(w3_mantle, address=agni_position_manager, abi=position_abi)
 
 
 def compute_pool_address(token_a, token_b, fee):
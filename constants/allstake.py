@@ -1,13 +1,12 @@
-import json
 from typing import TypedDict, Dict
 from utils.web3_utils import W3_BY_CHAIN
 from web3.contract.contract import Contract
 from web3 import Web3
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
+from utils.abi import load_abi
 
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
+erc20_abi = load_abi("ERC20_abi.json")
 
 
 class StrategyConfig(TypedDict):
@@ -1,14 +1,14 @@
-import json
 from web3 import Web3
-from utils.web3_utils import w3_berachain
+from utils.web3_utils import w3_berachain, lazy_contract
+from utils.abi import load_abi
 
 PAGINATION_SIZE = 1000
 BEND_ADDRESS = Web3.to_checksum_address("0x24147243f9c08d835C218Cda1e135f8dFD0517D0")
 
-with open("abi/morpho.json") as f:
-    BEND_ABI = json.load(f)
+BEND_ABI = load_abi("morpho.json")
 
-BEND_CONTRACT = w3_berachain.eth.contract(
+BEND_CONTRACT = lazy_contract(
+    w3_berachain,
     address=BEND_ADDRESS,
     abi=BEND_ABI,
 )
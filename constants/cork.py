@@ -1,5 +1,3 @@
-import json
-import pathlib
 from enum import Enum
 from collections import defaultdict
 from web3 import Web3
@@ -7,7 +5,9 @@ from constants.chains import Chain
 from utils.web3_utils import (
     w3,
     w3_sepolia,
+    lazy_contract,
 )
+from utils.abi import load_abi
 
 class TokenType(Enum):
     RA = 1
@@ -17,13 +17,9 @@ PAGINATION_SIZE = 5000
 
 ZERO_ADDRESS = Web3.to_checksum_address("0x0000000000000000000000000000000000000000")
 
-ABI_PATH = pathlib.Path(__file__).parent.parent / "abi"
-with open(ABI_PATH / "ERC20_abi.json") as f:
-    ERC20_ABI = json.load(f)
-with open(ABI_PATH / "cork" / "ModuleCore.json") as f:
-    MODULE_CORE_ABI = json.load(f)
-with open(ABI_PATH / "cork" / "ICorkHook.json") as f:
-    ICORK_HOOK_ABI = json.load(f)
+ERC20_ABI = load_abi("ERC20_abi.json")
+MODULE_CORE_ABI = load_abi("cork/ModuleCore.json")
+ICORK_HOOK_ABI = load_abi("cork/ICorkHook.json")
 
 PSM_ADDRESS_BY_CHAIN = {
     Chain.ETHEREUM: Web3.to_checksum_address("0xCCd90F6435dd78C4ECCED1FA4db0D7242548a2a9"),
@@ -38,22 +34,26 @@ AMM_ADDRESS_BY_CHAIN = {
 }
 
 AMM_CONTRACT_BY_CHAIN = {
-    Chain.ETHEREUM: w3.eth.contract(
+    Chain.ETHEREUM: lazy_contract(
+        w3,
         address=AMM_ADDRESS_BY_CHAIN[Chain.ETHEREUM],
         abi=ICORK_HOOK_ABI,
     ),
-    Chain.SEPOLIA: w3_sepolia.eth.contract(
+    Chain.SEPOLIA: lazy_contract(
+        w3_sepolia,
         address=AMM_ADDRESS_BY_CHAIN[Chain.SEPOLIA],
         abi=ICORK_HOOK_ABI,
     ),
 }
 
 PSM_CONTRACT_BY_CHAIN = {
-    Chain.ETHEREUM: w3.eth.contract(
+    Chain.ETHEREUM: lazy_contract(
+        w3,
         address=PSM_ADDRESS_BY_CHAIN[Chain.ETHEREUM],
         abi=MODULE_CORE_ABI,
     ),
-    Chain.SEPOLIA: w3_sepolia.eth.contract(
+    Chain.SEPOLIA: lazy_contract(
+        w3_sepolia,
         address=PSM_ADDRESS_BY_CHAIN[Chain.SEPOLIA],
         abi=MODULE_CORE_ABI,
     ),
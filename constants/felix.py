@@ -1,15 +1,15 @@
-import json
-from utils.web3_utils import W3_BY_CHAIN
+from utils.web3_utils import W3_BY_CHAIN, lazy_contract
 from constants.chains import Chain
 from web3 import Web3
+from utils.abi import load_abi
 
 # Load the ERC4626 ABI from the correct path
-with open("abi/felix_usde.json") as f:
-    felix_usde_abi = json.load(f)
+felix_usde_abi = load_abi("felix_usde.json")
 
 # Set the Felix USDe Vault address and contract
 FELIX_USDE_VAULT_ADDRESS = Web3.to_checksum_address("0x835FEBF893c6DdDee5CF762B0f8e31C5B06938ab")
-FELIX_USDE_VAULT_CONTRACT = W3_BY_CHAIN[Chain.HYPEREVM]["w3"].eth.contract(
+FELIX_USDE_VAULT_CONTRACT = lazy_contract(
+    W3_BY_CHAIN[Chain.HYPEREVM]["w3"],
     address=FELIX_USDE_VAULT_ADDRESS,
     abi=felix_usde_abi,
 )
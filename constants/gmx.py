@@ -39,5 +39,8 @@ GMX_MAX_PNL_FACTOR_FOR_TRADERS_KEY = (
     "0xab15365d3aa743e766355e2557c230d8f943e195dc84d9b2b05928a07b635ee1"
 )
 
-GMX_PRICES_ENDPOINT = "https://arbitrum-v2-1-api.gmxinfra.io/prices/tickers"
+GMX_API_URL = "https://arbitrum-v2-1-api.gmxinfra.io"
+GMX_PRICES_ENDPOINT = f"{GMX_API_URL}/prices/tickers"
+GMX_CANDLES_ENDPOINT = f"{GMX_API_URL}/prices/candles"
+GMX_TOKENS_ENDPOINT = f"{GMX_API_URL}/tokens"
 GMX_SUBSQUID_ENDPOINT = "https://gmx.squids.live/gmx-synthetics-arbitrum/graphql"
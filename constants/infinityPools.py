@@ -3,10 +3,11 @@
 from web3 import Web3
 
 
-import json
 from utils.web3_utils import (
     w3_base,
+    lazy_contract,
 )
+from utils.abi import load_abi
 
 
 START_BLOCK = 24888600
@@ -28,22 +29,17 @@ infinityPools_periphery = Web3.to_checksum_address(
     "0xF8FAD01B2902fF57460552C920233682c7c011a7")
 
 
-with open("abi/infinityPool.json") as j:
-    infinityPool_abi = json.load(j)
+infinityPools_periphery_abi = load_abi("infinityPools_periphery.json")
 
-with open("abi/infinityPools_periphery.json") as j:
-    infinityPools_periphery_abi = json.load(j)
+infinityPools_factory_abi = load_abi("infinityPools_factory.json")
 
-with open("abi/infinityPools_factory.json") as j:
-    infinityPools_factory_abi = json.load(j)
 
-
-infinityPools_factory_contract = w3_base.eth.contract(
+infinityPools_factory_contract = lazy_contract(
+    w3_base,
     address=infinityPools_factory, abi=infinityPools_factory_abi)
-infinityPools_periphery_contract = w3_base.eth.contract(
+infinityPools_periphery_contract = lazy_contract(
+    w3_base,
     address=infinityPools_periphery, abi=infinityPools_periphery_abi)
-infinityPool_contract = w3_base.eth.contract(
-    address=usdc_sUSDe, abi=infinityPool_abi)
 
 
 def get_pool_address(token_a, token_b, splits):
@@ -1,13 +1,13 @@
-import json
 from web3 import Web3
-from utils.web3_utils import w3
+from utils.web3_utils import w3, lazy_contract
+from utils.abi import load_abi
 
 PAGINATION_SIZE = 2000
 MORPHO_ADDRESS = Web3.to_checksum_address("0xBBBBBbbBBb9cC5e90e3b3Af64bdAF62C37EEFFCb")
-with open("abi/morpho.json") as f:
-    MORPHO_ABI = json.load(f)
+MORPHO_ABI = load_abi("morpho.json")
 
-MORPHO_CONTRACT = w3.eth.contract(
+MORPHO_CONTRACT = lazy_contract(
+    w3,
     address=MORPHO_ADDRESS,
     abi=MORPHO_ABI,
 )
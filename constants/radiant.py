@@ -1,15 +1,13 @@
-import json
 from typing import TypedDict, Dict
-from utils.web3_utils import W3_BY_CHAIN
+from utils.web3_utils import W3_BY_CHAIN, lazy_contract
 from web3.contract.contract import Contract
 from web3 import Web3
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
+from utils.abi import load_abi
 
-with open("abi/radiant_r_token.json") as f:
-    r_token_abi = json.load(f)
-with open("abi/radiant_lending_pool.json") as f:
-    lending_pool_abi = json.load(f)
+r_token_abi = load_abi("radiant_r_token.json")
+lending_pool_abi = load_abi("radiant_lending_pool.json")
 
 
 class RadiantLendingDetails(TypedDict):
@@ -28,13 +26,15 @@ RADIANT_CONTRACTS_AND_START_BY_TOKEN: Dict[IntegrationID, RadiantLendingDetails]
         collateral_address=Web3.to_checksum_address(
             "0x5d3a1Ff2b6BAb83b63cd9AD0787074081a52ef34"
         ),
-        r_token_contract=W3_BY_CHAIN[Chain.ARBITRUM]["w3"].eth.contract(
+        r_token_contract=lazy_contract(
+            W3_BY_CHAIN[Chain.ARBITRUM]["w3"],
             address=Web3.to_checksum_address(
                 "0x19f0bE6a603967c72bE32a30915a38d52cA31Ae2"
             ),
             abi=r_token_abi,
         ),
-        lending_pool=W3_BY_CHAIN[Chain.ARBITRUM]["w3"].eth.contract(
+        lending_pool=lazy_contract(
+            W3_BY_CHAIN[Chain.ARBITRUM]["w3"],
             address=Web3.to_checksum_address(
                 "0xF4B1486DD74D07706052A33d31d7c0AAFD0659E1"
             ),
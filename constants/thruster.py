@@ -1,7 +1,7 @@
-import json
 from web3 import Web3
 from web3.contract import Contract
-from utils.web3_utils import w3_blast
+from utils.web3_utils import w3_blast, lazy_contract
+from utils.abi import load_abi
 
 MAX_TICK_RANGE = 7000
 
@@ -28,13 +28,15 @@ PARTICLE_LEVERAGED_POOL_ADDRESS = Web3.to_checksum_address(
 JUICE_TOKEN_ID = 111969
 
 
-THRUSTER_NFP_ABI = json.load(open("abi/thruster_nfp.json"))
-THRUSTER_POOL_ABI = json.load(open("abi/thruster_pool.json"))
+THRUSTER_NFP_ABI = load_abi("thruster_nfp.json")
+THRUSTER_POOL_ABI = load_abi("thruster_pool.json")
 
-thruster_nfp_contract: Contract = w3_blast.eth.contract(
+thruster_nfp_contract: Contract = lazy_contract(
+    w3_blast,
     address=THRUSTER_NFP_ADDRESS, abi=THRUSTER_NFP_ABI
 )
 
-thruster_usde_pool_contract: Contract = w3_blast.eth.contract(
+thruster_usde_pool_contract: Contract = lazy_contract(
+    w3_blast,
     address=THRUSTER_USDE_POOL_ADDRESS, abi=THRUSTER_POOL_ABI
 )
@@ -1,9 +1,9 @@
-import json
 from typing import cast
 from web3 import Web3
 from web3.contract import Contract
 from web3.types import HexStr
-from utils.web3_utils import w3
+from utils.web3_utils import w3, lazy_contract
+from utils.abi import load_abi
 
 UNISWAP_V4_USDE_POOL = Web3.to_bytes(
     hexstr=cast(HexStr, "0x63bb22f47c7ede6578a25c873e77eb782ec8e4c19778e36ce64d37877b5bd1e7")
@@ -19,16 +19,19 @@ UNISWAP_V4_NFPM_ADDRESS = Web3.to_checksum_address(
     "0xbD216513d74C8cf14cf4747E6AaA6420FF64ee9e"
 )
 
-UNISWAP_V4_SV_ABI = json.load(open("abi/uniswap_v4_sv.json"))
-UNISWAP_V4_PM_ABI = json.load(open("abi/uniswap_v4_pm.json"))
-UNISWAP_V4_NFPM_ABI = json.load(open("abi/uniswap_v4_nfpm.json"))
+UNISWAP_V4_SV_ABI = load_abi("uniswap_v4_sv.json")
+UNISWAP_V4_PM_ABI = load_abi("uniswap_v4_pm.json")
+UNISWAP_V4_NFPM_ABI = load_abi("uniswap_v4_nfpm.json")
 
-uniswap_v4_sv_contract: Contract = w3.eth.contract(
+uniswap_v4_sv_contract: Contract = lazy_contract(
+    w3,
     address=UNISWAP_V4_STATE_VIEW, abi=UNISWAP_V4_SV_ABI
 )
-uniswap_v4_pm_contract: Contract = w3.eth.contract(
+uniswap_v4_pm_contract: Contract = lazy_contract(
+    w3,
     address=UNISWAP_V4_POOL_MANAGER, abi=UNISWAP_V4_PM_ABI
 )
-uniswap_v4_nfpm_contract: Contract = w3.eth.contract(
+uniswap_v4_nfpm_contract: Contract = lazy_contract(
+    w3,
     address=UNISWAP_V4_NFPM_ADDRESS, abi=UNISWAP_V4_NFPM_ABI
 )
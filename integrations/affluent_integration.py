@@ -5,7 +5,7 @@ from constants.affluent import AFFLUENT_ENDPOINT, AFFLUENT_USDE_START_BLOCK, AFF
 
 from integrations.l2_delegation_integration import L2DelegationIntegration
 from integrations.integration_ids import IntegrationID
-from utils.web3_utils import get_block_date
+from utils.web3_utils import get_block_date, get_block_timestamps
 from utils.request_utils import requests_retry_session
 from utils.slack import slack_message
 from constants.summary_columns import SummaryColumn
@@ -38,6 +38,8 @@ class AffluentIntegration(L2DelegationIntegration):
         try:
             block_balances: Dict[int, Dict[str, float]] = {}
 
+            # resolve every block date with one batched header fetch
+            get_block_timestamps(self.chain, blocks)
             for target_block in blocks:
                 block_balances[target_block] = self.get_participants_data(target_block)
 
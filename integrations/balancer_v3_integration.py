@@ -1,10 +1,11 @@
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set
 from integrations.integration_ids import IntegrationID
 from integrations.integration import Integration
 from utils.balancer import (
     get_vault_v3_pool_token_balance,
     get_potential_token_holders,
     get_user_balance,
+    get_users_balances,
     get_token_supply,
 )
 from constants.balancer_v3 import INTEGRATION_CONFIGS
@@ -69,6 +70,36 @@ class BalancerV3Integration(Integration):
             / pow(10, self.incentivized_token_decimals)
         )
 
+    def get_balances(self, users: List[str], block: int | str = "latest") -> Dict[str, float]:
+        """
+        Same as get_balance for many users, pool wide values are read once and BPT balances
+        through multicall.
+        """
+        user_balances = get_users_balances(self.chain, users, self.pool_address, block)
+        for staking_address in (self.gauge_address, self.aura_address):
+            if staking_address is not None:
+                user_balances = [
+                    balance + staked
+                    for balance, staked in zip(
+                        user_balances,
+                        get_users_balances(self.chain, users, staking_address, block),
+                    )
+                ]
+
+        bpt_supply = get_token_supply(self.chain, self.pool_address, block)
+
+        incentivized_token_balance = get_vault_v3_pool_token_balance(
+            self.chain, self.pool_address, self.incentivized_token, block
+        )
+
+        return {
+            user: user_balance
+            / bpt_supply
+            * incentivized_token_balance
+            / pow(10, self.incentivized_token_decimals)
+            for user, user_balance in zip(users, user_balances)
+        }
+
     def get_participants(
         self,
         blocks: Optional[List[int]],
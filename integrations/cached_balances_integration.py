@@ -1,9 +1,39 @@
-from typing import Callable, Dict, List, Optional, Set
+import json
+import logging
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TypeVar
 from eth_typing import ChecksumAddress
+from web3.types import EventData
 from constants.summary_columns import SummaryColumn
 from constants.chains import Chain
 from integrations.integration import Integration
 from integrations.integration_ids import IntegrationID as IntID
+from utils.log_cache import LOG_CACHE_CONFIRMATIONS, get_head_block, get_log_cache
+from utils.web3_utils import W3_BY_CHAIN, fetch_events_logs_in_range
+
+Balances = Dict[ChecksumAddress, float]
+# Raw integer amounts in base units (e.g. wei) per address
+WeiBalances = Dict[ChecksumAddress, int]
+State = TypeVar("State")
+
+
+def to_wei_balances(balances: Balances, decimals: int = 18, scale: float = 1) -> WeiBalances:
+    """Base unit amounts of float balances (divided by `scale` first, which must not be 0),
+    e.g. of a cached snapshot."""
+    return {
+        address: int(Decimal(repr(balance)) / Decimal(repr(scale)) * 10**decimals)
+        for address, balance in balances.items()
+    }
+
+
+def from_wei_balances(ledger: WeiBalances, decimals: int = 18, scale: float = 1) -> Balances:
+    """Float balances of a ledger, times `scale`. Negative amounts, which only mint sources
+    such as the zero address can reach, are reported as 0."""
+    return {
+        address: max(amount, 0) * scale / 10**decimals
+        for address, amount in ledger.items()
+    }
 
 
 class CachedBalancesIntegration(Integration):
@@ -37,3 +67,149 @@ class CachedBalancesIntegration(Integration):
         self, cached_data: Dict[int, Dict[ChecksumAddress, float]], blocks: List[int]
     ) -> Dict[int, Dict[ChecksumAddress, float]]:
         raise NotImplementedError
+
+    def replay_block_balances(
+        self,
+        cached_data: Dict[int, Balances],
+        blocks: List[int],
+        advance: Callable[[State, int, int], None],
+        load_cached: Optional[Callable[[Balances, int], State]] = None,
+        snapshot: Optional[Callable[[State, int], Balances]] = None,
+    ) -> Dict[int, Balances]:
+        """Walk the target blocks in order, keeping a single running balance state.
+
+        The state starts from the closest cached block before the first target (or empty
+        at self.start_block) and is only moved forward: for each target block,
+        `advance(state, from_block, to_block)` must update it in place with everything that
+        happened in [from_block, to_block]. A cached block that falls between two targets
+        replaces the running state, so cached data stays authoritative.
+
+        Args:
+            cached_data: Dictionary mapping block numbers to user balances at that block.
+            blocks: List of block numbers to get balances for.
+            advance: Folds all changes in an inclusive block range into the state.
+            load_cached: Converts a cached snapshot into a fresh state. Defaults to a shallow copy.
+            snapshot: Builds the emitted balances from the state. Defaults to a shallow copy.
+
+        Returns:
+            Dictionary mapping block numbers to user balances at that block.
+        """
+        new_block_data: Dict[int, Balances] = {}
+        cached_blocks = sorted(cached_data)
+
+        state: Any = {}
+        state_block: Optional[int] = None
+        for block in sorted(set(blocks)):
+            # closest cached block strictly before the target
+            idx = bisect_left(cached_blocks, block)
+            if idx > 0 and (state_block is None or cached_blocks[idx - 1] > state_block):
+                state_block = cached_blocks[idx - 1]
+                cached = cached_data[state_block]
+                state = load_cached(cached, state_block) if load_cached else dict(cached)
+
+            from_block = self.start_block if state_block is None else state_block + 1
+            if from_block <= block:
+                advance(state, from_block, block)
+            state_block = block
+
+            new_block_data[block] = snapshot(state, block) if snapshot else dict(state)
+        return new_block_data
+
+    def get_wei_ledger_key(self) -> str:
+        return f"wei_ledger|{self.integration_id.name}"
+
+    def load_wei_ledger(
+        self, balances: Balances, block: int, decimals: int = 18, scale: float = 1
+    ) -> WeiBalances:
+        """Ledger behind the balances cached at `block`.
+
+        The exact ledger persisted by save_wei_ledger is used when it was emitted at that
+        block, otherwise it is rebuilt from the cached floats.
+        """
+        cache = get_log_cache()
+        stored = cache.get_state(self.get_wei_ledger_key()) if cache is not None else None
+        if stored is not None:
+            indexed = json.loads(stored)
+            if indexed["block"] == block and indexed["balances"].keys() == balances.keys():
+                return indexed["balances"]
+        if scale == 0:
+            # e.g. an empty vault, no account holds any share at that block
+            logging.warning(
+                f"[{self.integration_id.name}] Zero scale at cached block {block}, "
+                "starting from an empty ledger"
+            )
+            return {}
+        return to_wei_balances(balances, decimals, scale)
+
+    def save_wei_ledger(self, ledger: WeiBalances, block: int):
+        """Persist the ledger emitted at `block`, once the block is finalized."""
+        cache = get_log_cache()
+        if cache is None:
+            return
+        head = get_head_block(W3_BY_CHAIN[self.chain]["w3"])
+        if block > head - LOG_CACHE_CONFIRMATIONS:
+            return
+        cache.store_state(
+            self.get_wei_ledger_key(), json.dumps({"block": block, "balances": ledger})
+        )
+
+    def replay_wei_balances(
+        self,
+        cached_data: Dict[int, Balances],
+        blocks: List[int],
+        advance: Callable[[WeiBalances, int, int], None],
+        decimals: int = 18,
+        get_scale: Optional[Callable[[int], float]] = None,
+    ) -> Dict[int, Balances]:
+        """replay_block_balances over an exact ledger of integer base units.
+
+        `advance` folds raw event amounts without any float conversion or rounding, the
+        ledger is only converted when balances are emitted, times `get_scale(block)` when
+        given (e.g. the assets per share of a vault). The ledger of the last emitted block
+        is persisted, so a later run resuming from that block continues from the exact
+        integers and matches a run from scratch.
+        """
+        emitted: Dict[str, Any] = {}
+
+        def load_cached(balances: Balances, block: int) -> WeiBalances:
+            scale = get_scale(block) if get_scale else 1
+            return self.load_wei_ledger(balances, block, decimals, scale)
+
+        def snapshot(ledger: WeiBalances, block: int) -> Balances:
+            emitted["block"], emitted["ledger"] = block, ledger
+            return from_wei_balances(ledger, decimals, get_scale(block) if get_scale else 1)
+
+        new_block_data = self.replay_block_balances(
+            cached_data, blocks, advance, load_cached, snapshot
+        )
+        if emitted:
+            self.save_wei_ledger(emitted["ledger"], emitted["block"])
+        return new_block_data
+
+    @staticmethod
+    def fold_events(
+        state: State,
+        label: str,
+        contract_event,
+        from_block: int,
+        to_block: int,
+        apply_event: Callable[[State, EventData], None],
+        pagination_size: int,
+        # pylint: disable=redefined-builtin
+        filter: Optional[dict] = None,
+    ) -> State:
+        """Fold the logs of `contract_event` in [from_block, to_block] into the state in place.
+
+        `pagination_size` is only the initial window, the fetcher grows or splits it
+        depending on how the provider responds."""
+        events: Iterable[EventData] = fetch_events_logs_in_range(
+            label,
+            contract_event,
+            from_block,
+            to_block,
+            filter=filter,
+            initial_range=pagination_size,
+        )
+        for event in events:
+            apply_event(state, event)
+        return state
@@ -1,10 +1,10 @@
-from copy import deepcopy
 import logging
 
 from typing import Dict, List, Optional
 
 from constants.summary_columns import SummaryColumn
 from eth_typing import ChecksumAddress
+from web3.types import EventData
 
 from constants.example_integrations import (
     ACTIVE_ENA_START_BLOCK_EXAMPLE,
@@ -14,8 +14,10 @@ from constants.example_integrations import (
 
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
-from integrations.cached_balances_integration import CachedBalancesIntegration
-from utils.web3_utils import fetch_events_logs_with_retry
+from integrations.cached_balances_integration import (
+    CachedBalancesIntegration,
+    WeiBalances,
+)
 
 
 class ClaimedEnaIntegration(CachedBalancesIntegration):
@@ -35,6 +37,11 @@ class ClaimedEnaIntegration(CachedBalancesIntegration):
             reward_multiplier,
         )
 
+    @staticmethod
+    def apply_transfer(ledger: WeiBalances, transfer: EventData):
+        recipient = transfer["args"]["to"]
+        ledger[recipient] = ledger.get(recipient, 0) + transfer["args"]["value"]
+
     def get_block_balances(
         self, cached_data: Dict[int, Dict[ChecksumAddress, float]], blocks: List[int]
     ) -> Dict[int, Dict[ChecksumAddress, float]]:
@@ -43,43 +50,20 @@ class ClaimedEnaIntegration(CachedBalancesIntegration):
         if not blocks:
             logging.error("No blocks provided to claimed ENA get_block_balances")
             return new_block_data
-        sorted_blocks = sorted(blocks)
-        cache_copy: Dict[int, Dict[ChecksumAddress, float]] = deepcopy(cached_data)
-        for block in sorted_blocks:
-            # find the closest prev block in the data
-            # list keys parsed as ints and in descending order
-            sorted_existing_blocks = sorted(
-                cache_copy,
-                reverse=True,
+
+        def advance(ledger: WeiBalances, from_block: int, to_block: int):
+            # parse transfer events since and update the ledger
+            self.fold_events(
+                ledger,
+                "Token transfers claimed ENA",
+                ENA_CONTRACT.events.Transfer(),
+                from_block,
+                to_block,
+                self.apply_transfer,
+                PAGINATION_SIZE,
             )
-            # loop through the sorted blocks and find the closest previous block
-            prev_block = self.start_block
-            start = prev_block
-            bals = {}
-            for existing_block in sorted_existing_blocks:
-                if existing_block < block:
-                    prev_block = existing_block
-                    start = existing_block + 1
-                    bals = deepcopy(cache_copy[prev_block])
-                    break
-            # parse transfer events since and update bals
-            while start <= block:
-                to_block = min(start + PAGINATION_SIZE, block)
-                # print(f"Fetching transfers from {start} to {to_block}")
-                transfers = fetch_events_logs_with_retry(
-                    "Token transfers claimed ENA",
-                    ENA_CONTRACT.events.Transfer(),
-                    start,
-                    to_block,
-                )
-                for transfer in transfers:
-                    recipient = transfer["args"]["to"]
-                    if recipient not in bals:
-                        bals[recipient] = 0
-                    bals[recipient] += round(transfer["args"]["value"] / 10**18, 4)
-                start = to_block + 1
-            new_block_data[block] = bals
-            cache_copy[block] = bals
+
+        new_block_data = self.replay_wei_balances(cached_data, blocks, advance)
         return new_block_data
 
 
@@ -1,10 +1,10 @@
 import logging
-from copy import deepcopy
 from decimal import Decimal
 from dataclasses import dataclass, field
-from typing import Callable, Dict, List, Mapping, NewType, Optional, Set, NamedTuple, Tuple, Union, cast
+from typing import Any, Callable, Dict, List, Mapping, NewType, Optional, Set, NamedTuple, Tuple, Union, cast
 
 from web3 import Web3
+from web3.types import EventData
 from eth_typing import ChecksumAddress
 
 from constants.chains import Chain
@@ -26,9 +26,11 @@ from integrations.integration_ids import IntegrationID
 from utils.web3_utils import (
     MULTICALL_ADDRESS_BY_CHAIN,
     fetch_events_logs_with_retry,
+    fetch_multi_events_logs_in_range,
     W3_BY_CHAIN,
     multicall_by_address,
 )
+from utils.abi import get_contract
 
 ########################################################################
 # Terminologies
@@ -46,6 +48,8 @@ PsmShareTokenAddress = NewType("PsmShareTokenAddress", ChecksumAddress)
 LpTokenAddress = NewType("LpTokenAddress", ChecksumAddress)
 QuoteTokenAddress = NewType("QuoteTokenAddress", ChecksumAddress)
 VaultShareTokenAddress = NewType("VaultShareTokenAddress", ChecksumAddress)
+# Decoded logs of one pagination window, keyed by (emitting address, event name)
+WindowLogs = Dict[Tuple[ChecksumAddress, str], List[EventData]]
 
 
 class TermConfig(NamedTuple):
@@ -97,6 +101,7 @@ class CorkIntegration(CachedBalancesIntegration):
         end_block: Optional[int] = None,
         ethereal_multiplier: int = 0,
         ethereal_multiplier_func: Optional[Callable[[int, str], int]] = None,
+        batch_log_scan: bool = True,
     ):
         super().__init__(
             integration_id,
@@ -125,29 +130,115 @@ class CorkIntegration(CachedBalancesIntegration):
         self.vault_contract = PSM_CONTRACT_BY_CHAIN[self.chain]
         self.vault_balances_by_vault_share_token: Optional[Dict[VaultShareTokenAddress, PooledBalance]] = None
 
+        # When enabled, all PSM/AMM events and all share token transfers of a pagination window
+        # are fetched with one eth_getLogs each and demultiplexed locally
+        self.batch_log_scan = batch_log_scan
+
+    def get_events(
+        self,
+        label: str,
+        contract_event,
+        from_block: int,
+        to_block: int | str,
+        window_logs: Optional[WindowLogs] = None,
+        # pylint: disable=redefined-builtin
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[EventData]:
+        """Fetch the logs of `contract_event`, or select them from the prefetched window logs
+        applying the same block range and indexed argument filter."""
+        if window_logs is None:
+            return list(fetch_events_logs_with_retry(
+                label, contract_event, from_block, to_block, filter=filter
+            ))
+
+        return [
+            event
+            for event in window_logs.get((contract_event.address, contract_event.event_name), [])
+            if event["blockNumber"] >= from_block
+            and (to_block == "latest" or event["blockNumber"] <= cast(int, to_block))
+            and all(
+                event["args"][arg] in value if isinstance(value, list) else event["args"][arg] == value
+                for arg, value in (filter or {}).items()
+            )
+        ]
+
+    @staticmethod
+    def group_window_logs(logs: List[EventData]) -> WindowLogs:
+        window_logs: WindowLogs = {}
+        for log in logs:
+            key = (Web3.to_checksum_address(log["address"]), log["event"])
+            window_logs.setdefault(key, []).append(log)
+        return window_logs
+
+    def fetch_window_event_logs(self, from_block: int, to_block: int) -> WindowLogs:
+        """Fetch every PSM and AMM event the integration tracks, for all pairs and terms."""
+        logs = list(fetch_multi_events_logs_in_range(
+            "PSM and AMM events on pairs with eligible asset",
+            self.w3,
+            [self.psm_contract.address, self.amm_contract.address],
+            [
+                self.psm_contract.events.InitializedModuleCore(),
+                self.psm_contract.events.Issued(),
+                self.psm_contract.events.PsmDeposited(),
+                self.psm_contract.events.Cancelled(),
+                self.psm_contract.events.CtRedeemed(),
+                self.psm_contract.events.DsRedeemed(),
+                self.psm_contract.events.Repurchased(),
+                self.amm_contract.events.Initialized(),
+            ],
+            from_block,
+            to_block,
+            initial_range=PAGINATION_SIZE,
+        ))
+        return self.group_window_logs(logs)
+
+    def fetch_window_transfer_logs(self, from_block: int, to_block: int) -> WindowLogs:
+        """Fetch the Transfer events of every CT, LP and LV token known so far."""
+        token_addrs: Set[ChecksumAddress] = set()
+        for pair_config in (self.pair_config_by_id or {}).values():
+            token_addrs.add(pair_config.vault_share_token_addr)
+            for term_config in pair_config.terms.values():
+                token_addrs.add(term_config.share_token_addr)
+                if term_config.amm_lp_token_addr is not None:
+                    token_addrs.add(term_config.amm_lp_token_addr)
+
+        token_contract = self.w3.eth.contract(abi=ERC20_ABI)
+        logs = list(fetch_multi_events_logs_in_range(
+            "Token transfers of CT, LP and LV tokens",
+            self.w3,
+            sorted(token_addrs),
+            [token_contract.events.Transfer()],
+            from_block,
+            to_block,
+            initial_range=PAGINATION_SIZE,
+        ))
+        return self.group_window_logs(logs)
+
     def update_pair_config(
         self,
         pair_config_by_id: Dict[bytes, PairConfig],
         from_block: int,
         to_block: int | str = "latest",
+        window_logs: Optional[WindowLogs] = None,
     ) -> Dict[bytes, PairConfig]:
         # Fetch events that indicates new pair was created
-        print("from_block\t", from_block)
-        print("to_block\t", to_block)
-        new_pair_events_with_eligible_pa = fetch_events_logs_with_retry(
+        logging.debug("Updating pair config from block %s to %s", from_block, to_block)
+        new_pair_events_with_eligible_pa = self.get_events(
             "Pair Initialized with USDe as PA",
             self.psm_contract.events.InitializedModuleCore(),
             from_block,
             to_block,
+            window_logs,
             filter={
                 "pa": self.eligible_token_addr,
             },
         )
-        new_pair_events_with_eligible_ra = fetch_events_logs_with_retry(
+        new_pair_events_with_eligible_ra = self.get_events(
             "Pair Initialized with USDe as RA",
             self.psm_contract.events.InitializedModuleCore(),
             from_block,
             to_block,
+            window_logs,
             filter={
                 "ra": self.eligible_token_addr,
             },
@@ -196,11 +287,12 @@ class CorkIntegration(CachedBalancesIntegration):
         # Fetch events emitted by Cork's custom UniV4 Hook,
         # that indicates new LP token (ERC20) was created.
         # event Initialized(address indexed ra, address indexed ct, address liquidityToken);
-        new_lpt_events = fetch_events_logs_with_retry(
+        new_lpt_events = self.get_events(
             "LPT Initialized on pairs with USDe",
             self.amm_contract.events.Initialized(),
             from_block,
             to_block,
+            window_logs,
             filter = {
                 "ra": [
                     pair_config.amm_quote_token_addr
@@ -230,11 +322,12 @@ class CorkIntegration(CachedBalancesIntegration):
                             )
 
             # Fetch events that indicate a new term was issued/started
-            new_term_events_of_pair = fetch_events_logs_with_retry(
+            new_term_events_of_pair = self.get_events(
                 "Term Initialized on pairs with USDe",
                 self.psm_contract.events.Issued(),
                 start_block,
                 to_block,
+                window_logs,
                 filter={
                     "id": pair_id,
                 },
@@ -291,6 +384,7 @@ class CorkIntegration(CachedBalancesIntegration):
         pool_balances: Dict[PsmShareTokenAddress, PooledBalance],
         from_block: int,
         to_block: int | str = "latest",
+        window_logs: Optional[WindowLogs] = None,
     ) -> Dict[PsmShareTokenAddress, PooledBalance]:
         # For each pair...
         for pair_id, pair_config in (self.pair_config_by_id or {}).items():
@@ -304,11 +398,12 @@ class CorkIntegration(CachedBalancesIntegration):
                 # event PsmDeposited(Id indexed id, uint256 indexed dsId, address indexed depositor, uint256 amount, uint256 received, uint256 exchangeRate)
                 # IN: RA
                 # OUT: DS + CT
-                deposit_events = fetch_events_logs_with_retry(
+                deposit_events = self.get_events(
                     "Deposit on pairs with USDe",
                     self.psm_contract.events.PsmDeposited(),
                     start_block,
                     to_block,
+                    window_logs,
                     filter={
                         "id": pair_id,
                         "dsId": int(term_id),
@@ -320,11 +415,12 @@ class CorkIntegration(CachedBalancesIntegration):
                 # event Cancelled(Id indexed id, uint256 indexed dsId, address indexed redeemer, uint256 raAmount, uint256 swapAmount)
                 # IN: CT + DS
                 # OUT: RA
-                early_withdraw_events = fetch_events_logs_with_retry(
+                early_withdraw_events = self.get_events(
                     "Early Withdraw using CT + DS on pairs with USDe",
                     self.psm_contract.events.Cancelled(),
                     start_block,
                     to_block,
+                    window_logs,
                     filter={
                         "id": pair_id,
                         "dsId": int(term_id),
@@ -336,11 +432,12 @@ class CorkIntegration(CachedBalancesIntegration):
                 # event CtRedeemed(Id indexed id, uint256 indexed dsId, address indexed redeemer, uint256 amount, uint256 paReceived, uint256 raReceived)
                 # IN: CT
                 # OUT: PA + RA
-                withdraw_events = fetch_events_logs_with_retry(
+                withdraw_events = self.get_events(
                     "Withdraw using CT on pairs with USDe",
                     self.psm_contract.events.CtRedeemed(),
                     start_block,
                     to_block,
+                    window_logs,
                     filter={
                         "id": pair_id,
                         "dsId": int(term_id),
@@ -352,11 +449,12 @@ class CorkIntegration(CachedBalancesIntegration):
                 # event DsRedeemed(Id indexed id, uint256 indexed dsId, address indexed redeemer, uint256 paUsed, uint256 dsUsed, uint256 raReceived, uint256 dsExchangeRate, uint256 feePercentage, uint256 fee)
                 # IN: DS + PA
                 # OUT: RA + fee
-                redeem_events = fetch_events_logs_with_retry(
+                redeem_events = self.get_events(
                     "Redeem using DS on pairs with USDe",
                     self.psm_contract.events.DsRedeemed(),
                     start_block,
                     to_block,
+                    window_logs,
                     filter={
                         "id": pair_id,
                         "dsId": int(term_id),
@@ -368,11 +466,12 @@ class CorkIntegration(CachedBalancesIntegration):
                 # event Repurchased(Id indexed id, address indexed buyer, uint256 indexed dsId, uint256 raUsed, uint256 receivedPa, uint256 receivedDs, uint256 feePercentage, uint256 fee, uint256 exchangeRates)
                 # IN: RA (raUsed includes fee)
                 # OUT: PA + DS
-                repurchase_events = fetch_events_logs_with_retry(
+                repurchase_events = self.get_events(
                     "Repurchase on pairs with USDe",
                     self.psm_contract.events.Repurchased(),
                     start_block,
                     to_block,
+                    window_logs,
                     filter={
                         "id": pair_id,
                         "dsId": int(term_id),
@@ -418,17 +517,15 @@ class CorkIntegration(CachedBalancesIntegration):
                 #     print("psm_pool.total_assets", pool.total_assets, to_block)
 
                 # For each token, accumulate all balance changes from Transfer events...
-                token_contract = self.w3.eth.contract(
-                    address=share_token_addr,
-                    abi=ERC20_ABI,
-                )
+                token_contract = get_contract(self.chain, share_token_addr, "ERC20_abi.json")
 
                 # event Transfer(address indexed from, address indexed to, uint256 value)
-                token_transfers = fetch_events_logs_with_retry(
+                token_transfers = self.get_events(
                     "Token transfers of PSM CT token",
                     token_contract.events.Transfer(),
                     start_block,
                     to_block,
+                    window_logs,
                 )
 
                 # Update token balance of accounts involved in transfer
@@ -457,6 +554,7 @@ class CorkIntegration(CachedBalancesIntegration):
         pool_balances: Dict[LpTokenAddress, PooledBalance],
         from_block,
         to_block: int | str = "latest",
+        window_logs: Optional[WindowLogs] = None,
     ) -> Dict[LpTokenAddress, PooledBalance]:
         # For each pair...
         for _pair_id, pair_config in (self.pair_config_by_id or {}).items():
@@ -474,17 +572,15 @@ class CorkIntegration(CachedBalancesIntegration):
                 )
 
                 # For each token, accumulate all balance changes from Transfer events...
-                token_contract = self.w3.eth.contract(
-                    address=lp_token_addr,
-                    abi=ERC20_ABI,
-                )
+                token_contract = get_contract(self.chain, lp_token_addr, "ERC20_abi.json")
 
                 # event Transfer(address indexed from, address indexed to, uint256 value)
-                token_transfers = fetch_events_logs_with_retry(
+                token_transfers = self.get_events(
                     "Token transfers of AMM LP token",
                     token_contract.events.Transfer(),
                     start_block,
                     to_block,
+                    window_logs,
                 )
 
                 # Update token balance of accounts involved in transfer
@@ -513,6 +609,7 @@ class CorkIntegration(CachedBalancesIntegration):
         pool_balances: Dict[VaultShareTokenAddress, PooledBalance],
         from_block: int,
         to_block: int | str = "latest",
+        window_logs: Optional[WindowLogs] = None,
     ) -> Dict[VaultShareTokenAddress, PooledBalance]:
         # For each pair...
         for _pair_id, pair_config in (self.pair_config_by_id or {}).items():
@@ -522,17 +619,15 @@ class CorkIntegration(CachedBalancesIntegration):
             pool = pool_balances.setdefault(vault_share_token_addr, PooledBalance(pair_config))
 
             # For each token, accumulate all balance changes from Transfer events...
-            token_contract = self.w3.eth.contract(
-                address=vault_share_token_addr,
-                abi=ERC20_ABI,
-            )
+            token_contract = get_contract(self.chain, vault_share_token_addr, "ERC20_abi.json")
 
             # event Transfer(address indexed from, address indexed to, uint256 value)
-            token_transfers = fetch_events_logs_with_retry(
+            token_transfers = self.get_events(
                 "Token transfers of Vault LV token",
                 token_contract.events.Transfer(),
                 start_block,
                 to_block,
+                window_logs,
             )
 
             # Update token balance of accounts involved in transfer
@@ -556,6 +651,349 @@ class CorkIntegration(CachedBalancesIntegration):
                     pool.shares_by_account[recipient] += value
         return pool_balances
 
+    def attribute_account_balances(
+        self, account_bals: Dict[ChecksumAddress, Decimal | float], block: int
+    ) -> Dict[ChecksumAddress, Decimal | float]:
+        """Attribute the Ethena asset balances held by every Vault, AMM and PSM pool at `block`
+        to the holders of their share tokens, accumulating onto `account_bals` in place."""
+        assert self.pair_config_by_id is not None
+        assert self.psm_balances_by_share_token is not None
+        assert self.amm_balances_by_lp_token is not None
+        assert self.vault_balances_by_vault_share_token is not None
+
+        # Fetch the idle asset balance of each eligible Vault pool
+        vault_contract_function = self.vault_contract.functions.tradeExecutionFundsAvailable
+        pair_ids = [
+            pair_id
+            for pair_id, pair_config in (self.pair_config_by_id or {}).items()
+            if pair_config.eligible_asset == TokenType.RA
+        ]
+        vault_calls = [
+            (
+                self.vault_contract,
+                vault_contract_function.fn_name,
+                [
+                    pair_id,
+                ],
+            )
+            for pair_id in pair_ids
+        ]
+        multicall_results = multicall_by_address(
+            wb3=self.w3,
+            multical_address=MULTICALL_ADDRESS_BY_CHAIN[self.chain],
+            calls=vault_calls,
+            block_identifier=block,
+        )
+
+        # The results contain the following:
+        #   - The `result[0]` is the total balance of the asset token in the vault pool
+        for pair_id, result in zip(
+            pair_ids, multicall_results
+        ):
+            # Update the total idle asset balance of each vault pool
+            pair_config = self.pair_config_by_id[pair_id]
+            vault_pool = self.vault_balances_by_vault_share_token[
+                pair_config.vault_share_token_addr
+            ]
+            vault_pool.total_assets = result[0]
+            logging.debug("vault_pool.total_assets %s %s", vault_pool.total_assets, block)
+
+        # Uniswap V4 doesn’t store reserves explicitly in storage.
+        # Instead, reserves are inferred from the pool’s liquidity and price data,
+        # necessitating off-chain computation of contract events for precise reserve values.
+        # Instead, use the `getReserves()` function on Cork's custom UniV4 Hook to,
+        # Fetch the reserve asset balance of each eligible AMM pool
+        # Note: We cannot assume that all LP token holders have withdrawn
+        # remaining reserves after end of epoch/term.
+        amm_contract_function = self.amm_contract.functions.getReserves
+        amm_pools = self.amm_balances_by_lp_token.values()
+        amm_pools_with_tc = [p for p in amm_pools if p.term_config is not None]
+        amm_calls = [
+            (
+                self.amm_contract,
+                amm_contract_function.fn_name,
+                [
+                    amm_pool.pair_config.amm_quote_token_addr,
+                    cast(TermConfig, amm_pool.term_config).share_token_addr,
+                ],
+            )
+            for amm_pool in amm_pools_with_tc
+        ]
+        multicall_results = multicall_by_address(
+            wb3=self.w3,
+            multical_address=MULTICALL_ADDRESS_BY_CHAIN[self.chain],
+            calls=amm_calls,
+            block_identifier=block,
+        )
+
+        # The results contain the following:
+        #   - The `result[0]` is the total balance of the asset token in the AMM pool
+        #   - The `result[1]` is the total balance of the share token in the AMM pool
+        for amm_pool, result in zip(
+          amm_pools_with_tc, multicall_results
+        ):
+            # Update the total Ethena-asset and PSM-shares balance of each AMM pool
+            amm_pool.total_assets = (result[0], result[1])
+            logging.debug("amm_pool.total_assets %s %s", amm_pool.total_assets, block)
+
+        # Fetch the asset balance of each eligible PSM pool
+        psm_contract_function = self.psm_contract.functions.valueLocked
+        psm_calls = [
+            (
+                self.psm_contract,
+                psm_contract_function.fn_name,
+                [
+                    pair_id,
+                    pair_config.eligible_asset == TokenType.RA,
+                ]
+                if term_id == max(pair_config.terms) else
+                [
+                    pair_id,
+                    term_id,
+                    pair_config.eligible_asset == TokenType.RA,
+                ],
+            )
+            for pair_id, pair_config in (self.pair_config_by_id or {}).items()
+            for term_id in pair_config.terms
+        ]
+        multicall_results = multicall_by_address(
+            wb3=self.w3,
+            multical_address=MULTICALL_ADDRESS_BY_CHAIN[self.chain],
+            calls=psm_calls,
+            block_identifier=block,
+        )
+
+        # The results contain the following:
+        #   - The `result[0]` is the total balance of the asset token in the psm pool
+        for (pair_id, term_id), result in zip(
+            (
+                (pair_id, term_id)
+                for pair_id, pair_config in (self.pair_config_by_id or {}).items()
+                for term_id in pair_config.terms
+            ),
+            multicall_results
+        ):
+            # Update the total asset balance of each psm pool
+            pair_config = self.pair_config_by_id[pair_id]
+            term_config = pair_config.terms[term_id]
+            share_token_addr = term_config.share_token_addr
+            psm_pool = self.psm_balances_by_share_token[share_token_addr]
+
+            if int(term_id) > 1:
+                assert (
+                    psm_pool.total_assets == result[0]
+                ), f"psm_pool.total_assets != psm_contract.valueLocked for {pair_id!r}:{term_id!r}"
+            else:
+                psm_pool.total_assets = result[0]
+            logging.debug("psm_pool.total_assets %s %s", psm_pool.total_assets, block)
+
+        # Attribute Ethena asset balances on Vault pools to their respective LV token holders
+        for lv_token_addr, vault_pool in (
+            (lv_token_addr, vault_pool)
+            for lv_token_addr, vault_pool in self.vault_balances_by_vault_share_token.items()
+            if vault_pool.pair_config.eligible_asset == TokenType.RA
+        ):
+            logging.debug("======== LVT: %s ========", lv_token_addr)
+            for account_addr, account_shares in vault_pool.shares_by_account.items():
+                ta = vault_pool.total_assets
+                ta_val = ta[0] if isinstance(ta, tuple) else ta
+                amount = (
+                    Decimal(ta_val)
+                    * Decimal(account_shares)
+                    / Decimal(vault_pool.total_supply)
+                )
+                bal = account_bals.setdefault(account_addr, Decimal(0))
+                account_bals[account_addr] = Decimal(bal) + amount
+                logging.debug(
+                    "LVT-holder: %s start: %s in: %s end: %s",
+                    account_addr,
+                    bal,
+                    amount,
+                    account_bals[account_addr],
+                )
+
+        # Attribute Ethena asset balances on AMM pools to their respective LP token holders
+        for lp_token_addr, amm_pool in (
+            (lp_token_addr, amm_pool)
+            for lp_token_addr, amm_pool in self.amm_balances_by_lp_token.items()
+            if amm_pool.pair_config.amm_quote_token_addr == self.eligible_token_addr
+        ):
+            logging.debug("======== LPT: %s ========", lp_token_addr)
+            for account_addr, account_shares in amm_pool.shares_by_account.items():
+                amm_ta = cast(Tuple[int, int], amm_pool.total_assets)
+                amount = (
+                    Decimal(amm_ta[0])
+                    * Decimal(account_shares)
+                    / Decimal(amm_pool.total_supply)
+                )
+                # If the account_addr is the vault_addr, then we need to attribute the
+                # Ethena asset balances to the respective LV token holders
+                if account_addr == amm_pool.pair_config.vault_addr and amount:
+                    vault_share_token_addr = amm_pool.pair_config.vault_share_token_addr
+                    vault = self.vault_balances_by_vault_share_token[
+                        vault_share_token_addr
+                    ]
+                    for (
+                        account_addr, account_shares
+                    ) in vault.shares_by_account.items():
+                        bal = account_bals.setdefault(account_addr, Decimal(0))
+                        qty = (
+                            amount
+                            * Decimal(account_shares)
+                            / Decimal(vault.total_supply)
+                        )
+                        account_bals[account_addr] = Decimal(bal) + qty
+                        logging.debug(
+                            "LVT-holder: %s %s start: %s in: %s end: %s",
+                            vault_share_token_addr,
+                            account_addr,
+                            bal,
+                            qty,
+                            account_bals[account_addr],
+                        )
+                else:
+                    bal = account_bals.setdefault(account_addr, Decimal(0))
+                    account_bals[account_addr] = Decimal(bal) + amount
+                    logging.debug(
+                        "LPT-holder: %s start: %s in: %s end: %s",
+                        account_addr,
+                        bal,
+                        amount,
+                        account_bals[account_addr],
+                    )
+
+                # # Attribute PSM share token balances to their respective LP token holders
+                # if amm_pool.term_config is not None:
+                #     share_token_addr = amm_pool.term_config.share_token_addr
+                #     psm_pool = self.psm_balances_by_share_token[share_token_addr]
+                #     account_share_token_bals = psm_pool.shares_by_account
+                #     share_amount = (
+                #         Decimal(amm_pool.total_assets[1])
+                #         * Decimal(account_shares)
+                #         / Decimal(amm_pool.total_supply)
+                #     )
+                #     bal = account_share_token_bals.setdefault(account_addr, Decimal(0))
+                #     account_share_token_bals[account_addr] = Decimal(bal) + share_amount
+
+        # Attribute Ethena asset balances on PSM pools to their respective CT token holders
+        for share_token_addr, psm_pool in self.psm_balances_by_share_token.items():
+            logging.debug("======== CT: %s ========", share_token_addr)
+            for account_addr, account_shares in psm_pool.shares_by_account.items():
+                psm_ta = psm_pool.total_assets
+                psm_ta_val = psm_ta[0] if isinstance(psm_ta, tuple) else psm_ta
+                amount = (
+                    Decimal(psm_ta_val)
+                    * Decimal(account_shares)
+                    / Decimal(psm_pool.total_supply)
+                )
+                # If the account_addr is the Cork Vault address, then we need to attribute the
+                # Ethena asset balances to the respective LV token holders
+                if account_addr == psm_pool.pair_config.vault_addr and amount:
+                    vault_share_token_addr = psm_pool.pair_config.vault_share_token_addr
+                    vault = self.vault_balances_by_vault_share_token[
+                        vault_share_token_addr
+                    ]
+                    for (
+                        account_addr, account_shares
+                    ) in vault.shares_by_account.items():
+                        bal = account_bals.setdefault(account_addr, Decimal(0))
+                        qty = (
+                            amount
+                            * Decimal(account_shares)
+                            / Decimal(vault.total_supply)
+                        )
+                        account_bals[account_addr] = Decimal(bal) + qty
+                        logging.debug(
+                            "LVT-holder: %s %s start: %s in: %s end: %s",
+                            vault_share_token_addr,
+                            account_addr,
+                            bal,
+                            qty,
+                            account_bals[account_addr],
+                        )
+                # If the account_addr is the UniV4 PoolManager address, then we need to
+                # attribute the Ethena asset balances to the respective LP token holders
+                elif psm_pool.term_config is not None and account_addr == psm_pool.term_config.amm_pool_addr and amount:
+                    tc = psm_pool.term_config
+                    lp_addr = tc.amm_lp_token_addr
+                    if lp_addr is not None:
+                        amm_pool = self.amm_balances_by_lp_token[lp_addr]
+                        amm_ta = cast(Tuple[int, int], amm_pool.total_assets)
+                        # If there are other Uniswap V4 pools which manage PSM-shares,
+                        if account_shares > amm_ta[1]:
+                            psm_ta = psm_pool.total_assets
+                            psm_ta_val = psm_ta[0] if isinstance(psm_ta, tuple) else psm_ta
+                            amount = (
+                                Decimal(psm_ta_val)
+                                * Decimal(amm_ta[1])
+                                / Decimal(psm_pool.total_supply)
+                            )
+                        for (
+                            account_addr, account_shares
+                        ) in amm_pool.shares_by_account.items():
+                            # If the account_addr is the vault_addr, then we need to attribute the
+                            # Ethena asset balances to the respective LV token holders
+                            if account_addr == amm_pool.pair_config.vault_addr and amount:
+                                vault_share_token_addr = amm_pool.pair_config.vault_share_token_addr
+                                vault = self.vault_balances_by_vault_share_token[
+                                    vault_share_token_addr
+                                ]
+                                amount = (
+                                    amount
+                                    * Decimal(account_shares)
+                                    / Decimal(amm_pool.total_supply)
+                                )
+                                for (
+                                    account_addr, account_shares
+                                ) in vault.shares_by_account.items():
+                                    bal = account_bals.setdefault(account_addr, Decimal(0))
+                                    qty = (
+                                        amount
+                                        * Decimal(account_shares)
+                                        / Decimal(vault.total_supply)
+                                    )
+                                    account_bals[account_addr] = Decimal(bal) + qty
+                                    logging.debug(
+                                        "LPT-LVT-holder: %s %s %s start: %s in: %s end: %s",
+                                        lp_addr,
+                                        vault_share_token_addr,
+                                        account_addr,
+                                        bal,
+                                        qty,
+                                        account_bals[account_addr],
+                                    )
+                            else:
+                                bal = account_bals.setdefault(account_addr, Decimal(0))
+                                qty = (
+                                    amount
+                                    * Decimal(account_shares)
+                                    / Decimal(amm_pool.total_supply)
+                                )
+                                account_bals[account_addr] = Decimal(bal) + qty
+                                logging.debug(
+                                    "LPT-holder: %s %s start: %s in: %s end: %s",
+                                    lp_addr,
+                                    account_addr,
+                                    bal,
+                                    qty,
+                                    account_bals[account_addr],
+                                )
+                else:
+                    bal = account_bals.setdefault(account_addr, Decimal(0))
+                    account_bals[account_addr] = Decimal(bal) + amount
+                    logging.debug(
+                        "CT-holder: %s start: %s in: %s end: %s",
+                        account_addr,
+                        bal,
+                        amount,
+                        account_bals[account_addr],
+                    )
+
+        # Round off to 4 decimals
+        for account_addr, account_bal in account_bals.items():
+            account_bals[account_addr] = float(round(Decimal(account_bal) / Decimal(1e18), 4))
+        return account_bals
+
     def get_block_balances(
         self, cached_data: Dict[int, Dict[ChecksumAddress, float]], blocks: List[int]
     ) -> Dict[int, Dict[ChecksumAddress, float]]:
@@ -580,58 +1018,16 @@ class CorkIntegration(CachedBalancesIntegration):
             logging.error("No blocks provided to get_block_balances")
             return new_block_data
 
-        sorted_blocks = sorted(blocks)
-        cache_copy_of_account_bals: Dict[int, Dict[ChecksumAddress, float]] = deepcopy(
-            cached_data
-        )
-
-        for block in sorted_blocks:
-            # find the closest prev block in the data
-            # list keys parsed as ints and in descending order
-            sorted_existing_blocks = sorted(
-                cache_copy_of_account_bals,
-                reverse=True,
-            )
-
-            # loop through the sorted blocks and find the closest previous block
-            prev_block = self.start_block
-            start = prev_block + 1
-            account_bals: Dict[ChecksumAddress, Decimal | float] = {}
-
-            for existing_block in sorted_existing_blocks:
-                if existing_block < block:
-                    prev_block = existing_block
-                    start = existing_block + 1
-                    account_bals = deepcopy(cast(Dict[ChecksumAddress, Union[Decimal, float]], cache_copy_of_account_bals[prev_block]))
-                    break
-
-            # Fetch pair config from self.start_block if not already done
+        def advance(account_bals: Dict[ChecksumAddress, float], start: int, block: int):
+            # Replay pair config and pool term balances from self.start_block if not already done,
+            # the running account balances may come from cached data but the pool state does not
             if self.pair_config_by_id is None:
-                self.pair_config_by_id = self.update_pair_config(
-                    {}, from_block=self.start_block, to_block=prev_block
-                )
-
-            # Fetch Peg Stability term balances from self.start_block if not already done
-            if self.psm_balances_by_share_token is None:
-                self.psm_balances_by_share_token = self.update_psm_pool_balances(
-                    {}, from_block=self.start_block, to_block=prev_block
-                )
-
-            # Fetch AMM Liquidity Pool term balances from self.start_block if not already done
-            if self.amm_balances_by_lp_token is None:
-                self.amm_balances_by_lp_token = self.update_amm_pool_balances(
-                    {}, from_block=self.start_block, to_block=prev_block
-                )
-
-            # Fetch Vault term balances from self.start_block if not already done
-            if self.vault_balances_by_vault_share_token is None:
-                self.vault_balances_by_vault_share_token = (
-                    self.update_vault_pool_balances(
-                        {}, from_block=self.start_block, to_block=prev_block
-                    )
-                )
+                self.pair_config_by_id = {}
+                self.psm_balances_by_share_token = {}
+                self.amm_balances_by_lp_token = {}
+                self.vault_balances_by_vault_share_token = {}
+                start = self.start_block
 
-            assert self.pair_config_by_id is not None
             assert self.psm_balances_by_share_token is not None
             assert self.amm_balances_by_lp_token is not None
             assert self.vault_balances_by_vault_share_token is not None
@@ -641,352 +1037,42 @@ class CorkIntegration(CachedBalancesIntegration):
                 to_block = min(start + PAGINATION_SIZE, block)
                 # print(f"Fetching events from {start} to {to_block}")
 
+                # Prefetch all PSM/AMM events of the window in a single pass
+                window_logs = (
+                    self.fetch_window_event_logs(start, to_block) if self.batch_log_scan else None
+                )
+
                 # Add new pairs to config
-                self.update_pair_config(self.pair_config_by_id, start, to_block)
+                self.update_pair_config(self.pair_config_by_id, start, to_block, window_logs)
+
+                # Prefetch the transfers of all share tokens, including terms issued in this window
+                if window_logs is not None:
+                    window_logs.update(self.fetch_window_transfer_logs(start, to_block))
 
                 # Update PSM Pool term balances
                 self.update_psm_pool_balances(
-                    self.psm_balances_by_share_token, start, to_block
+                    self.psm_balances_by_share_token, start, to_block, window_logs
                 )
 
                 # Update AMM Pool term balances
                 self.update_amm_pool_balances(
-                    self.amm_balances_by_lp_token, start, to_block
+                    self.amm_balances_by_lp_token, start, to_block, window_logs
                 )
 
                 # Update Vault Liquidity Pool term balances
                 self.update_vault_pool_balances(
-                    self.vault_balances_by_vault_share_token, start, to_block
+                    self.vault_balances_by_vault_share_token, start, to_block, window_logs
                 )
 
                 start = to_block + 1
                 # continue pagination
 
             # finished pagination loop, block height reached...
-
-            # Fetch the idle asset balance of each eligible Vault pool
-            vault_contract_function = self.vault_contract.functions.tradeExecutionFundsAvailable
-            pair_ids = [
-                pair_id
-                for pair_id, pair_config in (self.pair_config_by_id or {}).items()
-                if pair_config.eligible_asset == TokenType.RA
-            ]
-            vault_calls = [
-                (
-                    self.vault_contract,
-                    vault_contract_function.fn_name,
-                    [
-                        pair_id,
-                    ],
-                )
-                for pair_id in pair_ids
-            ]
-            multicall_results = multicall_by_address(
-                wb3=self.w3,
-                multical_address=MULTICALL_ADDRESS_BY_CHAIN[self.chain],
-                calls=vault_calls,
-                block_identifier=block,
-            )
-
-            # The results contain the following:
-            #   - The `result[0]` is the total balance of the asset token in the vault pool
-            for pair_id, result in zip(
-                pair_ids, multicall_results
-            ):
-                # Update the total idle asset balance of each vault pool
-                pair_config = self.pair_config_by_id[pair_id]
-                vault_pool = self.vault_balances_by_vault_share_token[
-                    pair_config.vault_share_token_addr
-                ]
-                vault_pool.total_assets = result[0]
-                print("vault_pool.total_assets", vault_pool.total_assets, block)
-
-            # Uniswap V4 doesn’t store reserves explicitly in storage.
-            # Instead, reserves are inferred from the pool’s liquidity and price data,
-            # necessitating off-chain computation of contract events for precise reserve values.
-            # Instead, use the `getReserves()` function on Cork's custom UniV4 Hook to,
-            # Fetch the reserve asset balance of each eligible AMM pool
-            # Note: We cannot assume that all LP token holders have withdrawn
-            # remaining reserves after end of epoch/term.
-            amm_contract_function = self.amm_contract.functions.getReserves
-            amm_pools = self.amm_balances_by_lp_token.values()
-            amm_pools_with_tc = [p for p in amm_pools if p.term_config is not None]
-            amm_calls = [
-                (
-                    self.amm_contract,
-                    amm_contract_function.fn_name,
-                    [
-                        amm_pool.pair_config.amm_quote_token_addr,
-                        cast(TermConfig, amm_pool.term_config).share_token_addr,
-                    ],
-                )
-                for amm_pool in amm_pools_with_tc
-            ]
-            multicall_results = multicall_by_address(
-                wb3=self.w3,
-                multical_address=MULTICALL_ADDRESS_BY_CHAIN[self.chain],
-                calls=amm_calls,
-                block_identifier=block,
-            )
-
-            # The results contain the following:
-            #   - The `result[0]` is the total balance of the asset token in the AMM pool
-            #   - The `result[1]` is the total balance of the share token in the AMM pool
-            for amm_pool, result in zip(
-              amm_pools_with_tc, multicall_results
-            ):
-                # Update the total Ethena-asset and PSM-shares balance of each AMM pool
-                amm_pool.total_assets = (result[0], result[1])
-                print("amm_pool.total_assets", amm_pool.total_assets, block)
-
-            # Fetch the asset balance of each eligible PSM pool
-            psm_contract_function = self.psm_contract.functions.valueLocked
-            psm_calls = [
-                (
-                    self.psm_contract,
-                    psm_contract_function.fn_name,
-                    [
-                        pair_id,
-                        pair_config.eligible_asset == TokenType.RA,
-                    ]
-                    if term_id == max(pair_config.terms) else
-                    [
-                        pair_id,
-                        term_id,
-                        pair_config.eligible_asset == TokenType.RA,
-                    ],
-                )
-                for pair_id, pair_config in (self.pair_config_by_id or {}).items()
-                for term_id in pair_config.terms
-            ]
-            multicall_results = multicall_by_address(
-                wb3=self.w3,
-                multical_address=MULTICALL_ADDRESS_BY_CHAIN[self.chain],
-                calls=psm_calls,
-                block_identifier=block,
+            self.attribute_account_balances(
+                cast(Dict[ChecksumAddress, Union[Decimal, float]], account_bals), block
             )
 
-            # The results contain the following:
-            #   - The `result[0]` is the total balance of the asset token in the psm pool
-            for (pair_id, term_id), result in zip(
-                (
-                    (pair_id, term_id)
-                    for pair_id, pair_config in (self.pair_config_by_id or {}).items()
-                    for term_id in pair_config.terms
-                ),
-                multicall_results
-            ):
-                # Update the total asset balance of each psm pool
-                pair_config = self.pair_config_by_id[pair_id]
-                term_config = pair_config.terms[term_id]
-                share_token_addr = term_config.share_token_addr
-                psm_pool = self.psm_balances_by_share_token[share_token_addr]
-
-                if int(term_id) > 1:
-                    assert (
-                        psm_pool.total_assets == result[0]
-                    ), f"psm_pool.total_assets != psm_contract.valueLocked for {pair_id!r}:{term_id!r}"
-                else:
-                    psm_pool.total_assets = result[0]
-                print("psm_pool.total_assets", psm_pool.total_assets, block)
-
-            # Attribute Ethena asset balances on Vault pools to their respective LV token holders
-            for lv_token_addr, vault_pool in (
-                (lv_token_addr, vault_pool)
-                for lv_token_addr, vault_pool in self.vault_balances_by_vault_share_token.items()
-                if vault_pool.pair_config.eligible_asset == TokenType.RA
-            ):
-                print("======== LVT:", lv_token_addr, "========")
-                for account_addr, account_shares in vault_pool.shares_by_account.items():
-                    ta = vault_pool.total_assets
-                    ta_val = ta[0] if isinstance(ta, tuple) else ta
-                    amount = (
-                        Decimal(ta_val)
-                        * Decimal(account_shares)
-                        / Decimal(vault_pool.total_supply)
-                    )
-                    bal = account_bals.setdefault(account_addr, Decimal(0))
-                    account_bals[account_addr] = Decimal(bal) + amount
-                    print(
-                        "LVT-holder:", account_addr,
-                        "start:", bal,
-                        "in:", amount,
-                        "end:", account_bals[account_addr]
-                    )
-
-            # Attribute Ethena asset balances on AMM pools to their respective LP token holders
-            for lp_token_addr, amm_pool in (
-                (lp_token_addr, amm_pool)
-                for lp_token_addr, amm_pool in self.amm_balances_by_lp_token.items()
-                if amm_pool.pair_config.amm_quote_token_addr == self.eligible_token_addr
-            ):
-                print("======== LPT:", lp_token_addr, "========")
-                for account_addr, account_shares in amm_pool.shares_by_account.items():
-                    amm_ta = cast(Tuple[int, int], amm_pool.total_assets)
-                    amount = (
-                        Decimal(amm_ta[0])
-                        * Decimal(account_shares)
-                        / Decimal(amm_pool.total_supply)
-                    )
-                    # If the account_addr is the vault_addr, then we need to attribute the
-                    # Ethena asset balances to the respective LV token holders
-                    if account_addr == amm_pool.pair_config.vault_addr and amount:
-                        vault_share_token_addr = amm_pool.pair_config.vault_share_token_addr
-                        vault = self.vault_balances_by_vault_share_token[
-                            vault_share_token_addr
-                        ]
-                        for (
-                            account_addr, account_shares
-                        ) in vault.shares_by_account.items():
-                            bal = account_bals.setdefault(account_addr, Decimal(0))
-                            qty = (
-                                amount
-                                * Decimal(account_shares)
-                                / Decimal(vault.total_supply)
-                            )
-                            account_bals[account_addr] = Decimal(bal) + qty
-                            print(
-                                "LVT-holder:", vault_share_token_addr, account_addr,
-                                "start:", bal,
-                                "in:", qty,
-                                "end:", account_bals[account_addr]
-                            )
-                    else:
-                        bal = account_bals.setdefault(account_addr, Decimal(0))
-                        account_bals[account_addr] = Decimal(bal) + amount
-                        print(
-                            "LPT-holder:", account_addr,
-                            "start:", bal,
-                            "in:", amount,
-                            "end:", account_bals[account_addr]
-                        )
-
-                    # # Attribute PSM share token balances to their respective LP token holders
-                    # if amm_pool.term_config is not None:
-                    #     share_token_addr = amm_pool.term_config.share_token_addr
-                    #     psm_pool = self.psm_balances_by_share_token[share_token_addr]
-                    #     account_share_token_bals = psm_pool.shares_by_account
-                    #     share_amount = (
-                    #         Decimal(amm_pool.total_assets[1])
-                    #         * Decimal(account_shares)
-                    #         / Decimal(amm_pool.total_supply)
-                    #     )
-                    #     bal = account_share_token_bals.setdefault(account_addr, Decimal(0))
-                    #     account_share_token_bals[account_addr] = Decimal(bal) + share_amount
-
-            # Attribute Ethena asset balances on PSM pools to their respective CT token holders
-            for share_token_addr, psm_pool in self.psm_balances_by_share_token.items():
-                print("======== CT:", share_token_addr, "========")
-                for account_addr, account_shares in psm_pool.shares_by_account.items():
-                    psm_ta = psm_pool.total_assets
-                    psm_ta_val = psm_ta[0] if isinstance(psm_ta, tuple) else psm_ta
-                    amount = (
-                        Decimal(psm_ta_val)
-                        * Decimal(account_shares)
-                        / Decimal(psm_pool.total_supply)
-                    )
-                    # If the account_addr is the Cork Vault address, then we need to attribute the
-                    # Ethena asset balances to the respective LV token holders
-                    if account_addr == psm_pool.pair_config.vault_addr and amount:
-                        vault_share_token_addr = psm_pool.pair_config.vault_share_token_addr
-                        vault = self.vault_balances_by_vault_share_token[
-                            vault_share_token_addr
-                        ]
-                        for (
-                            account_addr, account_shares
-                        ) in vault.shares_by_account.items():
-                            bal = account_bals.setdefault(account_addr, Decimal(0))
-                            qty = (
-                                amount
-                                * Decimal(account_shares)
-                                / Decimal(vault.total_supply)
-                            )
-                            account_bals[account_addr] = Decimal(bal) + qty
-                            print(
-                                "LVT-holder:", vault_share_token_addr, account_addr,
-                                "start:", bal,
-                                "in:", qty,
-                                "end:", account_bals[account_addr]
-                            )
-                    # If the account_addr is the UniV4 PoolManager address, then we need to
-                    # attribute the Ethena asset balances to the respective LP token holders
-                    elif psm_pool.term_config is not None and account_addr == psm_pool.term_config.amm_pool_addr and amount:
-                        tc = psm_pool.term_config
-                        lp_addr = tc.amm_lp_token_addr
-                        if lp_addr is not None:
-                            amm_pool = self.amm_balances_by_lp_token[lp_addr]
-                            amm_ta = cast(Tuple[int, int], amm_pool.total_assets)
-                            # If there are other Uniswap V4 pools which manage PSM-shares,
-                            if account_shares > amm_ta[1]:
-                                psm_ta = psm_pool.total_assets
-                                psm_ta_val = psm_ta[0] if isinstance(psm_ta, tuple) else psm_ta
-                                amount = (
-                                    Decimal(psm_ta_val)
-                                    * Decimal(amm_ta[1])
-                                    / Decimal(psm_pool.total_supply)
-                                )
-                            for (
-                                account_addr, account_shares
-                            ) in amm_pool.shares_by_account.items():
-                                # If the account_addr is the vault_addr, then we need to attribute the
-                                # Ethena asset balances to the respective LV token holders
-                                if account_addr == amm_pool.pair_config.vault_addr and amount:
-                                    vault_share_token_addr = amm_pool.pair_config.vault_share_token_addr
-                                    vault = self.vault_balances_by_vault_share_token[
-                                        vault_share_token_addr
-                                    ]
-                                    amount = (
-                                        amount
-                                        * Decimal(account_shares)
-                                        / Decimal(amm_pool.total_supply)
-                                    )
-                                    for (
-                                        account_addr, account_shares
-                                    ) in vault.shares_by_account.items():
-                                        bal = account_bals.setdefault(account_addr, Decimal(0))
-                                        qty = (
-                                            amount
-                                            * Decimal(account_shares)
-                                            / Decimal(vault.total_supply)
-                                        )
-                                        account_bals[account_addr] = Decimal(bal) + qty
-                                        print(
-                                            "LPT-LVT-holder:",
-                                            lp_addr, vault_share_token_addr, account_addr,
-                                            "start:", bal,
-                                            "in:", qty,
-                                            "end:", account_bals[account_addr]
-                                        )
-                                else:
-                                    bal = account_bals.setdefault(account_addr, Decimal(0))
-                                    qty = (
-                                        amount
-                                        * Decimal(account_shares)
-                                        / Decimal(amm_pool.total_supply)
-                                    )
-                                    account_bals[account_addr] = Decimal(bal) + qty
-                                    print(
-                                        "LPT-holder:", lp_addr, account_addr,
-                                        "start:", bal,
-                                        "in:", qty,
-                                        "end:", account_bals[account_addr]
-                                    )
-                    else:
-                        bal = account_bals.setdefault(account_addr, Decimal(0))
-                        account_bals[account_addr] = Decimal(bal) + amount
-                        print(
-                            "CT-holder:", account_addr,
-                            "start:", bal,
-                            "in:", amount,
-                            "end:", account_bals[account_addr]
-                        )
-
-            # Round off to 4 decimals
-            for account_addr, account_bal in account_bals.items():
-                account_bals[account_addr] = float(round(Decimal(account_bal) / Decimal(1e18), 4))
-
-            new_block_data[block] = {k: float(v) for k, v in account_bals.items()}
-            cache_copy_of_account_bals[block] = {k: float(v) for k, v in account_bals.items()}
+        new_block_data = self.replay_block_balances(cached_data, blocks, advance)
         return new_block_data
 
 
@@ -1,6 +1,6 @@
 import logging
-import subprocess
 import json
+from concurrent.futures import Future
 import requests
 
 from typing import Dict, List, Optional, Set
@@ -13,6 +13,7 @@ from constants.echelon import LENDING_CONTRACT_ADDRESS, XLPT_ORACLE_CONTRACT_ADD
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID as IntID
 from integrations.l2_delegation_integration import L2DelegationIntegration
+from utils.ts_worker import get_ts_worker_pool
 
 load_dotenv()
 
@@ -37,7 +38,7 @@ class EchelonAptosIntegration(L2DelegationIntegration):
         self.token_address = token_address
         self.market_address = market_address
         self.decimals = str(decimals)
-        self.echelon_ts_location = "ts/echelon_xlpt_balances.ts"
+        self.echelon_ts_script = "echelon_xlpt_balances"
 
     def get_l2_block_balances(
         self, cached_data: Dict[int, Dict[str, float]], blocks: List[int]
@@ -47,56 +48,43 @@ class EchelonAptosIntegration(L2DelegationIntegration):
         block_data: Dict[int, Dict[str, float]] = {}
         sorted_blocks = sorted(blocks)
 
-        # Populate block data from smallest to largest
+        # Dispatch every block to the TypeScript workers, then collect from smallest to largest
+        futures = {}
         for block in sorted_blocks:
             user_addresses = list(self.get_participants([block]))
-            result = self.get_participants_data(block, user_addresses[0:20])
+            futures[block] = self.submit_participants_data(block, user_addresses)
 
+        for block, future in futures.items():
             # Store the balances and cache the exchange rate
-            block_data[block] = result
+            block_data[block] = self.get_participants_result(future)
 
         return block_data
 
-    def get_participants_data(self, block, user_addresses=[]):
+    def submit_participants_data(self, block, user_addresses=[]) -> Future:
         print("Getting participants data for block", block)
+        return get_ts_worker_pool().submit(
+            self.echelon_ts_script,
+            [
+                LENDING_CONTRACT_ADDRESS,
+                self.market_address,
+                str(self.decimals),
+                str(block),
+                json.dumps(user_addresses),
+                XLPT_ORACLE_CONTRACT_ADDRESS,
+                SUSDE_USDC_TOKEN_ADDRESS,
+            ],
+        )
+
+    def get_participants_result(self, future: Future):
         try:
-            response = subprocess.run(
-                [
-                    "ts-node",
-                    self.echelon_ts_location,
-                    LENDING_CONTRACT_ADDRESS,
-                    self.market_address,
-                    str(self.decimals),
-                    str(block),
-                    json.dumps(user_addresses),
-                    XLPT_ORACLE_CONTRACT_ADDRESS,
-                    SUSDE_USDC_TOKEN_ADDRESS,
-                ],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # Debug output
-            print("TypeScript stdout:", response.stdout)
-            print("TypeScript stderr:", response.stderr)
-            
-            try:
-                result = json.loads(response.stdout)
-                return result  # Now returns dict with both balances and exchange rate
-            except json.JSONDecodeError as e:
-                print(f"JSON Decode Error: {e}")
-                print(f"Raw output: {response.stdout}")
-                raise
-                
-        except subprocess.CalledProcessError as e:
-            print(f"Process error: {e}")
-            print(f"stderr: {e.stderr}")
-            raise
+            return future.result()  # Now returns dict with both balances and exchange rate
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            print(f"TypeScript worker error: {e}")
             raise
 
+    def get_participants_data(self, block, user_addresses=[]):
+        return self.get_participants_result(self.submit_participants_data(block, user_addresses))
+
     def get_participants(self, blocks: Optional[List[int]] = None) -> Set[str]:
         block = blocks[0] if blocks else 0
         try:
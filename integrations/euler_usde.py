@@ -1,4 +1,5 @@
-import json
+import logging
+from typing import Dict, List
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
 from constants.euler import USDE_VAULT_ADDRESS
@@ -6,11 +7,14 @@ from integrations.integration import Integration
 from utils.web3_utils import (
     fetch_events_logs_with_retry,
     call_with_retry,
+    multicall_by_address,
     w3,
+    MULTICALL_ADDRESS,
 )
+from web3 import Web3
+from utils.abi import load_abi
 
-with open("abi/euler_evault.json") as f:
-    evault_abi = json.load(f)
+evault_abi = load_abi("euler_evault.json")
 
 
 class EulerIntegration(Integration):
@@ -43,6 +47,37 @@ class EulerIntegration(Integration):
 
         return asset_balance
 
+    def get_balances(self, users: List[str], block: int) -> Dict[str, float]:
+        balances: Dict[str, float] = {user: 0 for user in users}
+        etoken_balances = multicall_by_address(
+            w3,
+            MULTICALL_ADDRESS,
+            [(self.vault_contract, "balanceOf", [Web3.to_checksum_address(user)]) for user in users],
+            block,
+            allow_failure=True,
+        )
+        holders = [
+            (user, etoken_balance[0])
+            for user, etoken_balance in zip(users, etoken_balances)
+            if etoken_balance is not None and etoken_balance[0] > 0
+        ]
+        if not holders:
+            return balances
+
+        asset_balances = multicall_by_address(
+            w3,
+            MULTICALL_ADDRESS,
+            [(self.vault_contract, "convertToAssets", [etoken_balance]) for _, etoken_balance in holders],
+            block,
+            allow_failure=True,
+        )
+        for (user, _), asset_balance in zip(holders, asset_balances):
+            if asset_balance is None:
+                logging.error(f"Error getting balance for user {user} at block {block}")
+                continue
+            balances[user] = asset_balance[0]
+        return balances
+
     def get_participants(self, blocks: list[int] | None) -> set[str]:
         if self.participants is not None:
             return self.participants
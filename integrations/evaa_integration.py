@@ -4,7 +4,7 @@ from constants.evaa import EVAA_POOLS_MAP, EVAA_ENDPOINT, EVAA_USDE_START_BLOCK,
 
 from integrations.l2_delegation_integration import L2DelegationIntegration
 from integrations.integration_ids import IntegrationID
-from utils.web3_utils import get_block_date
+from utils.web3_utils import get_block_date, get_block_timestamps
 from utils.request_utils import requests_retry_session
 from utils.slack import slack_message
 from constants.summary_columns import SummaryColumn
@@ -39,6 +39,8 @@ class EvaaIntegration(L2DelegationIntegration):
         try:
             block_balances: Dict[int, Dict[str, float]] = {}
 
+            # resolve every block date with one batched header fetch
+            get_block_timestamps(self.chain, blocks)
             for block_number in blocks:
                 block_balances[block_number] = self.get_participants_data(block_number)
 
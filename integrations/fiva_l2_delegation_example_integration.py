@@ -4,7 +4,7 @@ from typing import Dict, List, Optional
 from constants.example_integrations import FIVA_EXAMPLE_USDE_START_BLOCK
 from constants.integration_token import Token
 from integrations.l2_delegation_integration import L2DelegationIntegration
-from utils.web3_utils import get_block_date
+from utils.web3_utils import get_block_date, get_block_timestamps
 from constants.chains import Chain
 from constants.summary_columns import SummaryColumn
 from integrations.integration_ids import IntegrationID
@@ -67,6 +67,8 @@ class FivaL2DelegationExampleIntegration(L2DelegationIntegration):
 
         data_per_block: Dict[int, Dict[str, float]] = {}
 
+        # resolve every block date with one batched header fetch
+        get_block_timestamps(self.chain, blocks)
         for target_block in blocks:
             if self.start_block > target_block or (
                 self.end_block and target_block > self.end_block
@@ -1,8 +1,12 @@
+from typing import Dict
+
+from web3 import Web3
+
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
 from integrations.integration import Integration
-from utils.web3_utils import call_with_retry, W3_BY_CHAIN
-from utils.fluid import vaultResolver_contract, vaultPositionResolver_contract
+from utils.web3_utils import W3_BY_CHAIN
+from utils.fluid import get_vaults_constants, get_vaults_positions
 from constants.fluid import sUSDe
 
 # covers all Fluid normal col SUSDE vaults.
@@ -20,73 +24,46 @@ class FluidIntegration(Integration):
             None,
         )
         self.blocknumber_to_susdeVaults = {}
+        self.balances_by_block: Dict[int, Dict[str, float]] = {}
 
     def get_balance(self, user: str, block: int) -> float:
-        balance = 0
         try:
-            userPositions, vaultEntireDatas = call_with_retry(
-                vaultResolver_contract.functions.positionsByUser(user), block
-            )
-            for i in range(len(userPositions)):
-                if (vaultEntireDatas[i][3][8][0] == sUSDe) and not (vaultEntireDatas[i][1]): # not smart col types
-                    balance += userPositions[i][9]
-            return balance / 1e18
+            return self.get_user_balances(block).get(Web3.to_checksum_address(user), 0)
         except Exception as e:
             return 0
 
+    def get_user_balances(self, block: int) -> Dict[str, float]:
+        """Balance of every position owner at `block`, derived from the positions of all relevant vaults."""
+        if block not in self.balances_by_block:
+            balances: Dict[str, float] = {}
+            positions_by_vault = get_vaults_positions(self.get_relevant_vaults(block), block)
+            for positions in positions_by_vault.values():
+                for position in positions:
+                    # position = (nftId, owner, supply, borrow)
+                    balances[position[1]] = balances.get(position[1], 0) + position[2]
+            self.balances_by_block[block] = {
+                owner: balance / 1e18 for owner, balance in balances.items()
+            }
+        return self.balances_by_block[block]
+
     def get_participants(self, blocks: list[int] | None) -> set[str]:
-        participants = []
+        participants = set()
         current_block = W3_BY_CHAIN[self.chain]["w3"].eth.get_block_number()
 
-        relevant_vaults = self.get_relevant_vaults(current_block)
-        relavantUserPositions = []
-
         try:
-            for vault in relevant_vaults:
-                relavantUserPositions += call_with_retry(
-                    vaultPositionResolver_contract.functions.getAllVaultPositions(
-                        vault
-                    ),
-                    current_block,
-                )
-            for userPosition in relavantUserPositions:
-                owner = userPosition[1]
-                if owner not in participants:
-                    participants.append(owner)
+            participants.update(self.get_user_balances(current_block))
         except Exception as e:
             print(f"Error: {str(e)}")
-        return set(participants)
+        return participants
 
     def get_relevant_vaults(self, block: int) -> list:
-        if block in self.blocknumber_to_susdeVaults:
-            return self.blocknumber_to_susdeVaults[block]
-
-        if self.blocknumber_to_susdeVaults != {}:
-            totalVaults = call_with_retry(
-                vaultResolver_contract.functions.getTotalVaults(), block
-            )
-            for block_number in self.blocknumber_to_susdeVaults:
-                totalVaults_at_block = call_with_retry(
-                    vaultResolver_contract.functions.getTotalVaults(), block_number
-                )
-                if totalVaults == totalVaults_at_block:
-                    self.blocknumber_to_susdeVaults[block] = (
-                        self.blocknumber_to_susdeVaults[block_number]
-                    )
-                    return self.blocknumber_to_susdeVaults[block_number]
-
-        vaults = call_with_retry(
-            vaultResolver_contract.functions.getAllVaultsAddresses(), block
-        )
-        relevantVaults = []
-        for vaultAddress in vaults:
-            vaultData = call_with_retry(
-                vaultResolver_contract.functions.getVaultEntireData(vaultAddress), block
-            )
-            if (vaultData[3][8][0] == sUSDe) and not (vaultData[1]): # not smart col types
-                relevantVaults.append(vaultAddress)
-        self.blocknumber_to_susdeVaults[block] = relevantVaults
-        return relevantVaults
+        if block not in self.blocknumber_to_susdeVaults:
+            self.blocknumber_to_susdeVaults[block] = [
+                vault.vault
+                for vault in get_vaults_constants(block)
+                if vault.supply_token0 == sUSDe and not vault.is_smart_col  # not smart col types
+            ]
+        return self.blocknumber_to_susdeVaults[block]
 
 
 if __name__ == "__main__":
@@ -1,14 +1,19 @@
+from typing import Dict, List
+
+from web3 import Web3
+
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
 from integrations.integration import Integration
-from utils.web3_utils import call_with_retry, W3_BY_CHAIN
+from utils.web3_utils import W3_BY_CHAIN
 from utils.fluid import (
-    vaultResolver_contract,
-    vaultPositionResolver_contract,
-    dexResolver_contract,
+    VaultConstants,
+    get_dexes_data,
+    get_smart_col_balance,
+    get_vaults_constants,
+    get_vaults_positions,
 )
 from constants.fluid import USDe
-import json
 
 # covers all Fluid smart col USDE vaults (LP positions)
 class FluidIntegration(Integration):
@@ -25,109 +30,55 @@ class FluidIntegration(Integration):
             None,
         )
         self.blocknumber_to_usdeVaults = {}
+        self.balances_by_block: Dict[int, Dict[str, float]] = {}
 
     def get_balance(self, user: str, block: int) -> float:
-        balance = 0
         try:
-            userPositions, vaultEntireDatas = call_with_retry(
-                vaultResolver_contract.functions.positionsByUser(user), block
-            )
-            dexEntireDatas = {}
-            for i in range(len(userPositions)):
-                if (vaultEntireDatas[i][3][8][0] == USDe or vaultEntireDatas[i][3][8][1] == USDe) and (vaultEntireDatas[i][1]): # ONLY smart col types
-                    # underlying dex as supply token in the vault
-                    # fetching the dex state to get the shares to tokens ratio
-                    dexAddress = vaultEntireDatas[i][3][6]
-                    if dexAddress not in dexEntireDatas:
-                        dexEntireDatas[dexAddress] = (
-                            dexResolver_contract.functions.getDexEntireData(dexAddress).call(
-                                block_identifier=block
-                            )
-                        )
-                    
-                    # For an example walkthrough see fluid_susde_smart.py
-
-                    # userShares =  userPositions[i][9]
-                    # token0PerSupplyShare = dexEntireDatas[dexAddress][7][-4]
-                    # token1PerSupplyShare = dexEntireDatas[dexAddress][7][-3]
-                    userPositionToken0 = userPositions[i][9] * dexEntireDatas[dexAddress][7][-4] / 1e18
-                    userPositionToken1 = userPositions[i][9] * dexEntireDatas[dexAddress][7][-3] / 1e18
-
-                    if (vaultEntireDatas[i][3][8][0] == USDe): 
-                        # token0 at the dex is USDe
-                        balance += userPositionToken0
-                        # lastStoredPrice = dexEntireDatas[dexAddress][4][0]
-                        userPositionToken1 = userPositionToken1 * 1e54 / dexEntireDatas[dexAddress][4][0] / 1e27
-                        # * 1e6 * numeratorPrecision / denominatorPrecision
-                        userPositionToken1 = userPositionToken1 * 1e6 * dexEntireDatas[dexAddress][2][2] / dexEntireDatas[dexAddress][2][3]
-
-                        balance += userPositionToken1
-                    else:
-                        # token1 at the dex is USDe
-                        balance += userPositionToken1
-                        # lastStoredPrice = dexEntireDatas[dexAddress][4][0]
-                        userPositionToken0 = userPositionToken0 * dexEntireDatas[dexAddress][4][0] / 1e27
-                        # * 1e6 * numeratorPrecision / denominatorPrecision
-                        userPositionToken0 = userPositionToken0 * 1e6 * dexEntireDatas[dexAddress][2][0] / dexEntireDatas[dexAddress][2][1]
-                    
-                        balance += userPositionToken1
-            return balance / 1e18
+            return self.get_user_balances(block).get(Web3.to_checksum_address(user), 0)
         except Exception as e:
             return 0
 
+    def get_user_balances(self, block: int) -> Dict[str, float]:
+        """Balance of every position owner at `block`, derived from the positions of all relevant vaults."""
+        if block not in self.balances_by_block:
+            vaults = self.get_relevant_vaults(block)
+            # underlying dex as supply token in the vault
+            # fetching the dex state to get the shares to tokens ratio
+            dexEntireDatas = get_dexes_data(list(dict.fromkeys(vault.supply for vault in vaults)), block)
+            positions_by_vault = get_vaults_positions([vault.vault for vault in vaults], block)
+
+            # For an example walkthrough see fluid_susde_smart.py
+
+            balances: Dict[str, float] = {}
+            for vault in vaults:
+                for position in positions_by_vault[vault.vault]:
+                    # position = (nftId, owner, supply, borrow), supply being the user's dex shares
+                    balances[position[1]] = balances.get(position[1], 0) + get_smart_col_balance(
+                        position[2], vault.supply_token0 == USDe, dexEntireDatas[vault.supply]
+                    )
+            self.balances_by_block[block] = {
+                owner: balance / 1e18 for owner, balance in balances.items()
+            }
+        return self.balances_by_block[block]
+
     def get_participants(self, blocks: list[int] | None) -> set[str]:
-        participants = []
+        participants = set()
         current_block = W3_BY_CHAIN[self.chain]["w3"].eth.get_block_number()
 
-        relevant_vaults = self.get_relevant_vaults(current_block)
-        relavantUserPositions = []
-
         try:
-            for vault in relevant_vaults:
-                relavantUserPositions += call_with_retry(
-                    vaultPositionResolver_contract.functions.getAllVaultPositions(
-                        vault
-                    ),
-                    current_block,
-                )
-            for userPosition in relavantUserPositions:
-                owner = userPosition[1]
-                if owner not in participants:
-                    participants.append(owner)
+            participants.update(self.get_user_balances(current_block))
         except Exception as e:
             print(f"Error: {str(e)}")
-        return set(participants)
-
-    def get_relevant_vaults(self, block: int) -> list:
-        if block in self.blocknumber_to_usdeVaults:
-            return self.blocknumber_to_usdeVaults[block]
-
-        if self.blocknumber_to_usdeVaults != {}:
-            totalVaults = call_with_retry(
-                vaultResolver_contract.functions.getTotalVaults(), block
-            )
-            for block_number in self.blocknumber_to_usdeVaults:
-                totalVaults_at_block = call_with_retry(
-                    vaultResolver_contract.functions.getTotalVaults(), block_number
-                )
-                if totalVaults == totalVaults_at_block:
-                    self.blocknumber_to_usdeVaults[block] = (
-                        self.blocknumber_to_usdeVaults[block_number]
-                    )
-                    return self.blocknumber_to_usdeVaults[block_number]
-
-        vaults = call_with_retry(
-            vaultResolver_contract.functions.getAllVaultsAddresses(), block
-        )
-        relevantVaults = []
-        for vaultAddress in vaults:
-            vaultData = call_with_retry(
-                vaultResolver_contract.functions.getVaultEntireData(vaultAddress), block
-            )
-            if (vaultData[3][8][0] == USDe or vaultData[3][8][1] == USDe) and (vaultData[1]): # ONLY smart col types
-                relevantVaults.append(vaultAddress)
-        self.blocknumber_to_usdeVaults[block] = relevantVaults
-        return relevantVaults
+        return participants
+
+    def get_relevant_vaults(self, block: int) -> List[VaultConstants]:
+        if block not in self.blocknumber_to_usdeVaults:
+            self.blocknumber_to_usdeVaults[block] = [
+                vault
+                for vault in get_vaults_constants(block)
+                if (vault.supply_token0 == USDe or vault.supply_token1 == USDe) and vault.is_smart_col  # ONLY smart col types
+            ]
+        return self.blocknumber_to_usdeVaults[block]
 
 
 if __name__ == "__main__":
@@ -5,14 +5,13 @@ from integrations.integration_ids import IntegrationID
 from constants.hyperdrive import (
     HYPERDRIVE_SUSDE_POOL_ADDRESS,
     HYPERDRIVE_SUSDE_POOL_DEPLOYMENT_BLOCK,
-    HYPERDRIVE_MORPHO_ABI,
 )
 from utils.hyperdrive import (
     get_hyperdrive_participants,
     get_pool_details,
     get_pool_positions,
 )
-from utils.web3_utils import w3
+from utils.abi import get_contract
 
 
 class Hyperdrive(Integration):
@@ -29,10 +28,11 @@ class Hyperdrive(Integration):
         )
         self.pool_ids = None
         self.pool_users = None
+        self.pool_pairs = None
         self.pool_positions = None
 
     def update_participants(self):
-        self.pool_users, self.pool_ids = get_hyperdrive_participants(
+        self.pool_users, self.pool_ids, self.pool_pairs = get_hyperdrive_participants(
             pool=HYPERDRIVE_SUSDE_POOL_ADDRESS,
             start_block=HYPERDRIVE_SUSDE_POOL_DEPLOYMENT_BLOCK,
         )
@@ -47,15 +47,13 @@ class Hyperdrive(Integration):
             if self.pool_users is None:
                 self.update_participants()
             # get pool positions
-            pool_contract = w3.eth.contract(
-                address=w3.to_checksum_address(HYPERDRIVE_SUSDE_POOL_ADDRESS),
-                abi=HYPERDRIVE_MORPHO_ABI,
+            pool_contract = get_contract(
+                Chain.ETHEREUM, HYPERDRIVE_SUSDE_POOL_ADDRESS, "IHyperdriveMorpho.json"
             )
             _, lp_rewardable_tvl, short_rewardable_tvl = get_pool_details(pool_contract)
             self.pool_positions = get_pool_positions(
                 pool_contract=pool_contract,
-                pool_users=self.pool_users,
-                pool_ids=self.pool_ids,
+                pool_pairs=self.pool_pairs,
                 lp_rewardable_tvl=lp_rewardable_tvl,
                 short_rewardable_tvl=short_rewardable_tvl,
                 block=block,
@@ -68,17 +66,15 @@ class Hyperdrive(Integration):
 
     def test_hyperdrive(self):
         self.update_participants()
-        pool_contract = w3.eth.contract(
-            address=w3.to_checksum_address(HYPERDRIVE_SUSDE_POOL_ADDRESS),
-            abi=HYPERDRIVE_MORPHO_ABI,
+        pool_contract = get_contract(
+            Chain.ETHEREUM, HYPERDRIVE_SUSDE_POOL_ADDRESS, "IHyperdriveMorpho.json"
         )
         vault_shares_balance, lp_rewardable_tvl, short_rewardable_tvl = (
             get_pool_details(pool_contract)
         )
         pool_positions = get_pool_positions(
             pool_contract=pool_contract,
-            pool_users=self.pool_users,
-            pool_ids=self.pool_ids,
+            pool_pairs=self.pool_pairs,
             lp_rewardable_tvl=lp_rewardable_tvl,
             short_rewardable_tvl=short_rewardable_tvl,
         )
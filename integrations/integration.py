@@ -8,7 +8,6 @@ from integrations.integration_ids import IntegrationID
 
 
 class Integration(ABC):
-
     def __init__(
         self,
         integration_id: IntegrationID,
@@ -39,6 +38,14 @@ class Integration(ABC):
     def get_balance(self, user: str, block: int) -> float:
         raise NotImplementedError
 
+    def get_balances(self, users: List[str], block: int) -> Dict[str, float]:
+        """Balances of many users at one block.
+
+        Defaults to one get_balance call per user. Integrations override it to read
+        pool wide values once per block and batch the per user reads through multicall.
+        """
+        return {user: self.get_balance(user, block) for user in users}
+
     def get_participants(
         self,
         blocks: Optional[List[int]],
@@ -1,7 +1,4 @@
 import logging
-import os
-import subprocess
-import json
 import time
 
 from typing import Dict, List
@@ -13,6 +10,7 @@ from constants.example_integrations import (
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID as IntID
 from integrations.l2_delegation_integration import L2DelegationIntegration
+from utils.ts_worker import get_ts_worker_pool
 
 load_dotenv()
 
@@ -39,7 +37,7 @@ class KaminoL2DelegationExampleIntegration(L2DelegationIntegration):
         self.token_address = token_address
         self.market_address = market_address
         self.decimals = str(decimals)
-        self.kamino_ts_location = "ts/kamino_collat.ts"
+        self.kamino_ts_script = "kamino_collat"
 
     def get_l2_block_balances(
         self, cached_data: Dict[int, Dict[str, float]], blocks: List[int]
@@ -62,22 +60,11 @@ class KaminoL2DelegationExampleIntegration(L2DelegationIntegration):
                 logging.info(
                     f"Getting participants data for Kamino l2 delegation example at block {block}... (Attempt {retry_count + 1}/{max_retries})"
                 )
-                response = subprocess.run(
-                    [
-                        "ts-node",
-                        os.path.join(
-                            os.path.dirname(__file__), "..", self.kamino_ts_location
-                        ),
-                        self.market_address,
-                        self.token_address,
-                        self.decimals,
-                    ],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                    env=os.environ.copy(),
+                # runs ts/kamino_collat.ts in a warm worker, the SDK and market are already loaded
+                balances = get_ts_worker_pool().run(
+                    self.kamino_ts_script,
+                    [self.market_address, self.token_address, self.decimals],
                 )
-                balances = json.loads(response.stdout)
                 return balances
             except Exception as e:
                 retry_count += 1
@@ -1,4 +1,4 @@
-from utils.web3_utils import W3_BY_CHAIN
+from utils.web3_utils import W3_BY_CHAIN, get_block_timestamp
 import logging
 
 from integrations.integration_ids import IntegrationID
@@ -43,9 +43,7 @@ class LyraIntegration(Integration):
                 integration_token=self.vault_data["integration_token"],  # type: ignore
                 bridge=self.vault_data["bridge"],  # type: ignore
                 vault_token=self.vault_data["vault_token"],  # type: ignore
-                timestamp=W3_BY_CHAIN[self.chain]["w3"].eth.get_block(block)[
-                    "timestamp"
-                ],
+                timestamp=get_block_timestamp(self.chain, block),
             )
 
         else:
@@ -1,8 +1,8 @@
-from copy import deepcopy
 import logging
 
 from typing import Dict, List
 from eth_typing import ChecksumAddress
+from web3.types import EventData
 from constants.chains import Chain
 from constants.morpho_susde_susds import (
     MORPHO_CONTRACT,
@@ -11,9 +11,11 @@ from constants.morpho_susde_susds import (
     PAGINATION_SIZE,
 )
 from constants.summary_columns import SummaryColumn
-from integrations.cached_balances_integration import CachedBalancesIntegration
+from integrations.cached_balances_integration import (
+    CachedBalancesIntegration,
+    WeiBalances,
+)
 from integrations.integration_ids import IntegrationID as IntID
-from utils.web3_utils import fetch_events_logs_with_retry
 
 
 class MorphoSusdeSusds(CachedBalancesIntegration):
@@ -31,6 +33,16 @@ class MorphoSusdeSusds(CachedBalancesIntegration):
             balance_multiplier=1,
         )
 
+    @staticmethod
+    def apply_supply(ledger: WeiBalances, supply: EventData):
+        recipient = supply["args"]["onBehalf"]
+        ledger[recipient] = ledger.get(recipient, 0) + supply["args"]["assets"]
+
+    @staticmethod
+    def apply_withdraw(ledger: WeiBalances, withdraw: EventData):
+        recipient = withdraw["args"]["onBehalf"]
+        ledger[recipient] = ledger.get(recipient, 0) - withdraw["args"]["assets"]
+
     def get_block_balances(
         self, cached_data: Dict[int, Dict[ChecksumAddress, float]], blocks: List[int]
     ) -> Dict[int, Dict[ChecksumAddress, float]]:
@@ -42,63 +54,33 @@ class MorphoSusdeSusds(CachedBalancesIntegration):
             )
             return new_block_data
 
-        sorted_blocks = sorted(blocks)
-        cache_copy: Dict[int, Dict[ChecksumAddress, float]] = deepcopy(cached_data)
-
-        for block in sorted_blocks:
-            # find the closest prev block in the data
-            # list keys parsed as ints and in descending order
-            sorted_existing_blocks = sorted(
-                cache_copy,
-                reverse=True,
-            )
-            # loop through the sorted blocks and find the closest previous block
-            prev_block = self.start_block
-            start = prev_block
-            bals = {}
-            for existing_block in sorted_existing_blocks:
-                if existing_block < block:
-                    prev_block = existing_block
-                    start = existing_block + 1
-                    bals = deepcopy(cache_copy[prev_block])
-                    break
-            # parse supply/withdraw events since and update bals
+        def advance(ledger: WeiBalances, from_block: int, to_block: int):
+            # parse supply/withdraw events since and update the ledger
             # NOTE: as per the morpho-blue EventsLib.sol comments,
             # `feeRecipient` receives supplied shares without any event,
             # so their sats are not accrued.
-            while start <= block:
-                to_block = min(start + PAGINATION_SIZE, block)
-
-                supplies = fetch_events_logs_with_retry(
-                    "Morpho-Borrow Supply with sUSDe",
-                    MORPHO_CONTRACT.events.SupplyCollateral(),
-                    start,
-                    to_block,
-                    filter={"id": MORPHO_MARKET_IDS},
-                )
-                for supply in supplies:
-                    recipient = supply["args"]["onBehalf"]
-                    if recipient not in bals:
-                        bals[recipient] = 0
-                    bals[recipient] += round(supply["args"]["assets"] / 10**18, 4)
+            self.fold_events(
+                ledger,
+                "Morpho-Borrow Supply with sUSDe",
+                MORPHO_CONTRACT.events.SupplyCollateral(),
+                from_block,
+                to_block,
+                self.apply_supply,
+                PAGINATION_SIZE,
+                filter={"id": MORPHO_MARKET_IDS},
+            )
+            self.fold_events(
+                ledger,
+                "Morpho-Borrow Supply with sUSDe",
+                MORPHO_CONTRACT.events.WithdrawCollateral(),
+                from_block,
+                to_block,
+                self.apply_withdraw,
+                PAGINATION_SIZE,
+                filter={"id": MORPHO_MARKET_IDS},
+            )
 
-                withdraws = fetch_events_logs_with_retry(
-                    "Morpho-Borrow Supply with sUSDe",
-                    MORPHO_CONTRACT.events.WithdrawCollateral(),
-                    start,
-                    to_block,
-                    filter={"id": MORPHO_MARKET_IDS},
-                )
-                for withdraw in withdraws:
-                    recipient = withdraw["args"]["onBehalf"]
-                    if recipient not in bals:
-                        bals[recipient] = 0
-                    bals[recipient] -= round(withdraw["args"]["assets"] / 10**18, 4)
-                    if bals[recipient] < 0:
-                        bals[recipient] = 0
-                start = to_block + 1
-            new_block_data[block] = bals
-            cache_copy[block] = bals
+        new_block_data = self.replay_wei_balances(cached_data, blocks, advance)
         return new_block_data
 
 
@@ -1,7 +1,8 @@
-from typing import Callable
+from typing import Callable, Dict, List
 import logging
 
 from eth_typing import ChecksumAddress
+from web3 import Web3
 from web3.contract import Contract
 
 from constants.chains import Chain
@@ -11,7 +12,11 @@ from utils import pendle
 from integrations.integration_ids import IntegrationID
 from constants.summary_columns import SummaryColumn
 from utils.pendle import get_pendle_participants_v3
-from utils.web3_utils import call_with_retry
+from utils.web3_utils import (
+    MULTICALL_ADDRESS_BY_CHAIN,
+    call_with_retry,
+    multicall_by_address,
+)
 
 
 class PendleLPTIntegration(Integration):
@@ -79,6 +84,40 @@ class PendleLPTIntegration(Integration):
         print(round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4))
         return round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4)
 
+    def get_balances(self, users: List[str], block: int) -> Dict[str, float]:
+        logging.info(
+            f"[{self.integration_id.get_description()}] Getting balances for {len(users)} users at block {block}"
+        )
+        # pool wide values are read once, only activeBalance depends on the user
+        sy_bal, total_active_supply = (
+            res[0]
+            for res in multicall_by_address(
+                self.lp_contract.w3,
+                MULTICALL_ADDRESS_BY_CHAIN[self.chain],
+                [
+                    (self.sy_contract, "balanceOf", [self.lp_contract.address]),
+                    (self.lp_contract, "totalActiveSupply", []),
+                ],
+                block,
+            )
+        )
+        if sy_bal == 0 or total_active_supply == 0:
+            return {user: 0 for user in users}
+
+        lpt_bals = multicall_by_address(
+            self.lp_contract.w3,
+            MULTICALL_ADDRESS_BY_CHAIN[self.chain],
+            [
+                (self.lp_contract, "activeBalance", [Web3.to_checksum_address(user)])
+                for user in users
+            ],
+            block,
+        )
+        return {
+            user: round(((sy_bal / 10**18) * lpt_bal[0]) / total_active_supply, 4)
+            for user, lpt_bal in zip(users, lpt_bals)
+        }
+
     def get_participants(self, blocks: list[int] | None) -> set[str]:
         if self.participants is not None:
             return self.participants
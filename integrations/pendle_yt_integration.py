@@ -1,7 +1,8 @@
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 import logging
 
 from eth_typing import ChecksumAddress
+from web3 import Web3
 from web3.contract import Contract
 
 from constants.chains import Chain
@@ -9,7 +10,11 @@ from integrations.integration import Integration
 from integrations.integration_ids import IntegrationID
 from constants.summary_columns import SummaryColumn
 from utils.pendle import get_pendle_participants_v3
-from utils.web3_utils import call_with_retry
+from utils.web3_utils import (
+    MULTICALL_ADDRESS_BY_CHAIN,
+    call_with_retry,
+    multicall_by_address,
+)
 
 
 class PendleYTIntegration(Integration):
@@ -53,6 +58,21 @@ class PendleYTIntegration(Integration):
             return 0
         return round(res / 10**18, 4)
 
+    def get_balances(self, users: List[str], block: int) -> Dict[str, float]:
+        logging.info(f"[Pendle YT] Getting balances for {len(users)} users at block {block}")
+        results = multicall_by_address(
+            self.yt_contract.w3,
+            MULTICALL_ADDRESS_BY_CHAIN[self.chain],
+            [
+                (self.yt_contract, "balanceOf", [Web3.to_checksum_address(user)])
+                for user in users
+            ],
+            block,
+        )
+        return {
+            user: round(res[0] / 10**18, 4) for user, res in zip(users, results)
+        }
+
     def get_participants(self, blocks: list[int] | None = None) -> set[str]:
         if self.participants is not None:
             return self.participants
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
 from integrations.integration import Integration
@@ -9,9 +11,15 @@ from constants.ramses import (
 )
 from constants.summary_columns import SummaryColumn
 from utils.ramses import nfp_manager, pool
-from utils.web3_utils import w3_arb, fetch_events_logs_with_retry, call_with_retry
+from utils.concentrated_liquidity import get_amounts_for_positions, get_nfp_positions
+from utils.web3_utils import (
+    w3_arb,
+    fetch_events_logs_with_retry,
+    call_with_retry,
+    multicall_by_address,
+    MULTICALL_ADDRESS_BY_CHAIN,
+)
 from web3 import Web3
-import math
 
 
 class Ramses(Integration):
@@ -24,92 +32,56 @@ class Ramses(Integration):
             20,
             1,
         )
+        self.sqrt_price_by_block: Dict[int, int] = {}
 
-    def calculate_sqrt_price(self, tick):
-        return math.sqrt(1.0001**tick) * (2**96)
-
-    def calculate_token_amounts(
-        self,
-        liquidity,
-        current_tick,
-        lower_tick,
-        upper_tick,
-        sqrt_price_x96,
-        decimals0,
-        decimals1,
-    ):
-        sqrt_price_current = sqrt_price_x96 / (2**96)
-        sqrt_price_lower = self.calculate_sqrt_price(lower_tick) / (2**96)
-        sqrt_price_upper = self.calculate_sqrt_price(upper_tick) / (2**96)
-
-        if current_tick < lower_tick:
-            amount0 = liquidity * (1 / sqrt_price_lower - 1 / sqrt_price_upper)
-            amount1 = 0
-        elif current_tick < upper_tick:
-            amount0 = liquidity * (1 / sqrt_price_current - 1 / sqrt_price_upper)
-            amount1 = liquidity * (sqrt_price_current - sqrt_price_lower)
-        else:
-            amount0 = 0
-            amount1 = liquidity * (sqrt_price_upper - sqrt_price_lower)
-
-        amount0_adjusted = amount0 / (10**decimals0)
-        amount1_adjusted = amount1 / (10**decimals1)
-
-        return max(amount0_adjusted, 0), max(amount1_adjusted, 0)
+    def get_sqrt_price(self, block: int) -> int:
+        """Pool sqrtPriceX96 at `block`, read once per block for all users."""
+        if block not in self.sqrt_price_by_block:
+            self.sqrt_price_by_block[block] = call_with_retry(
+                pool.functions.slot0(),
+                block,
+            )[0]
+        return self.sqrt_price_by_block[block]
 
     def get_balance(self, user: str, block: int) -> float:
-        # get pool current tick
-        current_tick = call_with_retry(
-            pool.functions.slot0(),
-            block,
-        )
-
-        sqrtPriceX96 = current_tick[0]
-        tick = current_tick[1]
+        sqrtPriceX96 = self.get_sqrt_price(block)
 
         balance = call_with_retry(
             nfp_manager.functions.balanceOf(user),
             block,
         )
-
-        print(f"User NFT balance: {balance}")
-
-        positions = []
-
-        for i in range(balance):
-            tokenOfOwnerByIndex = call_with_retry(
-                nfp_manager.functions.tokenOfOwnerByIndex(user, i),
+        if balance == 0:
+            return 0
+
+        multicall_address = MULTICALL_ADDRESS_BY_CHAIN[Chain.ARBITRUM]
+        token_ids = [
+            result[0]
+            for result in multicall_by_address(
+                w3_arb,
+                multicall_address,
+                [
+                    (nfp_manager, "tokenOfOwnerByIndex", [user, i])
+                    for i in range(balance)
+                ],
                 block,
             )
+        ]
+        positions = get_nfp_positions(
+            w3_arb, multicall_address, nfp_manager, token_ids, block
+        )
 
-            positions.append(tokenOfOwnerByIndex)
-
-        print(f"User positions: {positions}")
-
-        total_balance = 0
-
-        for position in positions:
-            position_info = call_with_retry(
-                nfp_manager.functions.positions(position),
-                block,
-            )
-            print(f"Position info: {position_info}")
-            token0 = position_info[2]
-            token1 = position_info[3]
-            tickLower = position_info[5]
-            tickUpper = position_info[6]
-            liquidity = position_info[7]
-
-            if token0 == ARBITRUM_USDE_TOKEN_ADDRESS:
-                # Calculate token amounts for this position
-                amount0, amount1 = self.calculate_token_amounts(
-                    liquidity, tick, tickLower, tickUpper, sqrtPriceX96, 18, 18
-                )
-
-                # Assuming we want to sum up the USDe amounts
-                total_balance += amount0
-
-        return total_balance
+        # (tickLower, tickUpper, liquidity) of the positions with USDe as token0
+        usde_positions = [
+            (position_info[5], position_info[6], position_info[7])
+            for position_info in positions.values()
+            if position_info is not None and position_info[2] == ARBITRUM_USDE_TOKEN_ADDRESS
+        ]
+
+        # Sum up the USDe (token0) amounts, USDe is 18 decimals
+        return sum(
+            amount0
+            for amount0, _ in get_amounts_for_positions(sqrtPriceX96, usde_positions)
+        ) / (10**18)
 
     def get_participants(self, blocks: list[int] | None = None) -> set[str]:
         page_size = 999
@@ -7,7 +7,8 @@ from web3 import Web3
 from eth_typing import ChecksumAddress
 
 import math
-from utils.web3_utils import w3, fetch_events_logs_with_retry, fetch_transaction_receipt_with_retry, call_with_retry
+from utils.web3_utils import fetch_events_logs_with_retry, fetch_transaction_receipt_with_retry, call_with_retry
+from utils.abi import get_event_topic
 from constants.rumpel import KPSATS3_SENA_UNIV3_POOL_DEPLOYED_BLOCK, KPSATS3_SENA_UNIV3_POOL_CONTRACT, UNIV3_NONFUNGIBLE_POSITION_MANAGER_CONTRACT, UNIV3_NONFUNGUBLE_POSITION_MANAGER_ADDRESS, KPSAT3_ADDRESS, SENA_ADDRESS
 
 def calculate_lp_tokens(tick, tick_lower, tick_upper, sqrt_price, liquidity):
@@ -83,10 +84,7 @@ class RumpelIntegration(
                     )
             
             lp_positions = set()
-            increase_liquidity_event = UNIV3_NONFUNGIBLE_POSITION_MANAGER_CONTRACT.events.IncreaseLiquidity()
-            increase_liquidity_param_types = [param['type'] for param in increase_liquidity_event.abi['inputs']]
-            increase_liquidity_signature = f"{increase_liquidity_event.event_name}({','.join(increase_liquidity_param_types)})"
-            topic_hash = w3.keccak(text=increase_liquidity_signature).hex()
+            topic_hash = get_event_topic("univ3_nonfungible_position_manager.json", "IncreaseLiquidity")
 
             # get the IncreaseLiquidity event from the NonFungiblePositionManager Increase Liquidity Event
             # dev: if the tx updates multiple pools, this will include out of scope positions.
@@ -94,7 +92,7 @@ class RumpelIntegration(
             for mint in mints:
                 tx = fetch_transaction_receipt_with_retry(Chain.ETHEREUM, mint["transactionHash"].hex());
                 for log in tx.logs:
-                    if(log.topics[0].hex() == topic_hash):
+                    if(log.topics[0] == topic_hash):
                         token_id = int.from_bytes(log.topics[1], 'big')
                         lp_positions.add(token_id);
 
@@ -13,7 +13,13 @@ from constants.sentiment import (
 from integrations.cached_balances_integration import CachedBalancesIntegration
 from integrations.integration_ids import IntegrationID
 from utils.slack import slack_message
-from utils.web3_utils import HYPEREVM_NODE_URL
+from utils.web3_utils import (
+    HYPEREVM_NODE_URL,
+    MULTICALL_ADDRESS_BY_CHAIN,
+    fetch_events_logs_in_range,
+    multicall_by_address,
+    pooled_http_provider,
+)
 
 # SuperPool ABI for balanceOf, totalSupply, Transfer events
 SUPERPOOL_ABI = [
@@ -117,7 +123,7 @@ class SentimentIntegration(CachedBalancesIntegration):
             excluded_addresses=excluded_addresses
         )
         # Initialize Web3 provider - use HYPEREVM_NODE_URL from environment variables
-        self.w3 = Web3(Web3.HTTPProvider(HYPEREVM_NODE_URL))
+        self.w3 = Web3(pooled_http_provider(HYPEREVM_NODE_URL, Chain.HYPEREVM))
         if not self.w3.is_connected():
             logging.error(f"Failed to connect to RPC at {HYPEREVM_NODE_URL}")
             raise ConnectionError(f"Could not connect to HyperEVM RPC at {HYPEREVM_NODE_URL}")
@@ -136,11 +142,14 @@ class SentimentIntegration(CachedBalancesIntegration):
         logging.info(f"[Sentiment integration] Getting Transfer events from block {from_block} to {to_block}")
         
         try:
-            # Create transfer event signature
-            transfer_event = self.superpool_contract.events.Transfer
-            
-            # Get all transfer events in the block range
-            events = transfer_event.get_logs(fromBlock=from_block, toBlock=to_block)  # type: ignore[attr-defined]
+            # Get all transfer events in the block range, letting the fetcher size the windows
+            events = fetch_events_logs_in_range(
+                "Sentiment SuperPool transfers",
+                self.superpool_contract.events.Transfer(),
+                from_block,
+                to_block,
+                initial_range=10000,
+            )
             
             # Extract unique addresses from 'from' and 'to' fields
             addresses = set()
@@ -166,16 +175,10 @@ class SentimentIntegration(CachedBalancesIntegration):
             # If the cache is empty, get all historical holders
             logging.info("[Sentiment integration] Initializing holder cache")
             try:
-                # Chunk size for event lookups (to avoid exceeding block range limits)
-                chunk_size = 10000
-                
-                # Process block range in chunks
-                start = SENTIMENT_USDE_SUPERPOOL_START_BLOCK
-                while start < latest_block:
-                    end = min(start + chunk_size, latest_block)
-                    new_addresses = self.get_transfer_events(start, end)
-                    self.known_holders.update(new_addresses)
-                    start = end + 1
+                # The transfer event scan adapts its block range to the provider limits
+                self.known_holders.update(
+                    self.get_transfer_events(SENTIMENT_USDE_SUPERPOOL_START_BLOCK, latest_block)
+                )
                     
                 logging.info(f"[Sentiment integration] Found {len(self.known_holders)} historical holders")
                 
@@ -195,34 +198,46 @@ class SentimentIntegration(CachedBalancesIntegration):
             return results
             
         try:
-            # Fall back to individual queries instead of multicall
-            # This simplifies the code and avoids decoding issues
-            for address in addresses:
-                try:
-                    # Get SuperPool token shares balance
-                    balance = self.superpool_contract.functions.balanceOf(address).call(
-                        block_identifier=block_number
-                    )
-                    if balance > 0:
-                        # Convert SuperPool shares to underlying USDE amount using previewRedeem
-                        usde_amount = self.superpool_contract.functions.previewRedeem(balance).call(
-                            block_identifier=block_number
-                        )
-                        # Normalize by dividing by 1e18
-                        usde_balance = float(usde_amount) / 1e18
-                        results[address] = usde_balance
-                except Exception as e:
-                    logging.error(f"Error getting balance for address {address}: {e}")
+            multicall_address = MULTICALL_ADDRESS_BY_CHAIN[Chain.HYPEREVM]
+            # Get SuperPool token shares balances, a failed call skips that address only
+            shares = multicall_by_address(
+                self.w3,
+                multicall_address,
+                [(self.superpool_contract, "balanceOf", [address]) for address in addresses],
+                block_identifier=block_number,
+                allow_failure=True,
+            )
+            holders = [
+                (address, result[0])
+                for address, result in zip(addresses, shares)
+                if result is not None and result[0] > 0
+            ]
+            if not holders:
+                return results
+
+            # Convert SuperPool shares to underlying USDE amounts using previewRedeem
+            usde_amounts = multicall_by_address(
+                self.w3,
+                multicall_address,
+                [(self.superpool_contract, "previewRedeem", [balance]) for _, balance in holders],
+                block_identifier=block_number,
+                allow_failure=True,
+            )
+            for (address, _), usde_amount in zip(holders, usde_amounts):
+                if usde_amount is None:
+                    logging.error(f"Error getting balance for address {address} at block {block_number}")
                     continue
-                    
+                # Normalize by dividing by 1e18
+                results[address] = float(usde_amount[0]) / 1e18
+
             return results
-                
+
         except Exception as e:
             error_msg = f"Error batch getting balances at block {block_number}: {e}"
             logging.error(error_msg)
             slack_message(error_msg)
             return {}
-        
+
     def get_holders_for_block(self, block_number: int) -> Dict[ChecksumAddress, float]:
         """Gets all holders and their balances for a specific block."""
         logging.info(f"[Sentiment integration] Getting holders for block {block_number}")
@@ -235,19 +250,8 @@ class SentimentIntegration(CachedBalancesIntegration):
             if not self.known_holders:
                 return {}
                 
-            # Use batch queries to efficiently get balances for all holders
-            # Process in chunks to avoid request size limits
-            all_holders = list(self.known_holders)
-            holders_data: Dict[ChecksumAddress, float] = {}
-            
-            # Process in chunks of 100 addresses
-            chunk_size = 100
-            for i in range(0, len(all_holders), chunk_size):
-                chunk = all_holders[i:i+chunk_size]
-                chunk_balances = self.batch_get_balances(chunk, block_number)
-                holders_data.update(chunk_balances)
-                
-            return holders_data
+            # Multicall batches the holders itself, so all of them are read in one go
+            return self.batch_get_balances(list(self.known_holders), block_number)
             
         except Exception as e:
             error_msg = f"Error fetching Sentiment USDE SuperPool holders for block {block_number}: {e}"
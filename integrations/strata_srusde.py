@@ -1,10 +1,9 @@
 import logging
-import json
-from copy import deepcopy
 from typing import Dict, List, Optional, Set, TypedDict, Any
 from eth_typing import ChecksumAddress
 from web3 import Web3
 from web3.contract import Contract
+from web3.types import EventData
 from constants.chains import Chain
 from constants.example_integrations import PAGINATION_SIZE
 from constants.summary_columns import SummaryColumn
@@ -13,13 +12,15 @@ from constants.strata import (
 )
 from integrations.cached_balances_integration import CachedBalancesIntegration
 from integrations.integration_ids import IntegrationID
+from utils.strata import prefetch_tranche_pps
 from utils.web3_utils import (
     ETH_NODE_URL,
     call_with_retry,
-    fetch_events_logs_with_retry,
+    pooled_http_provider,
 )
+from utils.abi import load_abi
 
-ERC4626_ABI = json.loads(open("abi/ERC4626_abi.json").read())
+ERC4626_ABI = load_abi("ERC4626_abi.json")
 
 class StrataSrUSDeIntegration(CachedBalancesIntegration):
     def __init__(
@@ -41,7 +42,7 @@ class StrataSrUSDeIntegration(CachedBalancesIntegration):
             excluded_addresses=excluded_addresses
         )
         # Initialize Web3 provider - use ETH_NODE_URL from environment variables
-        self.w3 = Web3(Web3.HTTPProvider(rpc))
+        self.w3 = Web3(pooled_http_provider(rpc, chain))
         if not self.w3.is_connected():
             logging.error(f"Failed to connect to RPC at {ETH_NODE_URL}")
             raise ConnectionError(f"Could not connect to Ethereum RPC at {ETH_NODE_URL}")
@@ -124,6 +125,20 @@ class StrataSrUSDeIntegration(CachedBalancesIntegration):
         return balances_shares
 
 
+    @staticmethod
+    def apply_transfer(balances: Dict[ChecksumAddress, float], transfer: EventData):
+        sender = transfer["args"]["from"]
+        recipient = transfer["args"]["to"]
+        if recipient not in balances:
+            balances[recipient] = 0
+        if sender not in balances:
+            balances[sender] = 0
+
+        amount_tranche = transfer["args"]["value"]
+        amount = round(amount_tranche / 10**18, 6)
+        balances[sender] -= min(amount, balances[sender])
+        balances[recipient] += amount
+
     def get_block_balances(
         self, cached_data: Dict[int, Dict[ChecksumAddress, float]], blocks: List[int]
     ) -> Dict[int, Dict[ChecksumAddress, float]]:
@@ -147,59 +162,34 @@ class StrataSrUSDeIntegration(CachedBalancesIntegration):
         if not blocks:
             return new_block_data
 
-        blocks = sorted(blocks)
-
-
-        cache_copy: Dict[int, Dict[ChecksumAddress, float]] = deepcopy(cached_data)
-        # convert cached data to tokens
-        cache_copy = {block: self.convert_block_balances_to_shares(balances, block) for block, balances in cache_copy.items()}
+        if not hasattr(self, "_pps_cache"):
+            self._pps_cache: dict[int, float] = {}
+        prefetch_tranche_pps(
+            self.w3, self.contract_tranche, self.contract_sUSDe, self._pps_cache, blocks
+        )
 
-        for block in blocks:
-            # find the closest prev block in the data
-            # list keys parsed as ints and in descending order
-            sorted_existing_blocks = sorted(
-                cache_copy,
-                reverse=True,
-            )
-            # loop through the sorted blocks and find the closest previous block
-            prev_block = self.start_block
-            start = prev_block
-            balances = {}
-            for existing_block in sorted_existing_blocks:
-                if existing_block < block:
-                    prev_block = existing_block
-                    start = existing_block + 1
-                    balances = deepcopy(cache_copy[prev_block])
-                    break
+        def advance(balances: Dict[ChecksumAddress, float], from_block: int, to_block: int):
             # parse transfer events since and update balances
-            while start <= block:
-                to_block = min(start + PAGINATION_SIZE, block)
-                transfers = fetch_events_logs_with_retry(
-                    "srUSDe Token transfers",
-                    self.contract_tranche.events.Transfer(),
-                    start,
-                    to_block,
-                )
-                for transfer in transfers:
-                    sender = transfer["args"]["from"]
-                    recipient = transfer["args"]["to"]
-                    if recipient not in balances:
-                        balances[recipient] = 0
-                    if sender not in balances:
-                        balances[sender] = 0
-
-                    amount_tranche = transfer["args"]["value"]
-                    amount = round(amount_tranche / 10**18, 6)
-                    balances[sender] -= min(amount, balances[sender])
-                    balances[recipient] += amount
-
-                start = to_block + 1
-
+            self.fold_events(
+                balances,
+                "srUSDe Token transfers",
+                self.contract_tranche.events.Transfer(),
+                from_block,
+                to_block,
+                self.apply_transfer,
+                PAGINATION_SIZE,
+            )
             balances.pop(Web3.to_checksum_address('0x0000000000000000000000000000000000000000'), None)
-            new_block_data[block] = self.convert_block_balances_to_assets(balances, block)
-            cache_copy[block] = balances
-        return new_block_data
 
+        # cached data is stored in sUSDe, so the running state is kept in tranche shares
+        new_block_data = self.replay_block_balances(
+            cached_data,
+            blocks,
+            advance,
+            load_cached=self.convert_block_balances_to_shares,
+            snapshot=self.convert_block_balances_to_assets,
+        )
+        return new_block_data
 
 
 if __name__ == "__main__":
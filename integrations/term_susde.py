@@ -1,9 +1,9 @@
-import requests
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
 from constants.integration_token import Token
 from constants.summary_columns import SummaryColumn
 from integrations.integration import Integration
+from utils.subgraph import paginate_subgraph, query_subgraph
 from web3 import Web3
 
 ###############################################################################
@@ -12,77 +12,98 @@ from web3 import Web3
 
 term_finance_subgraph_url_mainnet = "https://public-graph-proxy.mainnet.termfinance.io"
 
-borrower_balance_query = """{{
+borrower_balance_query = """
+query BorrowerBalance($collateralToken: String!, $borrower: String!, $block: Int!) {
     termRepoCollaterals(
-        where: {{
-            collateralToken: "{collateralToken}", 
-            repoExposure_: {{
-                borrower: "{borrower}"
-            }}
-        }},
-        block: {{
-            number: {block}
-        }}
-    ) {{
-        repoExposure {{
+        first: 1000,
+        where: {
+            collateralToken: $collateralToken,
+            repoExposure_: {
+                borrower: $borrower
+            }
+        },
+        block: {
+            number: $block
+        }
+    ) {
+        repoExposure {
             borrower
-        }}
+        }
         amountLocked
-    }}
+    }
     termBidCollaterals(
-        where: {{
-            collateralToken: "{collateralToken}", 
-            bid_: {{
-                bidder: "{borrower}",
+        first: 1000,
+        where: {
+            collateralToken: $collateralToken,
+            bid_: {
+                bidder: $borrower,
                 assignedAmount: 0,
                 locked: true
-            }}
-        }},
-        block: {{
-            number: {block}
-        }}
-    ) {{
-        bid {{
+            }
+        },
+        block: {
+            number: $block
+        }
+    ) {
+        bid {
             bidder
-        }}
+        }
         collateralToken
         amount
-    }}
-}}
+    }
+}
 """
 
-participants_query = """{{
+repo_collaterals_query = """
+query RepoCollaterals($first: Int!, $lastId: String!, $collateralToken: String!) {
     termRepoCollaterals(
-        where: {{
-            collateralToken: "{collateralToken}",
+        first: $first,
+        where: {
+            collateralToken: $collateralToken,
             amountLocked_gt: 0,
-        }},
-    ) {{
-        repoExposure {{
+            id_gt: $lastId
+        },
+        orderBy: id,
+        orderDirection: asc
+    ) {
+        id
+        repoExposure {
             borrower
-        }}
+        }
         amountLocked
-    }}
+    }
+}
+"""
+
+bid_collaterals_query = """
+query BidCollaterals($first: Int!, $lastId: String!, $collateralToken: String!) {
     termBidCollaterals(
-        where: {{
-            collateralToken: "{collateralToken}", 
-            bid_: {{
+        first: $first,
+        where: {
+            collateralToken: $collateralToken,
+            bid_: {
                 assignedAmount: 0,
                 locked: true
-            }}
-        }},
-    ) {{
-        bid {{
+            },
+            id_gt: $lastId
+        },
+        orderBy: id,
+        orderDirection: asc
+    ) {
+        id
+        bid {
             bidder
-        }}
+        }
         collateralToken
         amount
-    }}
-}}
+    }
+}
 """
 
-repo_lockers_query = """{
-    termRepos(first: 5000) {
+repo_lockers_query = """
+query TermRepos($first: Int!, $lastId: String!) {
+    termRepos(first: $first, where: {id_gt: $lastId}, orderBy: id, orderDirection: asc) {
+        id
         termRepoLocker
     }
 }
@@ -95,20 +116,6 @@ collateral_token_addresses = {
 }
 
 
-# Helper for making graphql queries
-def fetch_data(url, query):
-    response = requests.post(url, json={"query": query})
-    if response.status_code == 200:
-        response_json = response.json()
-        if "data" not in response_json:
-            print(f"Query failed with response: {response_json}")
-            return None
-        return response_json["data"]
-    else:
-        print(f"Query failed with status code {response.status_code}")
-        return None
-
-
 ###############################################################################
 # TermFinance integration #####################################################
 ###############################################################################
@@ -116,14 +123,11 @@ def fetch_data(url, query):
 
 class TermFinanceIntegration(Integration):
     def __init__(self):
-        repo_lockers_response = fetch_data(
-            url=term_finance_subgraph_url_mainnet,
-            query=repo_lockers_query,
-        )
         repo_lockers = set()
-        if repo_lockers_response is not None:
-            for result in repo_lockers_response["termRepos"]:
-                repo_lockers.add(Web3.to_checksum_address(result["termRepoLocker"]))
+        for result in paginate_subgraph(
+            term_finance_subgraph_url_mainnet, repo_lockers_query, "termRepos"
+        ):
+            repo_lockers.add(Web3.to_checksum_address(result["termRepoLocker"]))
         super().__init__(
             integration_id=IntegrationID.TERM_SUSDE,
             start_block=16380765,
@@ -138,45 +142,45 @@ class TermFinanceIntegration(Integration):
 
     def get_balance(self, user: str, block: int) -> float:
         # Make two queries: one to get borrower repo collateral and one to get borrower bid collateral
-        balance_results = fetch_data(
-            url=term_finance_subgraph_url_mainnet,
-            query=borrower_balance_query.format(
-                collateralToken=collateral_token_addresses[self.get_token()],
-                borrower=user,
-                block=block,
-            ),
+        balance_results = query_subgraph(
+            term_finance_subgraph_url_mainnet,
+            borrower_balance_query,
+            {
+                "collateralToken": collateral_token_addresses[self.get_token()],
+                "borrower": user,
+                "block": block,
+            },
         )
 
         # Add the results together (amount + amountLocked) to get the total balance
         total_balance = 0
-        if balance_results is not None:
-            for result in balance_results["termRepoCollaterals"]:
-                total_balance += int(result["amountLocked"])
-            for result in balance_results["termBidCollaterals"]:
-                total_balance += int(result["amount"])
-        else:
-            print(f"Failed to get balance for user {user} at block {block}")
+        for result in balance_results["termRepoCollaterals"]:
+            total_balance += int(result["amountLocked"])
+        for result in balance_results["termBidCollaterals"]:
+            total_balance += int(result["amount"])
 
         return total_balance
 
     def get_participants(self, blocks: list[int] | None) -> set[str]:
-        # Make two queries: one to get borrower repo collateral and one to get borrower bid collateral
-        participants_results = fetch_data(
-            url=term_finance_subgraph_url_mainnet,
-            query=participants_query.format(
-                collateralToken=collateral_token_addresses[self.get_token()],
-            ),
-        )
+        # Page through borrower repo collateral and borrower bid collateral
+        variables = {"collateralToken": collateral_token_addresses[self.get_token()]}
 
         # Build a set of all possible borrowers (de-duplicating them during set add)
         participants = set()
-        if participants_results is not None:
-            for result in participants_results["termRepoCollaterals"]:
-                participants.add(result["repoExposure"]["borrower"])
-            for result in participants_results["termBidCollaterals"]:
-                participants.add(result["bid"]["bidder"])
-        else:
-            print("Failed to get participants")
+        for result in paginate_subgraph(
+            term_finance_subgraph_url_mainnet,
+            repo_collaterals_query,
+            "termRepoCollaterals",
+            variables,
+        ):
+            participants.add(result["repoExposure"]["borrower"])
+        for result in paginate_subgraph(
+            term_finance_subgraph_url_mainnet,
+            bid_collaterals_query,
+            "termBidCollaterals",
+            variables,
+        ):
+            participants.add(result["bid"]["bidder"])
 
         return participants
 
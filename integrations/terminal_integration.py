@@ -1,4 +1,3 @@
-import json
 import logging
 from copy import deepcopy
 from typing import Callable, Dict, List, Optional, Set, Tuple
@@ -10,14 +9,20 @@ from web3.constants import ADDRESS_ZERO
 
 from constants.chains import Chain
 from constants.summary_columns import SummaryColumn
-from constants.terminal import PRE_DEPOSIT_START_BLOCK, TUSDE_ADDRESS, PAGINATION_SIZE
-from integrations.cached_balances_integration import CachedBalancesIntegration
+from constants.terminal import (
+    PAGINATION_SIZE,
+    PRE_DEPOSIT_START_BLOCK,
+    TUSDE_ADDRESS,
+    TUSDE_DECIMALS,
+)
+from integrations.cached_balances_integration import (
+    CachedBalancesIntegration,
+    WeiBalances,
+    from_wei_balances,
+)
 from integrations.integration_ids import IntegrationID
-from utils.web3_utils import fetch_events_logs_with_retry, w3
-from utils.terminal import convert_to_decimals
-
-with open("abi/ERC20_abi.json") as f:
-    ERC20_ABI = json.load(f)
+from utils.web3_utils import fetch_events_logs_with_retry
+from utils.abi import get_contract
 
 class TerminalIntegration(
     CachedBalancesIntegration
@@ -74,22 +79,16 @@ class TerminalIntegration(
             to_block=to_block,
         )
 
-    def process_transfer(
-        self,
-        transfer: Dict,
-        cached_balances: Dict[ChecksumAddress, float]
-    ):
+    def process_transfer(self, transfer: Dict, ledger: WeiBalances):
         sender = transfer["args"]["from"]
         receiver = transfer["args"]["to"]
         value = transfer["args"]["value"]
 
         if sender != ADDRESS_ZERO:
-            cached_balances[sender] = (cached_balances.get(sender) or 0.0) - convert_to_decimals(value)
-            # If balance is negative, set it to 0 (possible due to rounding errors)
-            if cached_balances[sender] < 0: cached_balances[sender] = 0
+            ledger[sender] = ledger.get(sender, 0) - value
 
         if receiver != ADDRESS_ZERO:
-            cached_balances[receiver] = cached_balances.get(receiver, 0.0) + convert_to_decimals(value)
+            ledger[receiver] = ledger.get(receiver, 0) + value
 
     def get_block_balances(
         self, cached_data: Dict[int, Dict[ChecksumAddress, float]], blocks: List[int]
@@ -113,23 +112,23 @@ class TerminalIntegration(
             logging.error("No blocks provided to get_block_balances")
             return block_data
 
-        tusde = w3.eth.contract(
-            address=Web3.to_checksum_address(TUSDE_ADDRESS),
-            abi=ERC20_ABI,
-        )
+        tusde = get_contract(self.chain, TUSDE_ADDRESS, "ERC20_abi.json")
         sorted_blocks = sorted(blocks)
         cached_block, cached_balances = self.find_closest_cached_data(
             sorted_blocks[0], cached_data
         )
-        for target_block in sorted(blocks):
+        # tUSDe amounts are folded as exact integers, only converted when reported
+        ledger = self.load_wei_ledger(cached_balances, cached_block, TUSDE_DECIMALS)
+        for target_block in sorted_blocks:
             while cached_block < target_block:
                 to_block = min(cached_block + PAGINATION_SIZE, target_block)
                 for transfer in self.fetch_transfers(tusde, cached_block + 1, to_block):
-                    self.process_transfer(transfer, cached_balances)
+                    self.process_transfer(transfer, ledger)
                 cached_block = to_block
 
-            block_data[target_block] = deepcopy(cached_balances)
+            block_data[target_block] = from_wei_balances(ledger, TUSDE_DECIMALS)
 
+        self.save_wei_ledger(ledger, cached_block)
         return block_data
 
 if __name__ == "__main__":
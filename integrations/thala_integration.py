@@ -1,6 +1,6 @@
 import logging
-import subprocess
 import json
+from concurrent.futures import Future
 from typing import Dict, List, Optional
 import requests
 
@@ -22,6 +22,7 @@ from constants.thala import (
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID as IntID
 from integrations.l2_delegation_integration import L2DelegationIntegration
+from utils.ts_worker import get_ts_worker_pool
 
 load_dotenv()
 
@@ -45,7 +46,7 @@ class ThalaAptosIntegration(L2DelegationIntegration):
         )
         self.token_address = token_address
         self.decimals = str(decimals)
-        self.thala_ts_location = "ts/thala_balances.ts"
+        self.thala_ts_script = "thala_balances"
 
     def get_l2_block_balances(
         self, cached_data: Dict[int, Dict[str, float]], blocks: List[int]
@@ -55,15 +56,20 @@ class ThalaAptosIntegration(L2DelegationIntegration):
         block_data: Dict[int, Dict[str, float]] = {}
         sorted_blocks = sorted(blocks)
 
-        # Populate block data from smallest to largest
-        for block in sorted_blocks:
-            user_addresses = self.get_thala_block_participants(block)
-
-            result = self.get_thala_block_data(block, user_addresses)
-
-            # Store the balances and cache the exchange rate
-            if result:
-                block_data[block] = result
+        # One script run covers several ledger versions, the blocks are split across the workers
+        pool = get_ts_worker_pool()
+        chunk_size = -(-len(sorted_blocks) // pool.size) if sorted_blocks else 1
+        futures = [
+            self.submit_thala_blocks_data(
+                {block: self.get_thala_block_participants(block) for block in sorted_blocks[i : i + chunk_size]}
+            )
+            for i in range(0, len(sorted_blocks), chunk_size)
+        ]
+        for future in futures:
+            for block, result in self.get_thala_block_result(future).items():
+                # Store the balances and cache the exchange rate
+                if result:
+                    block_data[int(block)] = result
 
         return block_data
 
@@ -88,48 +94,51 @@ class ThalaAptosIntegration(L2DelegationIntegration):
             logging.error(f"Error processing participants for block {block}: {str(e)}")
             return []
 
-    def get_thala_block_data(
+    def submit_thala_blocks_data(self, user_addresses_by_block: Dict[int, List[str]]) -> Future:
+        """Balances of several ledger versions in one script run, resolves to {block: balances}."""
+        print("Getting participants data for blocks: ", list(user_addresses_by_block))
+        return get_ts_worker_pool().submit(
+            self.thala_ts_script,
+            self.get_thala_script_args(
+                list(user_addresses_by_block), user_addresses_by_block
+            ),
+        )
+
+    def submit_thala_block_data(
         self, block: int, user_addresses: Optional[List[str]] = None
-    ):
+    ) -> Future:
         print("Getting participants data for block: ", block)
         if not user_addresses:
             user_addresses = []
-        try:
-            response = subprocess.run(
-                [
-                    "ts-node",
-                    self.thala_ts_location,
-                    THALA_FARMING_V1_ADDRESS,
-                    THALA_STAKED_LPT_ADDRESS,
-                    THALASWAP_V2_ADDRESS,
-                    str(SUSDE_LPT_PID),
-                    str(SUSDE_LPT_ADDRESS),
-                    str(SUSDE_XLPT_ADDRESS),
-                    str(self.decimals),
-                    str(block),
-                    json.dumps(user_addresses),
-                ],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
+        return get_ts_worker_pool().submit(
+            self.thala_ts_script, self.get_thala_script_args(block, user_addresses)
+        )
 
-            try:
-                result = json.loads(response.stdout)
-                return result
-            except json.JSONDecodeError as e:
-                print(f"JSON Decode Error: {e}")
-                print(f"Raw output: {response.stdout}")
-                raise
-
-        except subprocess.CalledProcessError as e:
-            print(f"Process error: {e}")
-            print(f"stderr: {e.stderr}")
-            raise
+    def get_thala_script_args(self, blocks, user_addresses) -> List[str]:
+        return [
+            THALA_FARMING_V1_ADDRESS,
+            THALA_STAKED_LPT_ADDRESS,
+            THALASWAP_V2_ADDRESS,
+            str(SUSDE_LPT_PID),
+            str(SUSDE_LPT_ADDRESS),
+            str(SUSDE_XLPT_ADDRESS),
+            str(self.decimals),
+            json.dumps(blocks),
+            json.dumps(user_addresses),
+        ]
+
+    def get_thala_block_result(self, future: Future):
+        try:
+            return future.result()
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            print(f"TypeScript worker error: {e}")
             raise
 
+    def get_thala_block_data(
+        self, block: int, user_addresses: Optional[List[str]] = None
+    ):
+        return self.get_thala_block_result(self.submit_thala_block_data(block, user_addresses))
+
 
 if __name__ == "__main__":
     example_integration = ThalaAptosIntegration(
@@ -1,4 +1,3 @@
-import math
 from typing import Dict, List, Optional, Set
 from eth_typing import ChecksumAddress
 from constants.thruster import (
@@ -16,11 +15,11 @@ from integrations.deposit_ids_integration import DepositIdsIntegration
 from integrations.integration_ids import IntegrationID as IntID
 
 from utils.thruster import (
-    get_pool_price,
-    get_pool_tick,
+    get_pool_sqrt_price_x96,
+    get_thruster_positions_balances,
     get_thruster_users,
-    get_thrusters_position_balance,
 )
+from utils.web3_utils import multicall_by_address, w3_blast, MULTICALL_ADDRESS_BY_CHAIN
 
 
 class ThrusterIntegration(DepositIdsIntegration):
@@ -39,6 +38,15 @@ class ThrusterIntegration(DepositIdsIntegration):
             {HYPERLOCK_DEPOSIT_ADDRESS, JUICE_USDE_VAULT_ADDR},
         )
         self.pool_address = pool_address
+        self.sqrt_price_x96_by_block: Dict[int, int] = {}
+
+    def get_sqrt_price_x96(self, block: int) -> int:
+        """Pool sqrtPriceX96 at `block`, read once per block for all users."""
+        if block not in self.sqrt_price_x96_by_block:
+            self.sqrt_price_x96_by_block[block] = get_pool_sqrt_price_x96(
+                thruster_usde_pool_contract, block
+            )
+        return self.sqrt_price_x96_by_block[block]
 
     def get_nfp_contract(self):
         return thruster_nfp_contract
@@ -49,29 +57,30 @@ class ThrusterIntegration(DepositIdsIntegration):
         try:
             if block < self.start_block or len(deposit_ids) == 0:
                 return 0
-            token_ids = deposit_ids
+            token_ids = list(deposit_ids)
             user_t0_balances = 0
             user_t1_balances = 0
-            sqrt_price = math.sqrt(get_pool_price(thruster_usde_pool_contract, block))
-            tick = get_pool_tick(thruster_usde_pool_contract, block)
+            sqrt_price_x96 = self.get_sqrt_price_x96(block)
             nfp_contract = self.get_nfp_contract()
-            for token_id in token_ids:
-                # This is the best approach to check if the token ID exists (handling the exception and continue),
-                # since performing any call on the smart contract to check if the token ID exists at the current block
-                # will revert anyways and its one RPC call more for each token ID
-                try:
-                    owner = nfp_contract.functions.ownerOf(token_id).call(
-                        block_identifier=block
-                    )
-                    if owner != user:
-                        continue
-                    [t0, t1] = get_thrusters_position_balance(
-                        token_id, block, tick, sqrt_price
-                    )
-                    user_t0_balances += t0
-                    user_t1_balances += t1
-                except Exception:
-                    continue
+            # ownerOf reverts for token IDs that do not exist at the current block,
+            # those come back as None from the multicall and are skipped
+            owners = multicall_by_address(
+                w3_blast,
+                MULTICALL_ADDRESS_BY_CHAIN[Chain.BLAST],
+                [(nfp_contract, "ownerOf", [token_id]) for token_id in token_ids],
+                block,
+                allow_failure=True,
+            )
+            owned_token_ids = [
+                token_id
+                for token_id, owner in zip(token_ids, owners)
+                if owner is not None and owner[0] == user
+            ]
+            for t0, t1 in get_thruster_positions_balances(
+                owned_token_ids, block, sqrt_price_x96
+            ).values():
+                user_t0_balances += t0
+                user_t1_balances += t1
             return round(user_t0_balances + user_t1_balances, 4)
         except Exception as e:
             err_msg = (
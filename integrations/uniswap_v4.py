@@ -1,4 +1,3 @@
-import math
 from typing import Dict, List, Optional, Set
 from eth_typing import ChecksumAddress
 from web3 import Web3
@@ -9,11 +8,13 @@ from constants.uniswap_v4 import (
     uniswap_v4_pm_contract,
     uniswap_v4_sv_contract,
 )
+from utils.concentrated_liquidity import get_amounts_for_positions
 from utils.web3_utils import (
     call_with_retry,
-    fetch_events_logs_with_retry,
+    fetch_events_logs_in_range,
     multicall_by_address,
     w3,
+    MULTICALL_ADDRESS,
 )
 from constants.summary_columns import SummaryColumn
 from constants.chains import Chain
@@ -36,35 +37,34 @@ def get_all_users(
     ownerOf_calls = []
     token_ids = []
 
-    while start < end:
-        to_block = start + PAGINATION_SIZE
-        deposits = fetch_events_logs_with_retry(
-            "Users",
-            uniswap_v4_pm_contract.events.ModifyLiquidity(),
-            start,
-            to_block,
-        )
-        deposits_list = list(deposits)
-        print(start, to_block, len(deposits_list), "getting deposits for uniswap v4")
-
-        for deposit in deposits_list:
-            if (
-                deposit["args"]["id"] == UNISWAP_V4_USDE_POOL
-                and deposit["args"]["sender"] == UNISWAP_V4_NFPM_ADDRESS
-            ):
-                token_id = Web3.to_int(deposit["args"]["salt"])
-
-                ownerOf_calls.append(
-                    (
-                        uniswap_v4_nfpm_contract,
-                        uniswap_v4_nfpm_contract.functions.ownerOf.fn_name,
-                        [token_id],
-                    )
+    deposits = fetch_events_logs_in_range(
+        "Users",
+        uniswap_v4_pm_contract.events.ModifyLiquidity(),
+        start,
+        end,
+        filter={
+            "id": UNISWAP_V4_USDE_POOL,
+            "sender": UNISWAP_V4_NFPM_ADDRESS,
+        },
+        initial_range=PAGINATION_SIZE,
+    )
+    for deposit in deposits:
+        if (
+            deposit["args"]["id"] == UNISWAP_V4_USDE_POOL
+            and deposit["args"]["sender"] == UNISWAP_V4_NFPM_ADDRESS
+        ):
+            token_id = Web3.to_int(deposit["args"]["salt"])
+
+            ownerOf_calls.append(
+                (
+                    uniswap_v4_nfpm_contract,
+                    uniswap_v4_nfpm_contract.functions.ownerOf.fn_name,
+                    [token_id],
                 )
-                token_ids.append(token_id)
+            )
+            token_ids.append(token_id)
 
-        print(start, to_block, len(token_ids), "found valid token ids")
-        start += PAGINATION_SIZE
+    print(start, end, len(token_ids), "found valid token ids")
 
     # Execute multicall for all token ownerships
     if ownerOf_calls:
@@ -94,60 +94,46 @@ def get_all_users(
     return users
 
 
-def get_position_balance(token_id, block, tick, sqrt_price):
-    try:
-        packedInfo = call_with_retry(
-            uniswap_v4_nfpm_contract.functions.positionInfo(token_id),
-            block,
-        )
-        liquidity = call_with_retry(
-            uniswap_v4_nfpm_contract.functions.getPositionLiquidity(token_id),
-            block,
-        )
-    except Exception:
-        print(f"token {token_id} empty at block {block}")
-        return [0, 0]
-
-    if liquidity == 0:
-        return [0, 0]
-
-    t0 = 0
-    t1 = 0
-
-    # tickUpper: bits 32-55 (from the right, 0-indexed)
-    # tickLower: bits 8-31
-    tick_upper = extract_signed_24bit((packedInfo >> 32) & ((1 << 24) - 1))
-    tick_lower = extract_signed_24bit((packedInfo >> 8) & ((1 << 24) - 1))
-
-    # print(
-    #     f"tick: {tick}, tick_lower: {tick_lower}, tick_upper: {tick_upper}, token_id: {token_id}, liquidity: {liquidity}"
-    # )
-
-    sqrt_ratio_l = math.sqrt(1.0001**tick_lower) * (2**96)
-    sqrt_ratio_u = math.sqrt(1.0001**tick_upper) * (2**96)
-
-    # t0 = liquidity * (sqrt_price_u - sqrt_price) / (sqrt_price * sqrt_price_u) * (2**96)
-    # t1 = liquidity * (sqrt_price - sqrt_price_l) / (2**96)
-
-    if tick_lower < tick < tick_upper:
-        t0 = (
-            liquidity
-            * (sqrt_ratio_u - sqrt_price)
-            / (sqrt_price * sqrt_ratio_u)
-            * (2**96)
-        )
-        t1 = liquidity * (sqrt_price - sqrt_ratio_l) / (2**96)
-    elif tick >= tick_upper:
-        t1 = liquidity * (sqrt_ratio_u - sqrt_ratio_l) / (2**96)
-    else:
-        t0 = (
-            liquidity
-            * (sqrt_ratio_u - sqrt_ratio_l)
-            / (sqrt_ratio_u * sqrt_ratio_l)
-            * (2**96)
-        )
+def get_positions_balances(token_ids, block, sqrt_price_x96) -> Dict[int, List[float]]:
+    """[token0, token1] amounts of each position, read in one multicall and valued in one pass.
+
+    Positions that are empty at `block` are left out.
+    """
+    token_ids = list(token_ids)
+    if not token_ids:
+        return {}
+    results = multicall_by_address(
+        w3,
+        MULTICALL_ADDRESS,
+        [
+            call
+            for token_id in token_ids
+            for call in (
+                (uniswap_v4_nfpm_contract, "positionInfo", [token_id]),
+                (uniswap_v4_nfpm_contract, "getPositionLiquidity", [token_id]),
+            )
+        ],
+        block,
+        allow_failure=True,
+    )
 
-    return [abs(t0 / 10**18), abs(t1 / 10**6)]
+    ranges = {}
+    for token_id, packed_info, liquidity in zip(token_ids, results[::2], results[1::2]):
+        if packed_info is None or liquidity is None:
+            print(f"token {token_id} empty at block {block}")
+            continue
+        packedInfo = packed_info[0]
+        # tickUpper: bits 32-55 (from the right, 0-indexed)
+        # tickLower: bits 8-31
+        tick_upper = extract_signed_24bit((packedInfo >> 32) & ((1 << 24) - 1))
+        tick_lower = extract_signed_24bit((packedInfo >> 8) & ((1 << 24) - 1))
+        ranges[token_id] = (tick_lower, tick_upper, liquidity[0])
+
+    amounts = get_amounts_for_positions(sqrt_price_x96, list(ranges.values()))
+    return {
+        token_id: [t0 / 10**18, t1 / 10**6]
+        for token_id, (t0, t1) in zip(ranges, amounts)
+    }
 
 
 class UniswapV4Integration(DepositIdsIntegration):
@@ -160,6 +146,17 @@ class UniswapV4Integration(DepositIdsIntegration):
             50,
             None,
         )
+        self.sqrt_price_x96_by_block: Dict[int, int] = {}
+
+    def get_sqrt_price_x96(self, block: int) -> int:
+        """Pool sqrtPriceX96 at `block`, read once per block for all users."""
+        if block not in self.sqrt_price_x96_by_block:
+            [sqrtPriceX96, _, _, _] = call_with_retry(
+                uniswap_v4_sv_contract.functions.getSlot0(UNISWAP_V4_USDE_POOL),
+                block,
+            )
+            self.sqrt_price_x96_by_block[block] = sqrtPriceX96
+        return self.sqrt_price_x96_by_block[block]
 
     def get_deposit_ids_balances(
         self, deposit_ids: Set[int], user: ChecksumAddress, block: int
@@ -167,27 +164,32 @@ class UniswapV4Integration(DepositIdsIntegration):
         try:
             if block < self.start_block or len(deposit_ids) == 0:
                 return 0
-            token_ids = deposit_ids
+            token_ids = list(deposit_ids)
             user_t0_balances = 0
             user_t1_balances = 0
 
-            [sqrtPriceX96, tick, _, _] = call_with_retry(
-                uniswap_v4_sv_contract.functions.getSlot0(UNISWAP_V4_USDE_POOL),
+            sqrtPriceX96 = self.get_sqrt_price_x96(block)
+
+            owners = multicall_by_address(
+                w3,
+                MULTICALL_ADDRESS,
+                [
+                    (uniswap_v4_nfpm_contract, "ownerOf", [token_id])
+                    for token_id in token_ids
+                ],
                 block,
+                allow_failure=True,
             )
-
-            for token_id in token_ids:
-                try:
-                    owner = uniswap_v4_nfpm_contract.functions.ownerOf(token_id).call(
-                        block_identifier=block
-                    )
-                    if owner != user:
-                        continue
-                    [t0, t1] = get_position_balance(token_id, block, tick, sqrtPriceX96)
-                    user_t0_balances += t0
-                    user_t1_balances += t1
-                except Exception:
-                    continue
+            owned_token_ids = [
+                token_id
+                for token_id, owner in zip(token_ids, owners)
+                if owner is not None and owner[0] == user
+            ]
+            for t0, t1 in get_positions_balances(
+                owned_token_ids, block, sqrtPriceX96
+            ).values():
+                user_t0_balances += t0
+                user_t1_balances += t1
 
             return round(user_t0_balances + user_t1_balances, 4)
         except Exception as e:
@@ -1,4 +1,3 @@
-import json
 import os
 from typing import Callable, Dict, List, Optional, Set
 from constants.chains import Chain
@@ -7,41 +6,36 @@ from integrations.cached_balances_integration import CachedBalancesIntegration
 from integrations.integration_ids import IntegrationID
 from web3 import Web3
 from eth_typing import ChecksumAddress
-import requests
 
+from utils.subgraph import paginate_subgraph_at_blocks
 from utils.web3_utils import (
     W3_BY_CHAIN,
 )
+from utils.abi import load_abi
 
-with open("abi/venus_vtoken.json") as f:
-    venus_vtoken_abi = json.load(f)
+venus_vtoken_abi = load_abi("venus_vtoken.json")
 
 
 venus_isolated_pools_subgraph_url_mainnet = f"https://gateway.thegraph.com/api/{os.getenv('VENUS_SUBGRAPH_API_KEY')}/subgraphs/id/Htf6Hh1qgkvxQxqbcv4Jp5AatsaiY5dNLVcySkpCaxQ8"
 
-supplier_balance_query = """{{
-  marketPositions(where: {{market: "{marketAddress}", vTokenBalanceMantissa_gt: 0}}, block :{{number: {blockNumber}}}) {{
-    account {{
+supplier_balance_query = """
+query MarketPositions($first: Int!, $lastId: String!, $block: Int!, $marketAddress: String!) {
+  marketPositions(
+    first: $first
+    where: {market: $marketAddress, vTokenBalanceMantissa_gt: 0, id_gt: $lastId}
+    orderBy: id
+    orderDirection: asc
+    block: {number: $block}
+  ) {
+    id
+    account {
       id
-    }}
+    }
     vTokenBalanceMantissa
-  }}
-}}
+  }
+}
 """
 
-# Helper for making graphql queries
-def fetch_data(url, query):
-    response = requests.post(url, json={"query": query})
-    if response.status_code == 200:
-        response_json = response.json()
-        if "data" not in response_json:
-            print(f"Query failed with response: {response_json}")
-            return None
-        return response_json["data"]
-    else:
-        print(f"Query failed with status code {response.status_code}")
-        return None
-
 vsUSDE = "0x0792b9c60C728C1D2Fd6665b3D7A08762a9b28e0"
 sUSDE_DECIMALS = 18
 
@@ -98,20 +92,29 @@ class VenusProtocolIntegration(
         """
         return_data = {}
 
+        # every uncached block's positions, fetched concurrently
+        new_blocks = [block for block in blocks if block not in cached_data.keys()]
+        positions_by_block = paginate_subgraph_at_blocks(
+            venus_isolated_pools_subgraph_url_mainnet,
+            supplier_balance_query,
+            "marketPositions",
+            new_blocks,
+            {"marketAddress": vsUSDE},
+        )
+
         for block in blocks:
-            exchange_rate = self.vsUSDE_contract.functions.exchangeRateCurrent().call(block_identifier=block)
             if block in cached_data.keys():
                 return_data[block] = cached_data[block]
                 continue
 
-            balances = fetch_data(venus_isolated_pools_subgraph_url_mainnet, supplier_balance_query.format(marketAddress=vsUSDE, blockNumber=block))
-
-            if balances: 
-                if len(balances['marketPositions']) > 0:
-                    return_data[block] = {}
+            positions = positions_by_block.get(block)
+            if not positions:
+                continue
 
-                for balance in balances['marketPositions']:
-                    return_data[block][balance['account']['id']] = (exchange_rate * int(balance['vTokenBalanceMantissa'])) / (10 ** (18 + sUSDE_DECIMALS))
+            exchange_rate = self.vsUSDE_contract.functions.exchangeRateCurrent().call(block_identifier=block)
+            return_data[block] = {}
+            for balance in positions:
+                return_data[block][balance['account']['id']] = (exchange_rate * int(balance['vTokenBalanceMantissa'])) / (10 ** (18 + sUSDE_DECIMALS))
 
         return return_data
 
@@ -0,0 +1,136 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+AGGREGATE_SELECTOR = function_signature_to_4byte_selector("aggregate((address,bytes)[])")
+AGGREGATE3_SELECTOR = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+
+# (target, call data, block) -> return data of one call
+CallHandler = Callable[[str, bytes, int], bytes]
+
+
+class FakeRPCError(Exception):
+    """Raised by a method handler to answer with a JSON-RPC error."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class FakeProvider(JSONBaseProvider):
+    """In memory JSON-RPC node: answers eth_chainId, eth_blockNumber and eth_call, the
+    multicall aggregate/aggregate3 calls being unpacked into `call_handler` calls.
+    Other methods are answered by the handlers registered in `methods`."""
+
+    def __init__(self, call_handler: CallHandler, head: int = 1000, chain_id: int = 1):
+        super().__init__()
+        self.endpoint_uri = f"fake://{id(self)}"
+        self.call_handler = call_handler
+        self.head = head
+        self.chain_id = chain_id
+        self.requests: List[Tuple[str, Any]] = []
+        self.methods: Dict[str, Callable[[Any], Any]] = {}
+        self.lock = threading.Lock()
+
+    def result(self, method: str, params: Any) -> Any:
+        with self.lock:
+            self.requests.append((method, params))
+        if method in self.methods:
+            return self.methods[method](params)
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "eth_blockNumber":
+            return hex(self.head)
+        if method == "eth_call":
+            transaction, block = params
+            return "0x" + self.eth_call(
+                transaction["to"], HexBytes(transaction["data"]), int(block, 16)
+            ).hex()
+        raise NotImplementedError(method)
+
+    def eth_call(self, to: str, data: bytes, block: int) -> bytes:
+        selector, arguments = bytes(data[:4]), bytes(data[4:])
+        if selector == AGGREGATE3_SELECTOR:
+            (calls,) = decode(["(address,bool,bytes)[]"], arguments)
+            results = [(True, self.call_handler(target, call_data, block)) for target, _, call_data in calls]
+            return encode(["(bool,bytes)[]"], [results])
+        if selector == AGGREGATE_SELECTOR:
+            (calls,) = decode(["(address,bytes)[]"], arguments)
+            results = [self.call_handler(target, call_data, block) for target, call_data in calls]
+            return encode(["uint256", "bytes[]"], [block, results])
+        return self.call_handler(to, data, block)
+
+    def response(self, request_id: Any, method: str, params: Any) -> Dict[str, Any]:
+        try:
+            return {"jsonrpc": "2.0", "id": request_id, "result": self.result(method, params)}
+        except FakeRPCError as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": e.message}}
+
+    def make_request(self, method, params):
+        return self.response(0, method, params)
+
+    def make_batch_request(self, requests):
+        return [self.response(i, method, params) for i, (method, params) in enumerate(requests)]
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class FakeNodeServer:
+    """Serves a FakeProvider over HTTP on localhost, for code opening its own (async) providers."""
+
+    def __init__(self, provider: FakeProvider):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if isinstance(body, list):
+                    answer: Any = [provider.response(r["id"], r["method"], r["params"]) for r in body]
+                else:
+                    answer = provider.response(body["id"], body["method"], body["params"])
+                data = json.dumps(answer).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.provider = provider
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "FakeNodeServer":
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def fake_web3(call_handler: CallHandler, head: int = 1000, chain_id: int = 1) -> Web3:
+    return Web3(FakeProvider(call_handler, head, chain_id))
+
+
+def no_calls(to: str, data: bytes, block: int) -> bytes:
+    raise AssertionError(f"Unexpected eth_call to {to} at block {block}")
+
+
+def state_by_call(states: Dict[Tuple[str, int], Any], output_types: List[str], input_types: List[str]) -> CallHandler:
+    """Call handler returning `states[(first argument, block)]` encoded as `output_types`."""
+
+    def handler(to: str, data: bytes, block: int) -> bytes:
+        (argument,) = decode(input_types, bytes(data[4:]))
+        return encode(output_types, [states[(Web3.to_checksum_address(argument), block)]])
+
+    return handler
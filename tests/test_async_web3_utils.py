@@ -0,0 +1,120 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from eth_abi import decode, encode
+from eth_utils import event_abi_to_log_topic
+from web3 import HTTPProvider, Web3
+
+from tests.fakes import FakeNodeServer, FakeProvider, FakeRPCError
+from utils import log_cache
+from utils.abi import get_abi_entry, load_abi
+from utils.async_web3_utils import (
+    SEMAPHORE_BY_ENDPOINT_AND_LOOP,
+    SESSION_BY_ENDPOINT_AND_LOOP,
+    async_call_with_retry,
+    async_fetch_events_logs_in_range,
+    run_async,
+)
+from utils.log_cache import LOG_CACHE_CONFIRMATIONS, EventLogCache
+
+TOKEN = Web3.to_checksum_address("0x" + "11" * 20)
+TRANSFER_TOPIC = "0x" + event_abi_to_log_topic(get_abi_entry("ERC20_abi.json", "event", "Transfer")).hex()
+
+
+def balance_at_block(to: str, data: bytes, block: int) -> bytes:
+    (account,) = decode(["address"], bytes(data[4:]))
+    return encode(["uint256"], [block * 10 + int(account[-1], 16)])
+
+
+class TransferLogs:
+    """eth_getLogs handler with one Transfer of `block` wei per block, rejecting ranges
+    wider than `max_blocks`."""
+
+    def __init__(self, max_blocks: int):
+        self.max_blocks = max_blocks
+        self.ranges = []
+
+    def __call__(self, params):
+        start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        self.ranges.append((start, end))
+        if end - start + 1 > self.max_blocks:
+            raise FakeRPCError(-32005, "query returned more than 10000 results")
+        return [
+            {
+                "address": TOKEN,
+                "topics": [TRANSFER_TOPIC, "0x" + "00" * 32, "0x" + "00" * 12 + "22" * 20],
+                "data": "0x" + encode(["uint256"], [block]).hex(),
+                "blockNumber": hex(block),
+                "blockHash": "0x" + block.to_bytes(32, "big").hex(),
+                "transactionHash": "0x" + block.to_bytes(32, "big").hex(),
+                "transactionIndex": "0x0",
+                "logIndex": "0x0",
+                "removed": False,
+            }
+            for block in range(start, end + 1)
+        ]
+
+
+class AsyncWeb3UtilsTest(unittest.TestCase):
+    def setUp(self):
+        self.provider = FakeProvider(balance_at_block, head=1000)
+        self.logs = TransferLogs(max_blocks=100)
+        self.provider.methods["eth_getLogs"] = self.logs
+        self.node = FakeNodeServer(self.provider).__enter__()
+        self.addCleanup(self.node.__exit__, None, None, None)
+        self.token = Web3(HTTPProvider(self.node.url)).eth.contract(
+            address=TOKEN, abi=load_abi("ERC20_abi.json")
+        )
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = EventLogCache(os.path.join(directory.name, "logs.sqlite"))
+        for patcher in (
+            mock.patch.object(log_cache, "LOG_CACHE", self.cache),
+            # each test has its own endpoint, hence its own limiter
+            mock.patch("utils.rate_limit.RPC_RATE_LIMIT", 1000.0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_concurrent_calls(self):
+        account = Web3.to_checksum_address("0x" + "00" * 19 + "05")
+
+        async def fetch_all():
+            return await asyncio.gather(
+                *(
+                    async_call_with_retry(self.token.functions.balanceOf(account), block=block)
+                    for block in range(10, 20)
+                )
+            )
+
+        self.assertEqual(run_async(fetch_all()), [block * 10 + 5 for block in range(10, 20)])
+        # the loop's sessions and semaphores are released with it
+        self.assertEqual(SESSION_BY_ENDPOINT_AND_LOOP, {})
+        self.assertEqual(SEMAPHORE_BY_ENDPOINT_AND_LOOP, {})
+
+    def test_fetch_events_logs_in_range(self):
+        def fetch():
+            return run_async(
+                async_fetch_events_logs_in_range(
+                    "test", self.token.events.Transfer(), 1, 1000, initial_range=500
+                )
+            )
+
+        transfers = fetch()
+        self.assertEqual([transfer["args"]["value"] for transfer in transfers], list(range(1, 1001)))
+        # the rejected range was halved until the provider accepted it
+        self.assertIn((1, 500), self.logs.ranges)
+        self.assertTrue(all(end - start < 100 for start, end in self.logs.ranges[-5:]))
+
+        # finalized blocks are read back from the log cache, only recent ones are fetched
+        self.logs.ranges.clear()
+        self.assertEqual(fetch(), transfers)
+        self.assertEqual(min(start for start, _ in self.logs.ranges), 1000 - LOG_CACHE_CONFIRMATIONS + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
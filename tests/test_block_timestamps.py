@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from web3 import Web3
+
+from constants.chains import Chain
+from tests.fakes import FakeProvider, no_calls
+from utils import log_cache
+from utils.log_cache import EventLogCache
+from utils.web3_utils import (
+    BLOCK_INDEX_BY_CHAIN_ID,
+    BLOCK_TIMESTAMPS_BY_CHAIN_ID,
+    W3_BY_CHAIN,
+    get_block_at_timestamp,
+    get_block_timestamps,
+)
+
+GENESIS = 1_600_000_000
+HEAD = 100_000
+
+
+def block_timestamp(block: int) -> int:
+    # block time changes from 13s to 2s half way, so a plain interpolation overshoots
+    if block <= HEAD // 2:
+        return GENESIS + 13 * block
+    return GENESIS + 13 * (HEAD // 2) + 2 * (block - HEAD // 2)
+
+
+class BlockTimestampsTest(unittest.TestCase):
+    def setUp(self):
+        self.provider = FakeProvider(no_calls, head=HEAD, chain_id=31337)
+        self.provider.methods["eth_getBlockByNumber"] = self.get_block
+        w3 = Web3(self.provider)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = EventLogCache(os.path.join(directory.name, "logs.sqlite"))
+        for patcher in (
+            mock.patch.object(log_cache, "LOG_CACHE", self.cache),
+            mock.patch.dict(W3_BY_CHAIN, {Chain.ETHEREUM: {"w3": w3}}),
+            mock.patch.dict(BLOCK_TIMESTAMPS_BY_CHAIN_ID),
+            mock.patch.dict(BLOCK_INDEX_BY_CHAIN_ID),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_block(self, params):
+        block = int(params[0], 16)
+        return {"number": hex(block), "timestamp": hex(block_timestamp(block)), "transactions": []}
+
+    def header_requests(self) -> int:
+        return sum(1 for method, _ in self.provider.requests if method == "eth_getBlockByNumber")
+
+    def test_block_timestamps_are_fetched_once(self):
+        blocks = list(range(1000, 1120))
+        expected = {block: block_timestamp(block) for block in blocks}
+        self.assertEqual(get_block_timestamps(Chain.ETHEREUM, blocks), expected)
+        self.assertEqual(self.header_requests(), len(blocks))
+
+        self.assertEqual(get_block_timestamps(Chain.ETHEREUM, blocks[::-1]), expected)
+        self.assertEqual(self.header_requests(), len(blocks))
+        # finalized blocks are persisted for the next runs
+        self.assertEqual(dict(self.cache.get_block_timestamps(31337)), expected)
+
+    def test_block_at_timestamp(self):
+        for block in (0, 1, 17_000, HEAD // 2, HEAD // 2 + 1, 77_777, HEAD - 1):
+            timestamp = block_timestamp(block)
+            self.assertEqual(get_block_at_timestamp(Chain.ETHEREUM, timestamp), block)
+            # between two blocks the earlier one is returned
+            self.assertEqual(get_block_at_timestamp(Chain.ETHEREUM, timestamp + 1), block)
+        self.assertEqual(get_block_at_timestamp(Chain.ETHEREUM, block_timestamp(HEAD) + 60), HEAD)
+
+        with self.assertRaises(ValueError):
+            get_block_at_timestamp(Chain.ETHEREUM, GENESIS - 1)
+
+    def test_block_at_timestamp_reuses_known_blocks(self):
+        get_block_at_timestamp(Chain.ETHEREUM, block_timestamp(77_777))
+        requests = self.header_requests()
+        # the blocks visited by the first search bound the second one
+        self.assertEqual(get_block_at_timestamp(Chain.ETHEREUM, block_timestamp(77_777) + 1), 77_777)
+        self.assertEqual(self.header_requests(), requests)
+        self.assertLess(requests, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from constants.chains import Chain
+from integrations.cached_balances_integration import CachedBalancesIntegration, WeiBalances
+from integrations.integration_ids import IntegrationID
+from tests.fakes import fake_web3, no_calls
+from utils import log_cache
+from utils.log_cache import EventLogCache
+from utils.web3_utils import W3_BY_CHAIN
+
+ZERO = "0x" + "00" * 20
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+
+# block -> (sender, receiver, amount in wei), amounts that floats can't hold exactly
+TRANSFERS = {
+    150: [(ZERO, ALICE, 10**18 // 3)],
+    160: [(ZERO, BOB, 7 * 10**17 + 1)],
+    250: [(ALICE, BOB, 10**17 + 7)],
+    260: [(BOB, ALICE, 1)],
+    350: [(BOB, ZERO, 3 * 10**17)],
+}
+
+
+class LedgerIntegration(CachedBalancesIntegration):
+    def __init__(self, scale_by_block=None):
+        super().__init__(IntegrationID.EXAMPLE, start_block=100)
+        self.scale_by_block = scale_by_block
+        self.advanced = []
+
+    def get_block_balances(self, cached_data, blocks):
+        def advance(ledger: WeiBalances, from_block: int, to_block: int):
+            self.advanced.append((from_block, to_block))
+            for block in range(from_block, to_block + 1):
+                for sender, receiver, amount in TRANSFERS.get(block, []):
+                    ledger[sender] = ledger.get(sender, 0) - amount
+                    ledger[receiver] = ledger.get(receiver, 0) + amount
+
+        get_scale = self.scale_by_block.__getitem__ if self.scale_by_block else None
+        return self.replay_wei_balances(cached_data, blocks, advance, get_scale=get_scale)
+
+
+class WeiLedgerTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = EventLogCache(os.path.join(directory.name, "logs.sqlite"))
+        for patcher in (
+            mock.patch.object(log_cache, "LOG_CACHE", self.cache),
+            mock.patch.dict(W3_BY_CHAIN, {Chain.ETHEREUM: {"w3": fake_web3(no_calls, head=1000)}}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_resume_matches_a_run_from_scratch(self):
+        scratch = LedgerIntegration().get_block_balances({}, [200, 300, 400])
+        self.assertEqual(scratch[400][ALICE], (10**18 // 3 - 10**17 - 7 + 1) / 10**18)
+
+        # a run emitting 200 persists its exact ledger, the next run resumes from it
+        LedgerIntegration().get_block_balances({}, [200])
+        integration = LedgerIntegration()
+        resumed = integration.get_block_balances({200: scratch[200]}, [300, 400])
+        self.assertEqual(resumed, {300: scratch[300], 400: scratch[400]})
+        self.assertEqual(integration.advanced, [(201, 300), (301, 400)])
+        ledger = integration.load_wei_ledger(scratch[400], 400)
+        self.assertEqual(ledger[BOB], 7 * 10**17 + 1 + 10**17 + 7 - 1 - 3 * 10**17)
+
+    def test_resume_without_a_persisted_ledger(self):
+        scratch = LedgerIntegration().get_block_balances({}, [200, 300])
+        self.cache.connection.execute("DELETE FROM states")
+        # rebuilt from the cached floats, off by at most a few wei
+        resumed = LedgerIntegration().get_block_balances({200: scratch[200]}, [300])
+        for address, balance in scratch[300].items():
+            self.assertAlmostEqual(resumed[300][address], balance, places=15)
+
+    def test_scaled_ledger(self):
+        scale_by_block = {200: 1.0, 300: 1.5, 400: 2.0}
+        scratch = LedgerIntegration(scale_by_block).get_block_balances({}, [200, 300, 400])
+        self.assertEqual(scratch[300][BOB], 1.5 * (8 * 10**17 + 8) / 10**18)
+
+        self.cache.connection.execute("DELETE FROM states")
+        resumed = LedgerIntegration(scale_by_block).get_block_balances({300: scratch[300]}, [400])
+        self.assertAlmostEqual(resumed[400][BOB], scratch[400][BOB], places=15)
+
+    def test_zero_scale_starts_from_an_empty_ledger(self):
+        integration = LedgerIntegration()
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(integration.load_wei_ledger({ALICE: 0.0}, 300, scale=0), {})
+
+    def test_recent_ledger_is_not_persisted(self):
+        LedgerIntegration().get_block_balances({}, [990])
+        self.assertIsNone(self.cache.get_state(LedgerIntegration().get_wei_ledger_key()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from decimal import Decimal, localcontext
+
+from utils.concentrated_liquidity import (
+    MAX_TICK,
+    MIN_TICK,
+    get_amounts_for_liquidity,
+    get_amounts_for_positions,
+    get_sqrt_ratio_at_tick,
+)
+
+Q96 = 2**96
+
+
+def exact_sqrt_ratio(tick: int) -> Decimal:
+    with localcontext() as context:
+        context.prec = 80
+        return Decimal("1.0001") ** (Decimal(tick) / 2) * Q96
+
+
+class TickMathTest(unittest.TestCase):
+    def test_known_values(self):
+        # TickMath.MIN_SQRT_RATIO / MAX_SQRT_RATIO of Uniswap V3
+        self.assertEqual(get_sqrt_ratio_at_tick(0), Q96)
+        self.assertEqual(get_sqrt_ratio_at_tick(MIN_TICK), 4295128739)
+        self.assertEqual(get_sqrt_ratio_at_tick(MAX_TICK), 1461446703485210103287273052203988822378723970342)
+
+    def test_matches_the_exact_ratio(self):
+        for tick in (1, -1, 50, -50, 887, 10_000, -10_000, 200_000, -200_000, 500_000):
+            ratio = get_sqrt_ratio_at_tick(tick)
+            self.assertIsInstance(ratio, int)
+            exact = exact_sqrt_ratio(tick)
+            self.assertLess(abs(Decimal(ratio) - exact) / exact, Decimal("1e-15"), tick)
+
+    def test_monotonic(self):
+        ticks = list(range(-1000, 1001, 7))
+        ratios = [get_sqrt_ratio_at_tick(tick) for tick in ticks]
+        self.assertEqual(ratios, sorted(set(ratios)))
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            get_sqrt_ratio_at_tick(MAX_TICK + 1)
+        with self.assertRaises(ValueError):
+            get_sqrt_ratio_at_tick(MIN_TICK - 1)
+
+
+class AmountsForLiquidityTest(unittest.TestCase):
+    liquidity = 10**24
+
+    def test_in_range(self):
+        sqrt_price = get_sqrt_ratio_at_tick(17)
+        sqrt_a, sqrt_b = get_sqrt_ratio_at_tick(-600), get_sqrt_ratio_at_tick(600)
+        amount0, amount1 = get_amounts_for_liquidity(sqrt_price, -600, 600, self.liquidity)
+        exact0 = Decimal(self.liquidity * Q96) * (sqrt_b - sqrt_price) / (sqrt_b * sqrt_price)
+        exact1 = Decimal(self.liquidity) * (sqrt_price - sqrt_a) / Q96
+        # rounded down like the pools, amount0 through two divisions
+        self.assertTrue(0 <= exact0 - amount0 < 2, exact0 - amount0)
+        self.assertTrue(0 <= exact1 - amount1 < 1, exact1 - amount1)
+
+    def test_out_of_range(self):
+        below = get_amounts_for_liquidity(get_sqrt_ratio_at_tick(-1000), -600, 600, self.liquidity)
+        above = get_amounts_for_liquidity(get_sqrt_ratio_at_tick(1000), -600, 600, self.liquidity)
+        self.assertEqual(below[1], 0)
+        self.assertEqual(above[0], 0)
+        # the whole position at either bound
+        self.assertEqual(below, get_amounts_for_liquidity(get_sqrt_ratio_at_tick(-600), -600, 600, self.liquidity))
+        self.assertEqual(above, get_amounts_for_liquidity(get_sqrt_ratio_at_tick(600), -600, 600, self.liquidity))
+
+    def test_positions(self):
+        positions = [(-600, 600, self.liquidity), (60, 120, 1), (-120, -60, 5 * self.liquidity)]
+        self.assertEqual(
+            get_amounts_for_positions(Q96, positions),
+            [get_amounts_for_liquidity(Q96, *position) for position in positions],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
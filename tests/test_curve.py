@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from web3 import Web3
+
+from constants.curve import CURVE_LLAMALEND
+from tests.fakes import fake_web3, state_by_call
+from utils import log_cache
+from utils.curve import Curve, UserState
+from utils.log_cache import LOG_CACHE_CONFIRMATIONS, EventLogCache
+
+ALICE = Web3.to_checksum_address("0x" + "a1" * 20)
+BOB = Web3.to_checksum_address("0x" + "b2" * 20)
+STATES = {
+    (ALICE, 100): (10**18, 2, 3, 4),
+    (BOB, 100): (5, 6, 7, 8),
+    (ALICE, 200): (9, 10, 11, 12),
+}
+
+
+class CurveTest(unittest.TestCase):
+    def setUp(self):
+        self.curve = Curve(CURVE_LLAMALEND[0])
+        self.curve.w3 = fake_web3(state_by_call(STATES, ["uint256[4]"], ["address"]), head=1000)
+
+    def test_get_borrow_states_decodes_uint256_4(self):
+        states = self.curve.get_borrow_states({100: [ALICE, BOB], 200: [ALICE]})
+        self.assertEqual(
+            states,
+            [
+                UserState(ALICE, [10**18, 2, 3, 4], 100),
+                UserState(BOB, [5, 6, 7, 8], 100),
+                UserState(ALICE, [9, 10, 11, 12], 200),
+            ],
+        )
+
+    def test_get_user_states_decodes_uint256_4(self):
+        self.curve.start_state = [UserState(ALICE, [0, 0, 0, 0], 1), UserState(BOB, [0, 0, 0, 0], 1)]
+        with mock.patch.object(Curve, "get_participants"):
+            states = self.curve.get_user_states(100)
+        self.assertEqual([state.state for state in states], [(10**18, 2, 3, 4), (5, 6, 7, 8)])
+
+
+class CurveIndexedStateTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(
+            log_cache, "LOG_CACHE", EventLogCache(os.path.join(directory.name, "cache.sqlite"))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def new_curve(self, head: int) -> Curve:
+        curve = Curve(CURVE_LLAMALEND[0])
+        curve.w3 = fake_web3(state_by_call({}, ["uint256[4]"], ["address"]), head=head)
+        return curve
+
+    def test_round_trip_holds_back_reorgable_blocks(self):
+        head = 1000
+        finalized = head - LOG_CACHE_CONFIRMATIONS
+        curve = self.new_curve(head)
+        curve.start_state = [
+            UserState(ALICE, [1, 2, 3, 4], finalized),
+            UserState(BOB, [5, 6, 7, 8], finalized + 1),
+        ]
+        curve.last_indexed_block = head
+        curve.save_indexed_state()
+
+        reloaded = self.new_curve(head)
+        reloaded.load_indexed_state()
+        self.assertEqual(reloaded.last_indexed_block, finalized)
+        self.assertEqual(reloaded.start_state, [UserState(ALICE, [1, 2, 3, 4], finalized)])
+
+    def test_load_keeps_state_already_indexed_in_memory(self):
+        curve = self.new_curve(1000)
+        curve.start_state = [UserState(ALICE, [1, 2, 3, 4], 10)]
+        curve.last_indexed_block = 500
+        curve.save_indexed_state()
+
+        curve.start_state.append(UserState(BOB, [5, 6, 7, 8], 600))
+        curve.last_indexed_block = 600
+        curve.load_indexed_state()
+        self.assertEqual(len(curve.start_state), 2)
+        self.assertEqual(curve.last_indexed_block, 600)
+
+
+if __name__ == "__main__":
+    unittest.main()
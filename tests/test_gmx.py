@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from constants.gmx import GMX_CANDLES_ENDPOINT, GMX_PRICES_ENDPOINT, GMX_TOKENS_ENDPOINT
+from utils import gmx, log_cache
+from utils.gmx import GMX_CANDLES_LIMIT, GMX_PRICE_BUCKET_SECONDS, get_gmx_prices, get_price_bucket
+from utils.log_cache import EventLogCache
+
+TOKENS = {"0xA": ("ETH", 18, 2000), "0xB": ("USDC", 6, 1)}
+
+
+class FakeGMXApi:
+    def __init__(self, test: unittest.TestCase, status_code: int = 200):
+        self.test = test
+        self.status_code = status_code
+        self.requests = []
+
+    def get(self, url, params=None):
+        # no request is sent while the snapshots are locked
+        self.test.assertFalse(gmx.GMX_PRICES_LOCK.locked())
+        self.requests.append((url, params))
+        response = requests.Response()
+        response.status_code = self.status_code
+        if url == GMX_TOKENS_ENDPOINT:
+            body = {"tokens": [{"address": a, "symbol": s, "decimals": d} for a, (s, d, _) in TOKENS.items()]}
+        elif url == GMX_PRICES_ENDPOINT:
+            body = [
+                {"tokenAddress": a, "minPrice": str(p * 10 ** (30 - d)), "maxPrice": str(p * 10 ** (30 - d))}
+                for a, (_, d, p) in TOKENS.items()
+            ]
+        else:
+            price = next(p for s, _, p in TOKENS.values() if s == params["tokenSymbol"])
+            now = get_price_bucket(int(time.time()))
+            body = {
+                "candles": [
+                    [now - i * GMX_PRICE_BUCKET_SECONDS, price + i, price + i, price + i, price + i]
+                    for i in range(params["limit"])
+                ]
+            }
+        response._content = json.dumps(body).encode()
+        return response
+
+    def count(self, url):
+        return sum(1 for request_url, _ in self.requests if request_url == url)
+
+
+class GetGMXPricesTest(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeGMXApi(self)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for patcher in (
+            mock.patch.object(log_cache, "LOG_CACHE", EventLogCache(os.path.join(directory.name, "logs.sqlite"))),
+            mock.patch.dict(gmx.GMX_PRICE_SNAPSHOTS, clear=True),
+            mock.patch.dict(gmx.GMX_TOKENS, clear=True),
+            mock.patch("utils.gmx.requests.get", side_effect=lambda *a, **k: self.api.get(*a, **k)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_past_buckets_come_from_candles(self):
+        timestamp = int(time.time()) - 3 * GMX_PRICE_BUCKET_SECONDS
+        prices = get_gmx_prices(["0xA", "0xB"], timestamp)
+        hours_ago = (get_price_bucket(int(time.time())) - get_price_bucket(timestamp)) // GMX_PRICE_BUCKET_SECONDS
+        self.assertEqual(prices["0xA"]["minPrice"], str((2000 + hours_ago) * 10**12))
+        self.assertEqual(prices["0xB"]["maxPrice"], str((1 + hours_ago) * 10**24))
+        self.assertEqual(self.api.count(GMX_CANDLES_ENDPOINT), 2)
+
+        # one candles request per token covers every later bucket
+        get_gmx_prices(["0xA", "0xB"], timestamp + GMX_PRICE_BUCKET_SECONDS)
+        self.assertEqual(self.api.count(GMX_CANDLES_ENDPOINT), 2)
+        self.assertEqual(self.api.count(GMX_PRICES_ENDPOINT), 0)
+
+        # finalized buckets are read back from the local cache
+        gmx.GMX_PRICE_SNAPSHOTS.clear()
+        self.assertEqual(get_gmx_prices(["0xA", "0xB"], timestamp), prices)
+        self.assertEqual(self.api.count(GMX_CANDLES_ENDPOINT), 2)
+
+    def test_current_bucket_fetches_tickers_once(self):
+        prices = get_gmx_prices(["0xA", "0xB", "0xA"], int(time.time()))
+        self.assertEqual(prices["0xA"]["minPrice"], str(2000 * 10**12))
+        self.assertEqual(self.api.count(GMX_PRICES_ENDPOINT), 1)
+
+    def test_missing_candles_raise(self):
+        too_old = int(time.time()) - (GMX_CANDLES_LIMIT + 1) * GMX_PRICE_BUCKET_SECONDS
+        with self.assertRaises(ValueError):
+            get_gmx_prices(["0xA"], too_old)
+        self.assertEqual(self.api.count(GMX_CANDLES_ENDPOINT), 0)
+
+        self.api.status_code = 500
+        with self.assertRaises(requests.HTTPError):
+            get_gmx_prices(["0xA"], int(time.time()) - 3 * GMX_PRICE_BUCKET_SECONDS)
+        self.assertEqual(self.api.count(GMX_PRICES_ENDPOINT), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
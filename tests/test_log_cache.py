@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.fakes import fake_web3, no_calls
+from utils import log_cache
+from utils.log_cache import LOG_CACHE_CONFIRMATIONS, EventLogCache, get_logs_cached_by_key
+
+HEAD = 1000
+CONFIRMED = HEAD - LOG_CACHE_CONFIRMATIONS
+
+
+class FakeFetch:
+    """Log fetcher with one log per block, recording the ranges it is asked for."""
+
+    def __init__(self):
+        self.ranges = []
+
+    def __call__(self, start: int, end):
+        self.ranges.append((start, end))
+        end = HEAD if end == "latest" else end
+        return [{"blockNumber": block, "logIndex": 0} for block in range(start, end + 1)]
+
+
+def blocks_of(logs):
+    return [log["blockNumber"] for log in logs]
+
+
+class LogCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = EventLogCache(os.path.join(directory.name, "logs.sqlite"))
+        patcher = mock.patch.object(log_cache, "LOG_CACHE", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.w3 = fake_web3(no_calls, head=HEAD)
+        self.fetch = FakeFetch()
+
+    def get_logs(self, from_block: int, to_block):
+        return blocks_of(get_logs_cached_by_key(self.w3, lambda: "key", from_block, to_block, self.fetch))
+
+    def test_only_confirmed_blocks_are_cached(self):
+        self.assertEqual(self.get_logs(1, HEAD), list(range(1, HEAD + 1)))
+        self.assertEqual(self.fetch.ranges, [(1, CONFIRMED), (CONFIRMED + 1, HEAD)])
+        self.assertEqual(self.cache.uncovered("key", 1, HEAD), [(CONFIRMED + 1, HEAD)])
+
+        # recent blocks are fetched again, they may still be reorganized
+        self.fetch.ranges.clear()
+        self.assertEqual(self.get_logs(1, "latest"), list(range(1, HEAD + 1)))
+        self.assertEqual(self.fetch.ranges, [(CONFIRMED + 1, "latest")])
+
+    def test_only_missing_ranges_are_fetched(self):
+        self.get_logs(100, 200)
+        self.get_logs(300, 400)
+        self.fetch.ranges.clear()
+        self.assertEqual(self.get_logs(1, 500), list(range(1, 501)))
+        self.assertEqual(self.fetch.ranges, [(1, 99), (201, 299), (401, 500)])
+        # touching ranges are merged
+        self.assertEqual(self.cache.uncovered("key", 1, CONFIRMED), [(501, CONFIRMED)])
+
+    def test_range_within_confirmations_is_never_cached(self):
+        self.assertEqual(self.get_logs(CONFIRMED + 1, HEAD), list(range(CONFIRMED + 1, HEAD + 1)))
+        self.assertEqual(self.cache.uncovered("key", CONFIRMED + 1, HEAD), [(CONFIRMED + 1, HEAD)])
+
+    def test_disabled_cache(self):
+        with mock.patch.object(log_cache, "LOG_CACHE", None), mock.patch.object(log_cache, "LOG_CACHE_PATH", ""):
+            self.assertEqual(self.get_logs(1, 10), list(range(1, 11)))
+        self.assertEqual(self.fetch.ranges, [(1, 10)])
+        self.assertEqual(self.cache.uncovered("key", 1, 10), [(1, 10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
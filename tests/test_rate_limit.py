@@ -0,0 +1,109 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from utils.rate_limit import RateLimitedSession, RateLimiter, get_rate_limiter, is_throttled
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def response(status_code: int, body: bytes = b"{}", headers=None) -> requests.Response:
+    result = requests.Response()
+    result.status_code = status_code
+    result._content = body
+    result.headers.update(headers or {})
+    return result
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("utils.rate_limit.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_token_bucket(self):
+        limiter = RateLimiter(rate=10, max_in_flight=4)
+        # one token is available up front, the next ones come every 1 / rate seconds
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertAlmostEqual(limiter.reserve(), 0.1)
+        self.assertAlmostEqual(limiter.reserve(), 0.2)
+
+        # an idle endpoint refills up to one second of requests
+        self.clock.now += 60
+        waits = [limiter.reserve() for _ in range(12)]
+        self.assertEqual(waits[:10], [0] * 10)
+        self.assertAlmostEqual(waits[11], 0.2)
+
+    def test_throttling_halves_the_rate_and_pauses(self):
+        limiter = RateLimiter(rate=16, max_in_flight=4)
+        self.assertEqual(limiter.reserve(), 0)
+        with mock.patch("utils.rate_limit.random.random", return_value=0):
+            self.assertEqual(limiter.throttled(retry_after=2), 2)
+        self.assertEqual(limiter.rate, 8)
+        self.assertGreaterEqual(limiter.reserve(), 2)
+
+        # repeated throttling never goes below a 16th of the configured rate
+        for attempt in range(10):
+            limiter.throttled(attempt=attempt)
+        self.assertEqual(limiter.rate, 1)
+
+        # and successes grow it back by 1% of it at a time
+        for _ in range(200):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 16)
+
+    def test_limiter_is_shared_per_endpoint(self):
+        self.assertIs(get_rate_limiter("https://node.test/a"), get_rate_limiter("https://node.test/a"))
+        self.assertIsNot(get_rate_limiter("https://node.test/a"), get_rate_limiter("https://node.test/b"))
+
+
+class RateLimitedSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        for patcher in (
+            mock.patch("utils.rate_limit.time", self.clock),
+            mock.patch("utils.rate_limit.random.random", return_value=0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_throttled_requests_are_retried(self):
+        limiter = RateLimiter(rate=1000, max_in_flight=4)
+        responses = [
+            response(429, headers={"Retry-After": "3"}),
+            response(200, b'{"jsonrpc":"2.0","id":1,"error":{"code":-32005,"message":"rate limit exceeded"}}'),
+            response(200, b'{"jsonrpc":"2.0","id":1,"result":"0x1"}'),
+        ]
+        with mock.patch("requests.Session.request", side_effect=responses) as request:
+            with self.assertLogs(level="WARNING"):
+                result = RateLimitedSession(limiter).request("POST", "https://node.test")
+        self.assertEqual(result.json()["result"], "0x1")
+        self.assertEqual(request.call_count, 3)
+        # the next slot waits for the provider's Retry-After
+        self.assertEqual(self.clock.sleeps[:1], [3])
+        # halved twice, then grown back by the success
+        self.assertEqual(limiter.rate, 1000 / 4 + 1000 / 100)
+
+    def test_is_throttled(self):
+        self.assertTrue(is_throttled(response(429)))
+        self.assertTrue(is_throttled(response(200, b'{"error":{"message":"Too Many Requests"}}')))
+        self.assertFalse(is_throttled(response(200, b'{"result":"0x1"}')))
+        # large results are not scanned for markers
+        self.assertFalse(is_throttled(response(200, b'{"result":"' + b"rate limit" * 200 + b'"}')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from campaign.campaign import get_integrations
+from campaign.runner import run_integrations
+from constants.chains import Chain
+from integrations.cached_balances_integration import CachedBalancesIntegration
+from integrations.integration_ids import IntegrationID
+
+
+class StubIntegration(CachedBalancesIntegration):
+    def get_block_balances(self, cached_data, blocks):
+        if self.start_block < 0:
+            raise ValueError("broken integration")
+        return {block: {"0x" + "00" * 20: float(block)} for block in blocks}
+
+
+def get_unused_ids():
+    campaign_ids = {integration.integration_id for integration in get_integrations()}
+    return [integration_id for integration_id in IntegrationID if integration_id not in campaign_ids]
+
+
+class RunIntegrationsTest(unittest.TestCase):
+    def test_failures_are_isolated(self):
+        working_id, broken_id = get_unused_ids()[:2]
+        with self.assertLogs(level="ERROR"):
+            runs = run_integrations(
+                [StubIntegration(working_id, 0), StubIntegration(broken_id, -1)],
+                {Chain.ETHEREUM: [10, 20]},
+            )
+        self.assertEqual(runs[working_id.name].balances, {10: {"0x" + "00" * 20: 10.0}, 20: {"0x" + "00" * 20: 20.0}})
+        self.assertEqual(runs[broken_id.name].error, "broken integration")
+
+    def test_processes(self):
+        # the campaign template integration returns no balances without any RPC call
+        template = next(i for i in get_integrations() if i.integration_id == IntegrationID.EXAMPLE)
+        runs = run_integrations([template], {Chain.ETHEREUM: [20000000]}, processes=1)
+        self.assertIsNone(runs[IntegrationID.EXAMPLE.name].error)
+        self.assertEqual(runs[IntegrationID.EXAMPLE.name].balances, {})
+
+        # a worker can only rebuild campaign integrations
+        with self.assertRaises(AssertionError):
+            run_integrations([StubIntegration(get_unused_ids()[0], 0)], {Chain.ETHEREUM: [10]}, processes=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
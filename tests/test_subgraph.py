@@ -0,0 +1,77 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+from utils import subgraph
+from utils.subgraph import paginate_subgraph, paginate_subgraph_at_blocks
+
+QUERY = "query Accounts($first: Int!, $lastId: String!, $block: Int!) { ... }"
+
+
+def json_response(body: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode()
+    return response
+
+
+class FakeSubgraphSession:
+    """Serves `rows_by_block[block]` sorted by id with the id cursor semantics of The Graph,
+    answering blocks in `errors_at` with a GraphQL errors payload."""
+
+    def __init__(self, rows_by_block, errors_at=()):
+        self.rows_by_block = rows_by_block
+        self.errors_at = set(errors_at)
+        self.requests = []
+
+    def post(self, url, json=None, headers=None, timeout=None):  # pylint: disable=redefined-outer-name
+        variables = json["variables"]
+        self.requests.append(variables)
+        block = variables.get("block")
+        if block in self.errors_at:
+            body = {"errors": [{"message": f"indexer has not reached block {block}"}]}
+        else:
+            rows = [row for row in self.rows_by_block[block] if row["id"] > variables["lastId"]]
+            body = {"data": {"accounts": rows[: variables["first"]]}}
+        return json_response(body)
+
+
+def accounts(count: int):
+    return [{"id": f"0x{i:040x}", "balance": str(i)} for i in range(count)]
+
+
+class PaginateSubgraphTest(unittest.TestCase):
+    def patch_session(self, session: FakeSubgraphSession):
+        patcher = mock.patch.object(subgraph, "SESSION", session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_exact_page_is_followed_by_an_empty_page(self):
+        session = FakeSubgraphSession({None: accounts(4)})
+        self.patch_session(session)
+        self.assertEqual(list(paginate_subgraph("url", QUERY, "accounts", page_size=2)), accounts(4))
+        # two full pages, then an empty one ends the walk
+        self.assertEqual(
+            [request["lastId"] for request in session.requests],
+            ["", accounts(4)[1]["id"], accounts(4)[3]["id"]],
+        )
+
+    def test_at_blocks(self):
+        session = FakeSubgraphSession({10: accounts(3), 20: accounts(5)})
+        self.patch_session(session)
+        self.assertEqual(
+            paginate_subgraph_at_blocks("url", QUERY, "accounts", [10, 20], page_size=3),
+            {10: accounts(3), 20: accounts(5)},
+        )
+        self.assertEqual(sum(1 for request in session.requests if request["block"] == 10), 2)
+
+    def test_errors_raise_with_the_block(self):
+        self.patch_session(FakeSubgraphSession({10: accounts(3), 20: accounts(3)}, errors_at=[20]))
+        with self.assertRaisesRegex(Exception, "at block 20"):
+            paginate_subgraph_at_blocks("url", QUERY, "accounts", [10, 20])
+
+
+if __name__ == "__main__":
+    unittest.main()
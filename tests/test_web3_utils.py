@@ -0,0 +1,121 @@
+import unittest
+from unittest import mock
+
+from eth_abi import encode
+
+from utils.web3_utils import LOG_RANGE_BY_EVENT, compile_output_decoder, is_log_range_error, scan_logs
+
+
+class CompileOutputDecoderTest(unittest.TestCase):
+    def assert_decodes(self, output_types, values):
+        data = encode(list(output_types), list(values))
+        self.assertEqual(compile_output_decoder(output_types)(data), tuple(values))
+
+    def test_scalar_uints(self):
+        self.assert_decodes(("uint256",), (2**256 - 1,))
+        self.assert_decodes(("uint112", "uint112", "uint32"), (10**30, 5, 1_700_000_000))
+        self.assert_decodes(("uint",), (42,))
+
+    def test_fixed_array(self):
+        # e.g. Curve controller user_state
+        self.assert_decodes(("uint256[4]",), ((1, 2, 3, 4),))
+
+    def test_dynamic_array(self):
+        self.assert_decodes(("uint256[]",), ((5, 6, 7),))
+        self.assert_decodes(("uint256[]",), ((),))
+
+    def test_mixed_types(self):
+        self.assert_decodes(
+            ("uint256", "address", "bool"),
+            (1, "0x" + "ab" * 20, True),
+        )
+
+    def test_out_of_range_word_goes_through_eth_abi(self):
+        data = (2**200).to_bytes(32, "big")
+        with self.assertRaises(Exception):
+            compile_output_decoder(("uint8",))(data)
+
+
+class FakeLogsNode:
+    """eth_getLogs stand-in with one log per block, rejecting ranges wider than `max_blocks`."""
+
+    def __init__(self, max_blocks: int, error: str = "query returned more than 10000 results"):
+        self.max_blocks = max_blocks
+        self.error = error
+        self.requests = []
+        self.failures = []
+
+    def get_logs(self, start: int, end: int):
+        self.requests.append((start, end))
+        if self.failures:
+            raise self.failures.pop(0)
+        if end - start + 1 > self.max_blocks:
+            raise ValueError({"code": -32005, "message": self.error})
+        return [{"blockNumber": block, "logIndex": 0} for block in range(start, end + 1)]
+
+
+class ScanLogsTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("utils.web3_utils.slack_message")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.range_key = ("fake://", self.id(), "Transfer")
+        self.addCleanup(LOG_RANGE_BY_EVENT.pop, self.range_key, None)
+
+    def scan(self, node: FakeLogsNode, from_block: int, to_block: int, initial_range: int = 1000):
+        return list(
+            scan_logs("test", node.get_logs, self.range_key, from_block, to_block, initial_range, 500_000, 2000, 3, 0)
+        )
+
+    def test_splits_rejected_ranges_without_gaps_or_duplicates(self):
+        node = FakeLogsNode(max_blocks=100)
+        logs = self.scan(node, 1, 1000)
+        self.assertEqual([log["blockNumber"] for log in logs], list(range(1, 1001)))
+        # never grows back past the rejected range
+        self.assertTrue(all(end - start + 1 <= 1000 for start, end in node.requests))
+        self.assertLessEqual(LOG_RANGE_BY_EVENT[self.range_key], 100)
+
+    def test_grows_the_range_while_responses_are_small(self):
+        node = FakeLogsNode(max_blocks=10**9)
+        self.scan(node, 1, 100, initial_range=10)
+        self.assertEqual([end - start + 1 for start, end in node.requests], [10, 20, 40, 30])
+
+    def test_timeouts_are_retried_with_the_same_range(self):
+        node = FakeLogsNode(max_blocks=10**9)
+        node.failures = [TimeoutError("Read timed out. (read timeout=30)"), ValueError("429 Too Many Requests")]
+        logs = self.scan(node, 1, 100, initial_range=100)
+        self.assertEqual(len(logs), 100)
+        self.assertEqual(node.requests, [(1, 100)] * 3)
+
+    def test_persistent_errors_raise_after_the_retries(self):
+        node = FakeLogsNode(max_blocks=10**9)
+        node.failures = [TimeoutError("Read timed out.")] * 3
+        with self.assertRaises(TimeoutError), self.assertLogs(level="ERROR"):
+            self.scan(node, 1, 100, initial_range=100)
+        self.assertEqual(len(node.requests), 3)
+
+
+class IsLogRangeErrorTest(unittest.TestCase):
+    def test_range_errors(self):
+        for message in [
+            "{'code': -32005, 'message': 'query returned more than 10000 results'}",
+            "block range is too wide",
+            "exceed maximum block range: 50000",
+            "Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range",
+            "eth_getLogs is limited to a 10,000 range",
+        ]:
+            self.assertTrue(is_log_range_error(ValueError(message)), message)
+
+    def test_transient_errors(self):
+        for message in [
+            "HTTPSConnectionPool: Read timed out. (read timeout=30)",
+            "429 Client Error: Too Many Requests",
+            "{'code': -32005, 'message': 'project ID request rate exceeded'}",
+            "Your app has exceeded its compute units per second capacity, rate limit",
+            "Connection reset by peer",
+        ]:
+            self.assertFalse(is_log_range_error(ValueError(message)), message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+// Maximum number of Aptos view calls in flight per script run
+export const APTOS_VIEW_CONCURRENCY = Number(process.env.APTOS_VIEW_CONCURRENCY || 16);
+
+// Run fn over items with at most `limit` calls in flight, results keep the order of items
+export async function mapWithConcurrency<T, R>(
+  items: T[],
+  limit: number,
+  fn: (item: T) => Promise<R>
+): Promise<R[]> {
+  const results: R[] = new Array(items.length);
+  let next = 0;
+  async function worker() {
+    while (next < items.length) {
+      const i = next++;
+      results[i] = await fn(items[i]);
+    }
+  }
+  await Promise.all(Array.from({ length: Math.max(1, Math.min(limit, items.length)) }, worker));
+  return results;
+}
@@ -1,5 +1,6 @@
 import * as dotenv from "dotenv";
 import { Aptos, AptosConfig, Network } from "@aptos-labs/ts-sdk";
+import { APTOS_VIEW_CONCURRENCY, mapWithConcurrency } from "./concurrency";
 
 dotenv.config();
 
@@ -7,44 +8,49 @@ const config = new AptosConfig({ network: Network.MAINNET });
 // Aptos is the main entrypoint for all functions
 const client = new Aptos(config);
 
-const args = process.argv.slice(2);
-const LENDING_CONTRACT_ADDRESS = args[0];
-const market_address = args[1];
-const decimals = Number(args[2]);
-const block = Number(args[3]);
-const user_addresses: string[] = JSON.parse(args[4]);
-const XLPT_ORACLE_ADDRESS = args[5];
-const SUSDE_USDC_TOKEN_ADDRESS = args[6];
+export async function run(args: string[]): Promise<Record<string, number>> {
+  const LENDING_CONTRACT_ADDRESS = args[0];
+  const market_address = args[1];
+  const decimals = Number(args[2]);
+  const block = Number(args[3]);
+  const user_addresses: string[] = JSON.parse(args[4]);
+  const XLPT_ORACLE_ADDRESS = args[5];
+  const SUSDE_USDC_TOKEN_ADDRESS = args[6];
 
-async function getStrategy() {
-  // iterate over all users and get their susde balance
+  // the xLPT price only depends on the ledger version, not on the user
   const user_balances: Record<string, number> = {};
-  for (const address of user_addresses) {
-    const susde_usdc_xlpt_balance = await client.view({
+  if (!user_addresses.length) {
+    return user_balances;
+  }
+  const susde_usdc_xlpt_price = await client.view({
+    payload: {
+      function: `${XLPT_ORACLE_ADDRESS}::oracle::get_price`,
+      functionArguments: [SUSDE_USDC_TOKEN_ADDRESS],
+    },
+    options: { ledgerVersion: block },
+  });
+  const price = fp64ToFloat(BigInt((susde_usdc_xlpt_price[0] as { v: string }).v));
+
+  // get every user's susde/usdc xLPT balance, a bounded number of views at a time
+  const balances = await mapWithConcurrency(user_addresses, APTOS_VIEW_CONCURRENCY, (address) =>
+    client.view({
       payload: {
         function: `${LENDING_CONTRACT_ADDRESS}::lending::account_coins`,
         functionArguments: [address, market_address],
       },
       options: { ledgerVersion: block },
-    });
-
-    const susde_usdc_xlpt_price = await client.view({
-      payload: {
-        function: `${XLPT_ORACLE_ADDRESS}::oracle::get_price`,
-        functionArguments: [SUSDE_USDC_TOKEN_ADDRESS],
-      },
-      options: { ledgerVersion: block },
-    });
-
-    const susde_usdc_value = Number(susde_usdc_xlpt_balance) * fp64ToFloat(BigInt((susde_usdc_xlpt_price[0] as { v: string }).v));;
+    })
+  );
 
+  user_addresses.forEach((address, i) => {
+    const susde_usdc_value = Number(balances[i]) * price;
     user_balances[address] = scaleDownByDecimals(
       susde_usdc_value,
       decimals
     );
-  }
+  });
 
-  console.log(JSON.stringify(user_balances));
+  return user_balances;
 }
 
 function scaleDownByDecimals(value: number, decimals: number) {
@@ -86,4 +92,8 @@ export const fp64ToFloat = (a: bigint): number => {
   return result;
 };
 
-const strategy = getStrategy().catch(console.error);
+if (require.main === module) {
+  run(process.argv.slice(2))
+    .then((result) => console.log(JSON.stringify(result)))
+    .catch(console.error);
+}
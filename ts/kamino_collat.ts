@@ -7,12 +7,11 @@ dotenv.config();
 
 const connection = new Connection(SOL_NODE);
 
-const args = process.argv.slice(2);
-const market_address = args[0];
-const token_to_filter = args[1];
-const decimals = Number(args[2]);
+export async function run(args: string[]): Promise<Record<string, number>> {
+  const market_address = args[0];
+  const token_to_filter = args[1];
+  const decimals = Number(args[2]);
 
-async function getStrategy() {
   const market = await KaminoMarket.load(
     //connection as any, // Type cast to avoid version mismatch
     connection as any,
@@ -36,7 +35,11 @@ async function getStrategy() {
     }
   }
 
-  console.log(JSON.stringify(dataMap));
+  return dataMap;
 }
 
-const strategy = getStrategy().catch(console.error);
+if (require.main === module) {
+  run(process.argv.slice(2))
+    .then((result) => console.log(JSON.stringify(result)))
+    .catch(console.error);
+}
@@ -1,5 +1,6 @@
 import * as dotenv from "dotenv";
 import { Aptos, AptosConfig, Network } from "@aptos-labs/ts-sdk";
+import { APTOS_VIEW_CONCURRENCY, mapWithConcurrency } from "./concurrency";
 
 dotenv.config();
 
@@ -7,81 +8,106 @@ const config = new AptosConfig({ network: Network.MAINNET });
 // Aptos is the main entrypoint for all functions
 const client = new Aptos(config);
 
-const args = process.argv.slice(2);
-const THALA_V1_FARMING_ADDRESS = args[0];
-const THALA_STAKED_LPT_ADDRESS = args[1];
-const THALASWAP_V2_ADDRESS = args[2];
-const SUSDE_LPT_PID = args[3];
-const SUSDE_LPT_ADDRESS = args[4];
-const SUSDE_XLPT_ADDRESS = args[5];
-const decimals = Number(args[6]);
-const block = Number(args[7]);
-const user_addresses: Array<string> = JSON.parse(args[8]);
+type Balances = Record<string, number>;
 
-async function getStrategy() {
-    // iterate over all users and get their susde balance
-    const user_balances: Record<string, number> = {};
-    for (const address of user_addresses) {
-        // 1. Fetch thala_v1_farming stake amount
-        const [stake_amount_lpt, _boosted_stake_amount_lpt, _boost_multiplier_lpt] = await client.view<string[]>({
-            payload: {
-                function: `${THALA_V1_FARMING_ADDRESS}::farming::stake_amount`,
-                functionArguments: [address, Number(SUSDE_LPT_PID)],
-            },
-            options: { ledgerVersion: block },
-        });
+export async function run(args: string[]): Promise<Balances | Record<string, Balances>> {
+    const THALA_V1_FARMING_ADDRESS = args[0];
+    const THALA_STAKED_LPT_ADDRESS = args[1];
+    const THALASWAP_V2_ADDRESS = args[2];
+    const SUSDE_LPT_PID = args[3];
+    const SUSDE_LPT_ADDRESS = args[4];
+    const SUSDE_XLPT_ADDRESS = args[5];
+    const decimals = Number(args[6]);
+    // a single ledger version with a list of users, or a list of versions with either
+    // one list of users for all of them or a {version: users} map
+    const blocks: number | number[] = JSON.parse(args[7]);
+    const user_addresses: string[] | Record<string, string[]> = JSON.parse(args[8]);
+
+    // lpt price only depends on the ledger version, not on the user
+    async function getLptPrice(block: number): Promise<number> {
+        // preview how much sUSDE/USDC is returned when 1 LPT is removed (the pool LPT distribution)
+        // and the sUSDE/USDC exchange rate of 1 sUSDE
+        const [[lptPreview], [swapPreview]] = await Promise.all([
+            client.view<any[]>({
+                payload: {
+                    function: `${THALASWAP_V2_ADDRESS}::pool::preview_remove_liquidity`,
+                    functionArguments: [SUSDE_LPT_ADDRESS, SUSDE_LPT_ADDRESS, 100000000],
+                },
+                options: { ledgerVersion: block },
+            }),
+            client.view<any[]>({
+                payload: {
+                    function: `${THALASWAP_V2_ADDRESS}::pool::preview_swap_exact_in_metastable`,
+                    functionArguments: [SUSDE_LPT_ADDRESS, "0xb30a694a344edee467d9f82330bbe7c3b89f440a1ecd2da1f3bca266560fce69", "0xbae207659db88bea0cbead6da0ed00aac12edcdda169e591cd41c94180b46f3b", 100000000, "0x1"],
+                },
+                options: { ledgerVersion: block },
+            }),
+        ]);
 
-        // 2. Fetch thala_staked_lpt stake amount
-        let stake_amount_xlpt = "0"; // default to 0 if the view fails
+        // lpt Price = sUSDE/USDC exchange rate * (% of sUSDE in pool) + (USDC price ($1) * (% of USDC in pool))
+        return ((lptPreview.withdrawn_amounts[0] / 100000000 * swapPreview.amount_out / 100000000) + (lptPreview.withdrawn_amounts[1] / 100000000)) * 100;
+    }
 
-        try {
-            const [_boosted_stake_amount_xlpt, stakeResult] = await client.view<string[]>({
+    async function getStakeAmount(address: string, block: number): Promise<number> {
+        // 1. Fetch thala_v1_farming stake amount, and 2. thala_staked_lpt stake amount
+        const [[stake_amount_lpt, _boosted_stake_amount_lpt, _boost_multiplier_lpt], stake_amount_xlpt] = await Promise.all([
+            client.view<string[]>({
+                payload: {
+                    function: `${THALA_V1_FARMING_ADDRESS}::farming::stake_amount`,
+                    functionArguments: [address, Number(SUSDE_LPT_PID)],
+                },
+                options: { ledgerVersion: block },
+            }),
+            client.view<string[]>({
                 payload: {
                     function: `${THALA_STAKED_LPT_ADDRESS}::staked_lpt::user_stake_amount`,
                     functionArguments: [address, `${SUSDE_XLPT_ADDRESS}`],
                 },
                 options: { ledgerVersion: block },
-            });
-
-            stake_amount_xlpt = stakeResult;
-        } catch (e) {
-        }
+            }).then(([_boosted_stake_amount_xlpt, stakeResult]) => stakeResult)
+                .catch(() => "0"), // default to 0 if the view fails
+        ]);
 
         // 3. Sum respective farming amounts
-        let stake_amount = Number(stake_amount_lpt) + Number(stake_amount_xlpt);
+        return Number(stake_amount_lpt) + Number(stake_amount_xlpt);
+    }
 
-        // 4. preview how much sUSDE/USDC is returned when 1 LPT is removed (the pool LPT distribution)
-        let [lptPreview] = await client.view<any[]>({
-            payload: {
-                function: `${THALASWAP_V2_ADDRESS}::pool::preview_remove_liquidity`,
-                functionArguments: [SUSDE_LPT_ADDRESS, SUSDE_LPT_ADDRESS, 100000000],
-            },
-            options: { ledgerVersion: block },
-        });
+    async function getBlockBalances(block: number, addresses: string[]): Promise<Balances> {
+        const user_balances: Balances = {};
+        if (!addresses.length) {
+            return user_balances;
+        }
 
-        // 5. preview the sUSDE/USDC exchange rate of 1 sUSDE
-        let [swapPreview] = await client.view<any[]>({
-            payload: {
-                function: `${THALASWAP_V2_ADDRESS}::pool::preview_swap_exact_in_metastable`,
-                functionArguments: [SUSDE_LPT_ADDRESS, "0xb30a694a344edee467d9f82330bbe7c3b89f440a1ecd2da1f3bca266560fce69", "0xbae207659db88bea0cbead6da0ed00aac12edcdda169e591cd41c94180b46f3b", 100000000, "0x1"],
-            },
-            options: { ledgerVersion: block },
+        const lptPrice = await getLptPrice(block);
+        const stake_amounts = await mapWithConcurrency(addresses, APTOS_VIEW_CONCURRENCY, (address) =>
+            getStakeAmount(address, block)
+        );
+        addresses.forEach((address, i) => {
+            user_balances[address] = scaleDownByDecimals(
+                stake_amounts[i],
+                decimals
+            ) * lptPrice;
         });
-
-        // lpt Price = sUSDE/USDC exchange rate * (% of sUSDE in pool) + (USDC price ($1) * (% of USDC in pool))
-        let lptPrice = ((lptPreview.withdrawn_amounts[0] / 100000000 * swapPreview.amount_out / 100000000) + (lptPreview.withdrawn_amounts[1] / 100000000)) * 100;
-
-        user_balances[address] = scaleDownByDecimals(
-            stake_amount,
-            decimals
-        ) * lptPrice;
+        return user_balances;
     }
 
-    console.log(JSON.stringify(user_balances));
+    if (!Array.isArray(blocks)) {
+        return getBlockBalances(blocks, user_addresses as string[]);
+    }
+    const balances_by_block: Record<string, Balances> = {};
+    for (const block of blocks) {
+        const addresses = Array.isArray(user_addresses) ? user_addresses : user_addresses[block] || [];
+        balances_by_block[block] = await getBlockBalances(block, addresses);
+    }
+    return balances_by_block;
 }
 
 function scaleDownByDecimals(value: number, decimals: number) {
     return value / 10 ** decimals;
 }
 
-const strategy = getStrategy().catch(console.error);
\ No newline at end of file
+if (require.main === module) {
+    run(process.argv.slice(2))
+        .then((result) => console.log(JSON.stringify(result)))
+        .catch(console.error);
+}
\ No newline at end of file
@@ -0,0 +1,54 @@
+import * as readline from "readline";
+
+// Long-lived worker: reads one JSON request per line on stdin,
+//   {"id": 1, "script": "thala_balances", "args": ["0x...", ...]}
+// runs the `run` export of ./<script> and answers with one JSON line on stdout,
+//   {"id": 1, "result": {...}} or {"id": 1, "error": "..."}
+// Scripts are loaded once, so SDK imports and RPC clients stay warm between requests.
+
+type Handler = (args: string[]) => Promise<unknown>;
+
+// stdout carries the protocol, anything the scripts or SDKs log goes to stderr
+const write = process.stdout.write.bind(process.stdout);
+console.log = (...data: unknown[]) => console.error(...data);
+
+const handlers: Record<string, Handler> = {};
+
+function getHandler(script: string): Handler {
+  if (!/^[a-z0-9_]+$/.test(script)) {
+    throw new Error(`Invalid script name: ${script}`);
+  }
+  if (!handlers[script]) {
+    // eslint-disable-next-line @typescript-eslint/no-var-requires
+    const handler = require(`./${script}`).run;
+    if (typeof handler !== "function") {
+      throw new Error(`Script ${script} does not export run(args)`);
+    }
+    handlers[script] = handler;
+  }
+  return handlers[script];
+}
+
+async function handle(line: string) {
+  let id: unknown = null;
+  try {
+    const request = JSON.parse(line);
+    id = request.id;
+    const result = await getHandler(request.script)(request.args.map(String));
+    write(JSON.stringify({ id, result }) + "\n");
+  } catch (e) {
+    write(JSON.stringify({ id, error: e instanceof Error ? e.stack || e.message : String(e) }) + "\n");
+  }
+}
+
+const pending = new Set<Promise<void>>();
+const lines = readline.createInterface({ input: process.stdin });
+lines.on("line", (line) => {
+  if (line.trim()) {
+    const request = handle(line);
+    pending.add(request);
+    request.finally(() => pending.delete(request));
+  }
+});
+// answer the requests still running before exiting
+lines.on("close", () => Promise.allSettled(pending).then(() => process.exit(0)));
@@ -0,0 +1,61 @@
+import json
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+from web3.contract import Contract
+
+from constants.chains import Chain
+from utils.web3_utils import W3_BY_CHAIN
+
+ABI_DIR = Path(__file__).parent.parent / "abi"
+
+
+@lru_cache(maxsize=None)
+def load_abi(name: str) -> List[dict]:
+    """Parsed ABI of abi/<name>, read from disk once per process.
+
+    `name` is relative to the abi directory, a leading "abi/" is accepted. The returned
+    list is shared by every caller and must not be modified.
+    """
+    if name.startswith("abi/"):
+        return load_abi(name.removeprefix("abi/"))
+    with open(ABI_DIR / name) as f:
+        return json.load(f)
+
+
+def get_abi_entry(abi_name: str, entry_type: str, entry_name: str) -> dict:
+    entries = [
+        entry
+        for entry in load_abi(abi_name)
+        if entry.get("type") == entry_type and entry.get("name") == entry_name
+    ]
+    if len(entries) != 1:
+        raise ValueError(
+            f"Expected one {entry_type} {entry_name} in {abi_name}, found {len(entries)}"
+        )
+    return entries[0]
+
+
+@lru_cache(maxsize=None)
+def get_event_topic(abi_name: str, event_name: str) -> bytes:
+    """topic0 of an event of abi/<abi_name>."""
+    return event_abi_to_log_topic(get_abi_entry(abi_name, "event", event_name))
+
+
+CONTRACT_BY_KEY: Dict[Tuple[Chain, str, str], Contract] = {}
+CONTRACT_LOCK = threading.Lock()
+
+
+def get_contract(chain: Chain, address: str, abi_name: str) -> Contract:
+    """Contract at `address` on `chain` with the ABI of abi/<abi_name>, built once and shared."""
+    key = (chain, Web3.to_checksum_address(address), abi_name.removeprefix("abi/"))
+    with CONTRACT_LOCK:
+        if key not in CONTRACT_BY_KEY:
+            CONTRACT_BY_KEY[key] = W3_BY_CHAIN[chain]["w3"].eth.contract(
+                address=key[1], abi=load_abi(key[2])
+            )
+        return CONTRACT_BY_KEY[key]
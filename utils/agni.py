@@ -1,11 +1,12 @@
-import math
 from typing import Dict, Set
 
 from eth_typing import ChecksumAddress
 from web3 import Web3
 
+from constants.chains import Chain
+from utils.concentrated_liquidity import get_amounts_for_positions, get_nfp_positions
 from utils.web3_utils import call_with_retry, fetch_events_logs_with_retry
-from utils.web3_utils import w3_mantle
+from utils.web3_utils import w3_mantle, multicall_by_address, MULTICALL_ADDRESS_BY_CHAIN
 
 from constants.agni import (
     usde_cmeth_025,
@@ -27,8 +28,10 @@ from constants.agni import (
 def get_agni_pool_info_list(
         pools,
         start=START_BLOCK,
-        end=w3_mantle.eth.get_block_number(),
+        end=None,
 ) -> Dict[ChecksumAddress, Dict[ChecksumAddress, Set[int]]]:
+    if end is None:
+        end = w3_mantle.eth.get_block_number()
     pools = {Web3.to_checksum_address(pool) for pool in pools}
     pool_info_list: Dict[ChecksumAddress, Dict[ChecksumAddress, Set[int]]] = {}
 
@@ -47,27 +50,39 @@ def get_agni_pool_info_list(
             to_block,
         )
         print(start, to_block, len(list(deposits)), "getting deposits for agni")
-        for deposit in deposits:
-            try:
-                token_id = deposit["args"]["tokenId"]
-                position = position_manager_contract.functions.positions(token_id).call(
-                    block_identifier=end
-                )
-                pool_address = Web3.to_checksum_address(compute_pool_address(position[2], position[3], position[4]))
-                if pool_address not in pools:
-                    continue
-                owner = position_manager_contract.functions.ownerOf(token_id).call(
-                    block_identifier=end
-                )
-                owner = Web3.to_checksum_address(owner)
-                users = pool_info_list[pool_address]
-                if owner not in users:
-                    users[owner] = {deposit["args"]["tokenId"]}
-                else:
-                    users[owner].add(deposit["args"]["tokenId"])
-            except Exception:
-                # nft does not exist at current block
+        # positions and owners of the page's tokens in two multicalls,
+        # None when the nft does not exist at the current block
+        token_ids = list(dict.fromkeys(deposit["args"]["tokenId"] for deposit in deposits))
+        positions = get_nfp_positions(
+            w3_mantle,
+            MULTICALL_ADDRESS_BY_CHAIN[Chain.MANTLE],
+            position_manager_contract,
+            token_ids,
+            end,
+        )
+        pool_token_ids = {}
+        for token_id, position in positions.items():
+            if position is None:
+                continue
+            pool_address = Web3.to_checksum_address(compute_pool_address(position[2], position[3], position[4]))
+            if pool_address in pools:
+                pool_token_ids[token_id] = pool_address
+        owners = multicall_by_address(
+            w3_mantle,
+            MULTICALL_ADDRESS_BY_CHAIN[Chain.MANTLE],
+            [(position_manager_contract, "ownerOf", [token_id]) for token_id in pool_token_ids],
+            end,
+            allow_failure=True,
+        ) if pool_token_ids else []
+        for (token_id, pool_address), owner in zip(pool_token_ids.items(), owners):
+            if owner is None:
                 continue
+            owner = Web3.to_checksum_address(owner[0])
+            users = pool_info_list[pool_address]
+            if owner not in users:
+                users[owner] = {token_id}
+            else:
+                users[owner].add(token_id)
 
         if to_block == end:
             break
@@ -77,54 +92,18 @@ def get_agni_pool_info_list(
 
 
 def get_pool_price(
-        contract, block=w3_mantle.eth.get_block_number() - 100
+        contract, block=None
 ):  # assumes both tokens are using same number of decimals
+    if block is None:
+        block = w3_mantle.eth.get_block_number() - 100
     slot0 = call_with_retry(contract.functions.slot0(), block)
     return int(slot0[0])
 
 
-def get_pool_tick(contract, block=w3_mantle.eth.get_block_number() - 100):
-    return math.log(
-        ((call_with_retry(contract.functions.slot0(), block)[0]) / (2 ** 96)) ** 2
-    ) / math.log(1.0001)
-
-
-def get_agnis_position_balance(token_id, block, tick, sqrt_ratio_x96):
-    try:
-        [_, _, token0, token1, _, tick_lower, tick_upper, liquidity, _, _, _, _] = (
-            call_with_retry(position_manager_contract.functions.positions(token_id), block)
-        )
-    except Exception:
-        print(token_id, "not yet created at", block)
-        return [None, None, 0, 0]
-    result = calculate_agni_tokens(
-        tick, tick_lower, tick_upper, sqrt_ratio_x96, liquidity
-    )
-    return [token0, token1, result[0], result[1]]
-
-
-def calculate_agni_tokens(tick, tick_lower, tick_upper, sqrt_ratio_x96, liquidity):
-    if liquidity == 0:
-        return [0, 0]
-    if abs(tick_lower) > MAX_TICK_RANGE or abs(tick_upper) > MAX_TICK_RANGE:
-        return [0, 0]
-    t0 = 0
-    t1 = 0
-    sqrt_ratio_l = int(math.sqrt(1.0001) ** tick_upper * (2 ** 96))
-    sqrt_ratio_u = int(math.sqrt(1.0001) ** tick_lower * (2 ** 96))
-    liquidity_96 = liquidity << 96
-    if tick_lower < tick < tick_upper:
-        t0 = liquidity_96 * abs((sqrt_ratio_l - sqrt_ratio_x96)) / (sqrt_ratio_x96 * sqrt_ratio_l)
-        t1 = liquidity * abs(sqrt_ratio_x96 - sqrt_ratio_u) / (2 ** 96)
-    elif tick >= tick_upper:
-        t1 = liquidity * abs(sqrt_ratio_u - sqrt_ratio_l) / (2 ** 96)
-    else:
-        t0 = liquidity_96 * abs(sqrt_ratio_u - sqrt_ratio_l) / (sqrt_ratio_u * sqrt_ratio_l)
-    return [abs(t0 / 10 ** 18), abs(t1 / 10 ** 18)]
-
-
 def get_agni_all_user_balance(pool: ChecksumAddress, users: Dict[ChecksumAddress, Set[int]],
-                              block=w3_mantle.eth.get_block_number()) -> Dict[ChecksumAddress, float]:
+                              block=None) -> Dict[ChecksumAddress, float]:
+    if block is None:
+        block = w3_mantle.eth.get_block_number()
     try:
         if block < START_BLOCK:
             return {}
@@ -139,29 +118,52 @@ def get_agni_all_user_balance(pool: ChecksumAddress, users: Dict[ChecksumAddress
         else:
             raise Exception("Unknown pool")
 
-        print(users)
         all_user_total_balances:Dict[ChecksumAddress, float] = {}
 
         if len(users) == 0:
             return all_user_total_balances
 
         sqrt_ratio_x96 = get_pool_price(contract, block)
-        tick = get_pool_tick(contract, block)
-        print(sqrt_ratio_x96, tick)
+
+        # every position of the pool in one multicall, None when not yet created at block
+        token_ids = sorted({token_id for token_ids in users.values() for token_id in token_ids})
+        positions = get_nfp_positions(
+            w3_mantle,
+            MULTICALL_ADDRESS_BY_CHAIN[Chain.MANTLE],
+            position_manager_contract,
+            token_ids,
+            block,
+        )
+        valued_positions = {
+            token_id: position
+            for token_id, position in positions.items()
+            if position is not None
+            and position[7] != 0
+            and abs(position[5]) <= MAX_TICK_RANGE
+            and abs(position[6]) <= MAX_TICK_RANGE
+        }
+        amounts_by_token_id = dict(
+            zip(
+                valued_positions,
+                get_amounts_for_positions(
+                    sqrt_ratio_x96,
+                    [(position[5], position[6], position[7]) for position in valued_positions.values()],
+                ),
+            )
+        )
 
         for user in users:
-            token_ids = users[user]
             usde = 0
-            for token_id in token_ids:
-                [token0, token1, t0, t1] = get_agnis_position_balance(token_id, block, tick, sqrt_ratio_x96)
-                if token0 is None or token1 is None:
+            for token_id in users[user]:
+                if token_id not in amounts_by_token_id:
                     continue
+                token0, token1 = valued_positions[token_id][2:4]
+                t0, t1 = amounts_by_token_id[token_id]
                 if token0 == usde_address:
-                    usde += t0
+                    usde += t0 / 10 ** 18
                 elif token1 == usde_address:
-                    usde += t1
+                    usde += t1 / 10 ** 18
             all_user_total_balances[user] = round(usde, 2)
-            print(user, usde, len(token_ids))
         return all_user_total_balances
     except Exception :
         return {}
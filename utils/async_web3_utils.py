@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import os
+import traceback
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Tuple, TypeVar, Union
+
+from aiohttp import ClientSession, TCPConnector
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.contract import AsyncContract
+from web3.types import EventData
+
+from constants.chains import Chain
+from utils.log_cache import (
+    LOG_CACHE_CONFIRMATIONS,
+    get_cache_key,
+    get_head_block,
+    get_log_cache,
+)
+from utils.rate_limit import get_rate_limiter
+from utils.slack import slack_message
+from utils.web3_utils import (
+    MULTICALL_ABI,
+    W3_BY_CHAIN,
+    LogRange,
+    decode_multicall_results,
+    encode_multicall_calls,
+    get_endpoint,
+)
+
+T = TypeVar("T")
+
+# Maximum number of in-flight async requests per RPC endpoint. Override a chain with
+# <CHAIN>_RPC_MAX_CONCURRENCY, e.g. ETHEREUM_RPC_MAX_CONCURRENCY=16
+RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", "8"))
+RPC_MAX_CONCURRENCY_BY_CHAIN: Dict[Chain, int] = {
+    chain: int(os.environ[f"{chain.name}_RPC_MAX_CONCURRENCY"])
+    for chain in Chain
+    if f"{chain.name}_RPC_MAX_CONCURRENCY" in os.environ
+}
+
+ASYNC_W3_BY_ENDPOINT: Dict[str, AsyncWeb3] = {}
+CONCURRENCY_BY_ENDPOINT: Dict[str, int] = {}
+# asyncio primitives and aiohttp sessions are bound to the loop they are first used in
+SEMAPHORE_BY_ENDPOINT_AND_LOOP: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+SESSION_BY_ENDPOINT_AND_LOOP: Dict[Tuple[str, int], ClientSession] = {}
+ASYNC_CONTRACT_CACHE: Dict[Tuple[str, str, int], AsyncContract] = {}
+
+
+def get_async_w3(source: Union[Chain, Web3]) -> AsyncWeb3:
+    """Return the AsyncWeb3 sharing the endpoint of a chain in W3_BY_CHAIN, or of a sync Web3."""
+    if isinstance(source, Chain):
+        endpoint = get_endpoint(W3_BY_CHAIN[source]["w3"])
+        CONCURRENCY_BY_ENDPOINT.setdefault(
+            endpoint, RPC_MAX_CONCURRENCY_BY_CHAIN.get(source, RPC_MAX_CONCURRENCY)
+        )
+    else:
+        endpoint = get_endpoint(source)
+
+    if endpoint not in ASYNC_W3_BY_ENDPOINT:
+        ASYNC_W3_BY_ENDPOINT[endpoint] = AsyncWeb3(AsyncHTTPProvider(endpoint))
+    return ASYNC_W3_BY_ENDPOINT[endpoint]
+
+
+def run_async(coroutine: Awaitable[T]) -> T:
+    """Run `coroutine` in a new event loop from sync code, e.g. an integration running in a
+    runner thread, and close the connections it opened once it is done."""
+
+    async def main() -> T:
+        try:
+            return await coroutine
+        finally:
+            loop_id = id(asyncio.get_running_loop())
+            for key in [key for key in SESSION_BY_ENDPOINT_AND_LOOP if key[1] == loop_id]:
+                await SESSION_BY_ENDPOINT_AND_LOOP.pop(key).close()
+            for key in [key for key in SEMAPHORE_BY_ENDPOINT_AND_LOOP if key[1] == loop_id]:
+                del SEMAPHORE_BY_ENDPOINT_AND_LOOP[key]
+
+    return asyncio.run(main())
+
+
+def rpc_slot(aw3: AsyncWeb3) -> asyncio.Semaphore:
+    """Semaphore bounding the concurrent requests sent to the endpoint of `aw3`."""
+    key = (get_endpoint(aw3), id(asyncio.get_running_loop()))  # type: ignore[arg-type]
+    if key not in SEMAPHORE_BY_ENDPOINT_AND_LOOP:
+        SEMAPHORE_BY_ENDPOINT_AND_LOOP[key] = asyncio.Semaphore(
+            CONCURRENCY_BY_ENDPOINT.get(key[0], RPC_MAX_CONCURRENCY)
+        )
+    return SEMAPHORE_BY_ENDPOINT_AND_LOOP[key]
+
+
+async def use_keep_alive_session(aw3: AsyncWeb3):
+    """Give the provider of `aw3` a keep-alive session in the running loop, the web3 default
+    one closes the connection after every request."""
+    key = (get_endpoint(aw3), id(asyncio.get_running_loop()))  # type: ignore[arg-type]
+    if key not in SESSION_BY_ENDPOINT_AND_LOOP:
+        session = ClientSession(
+            raise_for_status=True,
+            connector=TCPConnector(limit=CONCURRENCY_BY_ENDPOINT.get(key[0], RPC_MAX_CONCURRENCY)),
+        )
+        SESSION_BY_ENDPOINT_AND_LOOP[key] = session
+        await aw3.provider.cache_async_session(session)  # type: ignore[attr-defined]
+
+
+@asynccontextmanager
+async def rate_limited_slot(aw3: AsyncWeb3) -> AsyncIterator[None]:
+    """Concurrency slot of `aw3` that also waits for a token of the endpoint rate limiter,
+    shared with the sync providers of the same endpoint."""
+    await use_keep_alive_session(aw3)
+    async with rpc_slot(aw3):
+        wait = get_rate_limiter(get_endpoint(aw3)).reserve()  # type: ignore[arg-type]
+        if wait > 0:
+            await asyncio.sleep(wait)
+        yield
+
+
+def throttle_delay(aw3: AsyncWeb3, e: Exception, attempt: int, delay: float) -> float:
+    """Pause before retrying: provider backoff on throttling errors, `delay` otherwise."""
+    message = str(e).lower()
+    if "429" in message or "rate limit" in message or "too many requests" in message:
+        return get_rate_limiter(get_endpoint(aw3)).throttled(attempt=attempt)  # type: ignore[arg-type]
+    return delay
+
+
+def to_async_contract(aw3: AsyncWeb3, address: str, abi) -> AsyncContract:
+    key = (get_endpoint(aw3), address, id(abi))  # type: ignore[arg-type]
+    if key not in ASYNC_CONTRACT_CACHE:
+        ASYNC_CONTRACT_CACHE[key] = aw3.eth.contract(address=address, abi=abi)
+    return ASYNC_CONTRACT_CACHE[key]
+
+
+async def async_call_with_retry(contract_function, block="latest", retries=3, delay=2):
+    """Async variant of call_with_retry, taking the same (sync) contract function."""
+    aw3 = get_async_w3(contract_function.w3)
+    contract = to_async_contract(aw3, contract_function.address, contract_function.contract_abi)
+    async_function = contract.functions[contract_function.fn_name](
+        *contract_function.args, **contract_function.kwargs
+    )
+    for attempt in range(retries):
+        try:
+            async with rate_limited_slot(aw3):
+                return await async_function.call(block_identifier=block)
+        except Exception as e:
+            if attempt < retries - 1:
+                await asyncio.sleep(throttle_delay(aw3, e, attempt, delay))
+                continue
+            else:
+                msg = f"Error calling function: {e}, {traceback.format_exc()}"
+                logging.error(msg)
+                slack_message(msg)
+                raise e
+
+
+def to_async_event(contract_event):
+    aw3 = get_async_w3(contract_event.w3)
+    contract = to_async_contract(aw3, contract_event.address, contract_event.contract_abi)
+    return aw3, contract.events[contract_event.event_name]()
+
+
+async def async_get_logs_cached(
+    contract_event,
+    from_block: int,
+    to_block: int,
+    # pylint: disable=redefined-builtin
+    filter: dict | None,
+    fetch: Callable[[int, int], Awaitable[List[EventData]]],
+) -> List[EventData]:
+    """Async variant of get_logs_cached: finalized blocks are served from and persisted to
+    the local log cache, the most recent LOG_CACHE_CONFIRMATIONS blocks are fetched live."""
+    cache = get_log_cache()
+    if cache is None:
+        return await fetch(from_block, to_block)
+
+    # the head and the chain id of the cache key are cached sync calls
+    head = await asyncio.to_thread(get_head_block, contract_event.w3)
+    cached_to = min(to_block, head - LOG_CACHE_CONFIRMATIONS)
+
+    logs: List[EventData] = []
+    if from_block <= cached_to:
+        key = await asyncio.to_thread(get_cache_key, contract_event, filter)
+        for start, end in cache.uncovered(key, from_block, cached_to):
+            cache.store(key, start, end, await fetch(start, end))
+        logs.extend(cache.read(key, from_block, cached_to))
+
+    live_from = max(from_block, cached_to + 1)
+    if live_from <= to_block:
+        logs.extend(await fetch(live_from, to_block))
+    return logs
+
+
+async def async_fetch_events_logs_with_retry(
+    label: str,
+    contract_event,
+    from_block: int,
+    to_block: int | str = "latest",
+    retries: int = 3,
+    delay: int = 2,
+    # pylint: disable=redefined-builtin
+    filter: dict | None = None,
+) -> Iterable[EventData]:
+    """Async variant of fetch_events_logs_with_retry, taking the same (sync) contract event."""
+    aw3, async_event = to_async_event(contract_event)
+    if not isinstance(to_block, int):
+        async with rate_limited_slot(aw3):
+            to_block = await aw3.eth.block_number
+
+    async def fetch(start: int, end: int) -> List[EventData]:
+        for attempt in range(retries):
+            try:
+                async with rate_limited_slot(aw3):
+                    return list(
+                        await async_event.get_logs(
+                            from_block=start, to_block=end, argument_filters=filter
+                        )
+                    )
+            except Exception as e:
+                if attempt < retries - 1:
+                    await asyncio.sleep(throttle_delay(aw3, e, attempt, delay))
+                    continue
+                else:
+                    msg = f"Error getting events logs for {label}: {e}, {traceback.format_exc()}"
+                    logging.error(msg)
+                    slack_message(msg)
+                    raise e
+        return []
+
+    return await async_get_logs_cached(contract_event, from_block, to_block, filter, fetch)
+
+
+async def async_fetch_events_logs_in_range(
+    label: str,
+    contract_event,
+    from_block: int,
+    to_block: int | str = "latest",
+    # pylint: disable=redefined-builtin
+    filter: dict | None = None,
+    initial_range: int = 2000,
+    max_range: int = 500_000,
+    target_logs: int = 2000,
+    retries: int = 3,
+    delay: int = 2,
+) -> List[EventData]:
+    """Async variant of fetch_events_logs_in_range, sharing its adaptive block ranges and
+    the local log cache. Each scan is sequential, run several with asyncio.gather."""
+    aw3, async_event = to_async_event(contract_event)
+    if not isinstance(to_block, int):
+        async with rate_limited_slot(aw3):
+            to_block = await aw3.eth.block_number
+    range_key = (get_endpoint(contract_event.w3), str(contract_event.address), contract_event.event_name)
+
+    async def fetch(scan_from: int, scan_to: int) -> List[EventData]:
+        block_range = LogRange(range_key, initial_range, max_range, target_logs)
+        logs: List[EventData] = []
+        start = scan_from
+        attempt = 0
+        while start <= scan_to:
+            end = min(start + block_range.size - 1, scan_to)
+            try:
+                async with rate_limited_slot(aw3):
+                    chunk = await async_event.get_logs(
+                        from_block=start, to_block=end, argument_filters=filter
+                    )
+            except Exception as e:
+                if block_range.rejected(start, end, e):
+                    continue
+                if attempt < retries - 1:
+                    await asyncio.sleep(throttle_delay(aw3, e, attempt, delay))
+                    attempt += 1
+                    continue
+                msg = f"Error getting events logs for {label}: {e}, {traceback.format_exc()}"
+                logging.error(msg)
+                slack_message(msg)
+                raise e
+
+            attempt = 0
+            block_range.accepted(len(chunk))
+            logs.extend(chunk)
+            start = end + 1
+        return logs
+
+    return await async_get_logs_cached(contract_event, from_block, to_block, filter, fetch)
+
+
+async def async_multicall_by_address(
+    wb3: Web3,
+    multical_address: str,
+    calls: list,
+    block_identifier="latest",
+    allow_failure: bool = False,
+    batch_size: int = 1024,
+) -> List[Union[Tuple, None]]:
+    """Async variant of multicall_by_address, the aggregate3 batches are sent concurrently."""
+    multicall_contract = wb3.eth.contract(
+        address=Web3.to_checksum_address(multical_address), abi=MULTICALL_ABI
+    )
+    aggregate_calls = encode_multicall_calls(calls, allow_failure)
+
+    async def call_batch(batch: list) -> list:
+        if not allow_failure:
+            return await async_call_with_retry(
+                multicall_contract.functions.aggregate3(batch), block=block_identifier
+            )
+        # When allowing failures, catch contract reverts and return None for failed batches
+        try:
+            return await async_call_with_retry(
+                multicall_contract.functions.aggregate3(batch), block=block_identifier
+            )
+        except Exception as e:
+            logging.warning(f"Multicall batch failed, returning None for {len(batch)} calls: {e}")
+            return [(False, b"")] * len(batch)
+
+    batch_results = await asyncio.gather(
+        *(
+            call_batch(aggregate_calls[i : i + batch_size])
+            for i in range(0, len(aggregate_calls), batch_size)
+        )
+    )
+    result = [item for batch_result in batch_results for item in batch_result]
+    return decode_multicall_results(calls, result, allow_failure)
@@ -1,22 +1,14 @@
-import json
-from web3 import Web3
-
 from constants.chains import Chain
 from constants.balancer import AURA_VOTER_PROXY, BALANCER_V2_VAULT, BALANCER_V3_VAULT
-from utils.web3_utils import W3_BY_CHAIN, fetch_events_logs_with_retry, call_with_retry
-
-
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
-
-with open("abi/balancer_v2_vault.json") as f:
-    vault_v2_abi = json.load(f)
+from utils.web3_utils import (
+    W3_BY_CHAIN,
+    MULTICALL_ADDRESS_BY_CHAIN,
+    fetch_events_logs_with_retry,
+    call_with_retry,
+    multicall_by_address,
+)
+from utils.abi import get_contract
 
-with open("abi/balancer_csp.json") as f:
-    composable_abi = json.load(f)
-
-with open("abi/balancer_v3_vault.json") as f:
-    vault_v3_abi = json.load(f)
 
 PAGE_SIZE = 1900
 
@@ -26,11 +18,7 @@ ZERO_ADRESS = "0x0000000000000000000000000000000000000000"
 def get_vault_v2_pool_token_balance(
     chain: Chain, pool_id: str, token_address: str, block: int | str
 ) -> float:
-    w3 = W3_BY_CHAIN[chain]["w3"]
-
-    vaut_contract = w3.eth.contract(
-        address=w3.to_checksum_address(BALANCER_V2_VAULT), abi=vault_v2_abi
-    )
+    vaut_contract = get_contract(chain, BALANCER_V2_VAULT, "balancer_v2_vault.json")
 
     tokens, balances, _ = call_with_retry(
         vaut_contract.functions.getPoolTokens(pool_id),
@@ -47,11 +35,7 @@ def get_vault_v2_pool_token_balance(
 def get_vault_v3_pool_token_balance(
     chain: Chain, pool_address: str, token_address: str, block: int | str
 ) -> float:
-    w3 = W3_BY_CHAIN[chain]["w3"]
-
-    vaut_contract = w3.eth.contract(
-        address=w3.to_checksum_address(BALANCER_V3_VAULT), abi=vault_v3_abi
-    )
+    vaut_contract = get_contract(chain, BALANCER_V3_VAULT, "balancer_v3_vault.json")
 
     tokens, _, _, balances = call_with_retry(
         vaut_contract.functions.getPoolTokenInfo(pool_address),
@@ -68,11 +52,7 @@ def get_vault_v3_pool_token_balance(
 def get_user_balance(
     chain: Chain, user: str, token_address: str, block: int | str
 ) -> float:
-    w3 = W3_BY_CHAIN[chain]["w3"]
-
-    token_contract = w3.eth.contract(
-        address=w3.to_checksum_address(token_address), abi=erc20_abi
-    )
+    token_contract = get_contract(chain, token_address, "ERC20_abi.json")
 
     user_balance = call_with_retry(
         token_contract.functions.balanceOf(user),
@@ -82,24 +62,36 @@ def get_user_balance(
     return user_balance
 
 
+def get_users_balances(
+    chain: Chain, users: list, token_address: str, block: int | str
+) -> list:
+    """balanceOf of every user, read through multicall."""
+    w3 = W3_BY_CHAIN[chain]["w3"]
+
+    token_contract = get_contract(chain, token_address, "ERC20_abi.json")
+
+    balances = multicall_by_address(
+        w3,
+        MULTICALL_ADDRESS_BY_CHAIN[chain],
+        [(token_contract, "balanceOf", [w3.to_checksum_address(user)]) for user in users],
+        block,
+    )
+
+    return [balance[0] for balance in balances]
+
+
 def get_v2_bpt_supply(
     chain: Chain, bpt_address: str, has_preminted_bpts: bool, block: int | str
 ) -> float:
-    w3 = W3_BY_CHAIN[chain]["w3"]
-
     if has_preminted_bpts:
-        bpt_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(bpt_address), abi=composable_abi
-        )
+        bpt_contract = get_contract(chain, bpt_address, "balancer_csp.json")
 
         bpt_supply = call_with_retry(
             bpt_contract.functions.getActualSupply(),
             block,
         )
     else:
-        bpt_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(bpt_address), abi=erc20_abi
-        )
+        bpt_contract = get_contract(chain, bpt_address, "ERC20_abi.json")
 
         bpt_supply = call_with_retry(
             bpt_contract.functions.totalSupply(),
@@ -110,11 +102,7 @@ def get_v2_bpt_supply(
 
 
 def get_token_supply(chain: Chain, token_address: str, block: int | str) -> float:
-    w3 = W3_BY_CHAIN[chain]["w3"]
-
-    token_contract = w3.eth.contract(
-        address=Web3.to_checksum_address(token_address), abi=erc20_abi
-    )
+    token_contract = get_contract(chain, token_address, "ERC20_abi.json")
 
     token_supply = call_with_retry(
         token_contract.functions.totalSupply(),
@@ -129,9 +117,7 @@ def get_potential_token_holders(
 ) -> list:
     w3 = W3_BY_CHAIN[chain]["w3"]
 
-    token_contract = w3.eth.contract(
-        address=Web3.to_checksum_address(token_address), abi=erc20_abi
-    )
+    token_contract = get_contract(chain, token_address, "ERC20_abi.json")
 
     token_holders = set()
     latest_block = w3.eth.get_block_number()
@@ -0,0 +1,99 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from web3 import Web3
+
+from utils.web3_utils import multicall_by_address
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+
+# Uniswap V3 TickMath.getSqrtRatioAtTick factors, one per bit of the absolute tick
+TICK_MATH_FACTORS = [
+    (0x2, 0xFFF97272373D413259A46990580E213A),
+    (0x4, 0xFFF2E50F5F656932EF12357CF3C7FDCC),
+    (0x8, 0xFFE5CACA7E10E4E61C3624EAA0941CD0),
+    (0x10, 0xFFCB9843D60F6159C9DB58835C926644),
+    (0x20, 0xFF973B41FA98C081472E6896DFB254C0),
+    (0x40, 0xFF2EA16466C96A3843EC78B326B52861),
+    (0x80, 0xFE5DEE046A99A2A811C461F1969C3053),
+    (0x100, 0xFCBE86C7900A88AEDCFFC83B479AA3A4),
+    (0x200, 0xF987A7253AC413176F2B074CF7815E54),
+    (0x400, 0xF3392B0822B70005940C7A398E4B70F3),
+    (0x800, 0xE7159475A2C29B7443B29C7FA6E889D9),
+    (0x1000, 0xD097F3BDFD2022B8845AD8F792AA5825),
+    (0x2000, 0xA9F746462D870FDF8A65DC1F90E061E5),
+    (0x4000, 0x70D869A156D2A1B890BB3DF62BAF32F7),
+    (0x8000, 0x31BE135F97D08FD981231505542FCFA6),
+    (0x10000, 0x9AA508B5B7A84E1C677DE54F3E99BC9),
+    (0x20000, 0x5D6AF8DEDB81196699C329225EE604),
+    (0x40000, 0x2216E584F5FA1EA926041BEDFE98),
+    (0x80000, 0x48A170391F7DC42444E8FA2),
+]
+
+
+@lru_cache(maxsize=65536)
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """sqrt(1.0001^tick) as a Q64.96, exactly as the pools compute it."""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"Tick {tick} out of range")
+    ratio = 0xFFFCB933BD6FAD37AA2D162D1A594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in TICK_MATH_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = ((1 << 256) - 1) // ratio
+    # round up to a Q64.96
+    return (ratio >> 32) + (1 if ratio % (1 << 32) else 0)
+
+
+def get_amounts_for_liquidity(
+    sqrt_price_x96: int, tick_lower: int, tick_upper: int, liquidity: int
+) -> Tuple[int, int]:
+    """Token0 and token1 amounts of a position in base units, rounded down like the pools."""
+    sqrt_ratio_a = get_sqrt_ratio_at_tick(tick_lower)
+    sqrt_ratio_b = get_sqrt_ratio_at_tick(tick_upper)
+    # below the range the position is all token0, above it all token1
+    sqrt_price = min(max(sqrt_price_x96, sqrt_ratio_a), sqrt_ratio_b)
+    amount0 = ((liquidity << 96) * (sqrt_ratio_b - sqrt_price) // sqrt_ratio_b) // sqrt_price
+    amount1 = liquidity * (sqrt_price - sqrt_ratio_a) >> 96
+    return amount0, amount1
+
+
+def get_amounts_for_positions(
+    sqrt_price_x96: int, positions: Sequence[Tuple[int, int, int]]
+) -> List[Tuple[int, int]]:
+    """Token0 and token1 amounts, in base units, of each (tickLower, tickUpper, liquidity).
+
+    Every position of a pool is valued against the same sqrt price with the exact integer
+    math of the pools, so the result of a position does not depend on the batch.
+    """
+    return [
+        get_amounts_for_liquidity(sqrt_price_x96, tick_lower, tick_upper, liquidity)
+        for tick_lower, tick_upper, liquidity in positions
+    ]
+
+
+def get_nfp_positions(
+    wb3: Web3,
+    multicall_address: str,
+    nfp_contract,
+    token_ids: Sequence[int],
+    block: int,
+) -> Dict[int, Optional[tuple]]:
+    """NonfungiblePositionManager.positions of each token id in one multicall.
+
+    Positions that do not exist at `block` (not minted yet or burned) are None.
+    """
+    token_ids = list(token_ids)
+    if not token_ids:
+        return {}
+    results = multicall_by_address(
+        wb3,
+        multicall_address,
+        [(nfp_contract, "positions", [token_id]) for token_id in token_ids],
+        block,
+        allow_failure=True,
+    )
+    return dict(zip(token_ids, results))
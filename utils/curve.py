@@ -1,19 +1,21 @@
 import json
 from dataclasses import dataclass
-from typing import List
-
-from web3 import Web3
+from typing import Dict, List
 
 from constants.summary_columns import SummaryColumn
 from constants.curve import RewardContractConfig
 
 from integrations.integration import Integration
 
+from utils.abi import get_contract
+from utils.log_cache import LOG_CACHE_CONFIRMATIONS, get_chain_id, get_log_cache
 from utils.web3_utils import (
     W3_BY_CHAIN,
+    MULTICALL_ADDRESS_BY_CHAIN,
     fetch_events_logs_with_retry,
     call_with_retry,
     multicall,
+    multicall_by_address_per_block,
 )
 
 
@@ -57,11 +59,9 @@ class Curve(Integration):
 
         self.w3 = W3_BY_CHAIN[self.chain]["w3"]
         self.reward_config = reward_config
-        with open(self.reward_config.abi_filename, "r") as f:
-            abi = json.load(f)
-            self.contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(self.reward_config.address), abi=abi
-            )
+        self.contract = get_contract(
+            self.chain, self.reward_config.address, self.reward_config.abi_filename
+        )
         self.contract_function = self.contract.functions.user_state
         self.contract_event = self.contract.events.Borrow()
         self.start_state: List[UserState] = []
@@ -138,6 +138,7 @@ class Curve(Integration):
             list: A list of unique Ethereum addresses that have borrowed.
         """
         page_size = 50000
+        self.load_indexed_state()
         current_block = self.get_current_block()
         if self.last_indexed_block == current_block:
             return {user_info.address for user_info in self.start_state}
@@ -155,19 +156,81 @@ class Curve(Integration):
                 start_block,
                 to_block,
             )
+            # user states are read at the borrow blocks, batched once the page is scanned
+            users_by_block: Dict[int, List[str]] = {}
             for event in events:
                 user = event["args"][self.reward_config.event_arg_name]
-                block = event["blockNumber"]
-                all_users.add(
-                    UserState(
-                        address=user,
-                        state=self.get_user_state(user, block),
-                        block=block,
-                    )
-                )
+                users_by_block.setdefault(event["blockNumber"], []).append(user)
+            all_users.update(self.get_borrow_states(users_by_block))
             start_block += page_size
 
         self.start_state.extend(all_users)
         self.last_indexed_block = current_block
+        self.save_indexed_state()
 
         return {user_info.address for user_info in self.start_state}
+
+    def get_borrow_states(self, users_by_block: Dict[int, List[str]]) -> List[UserState]:
+        """
+        Read the user state of each borrower at its borrow block, one multicall per block,
+        packed into JSON-RPC batches.
+        """
+        states_by_block = multicall_by_address_per_block(
+            self.w3,
+            MULTICALL_ADDRESS_BY_CHAIN[self.chain],
+            {
+                block: [
+                    (self.contract, self.contract_function.fn_name, [user])
+                    for user in users
+                ]
+                for block, users in users_by_block.items()
+            },
+        )
+        return [
+            UserState(address=user, state=state[0], block=block)
+            for block, users in users_by_block.items()
+            for user, state in zip(users, states_by_block[block])
+        ]
+
+    def get_state_key(self) -> str:
+        return f"curve_llamalend|{get_chain_id(self.w3)}|{self.contract.address.lower()}"
+
+    def load_indexed_state(self):
+        """
+        Restore the participants indexed by a previous run from the local cache.
+        """
+        cache = get_log_cache()
+        if cache is None or self.last_indexed_block:
+            return
+        stored = cache.get_state(self.get_state_key())
+        if stored is None:
+            return
+        indexed = json.loads(stored)
+        self.start_state = [
+            UserState(address=address, state=state, block=block)
+            for address, state, block in indexed["start_state"]
+        ]
+        self.last_indexed_block = indexed["last_indexed_block"]
+
+    def save_indexed_state(self):
+        """
+        Persist the participants indexed so far, up to the last block that can no longer be
+        reorged, so the next run only scans the blocks after it.
+        """
+        cache = get_log_cache()
+        if cache is None:
+            return
+        finalized_block = min(self.last_indexed_block, self.get_current_block() - LOG_CACHE_CONFIRMATIONS)
+        cache.store_state(
+            self.get_state_key(),
+            json.dumps(
+                {
+                    "last_indexed_block": finalized_block,
+                    "start_state": [
+                        [user_info.address, list(user_info.state), user_info.block]
+                        for user_info in self.start_state
+                        if user_info.block <= finalized_block
+                    ],
+                }
+            ),
+        )
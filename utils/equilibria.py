@@ -3,24 +3,17 @@ from integrations.integration_ids import IntegrationID
 from integrations.integration import Integration
 from constants.equilibria import PENDLE_LOCKER_ETHEREUM
 from constants.equilibria import equilibria_deposit_ethereum
-import json
+from utils.participant_index import get_event_participants
 from utils.web3_utils import (
-    fetch_events_logs_with_retry,
     call_with_retry,
+    multicall_by_address,
     w3,
+    MULTICALL_ADDRESS,
 )
-from typing import Optional, Set
+from typing import Dict, List, Optional, Set
 from web3 import Web3
 from eth_typing import ChecksumAddress
-
-with open("abi/equilibria_deposit.json") as f:
-    equilibria_deposit = json.load(f)
-with open("abi/pendle_lpt.json") as f:
-    lpt_abi = json.load(f)
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
-with open("abi/equilibria_lpt.json") as f:
-    equilibria_lpt = json.load(f)
+from utils.abi import get_contract
 
 
 class EquilibriaIntegration(Integration):
@@ -45,10 +38,22 @@ class EquilibriaIntegration(Integration):
         )
         self.lp_contract = Web3.to_checksum_address(lp_contract)
         self.lp_contract_id = lp_contract_id
+        self.pool_state_by_block: Dict[int, Optional[tuple]] = {}
 
     def get_balance(self, user: str, block: int | str = "latest") -> float:
-        equilibria_deposit_contract = w3.eth.contract(
-            address=equilibria_deposit_ethereum, abi=equilibria_deposit
+        return self.get_balances([user], block)[user]
+
+    def get_pool_state(self, block: int | str = "latest") -> Optional[tuple]:
+        """Pool wide values at `block`, read once per block for all users.
+
+        Returns (lockerSyBalance, gauge total supply), or None when the Equilibria locker
+        holds nothing in the Pendle pool.
+        """
+        if isinstance(block, int) and block in self.pool_state_by_block:
+            return self.pool_state_by_block[block]
+
+        equilibria_deposit_contract = get_contract(
+            Chain.ETHEREUM, equilibria_deposit_ethereum, "equilibria_deposit.json"
         )
 
         # Get lpt token address from Stake DAO vault
@@ -57,75 +62,75 @@ class EquilibriaIntegration(Integration):
             block,
         )
         pendle_market_address = poolInfo[0]
-        # print("lp contract", self.lp_contract)
-        # print('self lp contract id', self.lp_contract_id)
-        # print("pendlePoolAddress", poolInfo[0])
-
-        # pendlePoolAddress = "0x107a2e3cD2BB9a32B9eE2E4d51143149F8367eBa"
-        lptContract = w3.eth.contract(address=pendle_market_address, abi=lpt_abi)
+        lptContract = get_contract(
+            Chain.ETHEREUM, pendle_market_address, "pendle_lpt.json"
+        )
         # Get SY address
         tokens = call_with_retry(
             lptContract.functions.readTokens(),
             block,
         )
-        # print("tokens", tokens)
-        sy = tokens[0]
-        sy_contract = w3.eth.contract(address=sy, abi=erc20_abi)
-
-        # Get SY balance in the Pendle pool
-        sy_bal = call_with_retry(
-            sy_contract.functions.balanceOf(pendle_market_address),
-            block,
+        sy_contract = get_contract(Chain.ETHEREUM, tokens[0], "ERC20_abi.json")
+        receipt_contract = get_contract(
+            Chain.ETHEREUM, self.lp_contract, "ERC20_abi.json"
         )
-        print("sy_bal", sy_bal)
-        if sy_bal == 0:
-            return 0
         PENDLE_LOCKER = PENDLE_LOCKER_ETHEREUM
-        # Get Equilibria lpt balance
-        lpt_bal = call_with_retry(
-            lptContract.functions.activeBalance(PENDLE_LOCKER),
-            block,
-        )
-        print("lpt_bal", lpt_bal)
-        if lpt_bal == 0:
-            return 0
 
-        # Get LPT total supply
-        total_active_supply = call_with_retry(
-            lptContract.functions.totalActiveSupply(),
-            block,
+        # SY balance in the Pendle pool, Equilibria lpt balance, LPT total supply, gauge total supply
+        sy_bal, lpt_bal, total_active_supply, equilibria_pool_TotalSupply = (
+            result[0]
+            for result in multicall_by_address(
+                w3,
+                MULTICALL_ADDRESS,
+                [
+                    (sy_contract, "balanceOf", [pendle_market_address]),
+                    (lptContract, "activeBalance", [PENDLE_LOCKER]),
+                    (lptContract, "totalActiveSupply", []),
+                    (receipt_contract, "totalSupply", []),
+                ],
+                block,
+            )
         )
-        if total_active_supply == 0:
+        if sy_bal == 0 or lpt_bal == 0:
+            pool_state = None
+        elif total_active_supply == 0:
             print("total_active_supply is 0")
-            return 0
-
-        lockerSyBalance = round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4)
-        print(sy_bal / 10**18)
-        print(lpt_bal / 10**18)
-
-        receipt_contract = w3.eth.contract(address=self.lp_contract, abi=erc20_abi)
-
-        # Get gauge total suply
-        equilibria_pool_TotalSupply = call_with_retry(
-            receipt_contract.functions.totalSupply(),
-            block,
+            pool_state = None
+        else:
+            lockerSyBalance = round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4)
+            pool_state = (lockerSyBalance, equilibria_pool_TotalSupply)
+
+        if isinstance(block, int):
+            self.pool_state_by_block[block] = pool_state
+        return pool_state
+
+    def get_balances(self, users: List[str], block: int | str = "latest") -> Dict[str, float]:
+        pool_state = self.get_pool_state(block)
+        if pool_state is None:
+            return {user: 0 for user in users}
+        lockerSyBalance, equilibria_pool_TotalSupply = pool_state
+        receipt_contract = get_contract(
+            Chain.ETHEREUM, self.lp_contract, "ERC20_abi.json"
         )
 
-        print("equilibria_pool_TotalSupply", equilibria_pool_TotalSupply)
-        # Get gauge user balance
-        user_equilibria_pool_bal = call_with_retry(
-            receipt_contract.functions.balanceOf(user),
+        # Get gauge user balances
+        user_equilibria_pool_bals = multicall_by_address(
+            w3,
+            MULTICALL_ADDRESS,
+            [
+                (receipt_contract, "balanceOf", [Web3.to_checksum_address(user)])
+                for user in users
+            ],
             block,
         )
-        print("user_equilibria_pool_bal", user_equilibria_pool_bal)
 
         # Get user share based on gauge#totalSupply / gauge#balanceOf(user) and lockerSyBalance
-        userShare = user_equilibria_pool_bal * 100 / equilibria_pool_TotalSupply
-
-        # print(user, userShare * lpt_bal / 100)
-        print("userShare  lockerSyBalance:", userShare * lockerSyBalance / 100)
-        print("-------------------------------------------------")
-        return userShare * lockerSyBalance / 100
+        return {
+            user: (user_equilibria_pool_bal[0] * 100 / equilibria_pool_TotalSupply)
+            * lockerSyBalance
+            / 100
+            for user, user_equilibria_pool_bal in zip(users, user_equilibria_pool_bals)
+        }
 
     def get_participants(self, blocks: list[int] | None) -> set[str]:
         if self.participants is not None:
@@ -135,32 +140,10 @@ class EquilibriaIntegration(Integration):
         return self.participants
 
     def get_equilibria_participants(self) -> set[str]:
-        all_users = set()
-
-        start = self.start_block
-        contract = w3.eth.contract(address=self.lp_contract, abi=equilibria_lpt)
-        page_size = 1900
-        target_block = w3.eth.get_block_number()
-        while start < target_block:
-            to_block = min(start + page_size, target_block)
-            deposits = fetch_events_logs_with_retry(
-                f"Equilibria users {self.lp_contract}",
-                contract.events.Staked(),
-                start,
-                to_block,
-            )
-            print("deposits", deposits)
-            print(
-                start,
-                to_block,
-                len(list(deposits)),
-                "getting Equilibria Finance contract data",
-            )
-            for deposit in deposits:
-                if deposit["args"]["_user"]:
-                    all_users.add(deposit["args"]["_user"])
-                    print(deposit["args"]["_user"])
-            start += page_size
-        print("all_users", len(all_users))
-        print("-------------------------------------------------")
-        return all_users
+        contract = get_contract(Chain.ETHEREUM, self.lp_contract, "equilibria_lpt.json")
+        return get_event_participants(
+            f"Equilibria users {self.lp_contract}",
+            contract.events.Staked(),
+            "_user",
+            self.start_block,
+        )
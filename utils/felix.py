@@ -1,4 +1,4 @@
-from utils.request_utils import requests_retry_session
+from utils.subgraph import paginate_subgraph
 from constants.felix import FELIX_USDE_VAULT_CONTRACT
 from typing import Dict
 from web3.types import ChecksumAddress
@@ -56,58 +56,34 @@ def get_users_asset_balances_at_block(block_number: int) -> Dict[ChecksumAddress
     return user_asset_balances
 
 
-def get_feUSDe_active_holders_balance_at_block(graph_url: str, block_number: int):
-    skip = 0
-    max_pagination_size = 1000
-    active_holders_balance = {}
-
-    session = requests_retry_session(
-        retries=5,
-        backoff_factor=0.5,
-        status_forcelist=(429, 500, 502, 503, 504)
-    )
-
-    while True:
-        query = """
-        {
-            accounts(first: %s, skip: %s) {
-                id
-                snapshots(
-                    where: {blockNumber_lte: %s}
-                    orderBy: blockNumber
-                    orderDirection: desc
-                    first: 1
-                ) {
-                    balance
-                }
-            }
+ACTIVE_HOLDERS_QUERY = """
+query Accounts($first: Int!, $lastId: String!, $blockNumber: BigInt!) {
+    accounts(first: $first, where: {id_gt: $lastId}, orderBy: id, orderDirection: asc) {
+        id
+        snapshots(
+            where: {blockNumber_lte: $blockNumber}
+            orderBy: blockNumber
+            orderDirection: desc
+            first: 1
+        ) {
+            balance
         }
-        """ % (max_pagination_size, skip, block_number)
-
-        response = session.post(
-            url=graph_url,
-            json={'query': query},
-            timeout=10
-        )
-
-        if response.status_code != 200:
-            raise Exception(f"Query failed with status code {response.status_code}: {response.text}")
-
-        data = response.json()
-        accounts = data['data']['accounts']
+    }
+}
+"""
 
-        if not accounts:
-            break
 
-        for account in accounts:
-            # Only include accounts with a positive balance at the block number
-            if account['snapshots'] and int(account['snapshots'][0]['balance']) > 0:
-                active_holders_balance[account['id']] = int(account['snapshots'][0]['balance'])
-
-        # Stop if we've reached the end of the accounts
-        if len(accounts) < max_pagination_size:
-            break
+def get_feUSDe_active_holders_balance_at_block(graph_url: str, block_number: int):
+    active_holders_balance = {}
 
-        skip += max_pagination_size
+    for account in paginate_subgraph(
+        graph_url,
+        ACTIVE_HOLDERS_QUERY,
+        "accounts",
+        {"blockNumber": str(block_number)},
+    ):
+        # Only include accounts with a positive balance at the block number
+        if account['snapshots'] and int(account['snapshots'][0]['balance']) > 0:
+            active_holders_balance[account['id']] = int(account['snapshots'][0]['balance'])
 
     return active_holders_balance
@@ -1,48 +1,28 @@
-import json
 from typing import Any, Set
-from web3 import Web3
 from utils.web3_utils import (
     call_with_retry,
     fetch_events_logs_with_retry,
     w3,
 )
 
+from constants.chains import Chain
 from constants.firm import SUSDE_MARKET_ADDRESS
-
-with open("abi/firm_market.json") as f:
-    firm_market_abi = json.load(f)
-
-with open("abi/firm_simple_escrow.json") as f:
-    firm_simple_escrow_abi = json.load(f)
-
-with open("abi/curve_stable_swap_ng_lp.json") as f:
-    curve_stable_swap_ng_lp_abi = json.load(f)
-
-with open("abi/yearn_v2_vault.json") as f:
-    yearn_v2_vault_abi = json.load(f)
+from utils.abi import get_contract
 
 def get_firm_market_contract(marketAddress: str):
-    return w3.eth.contract(
-        address=Web3.to_checksum_address(marketAddress), abi=firm_market_abi
-    )
+    return get_contract(Chain.ETHEREUM, marketAddress, "firm_market.json")
 
 def get_escrow_contract(user_address: str, marketAddress: str):
     escrow_address: str = get_firm_market_contract(marketAddress).functions.escrows(
         user_address
     ).call()
-    return w3.eth.contract(
-        address=Web3.to_checksum_address(escrow_address), abi=firm_simple_escrow_abi
-    )
+    return get_contract(Chain.ETHEREUM, escrow_address, "firm_simple_escrow.json")
 
 def get_curve_lp_contract(lpAddress: str):
-    return w3.eth.contract(
-        address=Web3.to_checksum_address(lpAddress), abi=curve_stable_swap_ng_lp_abi
-    )
+    return get_contract(Chain.ETHEREUM, lpAddress, "curve_stable_swap_ng_lp.json")
 
 def get_yearn_vault_v2_contract(yvAddress: str):
-    return w3.eth.contract(
-        address=Web3.to_checksum_address(yvAddress), abi=yearn_v2_vault_abi
-    )
+    return get_contract(Chain.ETHEREUM, yvAddress, "yearn_v2_vault.json")
 
 def get_firm_user_balance(user: str, marketAddress: str, block: int) -> Any:
         # get user escrow
@@ -1,18 +1,127 @@
-import json
+import threading
+from typing import Dict, List, NamedTuple
+
 from utils.web3_utils import (
     w3,
+    call_with_retry,
+    multicall_by_address,
+    MULTICALL_ADDRESS,
+    lazy_contract,
 )
 from constants.fluid import vaultResolver, vaultPositionResolver, dexResolver
+from utils.abi import load_abi
+
+resolver_abi = load_abi("fluid_vault_resolver.json")
+
+position_resolver_abi = load_abi("fluid_vault_position_resolver.json")
+
+dex_resolver_abi = load_abi("fluid_dex_resolver.json")
+
+vaultResolver_contract = lazy_contract(w3, address=vaultResolver, abi=resolver_abi)
+vaultPositionResolver_contract = lazy_contract(w3, address = vaultPositionResolver, abi=position_resolver_abi)
+dexResolver_contract = lazy_contract(w3, address = dexResolver, abi=dex_resolver_abi)
+
+# Vaults per multicall, getVaultEntireData and getAllVaultPositions return large structs
+VAULT_DATA_BATCH_SIZE = 25
+VAULT_POSITIONS_BATCH_SIZE = 5
+
+
+class VaultConstants(NamedTuple):
+    vault: str
+    is_smart_col: bool
+    # underlying dex for smart col vaults, liquidity layer otherwise
+    supply: str
+    supply_token0: str
+    supply_token1: str
+
+
+# Vault constants never change once deployed, so every vault is resolved once per process
+VAULT_CONSTANTS_BY_ADDRESS: Dict[str, VaultConstants] = {}
+VAULT_ADDRESSES_BY_BLOCK: Dict[int, List[str]] = {}
+VAULTS_LOCK = threading.Lock()
+
+
+def get_vaults_constants(block: int) -> List[VaultConstants]:
+    """Constants of every vault deployed at `block`, shared by all the Fluid integrations.
+
+    Only vaults never seen before are resolved, with getVaultEntireData through multicall.
+    """
+    with VAULTS_LOCK:
+        if block not in VAULT_ADDRESSES_BY_BLOCK:
+            VAULT_ADDRESSES_BY_BLOCK[block] = call_with_retry(
+                vaultResolver_contract.functions.getAllVaultsAddresses(), block
+            )
+        vaults = VAULT_ADDRESSES_BY_BLOCK[block]
+
+        missing = [vault for vault in vaults if vault not in VAULT_CONSTANTS_BY_ADDRESS]
+        if missing:
+            vaults_data = multicall_by_address(
+                w3,
+                MULTICALL_ADDRESS,
+                [(vaultResolver_contract, "getVaultEntireData", [vault]) for vault in missing],
+                block,
+                batch_size=VAULT_DATA_BATCH_SIZE,
+            )
+            for vault, (vaultData,) in zip(missing, vaults_data):
+                constantVariables = vaultData[3]
+                VAULT_CONSTANTS_BY_ADDRESS[vault] = VaultConstants(
+                    vault,
+                    vaultData[1],
+                    constantVariables[6],
+                    constantVariables[8][0],
+                    constantVariables[8][1],
+                )
+        return [VAULT_CONSTANTS_BY_ADDRESS[vault] for vault in vaults]
+
+
+def get_vaults_positions(vaults: List[str], block: int) -> Dict[str, list]:
+    """getAllVaultPositions of each vault, (nftId, owner, supply, borrow) per position."""
+    if not vaults:
+        return {}
+    positions = multicall_by_address(
+        w3,
+        MULTICALL_ADDRESS,
+        [(vaultPositionResolver_contract, "getAllVaultPositions", [vault]) for vault in vaults],
+        block,
+        batch_size=VAULT_POSITIONS_BATCH_SIZE,
+    )
+    return {vault: vault_positions for vault, (vault_positions,) in zip(vaults, positions)}
+
+
+def get_dexes_data(dexes: List[str], block: int) -> Dict[str, tuple]:
+    """getDexEntireData of each dex."""
+    if not dexes:
+        return {}
+    dexes_data = multicall_by_address(
+        w3,
+        MULTICALL_ADDRESS,
+        [(dexResolver_contract, "getDexEntireData", [dex]) for dex in dexes],
+        block,
+        batch_size=VAULT_DATA_BATCH_SIZE,
+    )
+    return {dex: dexData for dex, (dexData,) in zip(dexes, dexes_data)}
+
+
+def get_smart_col_balance(shares: int, token_is_token0: bool, dexEntireData: tuple) -> float:
+    """Value of `shares` of a dex supply position in the tracked token, in wei.
 
-with open("abi/fluid_vault_resolver.json") as f:
-    resolver_abi = json.load(f)
-    
-with open("abi/fluid_vault_position_resolver.json") as j:
-    position_resolver_abi = json.load(j)
+    The position's other token is converted at the dex lastStoredPrice, see
+    integrations/fluid_susde_smart.py for a walkthrough.
+    """
+    # token0PerSupplyShare = dexEntireData[7][-4]
+    # token1PerSupplyShare = dexEntireData[7][-3]
+    positionToken0 = shares * dexEntireData[7][-4] / 1e18
+    positionToken1 = shares * dexEntireData[7][-3] / 1e18
+    # lastStoredPrice = dexEntireData[4][0]
+    lastStoredPrice = dexEntireData[4][0]
+    precisions = dexEntireData[2]
 
-with open("abi/fluid_dex_resolver.json") as j:
-    dex_resolver_abi = json.load(j)
+    if token_is_token0:
+        positionToken1 = positionToken1 * 1e54 / lastStoredPrice / 1e27
+        # * 1e6 * numeratorPrecision / denominatorPrecision
+        positionToken1 = positionToken1 * 1e6 * precisions[2] / precisions[3]
+        return positionToken0 + positionToken1
 
-vaultResolver_contract = w3.eth.contract(address=vaultResolver, abi=resolver_abi)
-vaultPositionResolver_contract = w3.eth.contract(address = vaultPositionResolver, abi=position_resolver_abi)
-dexResolver_contract = w3.eth.contract(address = dexResolver, abi=dex_resolver_abi)
+    positionToken0 = positionToken0 * lastStoredPrice / 1e27
+    positionToken0 = positionToken0 * 1e6 * precisions[0] / precisions[1]
+    return positionToken1 + positionToken0
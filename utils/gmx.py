@@ -1,11 +1,24 @@
 import json
-from typing import List, Optional, Set
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Set
 import requests
 from constants.chains import Chain
 from integrations.integration_ids import IntegrationID
 from integrations.integration import Integration
 from constants.summary_columns import SummaryColumn
-from utils.web3_utils import w3_arb, fetch_events_logs_with_retry, call_with_retry
+from utils.web3_utils import (
+    w3_arb,
+    fetch_events_logs_with_retry,
+    call_with_retry,
+    multicall_by_address,
+    get_block_timestamp,
+    MULTICALL_ADDRESS_BY_CHAIN,
+    lazy_contract,
+)
+from utils.log_cache import get_log_cache
+from web3 import Web3
 from web3.contract import Contract
 
 from constants.gmx import (
@@ -15,28 +28,156 @@ from constants.gmx import (
     GMX_USDE_USDC_MARKET_ADDRESS,
     GMX_MAX_PNL_FACTOR_FOR_TRADERS_KEY,
     GMX_PRICES_ENDPOINT,
+    GMX_CANDLES_ENDPOINT,
+    GMX_TOKENS_ENDPOINT,
 )
+from utils.abi import load_abi
 
-with open("abi/gmx_gm_token.json") as f:
-    gmx_gm_token_abi = json.load(f)
+gmx_gm_token_abi = load_abi("gmx_gm_token.json")
 
-with open("abi/gmx_synthetics_reader_contract.json") as f:
-    gmx_synthetics_reader_contract_abi = json.load(f)
+gmx_synthetics_reader_contract_abi = load_abi("gmx_synthetics_reader_contract.json")
 
-gmx_usde_usdc_market_contract = w3_arb.eth.contract(
+gmx_usde_usdc_market_contract = lazy_contract(
+    w3_arb,
     address=GMX_USDE_USDC_MARKET_ADDRESS, abi=gmx_gm_token_abi
 )
 
-gmx_wsteth_usde_market_contract = w3_arb.eth.contract(
+gmx_wsteth_usde_market_contract = lazy_contract(
+    w3_arb,
     address=GMX_WSTETH_USDE_MARKET_ADDRESS, abi=gmx_gm_token_abi
 )
 
-gmx_synthetics_reader_contract = w3_arb.eth.contract(
+gmx_synthetics_reader_contract = lazy_contract(
+    w3_arb,
     address=GMX_SYNTHETICS_READER_CONTRACT_ADDRESS,
     abi=gmx_synthetics_reader_contract_abi,
 )
 
 
+GMX_ORACLE_PRICE_DECIMALS = 1e30
+
+# Prices are snapshotted per candle period: a block is priced with the open of the candle
+# its timestamp falls in, blocks of the current period with the live tickers
+GMX_PRICE_PERIOD = "1h"
+GMX_PRICE_BUCKET_SECONDS = 3600
+# Most candles the prices API returns per request
+GMX_CANDLES_LIMIT = 10000
+
+# bucket -> token address -> {"minPrice", "maxPrice"}, in GMX oracle units
+GMX_PRICE_SNAPSHOTS: Dict[int, Dict[str, dict]] = {}
+GMX_TOKENS: Dict[str, dict] = {}
+GMX_PRICES_LOCK = threading.Lock()
+
+
+def get_price_bucket(timestamp: int) -> int:
+    return timestamp - timestamp % GMX_PRICE_BUCKET_SECONDS
+
+
+def fetch_latest_prices() -> Dict[str, dict]:
+    response = requests.get(GMX_PRICES_ENDPOINT)
+    response.raise_for_status()
+    return {item["tokenAddress"]: item for item in response.json()}
+
+
+def fetch_gmx_tokens() -> Dict[str, dict]:
+    if not GMX_TOKENS:
+        response = requests.get(GMX_TOKENS_ENDPOINT)
+        response.raise_for_status()
+        GMX_TOKENS.update(
+            {token["address"]: token for token in response.json()["tokens"]}
+        )
+    return GMX_TOKENS
+
+
+def fetch_candle_prices(token: str, from_bucket: int) -> Dict[int, dict]:
+    """Prices of `token` per bucket, from `from_bucket` to now, in one candles request.
+
+    The API only serves the last GMX_CANDLES_LIMIT candles, older buckets raise.
+    """
+    token_info = fetch_gmx_tokens()[token]
+    limit = (get_price_bucket(int(time.time())) - from_bucket) // GMX_PRICE_BUCKET_SECONDS + 1
+    if limit > GMX_CANDLES_LIMIT:
+        raise ValueError(
+            f"GMX: {token} bucket {from_bucket} is older than the last {GMX_CANDLES_LIMIT} candles"
+        )
+    response = requests.get(
+        GMX_CANDLES_ENDPOINT,
+        params={
+            "tokenSymbol": token_info["symbol"],
+            "period": GMX_PRICE_PERIOD,
+            "limit": limit,
+        },
+    )
+    response.raise_for_status()
+
+    # candles are [timestamp, open, high, low, close] in USD, oracle prices are per
+    # token unit with 30 decimals
+    scale = Decimal(10) ** (30 - token_info["decimals"])
+    prices: Dict[int, dict] = {}
+    for candle in response.json()["candles"]:
+        price = str(int(Decimal(str(candle[1])) * scale))
+        prices[get_price_bucket(candle[0])] = {"minPrice": price, "maxPrice": price}
+    return prices
+
+
+def get_gmx_prices(tokens: List[str], timestamp: int) -> Dict[str, dict]:
+    """GMX oracle prices of `tokens` at `timestamp`, as {"minPrice", "maxPrice"} per token.
+
+    Past buckets come from memory, then the local cache, then the candles API, which
+    returns every bucket up to now at once so a backfill costs one request per token.
+    The current bucket is priced with the live tickers. A past bucket without a candle
+    raises rather than being priced at today's tickers.
+    Requests are sent outside of GMX_PRICES_LOCK, the lock only guards the snapshots.
+    """
+    bucket = get_price_bucket(timestamp)
+    current_bucket = get_price_bucket(int(time.time()))
+
+    with GMX_PRICES_LOCK:
+        known = GMX_PRICE_SNAPSHOTS.get(bucket, {})
+        prices = {token: known[token] for token in tokens if token in known}
+    missing = [token for token in dict.fromkeys(tokens) if token not in prices]
+    if not missing:
+        return prices
+
+    fetched: Dict[int, Dict[str, dict]] = {}
+    if bucket < current_bucket:
+        cache = get_log_cache()
+        for token in missing:
+            namespace = f"gmx_prices:{token}"
+            if cache is not None:
+                stored = cache.get_snapshots(namespace, [bucket])
+                if bucket in stored:
+                    fetched.setdefault(bucket, {})[token] = json.loads(stored[bucket])
+                    continue
+            candle_prices = fetch_candle_prices(token, bucket)
+            if bucket not in candle_prices:
+                raise ValueError(f"GMX: no {token} candle at {timestamp}")
+            for price_bucket, price in candle_prices.items():
+                fetched.setdefault(price_bucket, {})[token] = price
+            if cache is not None:
+                # the current bucket's candle is still moving, don't persist it
+                cache.store_snapshots(
+                    namespace,
+                    {
+                        price_bucket: json.dumps(price)
+                        for price_bucket, price in candle_prices.items()
+                        if price_bucket < current_bucket
+                    },
+                )
+    else:
+        latest_prices = fetch_latest_prices()
+        for token in missing:
+            if token not in latest_prices:
+                raise ValueError(f"GMX: no price for {token} at {timestamp}")
+            fetched.setdefault(bucket, {})[token] = latest_prices[token]
+
+    with GMX_PRICES_LOCK:
+        for price_bucket, token_prices in fetched.items():
+            GMX_PRICE_SNAPSHOTS.setdefault(price_bucket, {}).update(token_prices)
+        snapshot = GMX_PRICE_SNAPSHOTS[bucket]
+        return {token: snapshot[token] for token in tokens}
+
+
 def makePriceTuple(prices, token):
     return (
         int(prices[token]["minPrice"]),
@@ -54,7 +195,6 @@ def getContract(contract_address) -> Optional[Contract]:
 
 
 class GMXLPIntegration(Integration):
-    prices = None
     market_address = None
     market_contract = None
     index_token_address = None
@@ -85,9 +225,49 @@ class GMXLPIntegration(Integration):
         self.index_token_address = index_token_address
         self.long_token_address = long_token_address
         self.short_token_address = short_token_address
+        self.market_token_price_by_block: Dict[int, int] = {}
 
     def get_balance(self, user: str, block: int) -> float:
-        marketPrices = self.fetchTokenPrices()
+        if self.market_contract is None:
+            return 0
+        user_token_balance = call_with_retry(
+            self.market_contract.functions.balanceOf(user),
+            block,
+        )
+
+        return self.getMarketTokenPrice(block) * user_token_balance / GMX_ORACLE_PRICE_DECIMALS
+
+    def get_balances(self, users: List[str], block: int) -> Dict[str, float]:
+        if self.market_contract is None:
+            return {user: 0 for user in users}
+        user_token_balances = multicall_by_address(
+            w3_arb,
+            MULTICALL_ADDRESS_BY_CHAIN[Chain.ARBITRUM],
+            [
+                (self.market_contract, "balanceOf", [Web3.to_checksum_address(user)])
+                for user in users
+            ],
+            block,
+        )
+
+        gm_token_price = self.getMarketTokenPrice(block)
+        return {
+            user: gm_token_price * user_token_balance[0] / GMX_ORACLE_PRICE_DECIMALS
+            for user, user_token_balance in zip(users, user_token_balances)
+        }
+
+    def getMarketTokenPrice(self, block: int | str) -> int:
+        """GM token price at `block`, evaluated once per block and shared by all users."""
+        if block in self.market_token_price_by_block:
+            return self.market_token_price_by_block[block]
+
+        timestamp = (
+            get_block_timestamp(self.chain, block) if isinstance(block, int) else int(time.time())
+        )
+        marketPrices = get_gmx_prices(
+            [self.index_token_address, self.long_token_address, self.short_token_address],
+            timestamp,
+        )
 
         marketParams = [
             self.market_address,
@@ -105,20 +285,14 @@ class GMXLPIntegration(Integration):
                 makePriceTuple(marketPrices, self.short_token_address),
                 GMX_MAX_PNL_FACTOR_FOR_TRADERS_KEY,
                 False,
-            )
-        )
-
-        if self.market_contract is None:
-            return 0
-        user_token_balance = call_with_retry(
-            self.market_contract.functions.balanceOf(user),
+            ),
             block,
         )
 
-        gm_token_price = marketTokenPrice[0]
-        oracle_price_decimals = 1e30
-
-        return gm_token_price * user_token_balance / oracle_price_decimals
+        # gm token price
+        if isinstance(block, int):
+            self.market_token_price_by_block[block] = marketTokenPrice[0]
+        return marketTokenPrice[0]
 
     def get_participants(
         self,
@@ -147,21 +321,3 @@ class GMXLPIntegration(Integration):
         all_users = list(all_users)
         self.participants = all_users
         return all_users
-
-    def fetchTokenPrices(self):
-        if self.prices:
-            return self.prices
-
-        response = requests.get(GMX_PRICES_ENDPOINT)
-
-        if response.status_code == 200:
-            pricesCollection = response.json()
-            pricesDict = {item["tokenAddress"]: item for item in pricesCollection}
-            self.prices = pricesDict
-            return self.prices
-
-        print(
-            f"GMX: failed to fetch token prices with status code {response.status_code}"
-        )
-
-        return None
@@ -1,10 +1,16 @@
-import itertools
 from decimal import Decimal, getcontext
 
 from dotenv import load_dotenv
 
-from constants.hyperdrive import ERC20_ABI, HYPERDRIVE_MORPHO_ABI, HyperdrivePrefix
-from utils.web3_utils import fetch_events_logs_with_retry, w3
+from constants.chains import Chain
+from constants.hyperdrive import HyperdrivePrefix
+from utils.abi import get_contract
+from utils.web3_utils import (
+    MULTICALL_ADDRESS,
+    fetch_events_logs_with_retry,
+    multicall_by_address,
+    w3,
+)
 
 load_dotenv()
 
@@ -36,14 +42,20 @@ def get_first_contract_block(contract_address):
 
 
 def get_hyperdrive_participants(pool, start_block=None):
+    """Scan TransferSingle events of the pool.
+
+    Returns the receiving users, the asset ids, and the (user, id) pairs that ever received
+    a transfer, the only pairs that can hold a balance.
+    """
     target_block: int = w3.eth.get_block_number()
     all_users: set[str] = set()
     all_ids: set[int] = set()
+    all_pairs: set[tuple[str, int]] = set()
     start_block = start_block or get_first_contract_block(pool)
     assert all_users is not None, "error: all_users is None"
     assert all_ids is not None, "error: all_ids is None"
     assert start_block is not None, "error: start_block is None"
-    contract = w3.eth.contract(address=pool, abi=HYPERDRIVE_MORPHO_ABI)
+    contract = get_contract(Chain.ETHEREUM, pool, "IHyperdriveMorpho.json")
 
     current_block = start_block
     while current_block < target_block:
@@ -58,9 +70,10 @@ def get_hyperdrive_participants(pool, start_block=None):
         for transfer in transfers:
             all_users.add(transfer["args"]["to"])
             all_ids.add(transfer["args"]["id"])
+            all_pairs.add((transfer["args"]["to"], transfer["args"]["id"]))
         current_block = to_block
 
-    return all_users, all_ids
+    return all_users, all_ids, all_pairs
 
 
 def decode_asset_id(asset_id: int) -> tuple[int, int]:
@@ -110,8 +123,8 @@ def get_pool_details(pool_contract):
     # query pool holdings
     vault_shares_balance = None
     if config["vaultSharesToken"] != "0x0000000000000000000000000000000000000000":
-        vault_shares_contract = w3.eth.contract(
-            address=config["vaultSharesToken"], abi=ERC20_ABI
+        vault_shares_contract = get_contract(
+            Chain.ETHEREUM, config["vaultSharesToken"], "ERC20_abi.json"
         )
         vault_shares_balance = vault_shares_contract.functions.balanceOf(
             pool_contract.address
@@ -124,8 +137,7 @@ def get_pool_details(pool_contract):
 
 def get_pool_positions(
     pool_contract,
-    pool_users,
-    pool_ids,
+    pool_pairs,
     lp_rewardable_tvl,
     short_rewardable_tvl,
     block=None,
@@ -134,12 +146,16 @@ def get_pool_positions(
     combined_prefixes = [(0, 3), (2,)]  # Treat prefixes 0 and 3 together, 2 separately
     bal_by_prefix = {0: Decimal(0), 1: Decimal(0), 2: Decimal(0), 3: Decimal(0)}
 
-    # First pass: collect balances
-    for user, id in itertools.product(pool_users, pool_ids):
+    # First pass: collect balances of the (user, id) pairs that ever received a transfer
+    pool_pairs = list(pool_pairs)
+    balances = multicall_by_address(
+        w3,
+        MULTICALL_ADDRESS,
+        [(pool_contract, "balanceOf", [int(id), user]) for user, id in pool_pairs],
+        block or "latest",
+    )
+    for (user, id), (bal,) in zip(pool_pairs, balances):
         trade_type, prefix, timestamp = get_trade_details(int(id))
-        bal = pool_contract.functions.balanceOf(int(id), user).call(
-            block_identifier=block or "latest"
-        )
         if bal > Decimal(1):
             pool_positions.append(
                 [user, trade_type, prefix, timestamp, bal, Decimal(0)]
@@ -1,10 +1,17 @@
 import math
-from typing import Dict, Set
+from typing import Dict, Iterable, List, Set, Tuple
 
 from eth_typing import ChecksumAddress
 from web3 import Web3
-
-from utils.web3_utils import call_with_retry, fetch_events_logs_with_retry
+from web3.contract import Contract
+
+from constants.chains import Chain
+from utils.abi import get_contract
+from utils.web3_utils import (
+    MULTICALL_ADDRESS_BY_CHAIN,
+    fetch_events_logs_with_retry,
+    multicall_by_address,
+)
 from utils.web3_utils import w3_base
 
 from constants.infinityPools import (
@@ -15,15 +22,16 @@ from constants.infinityPools import (
     wstETH_sUSDe,
     decode_id,
     sUSDe_address,
-    infinityPool_contract
 )
 
 
 def get_infinityPools_info_list(
         pools,
         start=START_BLOCK,
-        end=w3_base.eth.get_block_number(),
+        end=None,
 ) -> Dict[ChecksumAddress, Dict[ChecksumAddress, Set[int]]]:
+    if end is None:
+        end = w3_base.eth.get_block_number()
     pools = {Web3.to_checksum_address(pool) for pool in pools}
     pool_info_list: Dict[ChecksumAddress, Dict[ChecksumAddress, Set[int]]] = {}
 
@@ -71,20 +79,56 @@ def get_infinityPools_info_list(
     return pool_info_list
 
 
+def get_infinityPool_contract(pool_address: str) -> Contract:
+    """Read only handle of an InfinityPools pool, shared and safe to use from any thread."""
+    return get_contract(Chain.BASE, pool_address, "infinityPool.json")
+
+
+def get_infinityPools_positions_balances(
+    token_ids: Iterable[int], block: int
+) -> Dict[int, list]:
+    """[token0, token1, locked amount0, locked amount1] of each position at `block`.
+
+    getLiquidityPosition is read with one multicall per pool, positions that do not
+    exist yet at `block` are [None, None, 0, 0].
+    """
+    lp_nums_by_pool: Dict[ChecksumAddress, List[Tuple[int, int]]] = {}
+    for token_id in token_ids:
+        (_, pool_address, lpNum) = decode_id(token_id)
+        lp_nums_by_pool.setdefault(Web3.to_checksum_address(pool_address), []).append(
+            (token_id, lpNum)
+        )
+
+    balances: Dict[int, list] = {}
+    for pool_address, positions in lp_nums_by_pool.items():
+        pool_contract = get_infinityPool_contract(pool_address)
+        results = multicall_by_address(
+            w3_base,
+            MULTICALL_ADDRESS_BY_CHAIN[Chain.BASE],
+            [(pool_contract, "getLiquidityPosition", [lpNum]) for _, lpNum in positions],
+            block,
+            allow_failure=True,
+        )
+        for (token_id, _), result in zip(positions, results):
+            if result is None:
+                print(token_id, "not yet created at", block)
+                balances[token_id] = [None, None, 0, 0]
+                continue
+            [_, token0, token1, _, _, _, locked_amount0, locked_amount1, _, _,
+                _, _, _] = result[0]
+            balances[token_id] = [Web3.to_checksum_address(token0), Web3.to_checksum_address(token1),
+                                  locked_amount0, locked_amount1]
+    return balances
+
+
 def get_infinityPools_position_balance(token_id, block):
-    (positionType, pool_address, lpNum) = decode_id(token_id)
-    infinityPool_contract.address = pool_address
-    try:
-        [_, token0, token1, _, _, _, locked_amount0, locked_amount1, _, _,
-            _, _, _] = call_with_retry(infinityPool_contract.functions.getLiquidityPosition(lpNum), block)
-        return [Web3.to_checksum_address(token0), Web3.to_checksum_address(token1), locked_amount0, locked_amount1]
-    except Exception:
-        print(token_id, "not yet created at", block)
-        return [None, None, 0, 0]
+    return get_infinityPools_positions_balances([token_id], block)[token_id]
 
 
 def get_infinityPool_all_user_balance(users: Dict[ChecksumAddress, Set[int]],
-                                      block=w3_base.eth.get_block_number()) -> Dict[ChecksumAddress, float]:
+                                      block=None) -> Dict[ChecksumAddress, float]:
+    if block is None:
+        block = w3_base.eth.get_block_number()
     try:
         if block < START_BLOCK:
             return {}
@@ -95,12 +139,13 @@ def get_infinityPool_all_user_balance(users: Dict[ChecksumAddress, Set[int]],
         if len(users) == 0:
             return all_user_total_balances
 
+        position_balances = get_infinityPools_positions_balances(
+            {token_id for token_ids in users.values() for token_id in token_ids}, block)
         for user in users:
             token_ids = users[user]
             total_sUsde_amount = 0  # per user
             for token_id in token_ids:
-                [token0, token1, t0, t1] = get_infinityPools_position_balance(
-                    token_id, block)
+                [token0, token1, t0, t1] = position_balances[token_id]
                 # print("amounts", t0, t1)
                 if token0 is None or token1 is None:
                     continue
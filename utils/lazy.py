@@ -0,0 +1,37 @@
+import threading
+from typing import Any, Callable
+
+
+class Lazy:
+    """Stands in for an object that is only built, once, on first attribute access.
+
+    Module level providers and contracts are declared through it, so importing a module
+    does not build objects (or reach chains) that the running integrations never use.
+    """
+
+    __slots__ = ("_factory", "_target", "_lock")
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _lazy_target(self) -> Any:
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            with object.__getattribute__(self, "_lock"):
+                target = object.__getattribute__(self, "_target")
+                if target is None:
+                    target = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._lazy_target(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._lazy_target(), name, value)
+
+    def __repr__(self) -> str:
+        target = object.__getattribute__(self, "_target")
+        return repr(target) if target is not None else "<Lazy (not built yet)>"
@@ -1,21 +1,23 @@
-import json
 from web3.contract import Contract
 from web3 import Web3
 from utils.web3_utils import (
     w3_mantle,
+    lazy_contract,
 )
 
 from constants.lendle import LENDLE_USDE_TOKEN
 from constants.lendle import LENDLE_SUSDE_TOKEN
+from utils.abi import load_abi
 
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
+erc20_abi = load_abi("ERC20_abi.json")
 
 
-lendle_usde_contract: Contract = w3_mantle.eth.contract(
+lendle_usde_contract: Contract = lazy_contract(
+    w3_mantle,
     address=Web3.to_checksum_address(LENDLE_USDE_TOKEN), abi=erc20_abi
 )
 
-lendle_susde_contract: Contract = w3_mantle.eth.contract(
+lendle_susde_contract: Contract = lazy_contract(
+    w3_mantle,
     address=Web3.to_checksum_address(LENDLE_SUSDE_TOKEN), abi=erc20_abi
 )
@@ -0,0 +1,279 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from web3.types import EventData
+
+# Where finalized event logs, block timestamps, snapshots and indexer states are persisted
+# between runs, set to an empty string to disable
+LOG_CACHE_PATH = os.getenv("LOG_CACHE_PATH", ".cache/event_logs.sqlite")
+# Logs younger than this many blocks may still be reorged, they are always fetched live
+LOG_CACHE_CONFIRMATIONS = int(os.getenv("LOG_CACHE_CONFIRMATIONS", "64"))
+# Bump when the stored format changes, older entries are then ignored
+LOG_CACHE_VERSION = 1
+
+# How long a fetched chain head is reused before asking the node again, in seconds
+HEAD_TTL = 30
+CHAIN_ID_BY_ENDPOINT: Dict[str, int] = {}
+HEAD_BY_ENDPOINT: Dict[str, Tuple[int, float]] = {}
+
+
+class EventLogCache:
+    """SQLite store of decoded event logs and of the block ranges they fully cover.
+
+    Each (chain, address, event, filter) key has its own set of covered ranges, a range is
+    only recorded once every log in it has been stored, so a partially written scan is
+    simply fetched again. Timestamps of finalized blocks are kept alongside, as well as
+    JSON snapshots of off-chain data (e.g. prices) keyed by namespace and time bucket, and
+    JSON states of incremental indexers keyed by name.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS ranges "
+                "(key TEXT NOT NULL, from_block INTEGER NOT NULL, to_block INTEGER NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS ranges_key ON ranges (key, from_block)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS logs "
+                "(key TEXT NOT NULL, block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, "
+                "event BLOB NOT NULL, PRIMARY KEY (key, block_number, log_index))"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS block_timestamps "
+                "(chain_id INTEGER NOT NULL, block_number INTEGER NOT NULL, timestamp INTEGER NOT NULL, "
+                "PRIMARY KEY (chain_id, block_number))"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots "
+                "(namespace TEXT NOT NULL, bucket INTEGER NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, bucket))"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS states (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def uncovered(self, key: str, from_block: int, to_block: int) -> List[Tuple[int, int]]:
+        """Sub-ranges of [from_block, to_block] that are not stored yet."""
+        with self.lock:
+            covered = self.connection.execute(
+                "SELECT from_block, to_block FROM ranges "
+                "WHERE key = ? AND to_block >= ? AND from_block <= ? ORDER BY from_block",
+                (key, from_block, to_block),
+            ).fetchall()
+
+        missing: List[Tuple[int, int]] = []
+        start = from_block
+        for covered_from, covered_to in covered:
+            if covered_from > start:
+                missing.append((start, covered_from - 1))
+            start = max(start, covered_to + 1)
+        if start <= to_block:
+            missing.append((start, to_block))
+        return missing
+
+    def store(self, key: str, from_block: int, to_block: int, logs: Iterable[EventData]):
+        """Persist all the logs of [from_block, to_block] and mark the range as covered."""
+        rows = [
+            (key, log["blockNumber"], log["logIndex"], pickle.dumps(log))
+            for log in logs
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO logs (key, block_number, log_index, event) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            # merge the new range with the ranges it overlaps or touches
+            touching = self.connection.execute(
+                "SELECT from_block, to_block FROM ranges "
+                "WHERE key = ? AND to_block >= ? AND from_block <= ?",
+                (key, from_block - 1, to_block + 1),
+            ).fetchall()
+            merged_from = min([from_block] + [r[0] for r in touching])
+            merged_to = max([to_block] + [r[1] for r in touching])
+            self.connection.execute(
+                "DELETE FROM ranges WHERE key = ? AND to_block >= ? AND from_block <= ?",
+                (key, from_block - 1, to_block + 1),
+            )
+            self.connection.execute(
+                "INSERT INTO ranges (key, from_block, to_block) VALUES (?, ?, ?)",
+                (key, merged_from, merged_to),
+            )
+
+    def read(self, key: str, from_block: int, to_block: int) -> Iterator[EventData]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT event FROM logs WHERE key = ? AND block_number BETWEEN ? AND ? "
+                "ORDER BY block_number, log_index",
+                (key, from_block, to_block),
+            ).fetchall()
+        for (event,) in rows:
+            yield pickle.loads(event)
+
+    def get_block_timestamps(self, chain_id: int) -> List[Tuple[int, int]]:
+        """Every stored (block, timestamp) of a chain, ordered by block."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT block_number, timestamp FROM block_timestamps WHERE chain_id = ? ORDER BY block_number",
+                (chain_id,),
+            ).fetchall()
+
+    def store_block_timestamps(self, chain_id: int, timestamps: Dict[int, int]):
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO block_timestamps (chain_id, block_number, timestamp) VALUES (?, ?, ?)",
+                [(chain_id, block, timestamp) for block, timestamp in timestamps.items()],
+            )
+
+    def get_snapshots(self, namespace: str, buckets: List[int]) -> Dict[int, str]:
+        snapshots: Dict[int, str] = {}
+        with self.lock:
+            for i in range(0, len(buckets), 500):
+                chunk = buckets[i : i + 500]
+                snapshots.update(
+                    self.connection.execute(
+                        "SELECT bucket, value FROM snapshots "
+                        f"WHERE namespace = ? AND bucket IN ({','.join('?' * len(chunk))})",
+                        (namespace, *chunk),
+                    ).fetchall()
+                )
+        return snapshots
+
+    def store_snapshots(self, namespace: str, snapshots: Dict[int, str]):
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO snapshots (namespace, bucket, value) VALUES (?, ?, ?)",
+                [(namespace, bucket, value) for bucket, value in snapshots.items()],
+            )
+
+    def get_state(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM states WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def store_state(self, key: str, value: str):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO states (key, value) VALUES (?, ?)", (key, value)
+            )
+
+
+LOG_CACHE: Optional[EventLogCache] = None
+
+
+def get_log_cache() -> Optional[EventLogCache]:
+    global LOG_CACHE  # pylint: disable=global-statement
+    if LOG_CACHE is None and LOG_CACHE_PATH:
+        LOG_CACHE = EventLogCache(LOG_CACHE_PATH)
+    return LOG_CACHE
+
+
+def get_chain_id(wb3) -> int:
+    endpoint = str(getattr(wb3.provider, "endpoint_uri", "") or "")
+    if endpoint not in CHAIN_ID_BY_ENDPOINT:
+        CHAIN_ID_BY_ENDPOINT[endpoint] = wb3.eth.chain_id
+    return CHAIN_ID_BY_ENDPOINT[endpoint]
+
+
+def get_head_block(wb3) -> int:
+    endpoint = str(getattr(wb3.provider, "endpoint_uri", "") or "")
+    head, fetched_at = HEAD_BY_ENDPOINT.get(endpoint, (0, 0.0))
+    if time.time() - fetched_at > HEAD_TTL:
+        head = wb3.eth.get_block_number()
+        HEAD_BY_ENDPOINT[endpoint] = (head, time.time())
+    return head
+
+
+def get_cache_key(contract_event, filter: dict | None) -> str:  # pylint: disable=redefined-builtin
+    filter_key = json.dumps(
+        filter or {},
+        sort_keys=True,
+        default=lambda v: v.hex() if isinstance(v, bytes) else str(v),
+    )
+    return "|".join(
+        [
+            str(LOG_CACHE_VERSION),
+            str(get_chain_id(contract_event.w3)),
+            str(contract_event.address).lower(),
+            str(contract_event.topic),
+            filter_key,
+        ]
+    )
+
+
+def get_multi_events_cache_key(wb3, addresses: List[str], topics: List[str]) -> str:
+    """Cache key of a query for any of `topics` (topic0) emitted by any of `addresses`."""
+    return "|".join(
+        [
+            str(LOG_CACHE_VERSION),
+            str(get_chain_id(wb3)),
+            ",".join(sorted(str(address).lower() for address in addresses)),
+            ",".join(sorted(str(topic) for topic in topics)),
+            "multi",
+        ]
+    )
+
+
+def get_logs_cached(
+    contract_event,
+    from_block: int,
+    to_block: int | str,
+    # pylint: disable=redefined-builtin
+    filter: dict | None,
+    fetch: Callable[[int, int | str], Iterable[EventData]],
+) -> Iterator[EventData]:
+    """Yield the logs of `contract_event` in [from_block, to_block], fetching only what is missing.
+
+    `fetch(from_block, to_block)` retrieves logs from the node. Finalized blocks are served
+    from and persisted to the local cache, the most recent LOG_CACHE_CONFIRMATIONS blocks
+    are always fetched live.
+    """
+    yield from get_logs_cached_by_key(
+        contract_event.w3,
+        lambda: get_cache_key(contract_event, filter),
+        from_block,
+        to_block,
+        fetch,
+    )
+
+
+def get_logs_cached_by_key(
+    wb3,
+    get_key: Callable[[], str],
+    from_block: int,
+    to_block: int | str,
+    fetch: Callable[[int, int | str], Iterable[EventData]],
+) -> Iterator[EventData]:
+    """get_logs_cached for any log query, stored under the key returned by `get_key()`."""
+    cache = get_log_cache()
+    if cache is None:
+        yield from fetch(from_block, to_block)
+        return
+
+    head = get_head_block(wb3)
+    last_block = to_block if isinstance(to_block, int) else head
+    cached_to = min(last_block, head - LOG_CACHE_CONFIRMATIONS)
+
+    if from_block <= cached_to:
+        key = get_key()
+        for start, end in cache.uncovered(key, from_block, cached_to):
+            cache.store(key, start, end, list(fetch(start, end)))
+        yield from cache.read(key, from_block, cached_to)
+
+    live_from = max(from_block, cached_to + 1)
+    if live_from <= last_block:
+        yield from fetch(live_from, to_block)
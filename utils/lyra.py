@@ -8,6 +8,7 @@ import requests
 from web3.contract import Contract
 from utils.web3_utils import call_with_retry
 from constants.chains import Chain
+from utils.subgraph import paginate_subgraph, query_subgraph
 from web3 import Web3
 
 url = "https://app.sentio.xyz/api/v1/graphql/derive/v2_subgraph"
@@ -16,8 +17,8 @@ SUSDE_VAULT_ADDRESS = Web3.to_checksum_address(
 )
 
 user_balance_query = """
-{
-  accounts(where: {or: [{id: "{user}"}, {owner: "{user}"}]}, block: {number: {block}}) {
+query UserBalance($user: String!, $block: Int!) {
+  accounts(where: {or: [{id: $user}, {owner: $user}]}, block: {number: $block}) {
     id
     owner
     subaccounts{
@@ -37,37 +38,29 @@ user_balance_query = """
 """
 
 
-def get_exchange_balance(user: str, block: int) -> float:
-    user = user.lower()
-    # Replace the user and block placeholders in the query
-    user_balance_query_filled = user_balance_query.replace("{user}", user).replace(
-        "{block}", str(block)
-    )
-
-    headers = {
+def get_subgraph_headers() -> dict:
+    return {
         "Content-Type": "application/json",
         "api-key": str(os.getenv("DERIVE_SUBGRAPH_API_KEY", "")),
     }
-    print(user_balance_query_filled)
 
-    # Send the POST request
-    response = requests.post(
-        url, json={"query": user_balance_query_filled}, headers=headers
-    )
 
+def get_exchange_balance(user: str, block: int) -> float:
     total_balance = 0.0
-    if response.status_code == 200:
-        response_json = response.json()
-        accounts = response_json["data"]["accounts"]
-        for account in accounts:
-            for subaccount in account["subaccounts"]:
-                for balance in subaccount["balances"]:
-                    total_balance += float(balance["balance"])
-            for subaccount in account["depositedSubaccounts"]:
-                for balance in subaccount["balances"]:
-                    total_balance += float(balance["balance"])
-    else:
-        print(f"Query failed with status code {response.status_code}: {response.text}")
+    accounts = query_subgraph(
+        url,
+        user_balance_query,
+        {"user": user.lower(), "block": block},
+        get_subgraph_headers(),
+    )["accounts"]
+
+    for account in accounts:
+        for subaccount in account["subaccounts"]:
+            for balance in subaccount["balances"]:
+                total_balance += float(balance["balance"])
+        for subaccount in account["depositedSubaccounts"]:
+            for balance in subaccount["balances"]:
+                total_balance += float(balance["balance"])
     return total_balance
 
 
@@ -113,8 +106,14 @@ def get_effective_balance(
 
 
 all_users_query = """
-{
-  subAccountBalances(where: {asset: "0x375804cdcf0d534fdd2657584a7c4ff5ab14a2bb000000000000000000000000"} first: 10000) {
+query SubAccountBalances($first: Int!, $lastId: String!) {
+  subAccountBalances(
+    first: $first
+    where: {asset: "0x375804cdcf0d534fdd2657584a7c4ff5ab14a2bb000000000000000000000000", id_gt: $lastId}
+    orderBy: id
+    orderDirection: asc
+  ) {
+    id
     subaccount {
       id
       owner {
@@ -132,44 +131,35 @@ all_users_query = """
 
 
 def get_exchange_users() -> set:
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": str(os.getenv("DERIVE_SUBGRAPH_API_KEY", "")),
-    }
-
-    response = requests.post(url, json={"query": all_users_query}, headers=headers)
-
     users = set()
-    if response.status_code == 200:
-        response_json = response.json()
-        balances = response_json["data"]["subAccountBalances"]
-        for balance in balances:
-            if balance["subaccount"]["matchingOwner"] is not None:
-                if balance["subaccount"]["matchingOwner"]["owner"] is not None:
-                    users.add(
-                        Web3.to_checksum_address(
-                            balance["subaccount"]["matchingOwner"]["owner"]
-                        )
-                    )
-                else:
-                    users.add(
-                        Web3.to_checksum_address(
-                            balance["subaccount"]["matchingOwner"]["id"]
-                        )
+    for balance in paginate_subgraph(
+        url, all_users_query, "subAccountBalances", headers=get_subgraph_headers()
+    ):
+        if balance["subaccount"]["matchingOwner"] is not None:
+            if balance["subaccount"]["matchingOwner"]["owner"] is not None:
+                users.add(
+                    Web3.to_checksum_address(
+                        balance["subaccount"]["matchingOwner"]["owner"]
                     )
+                )
             else:
-                if balance["subaccount"]["owner"]["owner"] is not None:
-                    users.add(
-                        Web3.to_checksum_address(
-                            balance["subaccount"]["owner"]["owner"]
-                        )
+                users.add(
+                    Web3.to_checksum_address(
+                        balance["subaccount"]["matchingOwner"]["id"]
                     )
-                else:
-                    users.add(
-                        Web3.to_checksum_address(balance["subaccount"]["owner"]["id"])
+                )
+        else:
+            if balance["subaccount"]["owner"]["owner"] is not None:
+                users.add(
+                    Web3.to_checksum_address(
+                        balance["subaccount"]["owner"]["owner"]
                     )
-    else:
-        print(f"Query failed with status code {response.status_code}: {response.text}")
+                )
+            else:
+                users.add(
+                    Web3.to_checksum_address(balance["subaccount"]["owner"]["id"])
+                )
+
 
     try:
         users.remove(
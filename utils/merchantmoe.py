@@ -1,30 +1,26 @@
-import json
-from pathlib import Path
-
 from dotenv import load_dotenv
 
 from constants.merchantmoe import (
     MERCHANT_MOE_LIQUIDITY_HELPER_CONTRACT,
     METH_USDE_MERCHANT_MOE_LBT_CONTRACT,
 )
-from utils.web3_utils import w3_mantle
+from utils.web3_utils import w3_mantle, lazy_contract
+from utils.abi import load_abi
 from web3 import Web3
 
 load_dotenv()
 
-merchant_moe_lb_pair_abi = json.load(
-    open(Path(__file__).parent.parent / "abi/merchant_moe_lb_pair.json")
-)
+merchant_moe_lb_pair_abi = load_abi("merchant_moe_lb_pair.json")
 
-merchant_moe_liquidity_helper_abi = json.load(
-    open(Path(__file__).parent.parent / "abi/merchant_moe_liquidity_helper.json")
-)
+merchant_moe_liquidity_helper_abi = load_abi("merchant_moe_liquidity_helper.json")
 
-lb_pair_contract = w3_mantle.eth.contract(
+lb_pair_contract = lazy_contract(
+    w3_mantle,
     address=Web3.to_checksum_address(METH_USDE_MERCHANT_MOE_LBT_CONTRACT),
     abi=merchant_moe_lb_pair_abi,
 )
-liquidity_helper_contract = w3_mantle.eth.contract(
+liquidity_helper_contract = lazy_contract(
+    w3_mantle,
     address=Web3.to_checksum_address(MERCHANT_MOE_LIQUIDITY_HELPER_CONTRACT),
     abi=merchant_moe_liquidity_helper_abi,
 )
@@ -1,19 +1,19 @@
-import json
 from utils.web3_utils import (
     w3_scroll,
+    lazy_contract,
 )
 
 from constants.nuri import NURI_NFP_MANAGER_ADDRESS, NURI_POOL_ADDRESS
+from utils.abi import load_abi
 
-with open("abi/nuri_nfp_manager.json") as f:
-    nfp_manager_abi = json.load(f)
+nfp_manager_abi = load_abi("nuri_nfp_manager.json")
 
-with open("abi/nuri_pool.json") as f:
-    pool_abi = json.load(f)
+pool_abi = load_abi("nuri_pool.json")
 
 
-nfp_manager = w3_scroll.eth.contract(
+nfp_manager = lazy_contract(
+    w3_scroll,
     address=NURI_NFP_MANAGER_ADDRESS, abi=nfp_manager_abi
 )
 
-pool = w3_scroll.eth.contract(address=NURI_POOL_ADDRESS, abi=pool_abi)
+pool = lazy_contract(w3_scroll, address=NURI_POOL_ADDRESS, abi=pool_abi)
@@ -0,0 +1,129 @@
+import json
+import logging
+import threading
+from typing import Dict, List, Set, Tuple
+
+from utils.log_cache import LOG_CACHE_CONFIRMATIONS, get_chain_id, get_head_block, get_log_cache
+from utils.web3_utils import fetch_events_logs_in_range
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class ParticipantIndex:
+    """Addresses found in one argument of one event, scanned incrementally.
+
+    The first and last block each address was seen at are kept, so callers starting at
+    different blocks can share the index and only finalized entries are persisted. The next
+    run reloads them from the local cache and only scans the blocks after.
+    """
+
+    def __init__(self, contract_event, arg_name: str, start_block: int):
+        self.contract_event = contract_event
+        self.arg_name = arg_name
+        self.key = "|".join(
+            [
+                "participants",
+                str(get_chain_id(contract_event.w3)),
+                str(contract_event.address).lower(),
+                str(contract_event.topic),
+                arg_name,
+            ]
+        )
+        self.lock = threading.Lock()
+        self.first_scanned_block = start_block
+        self.last_scanned_block = start_block - 1
+        # address -> [first block, last block] it was seen at
+        self.seen_blocks: Dict[str, List[int]] = {}
+        self.load()
+
+    def load(self):
+        cache = get_log_cache()
+        stored = cache.get_state(self.key) if cache is not None else None
+        if stored is None:
+            return
+        indexed = json.loads(stored)
+        self.first_scanned_block = indexed["first_scanned_block"]
+        self.last_scanned_block = indexed["last_scanned_block"]
+        self.seen_blocks = indexed["participants"]
+
+    def save(self):
+        cache = get_log_cache()
+        if cache is None:
+            return
+        finalized_block = min(
+            self.last_scanned_block,
+            get_head_block(self.contract_event.w3) - LOG_CACHE_CONFIRMATIONS,
+        )
+        if finalized_block < self.first_scanned_block:
+            return
+        cache.store_state(
+            self.key,
+            json.dumps(
+                {
+                    "first_scanned_block": self.first_scanned_block,
+                    "last_scanned_block": finalized_block,
+                    "participants": {
+                        address: [first_block, min(last_block, finalized_block)]
+                        for address, (first_block, last_block) in self.seen_blocks.items()
+                        if first_block <= finalized_block
+                    },
+                }
+            ),
+        )
+
+    def scan(self, label: str, from_block: int, to_block: int):
+        for log in fetch_events_logs_in_range(label, self.contract_event, from_block, to_block):
+            address = log["args"][self.arg_name]
+            if not address or address == ZERO_ADDRESS:
+                continue
+            block = log["blockNumber"]
+            if address in self.seen_blocks:
+                seen = self.seen_blocks[address]
+                seen[0], seen[1] = min(seen[0], block), max(seen[1], block)
+            else:
+                self.seen_blocks[address] = [block, block]
+
+    def get_participants(self, label: str, start_block: int) -> Set[str]:
+        """Addresses seen from `start_block` to the chain head, scanning only what is missing."""
+        with self.lock:
+            head = get_head_block(self.contract_event.w3)
+            if start_block < self.first_scanned_block:
+                self.scan(label, start_block, self.first_scanned_block - 1)
+                self.first_scanned_block = start_block
+            if head > self.last_scanned_block:
+                self.scan(label, self.last_scanned_block + 1, head)
+                self.last_scanned_block = head
+            self.save()
+            participants = {
+                address
+                for address, (_, last_block) in self.seen_blocks.items()
+                if last_block >= start_block
+            }
+        logging.info(f"[{label}] {len(participants)} participants up to block {head}")
+        return participants
+
+
+PARTICIPANT_INDEX_BY_KEY: Dict[Tuple[str, str, str, str], ParticipantIndex] = {}
+PARTICIPANT_INDEX_LOCK = threading.Lock()
+
+
+def get_event_participants(
+    label: str, contract_event, arg_name: str, start_block: int
+) -> Set[str]:
+    """Addresses found in `arg_name` of `contract_event` logs from `start_block` to the head.
+
+    Indexes are shared by every integration reading the same event, across threads and runs.
+    """
+    index_key = (
+        str(getattr(contract_event.w3.provider, "endpoint_uri", "") or ""),
+        str(contract_event.address).lower(),
+        contract_event.event_name,
+        arg_name,
+    )
+    with PARTICIPANT_INDEX_LOCK:
+        if index_key not in PARTICIPANT_INDEX_BY_KEY:
+            PARTICIPANT_INDEX_BY_KEY[index_key] = ParticipantIndex(
+                contract_event, arg_name, start_block
+            )
+        index = PARTICIPANT_INDEX_BY_KEY[index_key]
+    return index.get_participants(label, start_block)
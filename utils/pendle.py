@@ -1,13 +1,13 @@
 import os
-import json
 from typing import Any, Dict
 from dotenv import load_dotenv
 from utils.web3_utils import (
     W3_BY_CHAIN,
-    fetch_events_logs_with_retry,
+    fetch_events_logs_in_range,
     w3,
     w3_mantle,
     w3_arb,
+    lazy_contract,
 )
 from constants.chains import Chain
 from web3.contract import Contract
@@ -56,81 +56,85 @@ from constants.pendle import (
     PENDLE_USDE_ZIRCUIT_DEPLOYMENT_BLOCK,
     PENDLE_SUSDE_APRIL_DEPLOYMENT_BLOCK,
 )
+from utils.abi import load_abi
 
 load_dotenv()
 
 FOLDER = os.getenv("FOLDER")
 
-with open("abi/pendle_lpt.json") as f:
-    lpt_abi = json.load(f)
+lpt_abi = load_abi("pendle_lpt.json")
 
-with open("abi/pendle_router_abi.json") as f:
-    pendle_router_abi = json.load(f)
+pendle_router_abi = load_abi("pendle_router_abi.json")
 
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
+erc20_abi = load_abi("ERC20_abi.json")
 
 
-lpt_contract = w3.eth.contract(address=LPT, abi=lpt_abi)
-sy_contract = w3.eth.contract(address=SY, abi=erc20_abi)
-yt_contract = w3.eth.contract(address=YT, abi=erc20_abi)
-pendle_router_contract = w3.eth.contract(address=pendle_router, abi=pendle_router_abi)
+lpt_contract = lazy_contract(w3, address=LPT, abi=lpt_abi)
+sy_contract = lazy_contract(w3, address=SY, abi=erc20_abi)
+yt_contract = lazy_contract(w3, address=YT, abi=erc20_abi)
+pendle_router_contract = lazy_contract(w3, address=pendle_router, abi=pendle_router_abi)
 
 
-susde_lpt_contract = w3.eth.contract(address=sUSDe_LPT, abi=lpt_abi)
-susde_sy_contract = w3.eth.contract(address=sUSDe_SY, abi=erc20_abi)
-susde_yt_contract = w3.eth.contract(address=sUSDe_YT, abi=erc20_abi)
+susde_lpt_contract = lazy_contract(w3, address=sUSDe_LPT, abi=lpt_abi)
+susde_sy_contract = lazy_contract(w3, address=sUSDe_SY, abi=erc20_abi)
+susde_yt_contract = lazy_contract(w3, address=sUSDe_YT, abi=erc20_abi)
 
 
-SUSDE_SY_SEPT_CONTRACT = w3.eth.contract(address=SUSDE_SY_SEPT, abi=erc20_abi)
-SUSDE_YT_SEPT_CONTRACT = w3.eth.contract(address=SUSDE_YT_SEPT, abi=erc20_abi)
-SUSDE_LPT_SEPT_CONTRACT = w3.eth.contract(address=SUSDE_LPT_SEPT, abi=lpt_abi)
+SUSDE_SY_SEPT_CONTRACT = lazy_contract(w3, address=SUSDE_SY_SEPT, abi=erc20_abi)
+SUSDE_YT_SEPT_CONTRACT = lazy_contract(w3, address=SUSDE_YT_SEPT, abi=erc20_abi)
+SUSDE_LPT_SEPT_CONTRACT = lazy_contract(w3, address=SUSDE_LPT_SEPT, abi=lpt_abi)
 
 
-susde_lpt_contract_old = w3.eth.contract(address=sUSDe_LPT_old, abi=lpt_abi)
-susde_sy_contract_old = w3.eth.contract(address=sUSDe_SY_old, abi=erc20_abi)
-susde_yt_contract_old = w3.eth.contract(address=sUSDe_YT_old, abi=erc20_abi)
+susde_lpt_contract_old = lazy_contract(w3, address=sUSDe_LPT_old, abi=lpt_abi)
+susde_sy_contract_old = lazy_contract(w3, address=sUSDe_SY_old, abi=erc20_abi)
+susde_yt_contract_old = lazy_contract(w3, address=sUSDe_YT_old, abi=erc20_abi)
 
 
-mantle_lpt_contract = w3_mantle.eth.contract(address=mantle_LPT, abi=lpt_abi)
-mantle_sy_contract = w3_mantle.eth.contract(address=mantle_SY, abi=erc20_abi)
-mantle_yt_contract = w3_mantle.eth.contract(address=mantle_YT, abi=erc20_abi)
+mantle_lpt_contract = lazy_contract(w3_mantle, address=mantle_LPT, abi=lpt_abi)
+mantle_sy_contract = lazy_contract(w3_mantle, address=mantle_SY, abi=erc20_abi)
+mantle_yt_contract = lazy_contract(w3_mantle, address=mantle_YT, abi=erc20_abi)
 
 
-USDe_zircuit_LPT_contract = w3.eth.contract(address=USDe_zircuit_LPT, abi=lpt_abi)
-USDe_zircuit_SY_contract = w3.eth.contract(address=USDe_zircuit_SY, abi=erc20_abi)
-USDe_zircuit_YT_contract = w3.eth.contract(address=USDe_zircuit_YT, abi=erc20_abi)
+USDe_zircuit_LPT_contract = lazy_contract(w3, address=USDe_zircuit_LPT, abi=lpt_abi)
+USDe_zircuit_SY_contract = lazy_contract(w3, address=USDe_zircuit_SY, abi=erc20_abi)
+USDe_zircuit_YT_contract = lazy_contract(w3, address=USDe_zircuit_YT, abi=erc20_abi)
 
 
-ENA_LPT_contract = w3.eth.contract(address=ENA_LP, abi=lpt_abi)
-ENA_SY_contract = w3.eth.contract(address=ENA_SY, abi=erc20_abi)
-ENA_YT_contract = w3.eth.contract(address=ENA_YT, abi=erc20_abi)
+ENA_LPT_contract = lazy_contract(w3, address=ENA_LP, abi=lpt_abi)
+ENA_SY_contract = lazy_contract(w3, address=ENA_SY, abi=erc20_abi)
+ENA_YT_contract = lazy_contract(w3, address=ENA_YT, abi=erc20_abi)
 
 
-PENDLE_USDE_KARAK_LP_CONTRACT = w3.eth.contract(
+PENDLE_USDE_KARAK_LP_CONTRACT = lazy_contract(
+    w3,
     address=PENDLE_USDE_KARAK_LP, abi=lpt_abi
 )
-PENDLE_USDE_KARAK_SY_CONTRACT = w3.eth.contract(
+PENDLE_USDE_KARAK_SY_CONTRACT = lazy_contract(
+    w3,
     address=PENDLE_USDE_KARAK_SY, abi=erc20_abi
 )
-PENDLE_USDE_KARAK_YT_CONTRACT = w3.eth.contract(
+PENDLE_USDE_KARAK_YT_CONTRACT = lazy_contract(
+    w3,
     address=PENDLE_USDE_KARAK_YT, abi=erc20_abi
 )
 
 
-PENDLE_SUSDE_KARAK_LP_CONTRACT = w3.eth.contract(
+PENDLE_SUSDE_KARAK_LP_CONTRACT = lazy_contract(
+    w3,
     address=PENDLE_SUSDE_KARAK_LP, abi=lpt_abi
 )
-PENDLE_SUSDE_KARAK_SY_CONTRACT = w3.eth.contract(
+PENDLE_SUSDE_KARAK_SY_CONTRACT = lazy_contract(
+    w3,
     address=PENDLE_SUSDE_KARAK_SY, abi=erc20_abi
 )
-PENDLE_SUSDE_KARAK_YT_CONTRACT = w3.eth.contract(
+PENDLE_SUSDE_KARAK_YT_CONTRACT = lazy_contract(
+    w3,
     address=PENDLE_SUSDE_KARAK_YT, abi=erc20_abi
 )
 
-usde_arb_LPT_contract = w3_arb.eth.contract(address=usde_arb_LP, abi=lpt_abi)
-usde_arb_SY_contract = w3_arb.eth.contract(address=usde_arb_SY, abi=erc20_abi)
-usde_arb_YT_contract = w3_arb.eth.contract(address=usde_arb_YT, abi=erc20_abi)
+usde_arb_LPT_contract = lazy_contract(w3_arb, address=usde_arb_LP, abi=lpt_abi)
+usde_arb_SY_contract = lazy_contract(w3_arb, address=usde_arb_SY, abi=erc20_abi)
+usde_arb_YT_contract = lazy_contract(w3_arb, address=usde_arb_YT, abi=erc20_abi)
 
 PENDLE_CONTRACT_AND_START_BY_LP_TOKEN: Dict[str, Dict[str, Any]] = {
     SY: {
@@ -338,18 +342,14 @@ def get_pendle_participants_v3(token_addresses):
         contract: Contract = token_data["contract"]
         chain = token_data["chain"]
         web3_for_token = W3_BY_CHAIN[chain]["w3"]
-        page_size = 1900
         target_block = web3_for_token.eth.get_block_number()
-        while start < target_block:
-            to_block = min(start + page_size, target_block)
-            transfers = fetch_events_logs_with_retry(
-                f"Pendle v3 users {token}",
-                contract.events.Transfer(),
-                start,
-                to_block,
-            )
-            print(start, to_block, len(list(transfers)), "getting Pendle contract data")
-            for transfer in transfers:
-                all_users.add(transfer["args"]["to"])
-            start += page_size
+        transfers = fetch_events_logs_in_range(
+            f"Pendle v3 users {token}",
+            contract.events.Transfer(),
+            start,
+            target_block,
+        )
+        for transfer in transfers:
+            all_users.add(transfer["args"]["to"])
+        print(start, target_block, len(all_users), "getting Pendle contract data")
     return all_users
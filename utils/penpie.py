@@ -6,25 +6,14 @@ from constants.penpie import PENDLE_LOCKER_ARBITRUM
 from constants.penpie import master_penpie_ethereum
 from constants.penpie import master_penpie_arbitrum
 import logging
-import json
+from utils.participant_index import get_event_participants
 from utils.web3_utils import (
-    fetch_events_logs_with_retry,
     call_with_retry,
-    w3,
-    w3_arb,
 )
 from typing import Optional, Set
 from web3.contract import Contract
 from eth_typing import ChecksumAddress
-
-with open("abi/penpie_master.json") as f:
-    master_penpie = json.load(f)
-with open("abi/pendle_lpt.json") as f:
-    lpt_abi = json.load(f)
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
-with open("abi/penpie_tokens.json") as f:
-    penpie_tokens = json.load(f)
+from utils.abi import get_contract
 
 
 class PENPIEIntegration(Integration):
@@ -50,13 +39,12 @@ class PENPIEIntegration(Integration):
 
     def get_balance(self, user: str, block: int | str = "latest") -> float:
         if self.chain == Chain.ETHEREUM:
-            masterpenpiecontract = w3.eth.contract(
-                address=master_penpie_ethereum, abi=master_penpie
+            masterpenpiecontract = get_contract(
+                Chain.ETHEREUM, master_penpie_ethereum, "penpie_master.json"
             )
         if self.chain == Chain.ARBITRUM:
-            masterpenpiecontract = w3_arb.eth.contract(
-                address=w3_arb.to_checksum_address(master_penpie_arbitrum),
-                abi=master_penpie,
+            masterpenpiecontract = get_contract(
+                Chain.ARBITRUM, master_penpie_arbitrum, "penpie_master.json"
             )
 
         # Get lpt token address from Stake DAO vault
@@ -66,9 +54,13 @@ class PENPIEIntegration(Integration):
         )
         # pendlePoolAddress = "0x107a2e3cD2BB9a32B9eE2E4d51143149F8367eBa"
         if self.chain == Chain.ETHEREUM:
-            lptContract = w3.eth.contract(address=pendlePoolAddress, abi=lpt_abi)
+            lptContract = get_contract(
+                Chain.ETHEREUM, pendlePoolAddress, "pendle_lpt.json"
+            )
         if self.chain == Chain.ARBITRUM:
-            lptContract = w3_arb.eth.contract(address=pendlePoolAddress, abi=lpt_abi)
+            lptContract = get_contract(
+                Chain.ARBITRUM, pendlePoolAddress, "pendle_lpt.json"
+            )
         print(pendlePoolAddress)
         # Get SY address
         tokens = call_with_retry(
@@ -78,9 +70,9 @@ class PENPIEIntegration(Integration):
 
         sy = tokens[0]
         if self.chain == Chain.ETHEREUM:
-            sy_contract = w3.eth.contract(address=sy, abi=erc20_abi)
+            sy_contract = get_contract(Chain.ETHEREUM, sy, "ERC20_abi.json")
         if self.chain == Chain.ARBITRUM:
-            sy_contract = w3_arb.eth.contract(address=sy, abi=erc20_abi)
+            sy_contract = get_contract(Chain.ARBITRUM, sy, "ERC20_abi.json")
 
         # Get SY balance in the Pendle pool
         sy_bal = call_with_retry(
@@ -115,12 +107,12 @@ class PENPIEIntegration(Integration):
         print(lpt_bal / 10**18)
 
         if self.chain == Chain.ETHEREUM:
-            receiptcontract = w3.eth.contract(
-                address=w3.to_checksum_address(self.lp_contract), abi=erc20_abi
+            receiptcontract = get_contract(
+                Chain.ETHEREUM, self.lp_contract, "ERC20_abi.json"
             )
         if self.chain == Chain.ARBITRUM:
-            receiptcontract = w3_arb.eth.contract(
-                address=w3_arb.to_checksum_address(self.lp_contract), abi=erc20_abi
+            receiptcontract = get_contract(
+                Chain.ARBITRUM, self.lp_contract, "ERC20_abi.json"
             )
 
         # Get gauge total suply
@@ -152,42 +144,15 @@ class PENPIEIntegration(Integration):
         return self.participants
 
     def get_penpie_participants(self):
-        all_users = set()
-        start = self.start_block
-
-        if self.chain == Chain.ETHEREUM:
-            contract = w3.eth.contract(
-                address=w3.to_checksum_address(self.lp_contract), abi=erc20_abi
-            )
-        elif self.chain == Chain.ARBITRUM:
-            contract = w3_arb.eth.contract(
-                address=w3_arb.to_checksum_address(self.lp_contract), abi=erc20_abi
-            )
-        else:
-            return set()
-        page_size = 1900
         if self.chain == Chain.ETHEREUM:
-            target_block = w3.eth.get_block_number()
+            contract = get_contract(Chain.ETHEREUM, self.lp_contract, "ERC20_abi.json")
         elif self.chain == Chain.ARBITRUM:
-            target_block = w3_arb.eth.get_block_number()
+            contract = get_contract(Chain.ARBITRUM, self.lp_contract, "ERC20_abi.json")
         else:
             return set()
-        while start < target_block:
-            to_block = min(start + page_size, target_block)
-            deposits = fetch_events_logs_with_retry(
-                f"Penpie users {self.lp_contract}",
-                contract.events.Transfer(),
-                start,
-                to_block,
-            )
-            # print(start, to_block, len(deposits), "getting Stake DAO contract data")
-            for deposit in deposits:
-                if (
-                    deposit["args"]["to"]
-                    != "0x0000000000000000000000000000000000000000"
-                ):
-                    all_users.add(deposit["args"]["to"])
-                    print(deposit["args"]["to"])
-            start += page_size
-
-        return all_users
+        return get_event_participants(
+            f"Penpie users {self.lp_contract}",
+            contract.events.Transfer(),
+            "to",
+            self.start_block,
+        )
@@ -8,27 +8,18 @@ from constants.penpie import master_penpie_arbitrum
 from constants.penpie import auto_compound_manager_ethereum
 from constants.penpie import auto_compound_manager_arbitrum
 import logging
-import json
+from utils.participant_index import get_event_participants
 from utils.web3_utils import (
-    fetch_events_logs_with_retry,
     call_with_retry,
+    multicall_by_address,
     w3,
     w3_arb,
+    MULTICALL_ADDRESS_BY_CHAIN,
 )
-from typing import Optional, Set
+from typing import Dict, List, Optional, Set
 from web3.contract import Contract
 from eth_typing import ChecksumAddress
-
-with open("abi/penpie_auto_market_manager.json") as f:
-    auto_market_manager_abi = json.load(f)
-with open("abi/penpie_master.json") as f:
-    master_penpie = json.load(f)
-with open("abi/pendle_lpt.json") as f:
-    lpt_abi = json.load(f)
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
-with open("abi/penpie_tokens.json") as f:
-    penpie_tokens = json.load(f)
+from utils.abi import get_contract
 
 
 class PENPIEIntegrationV2(Integration):
@@ -53,135 +44,153 @@ class PENPIEIntegrationV2(Integration):
         )
         self.lp_contract = lp_contract
         self.autoMarket_contract = autoMarket_contract
+        self.pool_state_by_block: Dict[int, Optional[tuple]] = {}
 
     def get_balance(self, user: str, block: int | str = "latest") -> float:
+        return self.get_balances([user], block)[user]
+
+    def get_contracts(self):
+        """Web3 instance, receipt token and auto market contracts of the pool's chain."""
+        wb3 = w3_arb if self.chain == Chain.ARBITRUM else w3
+        receiptcontract = get_contract(self.chain, self.lp_contract, "ERC20_abi.json")
+        autoMarketLPContract = None
+        if self.autoMarket_contract and self.autoMarket_contract != "0x0000000000000000000000000000000000000000":
+            autoMarketLPContract = get_contract(
+                self.chain, self.autoMarket_contract, "ERC20_abi.json"
+            )
+        return wb3, receiptcontract, autoMarketLPContract
+
+    def get_pool_state(self, block: int | str = "latest") -> Optional[tuple]:
+        """Pool wide values at `block`, read once per block for all users.
+
+        Returns (lockerSyBalance, receipt total supply, auto market total supply, auto market
+        receipt balance), or None when the Penpie locker holds nothing in the Pendle pool.
+        """
+        if isinstance(block, int) and block in self.pool_state_by_block:
+            return self.pool_state_by_block[block]
+
         if self.chain == Chain.ETHEREUM:
-            masterpenpiecontract = w3.eth.contract(
-                address=master_penpie_ethereum, abi=master_penpie
+            masterpenpiecontract = get_contract(
+                Chain.ETHEREUM, master_penpie_ethereum, "penpie_master.json"
             )
+            PENDLE_LOCKER = PENDLE_LOCKER_ETHEREUM
         if self.chain == Chain.ARBITRUM:
-            masterpenpiecontract = w3_arb.eth.contract(
-                address=w3_arb.to_checksum_address(master_penpie_arbitrum),
-                abi=master_penpie,
+            masterpenpiecontract = get_contract(
+                Chain.ARBITRUM, master_penpie_arbitrum, "penpie_master.json"
             )
+            PENDLE_LOCKER = PENDLE_LOCKER_ARBITRUM
+        wb3, receiptcontract, autoMarketLPContract = self.get_contracts()
 
         # Get lpt token address from Stake DAO vault
         pendlePoolAddress = call_with_retry(
             masterpenpiecontract.functions.receiptToStakeToken(self.lp_contract),
             block,
         )
-        # pendlePoolAddress = "0x107a2e3cD2BB9a32B9eE2E4d51143149F8367eBa"
-        if self.chain == Chain.ETHEREUM:
-            lptContract = w3.eth.contract(address=pendlePoolAddress, abi=lpt_abi)
-        if self.chain == Chain.ARBITRUM:
-            lptContract = w3_arb.eth.contract(address=pendlePoolAddress, abi=lpt_abi)
-        print(pendlePoolAddress)
+        lptContract = get_contract(self.chain, pendlePoolAddress, "pendle_lpt.json")
         # Get SY address
         tokens = call_with_retry(
             lptContract.functions.readTokens(),
             block,
         )
-
-        sy = tokens[0]
-        if self.chain == Chain.ETHEREUM:
-            sy_contract = w3.eth.contract(address=sy, abi=erc20_abi)
-        if self.chain == Chain.ARBITRUM:
-            sy_contract = w3_arb.eth.contract(address=sy, abi=erc20_abi)
-
-        # Get SY balance in the Pendle pool
-        sy_bal = call_with_retry(
-            sy_contract.functions.balanceOf(pendlePoolAddress),
-            block,
-        )
-        if sy_bal == 0:
-            return 0
-
-        if self.chain == Chain.ETHEREUM:
-            PENDLE_LOCKER = PENDLE_LOCKER_ETHEREUM
-        if self.chain == Chain.ARBITRUM:
-            PENDLE_LOCKER = PENDLE_LOCKER_ARBITRUM
-        # Get Stake DAO lpt balance
-        lpt_bal = call_with_retry(
-            lptContract.functions.activeBalance(PENDLE_LOCKER),
-            block,
-        )
-        if lpt_bal == 0:
-            return 0
-
-        # Get LPT total supply
-        total_active_supply = call_with_retry(
-            lptContract.functions.totalActiveSupply(),
-            block,
-        )
-        if total_active_supply == 0:
+        sy_contract = get_contract(self.chain, tokens[0], "ERC20_abi.json")
+
+        # SY balance in the Pendle pool, Penpie locker lpt balance, LPT total supply, gauge total supply
+        pool_calls = [
+            (sy_contract, "balanceOf", [pendlePoolAddress]),
+            (lptContract, "activeBalance", [PENDLE_LOCKER]),
+            (lptContract, "totalActiveSupply", []),
+            (receiptcontract, "totalSupply", []),
+        ]
+        if autoMarketLPContract is not None:
+            # Auto Market total supply and the auto market's penpie balance
+            pool_calls += [
+                (autoMarketLPContract, "totalSupply", []),
+                (receiptcontract, "balanceOf", [autoMarketLPContract.address]),
+            ]
+        pool_values = [
+            result[0]
+            for result in multicall_by_address(
+                wb3, MULTICALL_ADDRESS_BY_CHAIN[self.chain], pool_calls, block
+            )
+        ]
+        sy_bal, lpt_bal, total_active_supply, penpeiepoolTotalSupply = pool_values[:4]
+        if sy_bal == 0 or lpt_bal == 0:
+            pool_state = None
+        elif total_active_supply == 0:
             print("total_active_supply is 0")
-            return 0
-
-        lockerSyBalance = round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4)
-        print(sy_bal / 10**18)
-        print(lpt_bal / 10**18)
-
-        if self.chain == Chain.ETHEREUM:
-            receiptcontract = w3.eth.contract(
-                address=w3.to_checksum_address(self.lp_contract), abi=erc20_abi
+            pool_state = None
+        else:
+            lockerSyBalance = round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4)
+            autoMarketTotalSupply, autoMarketpenpeiepoolBal = (
+                pool_values[4:] if autoMarketLPContract is not None else (0, 0)
             )
-        if self.chain == Chain.ARBITRUM:
-            receiptcontract = w3_arb.eth.contract(
-                address=w3_arb.to_checksum_address(self.lp_contract), abi=erc20_abi
+            pool_state = (
+                lockerSyBalance,
+                penpeiepoolTotalSupply,
+                autoMarketTotalSupply,
+                autoMarketpenpeiepoolBal,
             )
 
-        # Get gauge total supply
-        penpeiepoolTotalSupply = call_with_retry(
-            receiptcontract.functions.totalSupply(),
-            block,
-        )
-
-        # Get gauge user balance
-        userpenpeiepoolBal = call_with_retry(
-            receiptcontract.functions.balanceOf(user),
-            block,
-        )
-
+        if isinstance(block, int):
+            self.pool_state_by_block[block] = pool_state
+        return pool_state
+
+    def get_balances(self, users: List[str], block: int | str = "latest") -> Dict[str, float]:
+        pool_state = self.get_pool_state(block)
+        if pool_state is None:
+            return {user: 0 for user in users}
+        (
+            lockerSyBalance,
+            penpeiepoolTotalSupply,
+            autoMarketTotalSupply,
+            autoMarketpenpeiepoolBal,
+        ) = pool_state
+        wb3, receiptcontract, autoMarketLPContract = self.get_contracts()
+        multicall_address = MULTICALL_ADDRESS_BY_CHAIN[self.chain]
+
+        # Get gauge user balances
+        checksum_users = [wb3.to_checksum_address(user) for user in users]
+        userpenpeiepoolBals = [
+            result[0]
+            for result in multicall_by_address(
+                wb3,
+                multicall_address,
+                [(receiptcontract, "balanceOf", [user]) for user in checksum_users],
+                block,
+            )
+        ]
         # Get user share based on gauge#totalSupply / gauge#balanceOf(user) and lockerSyBalance
-        userShare = userpenpeiepoolBal * 100 / penpeiepoolTotalSupply
+        userShares = [
+            userpenpeiepoolBal * 100 / penpeiepoolTotalSupply
+            for userpenpeiepoolBal in userpenpeiepoolBals
+        ]
 
         #---------------------Calculations for penpie auto compound pool--------------------
 
-        if self.autoMarket_contract and self.autoMarket_contract != "0x0000000000000000000000000000000000000000":
-            assert self.autoMarket_contract is not None  # for mypy
-            if self.chain == Chain.ETHEREUM:
-                autoMarketLPContract = w3.eth.contract(
-                    address=w3.to_checksum_address(self.autoMarket_contract), abi=erc20_abi
-                )
-            if self.chain == Chain.ARBITRUM:
-                autoMarketLPContract = w3_arb.eth.contract(
-                    address=w3_arb.to_checksum_address(self.autoMarket_contract), abi=erc20_abi
-                )
-
-            # Get User's Auto Market Balance
-            userAutoMarketBal = call_with_retry(
-                autoMarketLPContract.functions.balanceOf(user),
-                block,
-            )
-            # Get Auto Market Total Supply
-            autoMarketTotalSupply = call_with_retry(
-                autoMarketLPContract.functions.totalSupply(),
-                block,
-            )
-            # Get Auto market's penpie balance
-            autoMarketpenpeiepoolBal = call_with_retry(
-                receiptcontract.functions.balanceOf(w3.to_checksum_address(self.autoMarket_contract)),
-                block,
-            )
-
+        if autoMarketLPContract is not None:
             # Get the share of the auto market in the penpie pool
             autoMarketShareInPenpiePool = autoMarketpenpeiepoolBal * 100 / penpeiepoolTotalSupply
 
+            # Get Users' Auto Market Balance
+            userAutoMarketBals = [
+                result[0]
+                for result in multicall_by_address(
+                    wb3,
+                    multicall_address,
+                    [(autoMarketLPContract, "balanceOf", [user]) for user in checksum_users],
+                    block,
+                )
+            ]
             # Get user share based on the share of the auto market in the penpie pool and the user's auto market balance
-            userShare = userShare + (autoMarketShareInPenpiePool * userAutoMarketBal / autoMarketTotalSupply)
+            userShares = [
+                userShare + (autoMarketShareInPenpiePool * userAutoMarketBal / autoMarketTotalSupply)
+                for userShare, userAutoMarketBal in zip(userShares, userAutoMarketBals)
+            ]
 
-        print(user, userShare * lpt_bal / 100)
-        return userShare * lockerSyBalance / 100
+        return {
+            user: userShare * lockerSyBalance / 100
+            for user, userShare in zip(users, userShares)
+        }
 
     def get_participants(self, blocks: list[int] | None) -> set[str]:
         if self.participants is not None:
@@ -194,65 +203,20 @@ class PENPIEIntegrationV2(Integration):
         return self.participants
 
     def get_penpie_participants(self):
-        all_users = set()
-        start = self.start_block
-
-        auto_market_addr = self.autoMarket_contract or "0x0000000000000000000000000000000000000000"
-        if self.chain == Chain.ETHEREUM:
-            contract = w3.eth.contract(
-                address=w3.to_checksum_address(self.lp_contract), abi=erc20_abi
-            )
-            contract_auto_market = w3.eth.contract(
-                address=w3.to_checksum_address(auto_market_addr), abi=erc20_abi
-            )
-        elif self.chain == Chain.ARBITRUM:
-            contract = w3_arb.eth.contract(
-                address=w3_arb.to_checksum_address(self.lp_contract), abi=erc20_abi
-            )
-            contract_auto_market = w3_arb.eth.contract(
-                address=w3_arb.to_checksum_address(auto_market_addr), abi=erc20_abi
-            )
-        else:
+        if self.chain not in (Chain.ETHEREUM, Chain.ARBITRUM):
             return set()
-        page_size = 1900
-        if self.chain == Chain.ETHEREUM:
-            target_block = w3.eth.get_block_number()
-        elif self.chain == Chain.ARBITRUM:
-            target_block = w3_arb.eth.get_block_number()
-        else:
-            return set()
-        while start < target_block:
-            to_block = min(start + page_size, target_block)
-            deposits = fetch_events_logs_with_retry(
-                f"Penpie users {self.lp_contract}",
-                contract.events.Transfer(),
-                start,
-                to_block,
+        wb3, receiptcontract, autoMarketLPContract = self.get_contracts()
+        all_users = get_event_participants(
+            f"Penpie users {self.lp_contract}",
+            receiptcontract.events.Transfer(),
+            "to",
+            self.start_block,
+        )
+        if autoMarketLPContract is not None:
+            all_users |= get_event_participants(
+                f"Penpie users {self.autoMarket_contract}",
+                autoMarketLPContract.events.Transfer(),
+                "to",
+                self.start_block,
             )
-            # print(start, to_block, len(deposits), "getting Stake DAO contract data")
-            for deposit in deposits:
-                if (
-                    deposit["args"]["to"]
-                    != "0x0000000000000000000000000000000000000000"
-                ):
-                    all_users.add(deposit["args"]["to"])
-                    print(deposit["args"]["to"])
-
-            if self.autoMarket_contract != "0x0000000000000000000000000000000000000000":
-                deposits_auto_market = fetch_events_logs_with_retry(
-                    f"Penpie users {self.lp_contract}",
-                    contract_auto_market.events.Transfer(),
-                    start,
-                    to_block,
-                )
-
-                for deposit_auto_market in deposits_auto_market:
-                    if (
-                        deposit_auto_market["args"]["to"]
-                        != "0x0000000000000000000000000000000000000000"
-                    ):
-                        all_users.add(deposit_auto_market["args"]["to"])
-                        print(deposit_auto_market["args"]["to"])
-            start += page_size
-
         return all_users
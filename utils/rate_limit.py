@@ -0,0 +1,139 @@
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import requests
+
+from constants.chains import Chain
+
+# Requests per second and requests in flight allowed per RPC endpoint. Override a chain with
+# <CHAIN>_RPC_RATE_LIMIT / <CHAIN>_RPC_MAX_IN_FLIGHT, e.g. ETHEREUM_RPC_RATE_LIMIT=50
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "25"))
+RPC_MAX_IN_FLIGHT = int(os.getenv("RPC_MAX_IN_FLIGHT", "16"))
+RPC_RATE_LIMIT_BY_CHAIN: Dict[Chain, float] = {
+    chain: float(os.environ[f"{chain.name}_RPC_RATE_LIMIT"])
+    for chain in Chain
+    if f"{chain.name}_RPC_RATE_LIMIT" in os.environ
+}
+RPC_MAX_IN_FLIGHT_BY_CHAIN: Dict[Chain, int] = {
+    chain: int(os.environ[f"{chain.name}_RPC_MAX_IN_FLIGHT"])
+    for chain in Chain
+    if f"{chain.name}_RPC_MAX_IN_FLIGHT" in os.environ
+}
+# How many times a throttled request is sent again before its response is handed back
+RPC_THROTTLE_RETRIES = int(os.getenv("RPC_THROTTLE_RETRIES", "8"))
+
+# Substrings of JSON-RPC error bodies that providers return with a 200 when throttling
+THROTTLE_MARKERS = (b"rate limit", b"too many requests", b"exceeded its throughput")
+
+
+class RateLimiter:
+    """Token bucket plus in-flight cap shared by every thread talking to one RPC endpoint.
+
+    Throttling responses halve the current rate and pause the whole endpoint, successful
+    requests then grow the rate back towards the configured one, so the limiter settles
+    just under the provider quota.
+    """
+
+    def __init__(self, rate: float, max_in_flight: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before sending, without blocking."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                max(self.rate, 1.0), self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def throttled(self, retry_after: Optional[float] = None, attempt: int = 0) -> float:
+        """Slow down after a throttling response, returns the pause before the next attempt."""
+        pause = retry_after if retry_after is not None else min(30.0, 2**attempt * 0.5)
+        pause *= 1 + random.random() * 0.25
+        with self.lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        return pause
+
+    def succeeded(self):
+        if self.rate < self.max_rate:
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self.in_flight:
+            wait = self.reserve()
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+RATE_LIMITER_BY_ENDPOINT: Dict[str, RateLimiter] = {}
+RATE_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter(endpoint_uri: str, chain: Optional[Chain] = None) -> RateLimiter:
+    """Limiter shared by every provider of `endpoint_uri`, the first chain registered sets its limits."""
+    with RATE_LIMITER_LOCK:
+        if endpoint_uri not in RATE_LIMITER_BY_ENDPOINT:
+            RATE_LIMITER_BY_ENDPOINT[endpoint_uri] = RateLimiter(
+                RPC_RATE_LIMIT_BY_CHAIN.get(chain, RPC_RATE_LIMIT) if chain else RPC_RATE_LIMIT,
+                RPC_MAX_IN_FLIGHT_BY_CHAIN.get(chain, RPC_MAX_IN_FLIGHT) if chain else RPC_MAX_IN_FLIGHT,
+            )
+        return RATE_LIMITER_BY_ENDPOINT[endpoint_uri]
+
+
+def is_throttled(response: requests.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    # JSON-RPC throttling errors are short, don't scan large result bodies
+    if len(response.content) > 1024:
+        return False
+    body = response.content.lower()
+    return any(marker in body for marker in THROTTLE_MARKERS)
+
+
+def get_retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class RateLimitedSession(requests.Session):
+    """requests.Session sending every request through the rate limiter of its endpoint.
+
+    Throttled requests are retried here with the provider's Retry-After (or an exponential
+    backoff), so callers only see the response once it went through or retries ran out.
+    """
+
+    def __init__(self, limiter: RateLimiter):
+        super().__init__()
+        self.limiter = limiter
+
+    def request(self, method, url, *args, **kwargs) -> requests.Response:  # type: ignore[override]
+        for attempt in range(RPC_THROTTLE_RETRIES + 1):
+            with self.limiter.slot():
+                response = super().request(method, url, *args, **kwargs)
+            if not is_throttled(response):
+                self.limiter.succeeded()
+                return response
+            if attempt < RPC_THROTTLE_RETRIES:
+                pause = self.limiter.throttled(get_retry_after(response), attempt)
+                logging.warning(f"RPC throttled, retrying in {pause:.1f}s")
+        return response
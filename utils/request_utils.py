@@ -8,6 +8,7 @@ def requests_retry_session(
     backoff_factor=0.3,
     status_forcelist=(400, 404, 500, 502, 504),
     session=None,
+    allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
 ):
     session = session or requests.Session()
     retry = Retry(
@@ -16,6 +17,7 @@ def requests_retry_session(
         connect=retries,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
+        allowed_methods=allowed_methods,
     )
     adapter = HTTPAdapter(max_retries=retry)
     session.mount("http://", adapter)
@@ -7,14 +7,11 @@ from integrations.integration import Integration
 from constants.summary_columns import SummaryColumn
 from integrations.integration_ids import IntegrationID
 from constants.chains import Chain
-import json
 import requests
 from utils.web3_utils import (
     w3_scroll,
 )
-
-with open("abi/r_token.json") as f:
-    r_token_abi = json.load(f)
+from utils.abi import get_contract
 
 
 class RhoMarkets(Integration):
@@ -34,8 +31,8 @@ class RhoMarkets(Integration):
         else:
             print("Failed to connect to Ethereum node")
 
-        r_usde_contract = w3_scroll.eth.contract(
-            address=RHO_MARKETS_SCROLL_RUSDE_ADDRESS, abi=r_token_abi
+        r_usde_contract = get_contract(
+            Chain.SCROLL, RHO_MARKETS_SCROLL_RUSDE_ADDRESS, "r_token.json"
         )
         balance = call_with_retry(r_usde_contract.functions.balanceOf(user), block)
 
@@ -1,8 +1,12 @@
-import json
 import logging
 from typing import Callable
 
-from utils.web3_utils import W3_BY_CHAIN, call_with_retry, fetch_events_logs_with_retry
+from utils.web3_utils import (
+    W3_BY_CHAIN,
+    call_with_retry,
+    fetch_events_logs_with_retry,
+    lazy_contract,
+)
 from web3.contract import Contract
 from functools import partial
 from constants.chains import Chain
@@ -19,6 +23,7 @@ from constants.splice import (
     SUSDE_LPT,
     SUSDE_DEPLOYMENT_BLOCK,
 )
+from utils.abi import get_contract, load_abi
 
 w3 = W3_BY_CHAIN[Chain.MODE]["w3"]
 
@@ -27,20 +32,18 @@ w3 = W3_BY_CHAIN[Chain.MODE]["w3"]
 # Contracts
 ########################################################################
 
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
+erc20_abi = load_abi("ERC20_abi.json")
 
-with open("abi/pendle_lpt.json") as f:
-    lpt_abi = json.load(f)
+lpt_abi = load_abi("pendle_lpt.json")
 
 
-usde_sy_contract = w3.eth.contract(address=USDE_SY, abi=erc20_abi)
-usde_yt_contract = w3.eth.contract(address=USDE_YT, abi=erc20_abi)
-usde_lpt_contract = w3.eth.contract(address=USDE_LPT, abi=lpt_abi)
+usde_sy_contract = lazy_contract(w3, address=USDE_SY, abi=erc20_abi)
+usde_yt_contract = lazy_contract(w3, address=USDE_YT, abi=erc20_abi)
+usde_lpt_contract = lazy_contract(w3, address=USDE_LPT, abi=lpt_abi)
 
-susde_sy_contract = w3.eth.contract(address=SUSDE_SY, abi=erc20_abi)
-susde_yt_contract = w3.eth.contract(address=SUSDE_YT, abi=erc20_abi)
-susde_lpt_contract = w3.eth.contract(address=SUSDE_LPT, abi=lpt_abi)
+susde_sy_contract = lazy_contract(w3, address=SUSDE_SY, abi=erc20_abi)
+susde_yt_contract = lazy_contract(w3, address=SUSDE_YT, abi=erc20_abi)
+susde_lpt_contract = lazy_contract(w3, address=SUSDE_LPT, abi=lpt_abi)
 
 
 ########################################################################
@@ -96,7 +99,7 @@ def get_splice_participants_v3(token_addresses, start: int):
 
     for i in range(len(token_addresses)):
         token = token_addresses[i]
-        contract = w3.eth.contract(address=token, abi=erc20_abi)
+        contract = get_contract(Chain.MODE, token, "ERC20_abi.json")
 
         while start < target_block:
             to_block = min(start + page_size, target_block)
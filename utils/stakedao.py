@@ -3,22 +3,14 @@ from integrations.integration_ids import IntegrationID
 from integrations.integration import Integration
 from constants.stakedao import PENDLE_LOCKER
 import logging
-import json
+from utils.participant_index import get_event_participants
 from utils.web3_utils import (
-    fetch_events_logs_with_retry,
     call_with_retry,
-    w3,
 )
-from typing import Optional, Set
+from typing import Dict, Optional, Set
 from eth_typing import ChecksumAddress
 from web3 import Web3
-
-with open("abi/stakedao_vault.json") as f:
-    vault_abi = json.load(f)
-with open("abi/pendle_lpt.json") as f:
-    lpt_abi = json.load(f)
-with open("abi/ERC20_abi.json") as f:
-    erc20_abi = json.load(f)
+from utils.abi import get_contract
 
 
 class StakeDAOIntegration(Integration):
@@ -43,11 +35,19 @@ class StakeDAOIntegration(Integration):
             excluded_addresses=excluded_addresses,
         )
         self.lp_contract = Web3.to_checksum_address(lp_contract)
+        self.pool_state_by_block: Dict[int, Optional[tuple]] = {}
 
-    def get_balance(self, user: str, block: int) -> float:
+    def get_pool_state(self, block: int) -> Optional[tuple]:
+        """Pool wide values at `block`, read once per block for all users.
+
+        Returns (lockerSyBalance, gauge address, gauge total supply), or None when the Stake DAO
+        locker holds nothing in the Pendle pool.
+        """
+        if isinstance(block, int) and block in self.pool_state_by_block:
+            return self.pool_state_by_block[block]
 
-        stakeDAOVaultContract = w3.eth.contract(
-            address=w3.to_checksum_address(self.lp_contract), abi=vault_abi
+        stakeDAOVaultContract = get_contract(
+            Chain.ETHEREUM, self.lp_contract, "stakedao_vault.json"
         )
 
         # Get lpt token address from Stake DAO vault
@@ -56,7 +56,7 @@ class StakeDAOIntegration(Integration):
             block,
         )
 
-        lptContract = w3.eth.contract(address=pendlePoolAddress, abi=lpt_abi)
+        lptContract = get_contract(Chain.ETHEREUM, pendlePoolAddress, "pendle_lpt.json")
 
         # Get SY address
         tokens = call_with_retry(
@@ -65,47 +65,68 @@ class StakeDAOIntegration(Integration):
         )
 
         sy = tokens[0]
-        sy_contract = w3.eth.contract(address=sy, abi=erc20_abi)
+        sy_contract = get_contract(Chain.ETHEREUM, sy, "ERC20_abi.json")
 
         # Get SY balance in the Pendle pool
         sy_bal = call_with_retry(
             sy_contract.functions.balanceOf(pendlePoolAddress),
             block,
         )
-        if sy_bal == 0:
-            return 0
-
         # Get Stake DAO lpt balance
-        lpt_bal = call_with_retry(
-            lptContract.functions.activeBalance(PENDLE_LOCKER),
-            block,
+        lpt_bal = (
+            call_with_retry(
+                lptContract.functions.activeBalance(PENDLE_LOCKER),
+                block,
+            )
+            if sy_bal != 0
+            else 0
         )
-        if lpt_bal == 0:
-            return 0
-
         # Get LPT total supply
-        total_active_supply = call_with_retry(
-            lptContract.functions.totalActiveSupply(),
-            block,
+        total_active_supply = (
+            call_with_retry(
+                lptContract.functions.totalActiveSupply(),
+                block,
+            )
+            if lpt_bal != 0
+            else 0
         )
-        if total_active_supply == 0:
+
+        if sy_bal == 0 or lpt_bal == 0:
+            pool_state = None
+        elif total_active_supply == 0:
             print("total_active_supply is 0")
-            return 0
+            pool_state = None
+        else:
+            lockerSyBalance = round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4)
+
+            # Get stake dao liquidity gauge
+            sdGaugeAddress = call_with_retry(
+                stakeDAOVaultContract.functions.liquidityGauge(),
+                block,
+            )
 
-        lockerSyBalance = round(((sy_bal / 10**18) * lpt_bal) / total_active_supply, 4)
+            sd_gauge_contract = get_contract(
+                Chain.ETHEREUM, sdGaugeAddress, "ERC20_abi.json"
+            )
 
-        # Get stake dao liquidity gauge
-        sdGaugeAddress = call_with_retry(
-            stakeDAOVaultContract.functions.liquidityGauge(),
-            block,
-        )
+            # Get gauge total suply
+            sdGaugeTotalSupply = call_with_retry(
+                sd_gauge_contract.functions.totalSupply(),
+                block,
+            )
+            pool_state = (lockerSyBalance, sdGaugeAddress, sdGaugeTotalSupply)
 
-        sd_gauge_contract = w3.eth.contract(address=sdGaugeAddress, abi=erc20_abi)
+        if isinstance(block, int):
+            self.pool_state_by_block[block] = pool_state
+        return pool_state
 
-        # Get gauge total suply
-        sdGaugeTotalSupply = call_with_retry(
-            sd_gauge_contract.functions.totalSupply(),
-            block,
+    def get_balance(self, user: str, block: int) -> float:
+        pool_state = self.get_pool_state(block)
+        if pool_state is None:
+            return 0
+        lockerSyBalance, sdGaugeAddress, sdGaugeTotalSupply = pool_state
+        sd_gauge_contract = get_contract(
+            Chain.ETHEREUM, sdGaugeAddress, "ERC20_abi.json"
         )
 
         # Get gauge user balance
@@ -132,23 +153,10 @@ class StakeDAOIntegration(Integration):
         return self.participants
 
     def get_stakedao_participants(self):
-        all_users = set()
-
-        start = self.start_block
-        contract = w3.eth.contract(address=self.lp_contract, abi=vault_abi)
-        page_size = 1900
-        target_block = w3.eth.get_block_number()
-        while start < target_block:
-            to_block = min(start + page_size, target_block)
-            deposits = fetch_events_logs_with_retry(
-                f"Stake DAO users {self.lp_contract}",
-                contract.events.Deposit(),
-                start,
-                to_block,
-            )
-            print(start, to_block, len(list(deposits)), "getting Stake DAO contract data")
-            for deposit in deposits:
-                all_users.add(deposit["args"]["_depositor"])
-            start += page_size
-
-        return all_users
+        contract = get_contract(Chain.ETHEREUM, self.lp_contract, "stakedao_vault.json")
+        return get_event_participants(
+            f"Stake DAO users {self.lp_contract}",
+            contract.events.Deposit(),
+            "_depositor",
+            self.start_block,
+        )
@@ -0,0 +1,36 @@
+from typing import Dict, List
+
+from web3 import Web3
+from web3.contract import Contract
+
+from utils.web3_utils import MULTICALL_ADDRESS, multicall_by_address_at_blocks
+
+
+def prefetch_tranche_pps(
+    w3: Web3,
+    contract_tranche: Contract,
+    contract_susde: Contract,
+    pps_cache: Dict[int, float],
+    blocks: List[int],
+):
+    """
+    Fill `pps_cache` with the tranche price per share (in sUSDe) of every missing block: the
+    totalAssets/totalSupply reads of every block are sent as JSON-RPC batches instead of four
+    calls per block.
+    """
+    missing_blocks = [block for block in blocks if block not in pps_cache]
+    if not missing_blocks:
+        return
+
+    calls = [
+        (contract_tranche, "totalAssets", []),
+        (contract_tranche, "totalSupply", []),
+        (contract_susde, "totalAssets", []),
+        (contract_susde, "totalSupply", []),
+    ]
+    results = multicall_by_address_at_blocks(w3, MULTICALL_ADDRESS, calls, missing_blocks)
+    for block, result in results.items():
+        (tranche_assets,), (tranche_supply,), (susde_assets,), (susde_supply,) = result
+        pps_tranche_in_usde = float(tranche_assets) / float(tranche_supply)
+        pps_susde_in_usde = float(susde_assets) / float(susde_supply)
+        pps_cache[block] = pps_tranche_in_usde / pps_susde_in_usde
@@ -0,0 +1,118 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from utils.request_utils import requests_retry_session
+
+# The Graph caps `first` at 1000
+SUBGRAPH_PAGE_SIZE = 1000
+SUBGRAPH_TIMEOUT = 60
+# Blocks queried at the same time by paginate_subgraph_at_blocks
+SUBGRAPH_MAX_WORKERS = 8
+
+SESSION = None
+SESSION_LOCK = threading.Lock()
+
+
+def get_session():
+    """Pooled session shared by every subgraph query, retrying rate limits and server errors.
+
+    Failures that outlast the retries are raised, callers must not turn them into partial
+    results.
+    """
+    global SESSION  # pylint: disable=global-statement
+    with SESSION_LOCK:
+        if SESSION is None:
+            SESSION = requests_retry_session(
+                retries=5,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                # GraphQL queries are POSTs, which urllib3 does not retry by default
+                allowed_methods=None,
+            )
+        return SESSION
+
+
+def query_subgraph(
+    url: str,
+    query: str,
+    variables: Optional[dict] = None,
+    headers: Optional[dict] = None,
+) -> dict:
+    """Run a GraphQL query and return its data, raising when the subgraph reports errors."""
+    response = get_session().post(
+        url,
+        json={"query": query, "variables": variables or {}},
+        headers=headers,
+        timeout=SUBGRAPH_TIMEOUT,
+    )
+    if response.status_code != 200:
+        raise Exception(f"Query failed with status code {response.status_code}: {response.text}")
+    response_json = response.json()
+    if response_json.get("errors") or "data" not in response_json:
+        raise Exception(f"Query failed with response: {response_json}")
+    return response_json["data"]
+
+
+def paginate_subgraph(
+    url: str,
+    query: str,
+    entity: str,
+    variables: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    page_size: int = SUBGRAPH_PAGE_SIZE,
+) -> Iterator[dict]:
+    """Stream every `entity` row of `query`, one page at a time.
+
+    Pages are walked with an id cursor rather than `skip`, which The Graph resolves in time
+    linear to the offset. The query takes `$first: Int!` and `$lastId: String!` variables and
+    must select `id`, order by it and filter on `id_gt: $lastId`, e.g.
+
+        query Accounts($first: Int!, $lastId: String!) {
+            accounts(first: $first, where: {id_gt: $lastId}, orderBy: id, orderDirection: asc) {
+                id
+            }
+        }
+    """
+    last_id = ""
+    while True:
+        rows = query_subgraph(
+            url,
+            query,
+            {**(variables or {}), "first": page_size, "lastId": last_id},
+            headers,
+        )[entity]
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def paginate_subgraph_at_blocks(
+    url: str,
+    query: str,
+    entity: str,
+    blocks: List[int],
+    variables: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    page_size: int = SUBGRAPH_PAGE_SIZE,
+    max_workers: int = SUBGRAPH_MAX_WORKERS,
+) -> Dict[int, List[dict]]:
+    """Every `entity` row of a block pinned `query` at each block, blocks fetched concurrently.
+
+    Same as paginate_subgraph, the query also takes a `$block: Int!` variable used in
+    `block: {number: $block}`. A failing block raises with its number.
+    """
+
+    def fetch(block: int) -> List[dict]:
+        try:
+            return list(
+                paginate_subgraph(
+                    url, query, entity, {**(variables or {}), "block": block}, headers, page_size
+                )
+            )
+        except Exception as e:
+            raise Exception(f"Subgraph query of {entity} at block {block} failed: {e}") from e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(blocks, executor.map(fetch, blocks)))
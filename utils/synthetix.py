@@ -1,23 +1,24 @@
 import os
-import json
 from dotenv import load_dotenv
 from utils.web3_utils import (
     w3_arb,
+    lazy_contract,
 )
 
 from constants.synthetix import SYNTHETIX_ARB_CORE_PROXY_ADDRESS, SYNTHETIX_ARB_CORE_ACCOUNT_PROXY_ADDRESS
+from utils.abi import load_abi
 
-with open("abi/synthetix_core_proxy.json") as f:
-    core_proxy_abi = json.load(f)
+core_proxy_abi = load_abi("synthetix_core_proxy.json")
 
-with open("abi/synthetix_core_account_proxy.json") as f:
-    core_account_proxy_abi = json.load(f)
+core_account_proxy_abi = load_abi("synthetix_core_account_proxy.json")
 
 
-core_proxy_contract = w3_arb.eth.contract(
+core_proxy_contract = lazy_contract(
+    w3_arb,
     address=SYNTHETIX_ARB_CORE_PROXY_ADDRESS, abi=core_proxy_abi
 )
 
-core_account_proxy_contract = w3_arb.eth.contract(
+core_account_proxy_contract = lazy_contract(
+    w3_arb,
     address=SYNTHETIX_ARB_CORE_ACCOUNT_PROXY_ADDRESS, abi=core_account_proxy_abi
 )
@@ -1,5 +1,4 @@
-import math
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set
 
 from eth_typing import ChecksumAddress
 from web3 import Web3
@@ -19,6 +18,7 @@ from constants.thruster import (
 )
 from constants.thruster import thruster_nfp_contract, thruster_usde_pool_contract
 from constants.chains import Chain
+from utils.concentrated_liquidity import get_amounts_for_positions, get_nfp_positions
 
 # Pagination size for fetching events
 PAGINATION_SIZE = 2000
@@ -113,52 +113,38 @@ def get_thruster_users(
     return users
 
 
-def get_pool_price(
-    contract, block=None
-):  # assumes both tokens are using same number of decimals
+def get_pool_sqrt_price_x96(contract, block=None) -> int:
     if block is None:
         block = w3_blast.eth.get_block_number() - 100
-    return (int(call_with_retry(contract.functions.slot0(), block)[0]) / (2**96)) ** 2
+    return int(call_with_retry(contract.functions.slot0(), block)[0])
 
 
-def get_pool_tick(contract, block=None):
-    if block is None:
-        block = w3_blast.eth.get_block_number() - 100
-    return math.log(
-        ((call_with_retry(contract.functions.slot0(), block)[0]) / (2**96)) ** 2
-    ) / math.log(1.0001)
+def get_thruster_positions_balances(
+    token_ids, block, sqrt_price_x96
+) -> Dict[int, List[float]]:
+    """[token0, token1] amounts of each position, read in one multicall and valued in one pass.
 
-
-def get_thrusters_position_balance(token_id, block, tick, sqrt_price):
-    try:
-        [_, _, _, _, _, tick_lower, tick_upper, liquidity, _, _, _, _] = (
-            call_with_retry(thruster_nfp_contract.functions.positions(token_id), block)
-        )
-    except Exception:
-        print(f"token {token_id} not yet created at block {block}")
-        return [0, 0]
-    return calculate_thruster_tokens(
-        tick, tick_lower, tick_upper, sqrt_price, liquidity
+    Positions not yet created at `block` are left out.
+    """
+    positions = get_nfp_positions(
+        w3_blast,
+        MULTICALL_ADDRESS_BY_CHAIN[Chain.BLAST],
+        thruster_nfp_contract,
+        token_ids,
+        block,
     )
-
-
-def calculate_thruster_tokens(tick, tick_lower, tick_upper, sqrt_price, liquidity):
-    if liquidity == 0:
-        return [0, 0]
-    if abs(tick_lower) > MAX_TICK_RANGE or abs(tick_upper) > MAX_TICK_RANGE:
-        return [0, 0]
-    t0 = 0
-    t1 = 0
-    sqrt_ratio_l = math.sqrt(1.0001**tick_lower)
-    sqrt_ratio_u = math.sqrt(1.0001**tick_upper)
-    if tick_lower < tick < tick_upper:
-        t0 = liquidity * (sqrt_ratio_u - sqrt_price) / (sqrt_price * sqrt_ratio_u)
-        t1 = liquidity * (sqrt_price - sqrt_ratio_l)
-    elif tick >= tick_upper:
-        t1 = liquidity * (sqrt_ratio_u - sqrt_ratio_l)
-    else:
-        t0 = liquidity * (sqrt_ratio_u - sqrt_ratio_l) / (sqrt_ratio_u * sqrt_ratio_l)
-    return [abs(t0 / 10**18), abs(t1 / 10**18)]
+    ranges = {
+        token_id: (position[5], position[6], position[7])
+        for token_id, position in positions.items()
+        if position is not None
+        and abs(position[5]) <= MAX_TICK_RANGE
+        and abs(position[6]) <= MAX_TICK_RANGE
+    }
+    amounts = get_amounts_for_positions(sqrt_price_x96, list(ranges.values()))
+    return {
+        token_id: [t0 / 10**18, t1 / 10**18]
+        for token_id, (t0, t1) in zip(ranges, amounts)
+    }
 
 
 def get_thruster_all_user_balance(pool, block: Optional[int] = None):
@@ -168,9 +154,13 @@ def get_thruster_all_user_balance(pool, block: Optional[int] = None):
         return {}
 
     contract = thruster_usde_pool_contract
-    sqrt_price = math.sqrt(get_pool_price(contract, block))
-    tick = get_pool_tick(contract, block)
+    sqrt_price_x96 = get_pool_sqrt_price_x96(contract, block)
     users = get_thruster_users(pool, block)
+    balances_by_token_id = get_thruster_positions_balances(
+        [token_id for token_ids in users.values() for token_id in token_ids],
+        block,
+        sqrt_price_x96,
+    )
     all_user_total_balances = {}
 
     for user in users:
@@ -178,7 +168,7 @@ def get_thruster_all_user_balance(pool, block: Optional[int] = None):
         user_t0_balances = 0
         user_t1_balances = 0
         for token_id in token_ids:
-            [t0, t1] = get_thrusters_position_balance(token_id, block, tick, sqrt_price)
+            [t0, t1] = balances_by_token_id.get(token_id, [0, 0])
             user_t0_balances += t0
             user_t1_balances += t1
         all_user_total_balances[user] = round(user_t0_balances + user_t1_balances, 2)
@@ -0,0 +1,132 @@
+import atexit
+import itertools
+import json
+import logging
+import os
+import subprocess
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+# Warm ts-node processes kept per Python process, each one runs many requests concurrently
+TS_WORKER_POOL_SIZE = int(os.getenv("TS_WORKER_POOL_SIZE", "2"))
+TS_WORKER_LOCATION = os.path.join(os.path.dirname(__file__), "..", "ts", "worker.ts")
+
+
+class TsWorker:
+    """One long-lived `ts-node ts/worker.ts` process speaking line-delimited JSON.
+
+    Requests are written to stdin as {"id", "script", "args"}, the worker answers each one
+    with {"id", "result"} or {"id", "error"} on stdout, possibly out of order.
+    """
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ["ts-node", TS_WORKER_LOCATION],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=os.environ.copy(),
+        )
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.pending: Dict[int, Future] = {}
+        self.reader = threading.Thread(target=self.read_responses, daemon=True)
+        self.reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def submit(self, script: str, args: List[str]) -> Future:
+        future: Future = Future()
+        with self.lock:
+            request_id = next(self.ids)
+            self.pending[request_id] = future
+            try:
+                assert self.process.stdin is not None
+                self.process.stdin.write(
+                    json.dumps({"id": request_id, "script": script, "args": args}) + "\n"
+                )
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self.pending.pop(request_id)
+                future.set_exception(RuntimeError(f"TypeScript worker is not running: {e}"))
+        return future
+
+    def read_responses(self):
+        assert self.process.stdout is not None
+        for line in self.process.stdout:
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Unexpected TypeScript worker output: {line.strip()}")
+                continue
+            with self.lock:
+                future = self.pending.pop(response.get("id"), None)
+            if future is None:
+                continue
+            if "error" in response:
+                future.set_exception(RuntimeError(response["error"]))
+            else:
+                future.set_result(response.get("result"))
+
+        # the process exited, fail whatever it was still working on
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(
+                RuntimeError(f"TypeScript worker exited with code {self.process.wait()}")
+            )
+
+    def close(self):
+        if self.alive and self.process.stdin is not None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class TsWorkerPool:
+    """Dispatches TypeScript script runs to a few warm workers, replacing dead ones."""
+
+    def __init__(self, size: int = TS_WORKER_POOL_SIZE):
+        self.size = size
+        self.workers: List[TsWorker] = []
+        self.lock = threading.Lock()
+
+    def get_worker(self) -> TsWorker:
+        with self.lock:
+            self.workers = [worker for worker in self.workers if worker.alive]
+            if len(self.workers) < self.size:
+                self.workers.append(TsWorker())
+            # least busy worker
+            return min(self.workers, key=lambda worker: len(worker.pending))
+
+    def submit(self, script: str, args: List[Any]) -> Future:
+        """Run the `run(args)` export of ts/<script>.ts, the future resolves to its result."""
+        return self.get_worker().submit(script, [str(arg) for arg in args])
+
+    def run(self, script: str, args: List[Any], timeout: Optional[float] = None) -> Any:
+        return self.submit(script, args).result(timeout=timeout)
+
+    def close(self):
+        with self.lock:
+            for worker in self.workers:
+                worker.close()
+            self.workers = []
+
+
+TS_WORKER_POOL: Optional[TsWorkerPool] = None
+TS_WORKER_POOL_LOCK = threading.Lock()
+
+
+def get_ts_worker_pool() -> TsWorkerPool:
+    global TS_WORKER_POOL  # pylint: disable=global-statement
+    with TS_WORKER_POOL_LOCK:
+        if TS_WORKER_POOL is None:
+            TS_WORKER_POOL = TsWorkerPool()
+            atexit.register(TS_WORKER_POOL.close)
+        return TS_WORKER_POOL
@@ -1,23 +1,22 @@
-import json
 from utils.web3_utils import (
     w3_mode,
     fetch_events_logs_with_retry,
     call_with_retry,
+    lazy_contract,
 )
 from web3 import Web3
+from constants.chains import Chain
 from constants.velodrome import (
     VELODROME_MODE_SUGAR_ADDRESS,
     PAGE_SIZE,
     VELODROME_MODE_START_BLOCK,
 )
+from utils.abi import get_contract, load_abi
 
-with open("abi/velodrome_sugar.json") as f:
-    sugar_abi = json.load(f)
+sugar_abi = load_abi("velodrome_sugar.json")
 
-with open("abi/velodrome_pool.json") as f:
-    pool_abi = json.load(f)
-
-sugar_contract = w3_mode.eth.contract(
+sugar_contract = lazy_contract(
+    w3_mode,
     address=Web3.to_checksum_address(VELODROME_MODE_SUGAR_ADDRESS),
     abi=sugar_abi,
 )
@@ -55,7 +54,7 @@ def fetch_participants(token):
             pool_addresses.append(pool_data[0])
 
     for pool in pool_addresses:
-        pool_contract = w3_mode.eth.contract(address=pool, abi=pool_abi)
+        pool_contract = get_contract(Chain.MODE, pool, "velodrome_pool.json")
 
         lps = fetch_events_logs_with_retry(
             f"Velodrome Mode users from {VELODROME_MODE_START_BLOCK} to {latest_block}",
@@ -1,49 +1,94 @@
 import logging
 import os
+import re
+import threading
 import time
+from bisect import bisect_right, insort
 from datetime import datetime
+from functools import lru_cache
 import traceback
-from typing import Iterable, List, Tuple, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
 
 from dotenv import load_dotenv
 from eth_abi.abi import decode
+from eth_abi.decoding import ContextFramesBytesIO
+from eth_abi.registry import registry as abi_registry
+from requests.adapters import HTTPAdapter
 
-from eth_typing import ChecksumAddress
-from web3 import Web3
-from web3.types import BlockIdentifier, EventData
+from eth_typing import ChecksumAddress, HexStr
+from eth_utils import get_abi_output_types
+from hexbytes import HexBytes
+from web3 import HTTPProvider, Web3
+from web3.contract import Contract
+from web3.types import BlockIdentifier, EventData, FilterParams
 
+from utils.lazy import Lazy
+from utils.log_cache import (
+    LOG_CACHE_CONFIRMATIONS,
+    get_chain_id,
+    get_head_block,
+    get_log_cache,
+    get_logs_cached,
+    get_logs_cached_by_key,
+    get_multi_events_cache_key,
+)
+from utils.rate_limit import RateLimitedSession, get_rate_limiter
 from utils.slack import slack_message
 from constants.chains import Chain
 
 load_dotenv()
+
+# Keep-alive connections kept per RPC endpoint, so threads sharing a provider do not reconnect
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "16"))
+
+
+def pooled_http_provider(endpoint_uri: str | None, chain: Chain | None = None) -> HTTPProvider:
+    """HTTPProvider with a keep-alive connection pool, rate limited with the limits of `chain`."""
+    session = RateLimitedSession(get_rate_limiter(endpoint_uri or "", chain))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RPC_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return HTTPProvider(endpoint_uri, session=session)
+
+
+def lazy_web3(endpoint_uri: str | None, chain: Chain | None = None) -> Web3:
+    """Web3 of `endpoint_uri`, only built when first used."""
+    return Lazy(lambda: Web3(pooled_http_provider(endpoint_uri, chain)))  # type: ignore[return-value]
+
+
+def lazy_contract(wb3: Web3, address: str, abi) -> Contract:
+    """Contract only built when first used, for contracts declared at module level."""
+    return Lazy(lambda: wb3.eth.contract(address=address, abi=abi))  # type: ignore[return-value]
+
+
 ETH_NODE_URL = os.getenv("ETH_NODE_URL")
-w3 = Web3(Web3.HTTPProvider(ETH_NODE_URL))
+w3 = lazy_web3(ETH_NODE_URL, Chain.ETHEREUM)
 ARBITRUM_NODE_URL = os.getenv("ARBITRUM_NODE_URL")
-w3_arb = Web3(Web3.HTTPProvider(ARBITRUM_NODE_URL))
+w3_arb = lazy_web3(ARBITRUM_NODE_URL, Chain.ARBITRUM)
 MANTLE_NODE_URL = os.getenv("MANTLE_NODE_URL")
-w3_mantle = Web3(Web3.HTTPProvider(MANTLE_NODE_URL))
+w3_mantle = lazy_web3(MANTLE_NODE_URL, Chain.MANTLE)
 BLAST_NODE_URL = os.getenv("BLAST_NODE_URL")
-w3_blast = Web3(Web3.HTTPProvider(BLAST_NODE_URL))
+w3_blast = lazy_web3(BLAST_NODE_URL, Chain.BLAST)
 SCROLL_NODE_URL = os.getenv("SCROLL_NODE_URL")
-w3_scroll = Web3(Web3.HTTPProvider(SCROLL_NODE_URL))
+w3_scroll = lazy_web3(SCROLL_NODE_URL, Chain.SCROLL)
 MODE_NODE_URL = os.getenv("MODE_NODE_URL")
-w3_mode = Web3(Web3.HTTPProvider(MODE_NODE_URL))
+w3_mode = lazy_web3(MODE_NODE_URL, Chain.MODE)
 FRAXTAL_NODE_URL = os.getenv("FRAXTAL_NODE_URL")
-w3_fraxtal = Web3(Web3.HTTPProvider(FRAXTAL_NODE_URL))
+w3_fraxtal = lazy_web3(FRAXTAL_NODE_URL, Chain.FRAXTAL)
 LYRA_NODE_URL = os.getenv("LYRA_NODE_URL")
-w3_lyra = Web3(Web3.HTTPProvider(LYRA_NODE_URL))
+w3_lyra = lazy_web3(LYRA_NODE_URL, Chain.LYRA)
 SWELL_NODE_URL = os.getenv("SWELL_NODE_URL")
-w3_swell = Web3(Web3.HTTPProvider(SWELL_NODE_URL))
+w3_swell = lazy_web3(SWELL_NODE_URL, Chain.SWELL)
 BASE_NODE_URL = os.getenv("BASE_NODE_URL")
-w3_base = Web3(Web3.HTTPProvider(BASE_NODE_URL))
+w3_base = lazy_web3(BASE_NODE_URL, Chain.BASE)
 SEPOLIA_NODE_URL = os.getenv("SEPOLIA_NODE_URL")
-w3_sepolia = Web3(Web3.HTTPProvider(SEPOLIA_NODE_URL))
+w3_sepolia = lazy_web3(SEPOLIA_NODE_URL, Chain.SEPOLIA)
 HYPEREVM_NODE_URL = os.getenv("HYPEREVM_NODE_URL")
-w3_hyperevm = Web3(Web3.HTTPProvider(HYPEREVM_NODE_URL))
+w3_hyperevm = lazy_web3(HYPEREVM_NODE_URL, Chain.HYPEREVM)
 PLASMA_NODE_URL = os.getenv("PLASMA_NODE_URL")
-w3_plasma = Web3(Web3.HTTPProvider(PLASMA_NODE_URL))
+w3_plasma = lazy_web3(PLASMA_NODE_URL, Chain.PLASMA)
 BERACHAIN_NODE_URL = os.getenv("BERACHAIN_NODE_URL")
-w3_berachain = Web3(Web3.HTTPProvider(BERACHAIN_NODE_URL))
+w3_berachain = lazy_web3(BERACHAIN_NODE_URL, Chain.BERACHAIN)
 
 W3_BY_CHAIN = {
     Chain.ETHEREUM: {
@@ -154,8 +199,13 @@ MULTICALL_ADDRESS_BY_CHAIN = {
     Chain.SWELL: "0xcA11bde05977b3631167028862bE2a173976CA11",
     Chain.SEPOLIA: "0x25Eef291876194AeFAd0D60Dff89e268b90754Bb",
     Chain.ETHEREUM: MULTICALL_ADDRESS,
+    Chain.ARBITRUM: MULTICALL_ADDRESS,
+    Chain.PLASMA: MULTICALL_ADDRESS,
+    Chain.MANTLE: MULTICALL_ADDRESS,
+    Chain.SCROLL: MULTICALL_ADDRESS,
     Chain.HYPEREVM: "0xcA11bde05977b3631167028862bE2a173976CA11",
     Chain.BLAST: Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11"),
+    Chain.BASE: MULTICALL_ADDRESS,
 }
 
 
@@ -169,25 +219,252 @@ def fetch_events_logs_with_retry(
     # pylint: disable=redefined-builtin
     filter: dict | None = None,
 ) -> Iterable[EventData]:
-    for attempt in range(retries):
-        try:
-            if filter is None:
-                return contract_event.get_logs(fromBlock=from_block, toBlock=to_block)
-            else:
-                return contract_event.get_logs(
-                    fromBlock=from_block, toBlock=to_block, argument_filters=filter
-                )
+    """Fetch the logs of `contract_event`, finalized blocks are served from the local log cache."""
+
+    def fetch(start: int, end: int | str) -> Iterable[EventData]:
+        for attempt in range(retries):
+            try:
+                if filter is None:
+                    return contract_event.get_logs(from_block=start, to_block=end)
+                else:
+                    return contract_event.get_logs(
+                        from_block=start, to_block=end, argument_filters=filter
+                    )
+
+            except Exception as e:
+                if attempt < retries - 1:
+                    time.sleep(delay)
+                    continue
+                else:
+                    msg = f"Error getting events logs for {label}: {e}, {traceback.format_exc()}"
+                    logging.error(msg)
+                    slack_message(msg)
+                    raise e
+        return []
+
+    return list(get_logs_cached(contract_event, from_block, to_block, filter, fetch))
+
+
+# Substrings of the provider errors rejecting an eth_getLogs for its block range or result
+# count. Timeouts and rate limits are not among them, they are retried with the same range.
+LOG_RANGE_ERROR_MARKERS = (
+    "query returned more than",  # Infura, Geth based nodes
+    "block range",  # "block range is too wide", "block range too large", ...
+    "exceed maximum block range",
+    "response size exceeded",  # Alchemy
+    "is limited to a",  # QuickNode "eth_getLogs is limited to a 10,000 range"
+    "requested too many blocks",
+    "-32005",
+)
+# Rate limit errors, some providers also report them with the -32005 code
+LOG_RATE_LIMIT_MARKERS = ("rate limit", "rate exceeded", "request count exceeded", "too many requests", "429")
+# Last block range that succeeded per (endpoint, address, event), reused as the next starting range.
+# Multi event queries use (endpoint, addresses, topics).
+LOG_RANGE_BY_EVENT: Dict[Tuple[str, str, str], int] = {}
+
+
+def get_endpoint(wb3: Web3) -> str:
+    return str(getattr(wb3.provider, "endpoint_uri", "") or "")
+
+
+def is_log_range_error(e: Exception) -> bool:
+    message = str(e).lower()
+    if any(marker in message for marker in LOG_RATE_LIMIT_MARKERS):
+        return False
+    return any(marker in message for marker in LOG_RANGE_ERROR_MARKERS)
+
+
+def fetch_events_logs_in_range(
+    label: str,
+    contract_event,
+    from_block: int,
+    to_block: int | str = "latest",
+    # pylint: disable=redefined-builtin
+    filter: dict | None = None,
+    initial_range: int = 2000,
+    max_range: int = 500_000,
+    target_logs: int = 2000,
+    retries: int = 3,
+    delay: int = 2,
+) -> Iterator[EventData]:
+    """Yield all logs of `contract_event` in [from_block, to_block] in the fewest eth_getLogs calls.
+
+    The block range doubles while responses stay under `target_logs` and is halved (and capped
+    there) whenever the provider rejects a request for returning too many results or spanning
+    too many blocks.
+    The last range that worked is remembered per endpoint and event for the next scan.
+    Finalized blocks are served from the local log cache, only the missing ranges are scanned.
+    """
+    if not isinstance(to_block, int):
+        to_block = contract_event.w3.eth.get_block_number()
+
+    def fetch(start: int, end: int) -> Iterator[EventData]:
+        return scan_events_logs(
+            label, contract_event, start, end, filter, initial_range, max_range, target_logs, retries, delay
+        )
+
+    return get_logs_cached(contract_event, from_block, to_block, filter, fetch)
+
+
+def fetch_multi_events_logs_in_range(
+    label: str,
+    wb3: Web3,
+    addresses: List[ChecksumAddress],
+    contract_events: list,
+    from_block: int,
+    to_block: int | str = "latest",
+    initial_range: int = 2000,
+    max_range: int = 500_000,
+    target_logs: int = 2000,
+    retries: int = 3,
+    delay: int = 2,
+) -> Iterator[EventData]:
+    """Yield the logs of several events emitted by any of `addresses`, each decoded with the
+    event matching its topic0.
+
+    Same as fetch_events_logs_in_range, but every request is a single eth_getLogs with an
+    address list and a topic0 OR filter. Events sharing a signature across addresses (e.g.
+    ERC20 Transfer) only need to be passed once. Logs are cached under the address list and
+    topics, so a query for another set of addresses is fetched again.
+    """
+    if not addresses or not contract_events:
+        return iter([])
+    if not isinstance(to_block, int):
+        to_block = wb3.eth.get_block_number()
+    events_by_topic = {HexBytes(event.topic): event for event in contract_events}
+    topics = [HexStr(event.topic) for event in contract_events]
+    range_key = (
+        get_endpoint(wb3),
+        ",".join(sorted(str(address) for address in addresses)),
+        ",".join(sorted(topics)),
+    )
+
+    def get_logs(start: int, end: int) -> List[EventData]:
+        params: FilterParams = {
+            "fromBlock": start,
+            "toBlock": end,
+            "address": addresses,
+            "topics": [topics],
+        }
+        return [
+            events_by_topic[HexBytes(log["topics"][0])].process_log(log)
+            for log in wb3.eth.get_logs(params)
+            if log["topics"] and HexBytes(log["topics"][0]) in events_by_topic
+        ]
+
+    def fetch(start: int, end: int) -> Iterator[EventData]:
+        return scan_logs(
+            label, get_logs, range_key, start, end, initial_range, max_range, target_logs, retries, delay
+        )
+
+    return get_logs_cached_by_key(
+        wb3,
+        lambda: get_multi_events_cache_key(wb3, addresses, topics),
+        from_block,
+        to_block,
+        fetch,
+    )
+
+
+def scan_events_logs(
+    label: str,
+    contract_event,
+    from_block: int,
+    to_block: int,
+    # pylint: disable=redefined-builtin
+    filter: dict | None,
+    initial_range: int,
+    max_range: int,
+    target_logs: int,
+    retries: int,
+    delay: int,
+) -> Iterator[EventData]:
+    """Adaptive eth_getLogs scan behind fetch_events_logs_in_range, always hits the node."""
+    range_key = (
+        get_endpoint(contract_event.w3),
+        str(contract_event.address),
+        contract_event.event_name,
+    )
+
+    def get_logs(start: int, end: int) -> List[EventData]:
+        if filter is None:
+            return contract_event.get_logs(from_block=start, to_block=end)
+        return contract_event.get_logs(from_block=start, to_block=end, argument_filters=filter)
+
+    return scan_logs(
+        label, get_logs, range_key, from_block, to_block, initial_range, max_range, target_logs, retries, delay
+    )
+
+
+class LogRange:
+    """Adaptive eth_getLogs block range of one scan, seeded from and saved to LOG_RANGE_BY_EVENT.
+
+    The range doubles while responses stay under half of `target_logs`, is halved when they
+    go over it, and is halved and capped for the rest of the scan when the provider rejects
+    a request as too large.
+    """
+
+    def __init__(self, range_key: Tuple[str, str, str], initial_range: int, max_range: int, target_logs: int):
+        self.range_key = range_key
+        self.max_range = max_range
+        self.target_logs = target_logs
+        self.size = max(1, min(LOG_RANGE_BY_EVENT.get(range_key, initial_range), max_range))
+
+    def rejected(self, start: int, end: int, e: Exception) -> bool:
+        """Shrink the range after `e` failed [start, end], False when `e` should be retried as is."""
+        if self.size <= 1 or not is_log_range_error(e):
+            return False
+        # never grow back past a range the provider rejected during this scan
+        self.size = max(1, (end - start + 1) // 2)
+        self.max_range = self.size
+        return True
+
+    def accepted(self, log_count: int):
+        LOG_RANGE_BY_EVENT[self.range_key] = self.size
+        if log_count < self.target_logs // 2:
+            self.size = min(self.size * 2, self.max_range)
+        elif log_count > self.target_logs:
+            self.size = max(1, self.size // 2)
 
+
+def scan_logs(
+    label: str,
+    get_logs: Callable[[int, int], List[EventData]],
+    range_key: Tuple[str, str, str],
+    from_block: int,
+    to_block: int,
+    initial_range: int,
+    max_range: int,
+    target_logs: int,
+    retries: int,
+    delay: int,
+) -> Iterator[EventData]:
+    """Call `get_logs(start, end)` over [from_block, to_block], growing the block range while
+    responses are small and halving it when the provider rejects one as too large."""
+    block_range = LogRange(range_key, initial_range, max_range, target_logs)
+
+    start = from_block
+    attempt = 0
+    while start <= to_block:
+        end = min(start + block_range.size - 1, to_block)
+        try:
+            logs = get_logs(start, end)
         except Exception as e:
+            if block_range.rejected(start, end, e):
+                continue
             if attempt < retries - 1:
+                attempt += 1
                 time.sleep(delay)
                 continue
-            else:
-                msg = f"Error getting events logs for {label}: {e}, {traceback.format_exc()}"
-                logging.error(msg)
-                slack_message(msg)
-                raise e
-    return {}
+            msg = f"Error getting events logs for {label}: {e}, {traceback.format_exc()}"
+            logging.error(msg)
+            slack_message(msg)
+            raise e
+
+        attempt = 0
+        block_range.accepted(len(logs))
+        yield from logs
+        start = end + 1
 
 
 def call_with_retry(contract_function, block="latest", retries=3, delay=2):
@@ -205,16 +482,75 @@ def call_with_retry(contract_function, block="latest", retries=3, delay=2):
                 raise e
 
 
+OutputDecoder = Callable[[bytes], Tuple]
+# uint, uint8 ... uint256, but not arrays such as uint256[4] or uint256[]
+SCALAR_UINT_TYPE = re.compile(f"uint({'|'.join(str(bits) for bits in range(8, 257, 8))})?")
+
+# Compiled return-data decoders, shared by every function with the same output types
+DECODER_BY_OUTPUT_TYPES: Dict[Tuple[str, ...], OutputDecoder] = {}
+# (contract address, function name) -> decoder, so the ABI is only searched once per function
+DECODER_BY_FUNCTION: Dict[Tuple[ChecksumAddress, str], OutputDecoder] = {}
+
+
+def compile_output_decoder(output_types: Tuple[str, ...]) -> OutputDecoder:
+    """Build a decoder for the return data of a function with the given output types.
+
+    Scalar unsigned integers (balanceOf, totalSupply, getReserves, ...) are decoded straight
+    from their 32-byte words, anything else (arrays included), or any malformed data, goes
+    through eth_abi.
+    """
+    tuple_decoder = abi_registry.get_tuple_decoder(*output_types)
+
+    def decode_abi(data: bytes) -> Tuple:
+        return tuple_decoder(ContextFramesBytesIO(data))
+
+    if not output_types or not all(SCALAR_UINT_TYPE.fullmatch(t) for t in output_types):
+        return decode_abi
+
+    bounds = [1 << int(t[4:] or 256) for t in output_types]
+    size = 32 * len(output_types)
+
+    def decode_uints(data: bytes) -> Tuple:
+        if len(data) != size:
+            return decode_abi(data)
+        values = tuple(
+            int.from_bytes(data[i : i + 32], "big") for i in range(0, size, 32)
+        )
+        if any(value >= bound for value, bound in zip(values, bounds)):
+            return decode_abi(data)
+        return values
+
+    return decode_uints
+
+
+def get_output_decoder(contract, fn_name: str) -> OutputDecoder:
+    """Cached return-data decoder of `contract.fn_name`."""
+    key = (contract.address, fn_name)
+    if key not in DECODER_BY_FUNCTION:
+        function = contract.get_function_by_name(fn_name)
+        output_types = tuple(get_abi_output_types(function.abi))
+        if output_types not in DECODER_BY_OUTPUT_TYPES:
+            DECODER_BY_OUTPUT_TYPES[output_types] = compile_output_decoder(output_types)
+        DECODER_BY_FUNCTION[key] = DECODER_BY_OUTPUT_TYPES[output_types]
+    return DECODER_BY_FUNCTION[key]
+
+
+@lru_cache(maxsize=64)
+def get_multicall_contract(wb3: Web3, multicall_address: str) -> Contract:
+    """Multicall3 contract of a provider, built once rather than on every multicall."""
+    return wb3.eth.contract(
+        address=Web3.to_checksum_address(multicall_address), abi=MULTICALL_ABI
+    )
+
+
 # pylint: disable=redefined-outer-name
 def multicall(w3: Web3, calls: list, block_identifier: BlockIdentifier = "latest"):
-    multicall_contract = w3.eth.contract(
-        address=Web3.to_checksum_address(MULTICALL_ADDRESS), abi=MULTICALL_ABI
-    )
+    multicall_contract = get_multicall_contract(w3, MULTICALL_ADDRESS)
 
     aggregate_calls = []
     for call in calls:
         contract, fn_name, args = call
-        call_data = contract.encode_abi(fn_name=fn_name, args=args)
+        call_data = contract.encode_abi(fn_name, args=args)
         aggregate_calls.append((contract.address, call_data))
 
     result = multicall_contract.functions.aggregate(aggregate_calls).call(
@@ -224,13 +560,37 @@ def multicall(w3: Web3, calls: list, block_identifier: BlockIdentifier = "latest
     decoded_results = []
     for i, call in enumerate(calls):
         contract, fn_name, _ = call
-        function = contract.get_function_by_name(fn_name)
-        output_types = [output["type"] for output in function.abi["outputs"]]
-        decoded_results.append(decode(output_types, result[1][i]))
+        decoded_results.append(get_output_decoder(contract, fn_name)(result[1][i]))
 
     return decoded_results
 
 
+def encode_multicall_calls(
+    calls: list, allow_failure: bool = False
+) -> List[Tuple[ChecksumAddress, bool, str]]:
+    """Encode (contract, fn_name, args) calls as Multicall3 aggregate3 Call3 structs."""
+    aggregate_calls: List[Tuple[ChecksumAddress, bool, str]] = []
+    for call in calls:
+        contract, fn_name, args = call
+        call_data = contract.encode_abi(fn_name, args=args)
+
+        aggregate_calls.append((contract.address, allow_failure, call_data))
+    return aggregate_calls
+
+
+def decode_multicall_results(
+    calls: list, result: list, allow_failure: bool = False
+) -> List[Union[Tuple, None]]:
+    """Decode aggregate3 (success, returnData) results of `calls`, None for failed calls."""
+    decoded_results: List[Union[Tuple, None]] = []
+    for (contract, fn_name, _), (success, return_data) in zip(calls, result):
+        if allow_failure and not success:
+            decoded_results.append(None)
+        else:
+            decoded_results.append(get_output_decoder(contract, fn_name)(return_data))
+    return decoded_results
+
+
 def multicall_by_address(
     wb3: Web3,
     multical_address: str,
@@ -239,18 +599,9 @@ def multicall_by_address(
     allow_failure: bool = False,
     batch_size: int = 1024,
 ):
-    multicall_contract = wb3.eth.contract(
-        address=Web3.to_checksum_address(multical_address), abi=MULTICALL_ABI
-    )
-
-    aggregate_calls: List[
-        Union[Tuple[ChecksumAddress, bool, str], Tuple[ChecksumAddress, str]]
-    ] = []
-    for call in calls:
-        contract, fn_name, args = call
-        call_data = contract.encode_abi(fn_name, args=args)
+    multicall_contract = get_multicall_contract(wb3, multical_address)
 
-        aggregate_calls.append((contract.address, allow_failure, call_data))
+    aggregate_calls = encode_multicall_calls(calls, allow_failure)
 
     result = []
     for i in range(0, len(aggregate_calls), batch_size):
@@ -278,34 +629,250 @@ def multicall_by_address(
                 )
             )
 
-    decoded_results: List[Union[Tuple, None]] = []
-    for i, call in enumerate(calls):
-        contract, fn_name, _ = call
-        function = contract.get_function_by_name(fn_name)
-        output_types = [output["type"] for output in function.abi["outputs"]]
-        if allow_failure:
-            success = result[i][0]
-            if success:
-                decoded_output = decode(output_types, result[i][1])
-                decoded_results.append(decoded_output)
-            else:
-                decoded_results.append(None)
+    return decode_multicall_results(calls, result, allow_failure)
+
+
+def multicall_by_address_at_blocks(
+    wb3: Web3,
+    multical_address: str,
+    calls: list,
+    block_identifiers: List[BlockIdentifier],
+    allow_failure: bool = False,
+    batch_size: int = 1024,
+    rpc_batch_size: int = 20,
+    retries: int = 3,
+    delay: int = 2,
+) -> Dict[BlockIdentifier, List[Union[Tuple, None]]]:
+    """Run the same multicall at many blocks, packing the eth_calls of all blocks into
+    JSON-RPC batch requests of `rpc_batch_size` calls. Results are keyed by block.
+
+    Falls back to one eth_call per block when the provider rejects the batch.
+    """
+    return multicall_by_address_per_block(
+        wb3,
+        multical_address,
+        {block: calls for block in block_identifiers},
+        allow_failure,
+        batch_size,
+        rpc_batch_size,
+        retries,
+        delay,
+    )
+
+
+def multicall_by_address_per_block(
+    wb3: Web3,
+    multical_address: str,
+    calls_by_block: Dict[BlockIdentifier, list],
+    allow_failure: bool = False,
+    batch_size: int = 1024,
+    rpc_batch_size: int = 20,
+    retries: int = 3,
+    delay: int = 2,
+) -> Dict[BlockIdentifier, List[Union[Tuple, None]]]:
+    """Run a different multicall at each block, see multicall_by_address_at_blocks."""
+    multicall_contract = get_multicall_contract(wb3, multical_address)
+    batches_by_block: Dict[BlockIdentifier, list] = {}
+    call_datas: Dict[Tuple[BlockIdentifier, int], str] = {}
+    encoded_by_calls: Dict[int, Tuple[list, List[str]]] = {}
+    for block, calls in calls_by_block.items():
+        # a call list shared by many blocks is only encoded once
+        if id(calls) not in encoded_by_calls:
+            aggregate_calls = encode_multicall_calls(calls, allow_failure)
+            batches = [
+                aggregate_calls[i : i + batch_size]
+                for i in range(0, len(aggregate_calls), batch_size)
+            ]
+            encoded_by_calls[id(calls)] = (
+                batches,
+                [multicall_contract.encode_abi("aggregate3", args=[batch]) for batch in batches],
+            )
+        batches_by_block[block], datas = encoded_by_calls[id(calls)]
+        for batch_index, data in enumerate(datas):
+            call_datas[(block, batch_index)] = data
+
+    requests_info = list(call_datas)
+    result_by_request: Dict[Tuple[BlockIdentifier, int], list] = {}
+    for i in range(0, len(requests_info), rpc_batch_size):
+        group = requests_info[i : i + rpc_batch_size]
+        responses = None
+        for attempt in range(retries):
+            try:
+                with wb3.batch_requests() as rpc_batch:
+                    for block, batch_index in group:
+                        rpc_batch.add(
+                            wb3.eth.call(
+                                {"to": multicall_contract.address, "data": call_datas[(block, batch_index)]},
+                                block,
+                            )
+                        )
+                    responses = rpc_batch.execute()
+                break
+            except Exception as e:
+                if attempt < retries - 1:
+                    time.sleep(delay)
+                    continue
+                logging.warning(f"JSON-RPC batch failed, falling back to single calls: {e}")
+
+        for j, (block, batch_index) in enumerate(group):
+            batch = batches_by_block[block][batch_index]
+            if responses is not None:
+                result_by_request[(block, batch_index)] = decode(
+                    ["(bool,bytes)[]"], responses[j]
+                )[0]
+                continue
+            try:
+                result_by_request[(block, batch_index)] = call_with_retry(
+                    multicall_contract.functions.aggregate3(batch),
+                    block=block,
+                )
+            except Exception as e:
+                if not allow_failure:
+                    raise e
+                print(
+                    f"Multicall batch failed, returning None for {len(batch)} calls: {e}"
+                )
+                result_by_request[(block, batch_index)] = [(False, b"")] * len(batch)
+
+    decoded_by_block: Dict[BlockIdentifier, List[Union[Tuple, None]]] = {}
+    for block, calls in calls_by_block.items():
+        result = [
+            item
+            for batch_index in range(len(batches_by_block[block]))
+            for item in result_by_request[(block, batch_index)]
+        ]
+        decoded_by_block[block] = decode_multicall_results(calls, result, allow_failure)
+    return decoded_by_block
+
+
+# Known block timestamps per chain id, shared by every Chain that resolves to the same node
+BLOCK_TIMESTAMPS_BY_CHAIN_ID: Dict[int, Dict[int, int]] = {}
+# Sorted blocks of BLOCK_TIMESTAMPS_BY_CHAIN_ID, searched for timestamp -> block lookups
+BLOCK_INDEX_BY_CHAIN_ID: Dict[int, List[int]] = {}
+BLOCK_TIMESTAMPS_LOCK = threading.Lock()
+# Block headers requested per JSON-RPC batch
+BLOCK_HEADER_BATCH_SIZE = 50
+
+
+def remember_block_timestamps(chain_id: int, timestamps: Dict[int, int]):
+    with BLOCK_TIMESTAMPS_LOCK:
+        known = BLOCK_TIMESTAMPS_BY_CHAIN_ID.setdefault(chain_id, {})
+        index = BLOCK_INDEX_BY_CHAIN_ID.setdefault(chain_id, [])
+        for block, timestamp in timestamps.items():
+            if block not in known:
+                insort(index, block)
+            known[block] = timestamp
+
+
+def load_block_timestamps(wb3: Web3) -> int:
+    """Chain id of `wb3`, with the timestamps persisted by previous runs loaded in memory."""
+    chain_id = get_chain_id(wb3)
+    if chain_id not in BLOCK_TIMESTAMPS_BY_CHAIN_ID:
+        cache = get_log_cache()
+        stored = cache.get_block_timestamps(chain_id) if cache is not None else []
+        remember_block_timestamps(chain_id, dict(stored))
+    return chain_id
+
+
+def fetch_block_timestamps(wb3: Web3, blocks: List[int]) -> Dict[int, int]:
+    """Timestamps of `blocks` from the node, headers are requested in JSON-RPC batches."""
+    timestamps: Dict[int, int] = {}
+    for i in range(0, len(blocks), BLOCK_HEADER_BATCH_SIZE):
+        chunk = blocks[i : i + BLOCK_HEADER_BATCH_SIZE]
+        try:
+            with wb3.batch_requests() as batch:
+                for block in chunk:
+                    batch.add(wb3.eth.get_block(block))
+                headers = batch.execute()
+        except Exception as e:
+            logging.warning(f"JSON-RPC batch failed, fetching block headers one by one: {e}")
+            headers = [wb3.eth.get_block(block) for block in chunk]
+        for block, header in zip(chunk, headers):
+            timestamps[block] = header["timestamp"]
+    return timestamps
+
+
+def get_block_timestamps(chain: Chain, blocks: Iterable[int]) -> Dict[int, int]:
+    """Timestamps of many blocks of `chain`, fetching only the ones never seen before.
+
+    Finalized blocks are persisted in the local cache (see utils/log_cache.py), so the same
+    hourly blocks are resolved once across integrations and runs.
+    Chains without an EVM node in W3_BY_CHAIN (TON, Solana) resolve through Ethereum.
+    """
+    wb3 = W3_BY_CHAIN[chain]["w3"]
+    blocks = list(blocks)
+    chain_id = load_block_timestamps(wb3)
+    known = BLOCK_TIMESTAMPS_BY_CHAIN_ID[chain_id]
+
+    missing = sorted({block for block in blocks if block not in known})
+    if missing:
+        fetched = fetch_block_timestamps(wb3, missing)
+        remember_block_timestamps(chain_id, fetched)
+        cache = get_log_cache()
+        if cache is not None:
+            finalized = get_head_block(wb3) - LOG_CACHE_CONFIRMATIONS
+            cache.store_block_timestamps(
+                chain_id, {block: ts for block, ts in fetched.items() if block <= finalized}
+            )
+    return {block: known[block] for block in blocks}
+
+
+def get_block_timestamp(chain: Chain, block: int) -> int:
+    return get_block_timestamps(chain, [block])[block]
+
+
+def get_block_at_timestamp(chain: Chain, timestamp: int) -> int:
+    """Last block of `chain` mined at or before `timestamp`.
+
+    Starts from the closest known blocks around the timestamp, then narrows the range by
+    interpolating on block times, falling back to bisection when that does not halve it.
+    """
+    wb3 = W3_BY_CHAIN[chain]["w3"]
+    chain_id = load_block_timestamps(wb3)
+    head = get_head_block(wb3)
+    head_timestamp = get_block_timestamp(chain, head)
+    if timestamp >= head_timestamp:
+        return head
+
+    with BLOCK_TIMESTAMPS_LOCK:
+        known = BLOCK_TIMESTAMPS_BY_CHAIN_ID[chain_id]
+        index = [block for block in BLOCK_INDEX_BY_CHAIN_ID[chain_id] if block <= head]
+        timestamps = [known[block] for block in index]
+    # invariant: timestamp(low) <= timestamp < timestamp(high)
+    position = bisect_right(timestamps, timestamp)
+    low = index[position - 1] if position > 0 else 0
+    high = index[position] if position < len(index) else head
+    low_timestamp = get_block_timestamp(chain, low)
+    high_timestamp = get_block_timestamp(chain, high)
+    if timestamp < low_timestamp:
+        raise ValueError(f"Timestamp {timestamp} is before the first block of {chain.value}")
+
+    interpolate = True
+    while high - low > 1:
+        if interpolate and high_timestamp > low_timestamp:
+            guess = low + (timestamp - low_timestamp) * (high - low) // (high_timestamp - low_timestamp)
         else:
-            decoded_output = decode(output_types, result[i][1])
-            decoded_results.append(decoded_output)
+            guess = (low + high) // 2
+        guess = min(max(guess, low + 1), high - 1)
+        previous_range = high - low
 
-    return decoded_results
+        guess_timestamp = get_block_timestamp(chain, guess)
+        if guess_timestamp <= timestamp:
+            low, low_timestamp = guess, guess_timestamp
+        else:
+            high, high_timestamp = guess, guess_timestamp
+        interpolate = high - low <= previous_range // 2
+    return low
 
 
 def get_block_date(
     block: int, chain: Chain, adjustment: int = 0, fmt: str = "%Y-%m-%d %H"
 ) -> str:
-    wb3 = W3_BY_CHAIN[chain]["w3"]
-    block_info = wb3.eth.get_block(block)
+    block_timestamp = get_block_timestamp(chain, block)
     timestamp = (
-        block_info["timestamp"]
+        block_timestamp
         if adjustment == 0
-        else block_info["timestamp"] - adjustment
+        else block_timestamp - adjustment
     )
     timestamp_date = datetime.fromtimestamp(timestamp).strftime(fmt)
     return timestamp_date